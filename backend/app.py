@@ -27,8 +27,11 @@ from config.settings import BackendConfig, SystemPrompts
 # Importar configuração do Swagger
 from swagger_config import setup_swagger, SWAGGER_TEMPLATE, COMMON_SCHEMAS
 
-from services.gemma_service import GemmaService
+from services.gemma_registry import GemmaServiceRegistry
+from services.generation_scheduler import register_admission_handlers
+from services.request_deadline import register_deadline_handlers
 from services.health_service import HealthService
+from services.resource_monitor import get_resource_monitor
 from services.demo_service import DemoService
 from utils.logger import setup_logger
 from utils.error_handler import setup_error_handlers
@@ -58,7 +61,7 @@ def create_app():
         r"/*": {
             "origins": ["*"],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "allow_headers": ["Content-Type", "Authorization", "X-Cache-Bypass", "X-Request-Deadline"]
         }
     })
     
@@ -69,9 +72,16 @@ def create_app():
     # Configurar tratamento de erros
     setup_error_handlers(app)
     
+    # Rejeições do agendador de geração viram HTTP 503 com Retry-After
+    register_admission_handlers(app)
+    register_deadline_handlers(app)
+    
     # Verificar modo demonstração
     demo_mode = os.getenv('DEMO_MODE', 'false').lower() == 'true'
     
+    # Registro de instâncias do GemmaService compartilhado pelos blueprints
+    app.gemma_registry = GemmaServiceRegistry()
+    
     # Inicializar serviços
     try:
         logger.info("Inicializando serviços...")
@@ -82,15 +92,28 @@ def create_app():
             demo_service = DemoService()
             app.demo_service = demo_service
             app.gemma_service = None  # Não usar Gemma em modo demo
+            app.model_warmup = None
         else:
             logger.info("🤖 Modo produção - usando GemmaService")
-            # Inicializar serviço Gemma
-            gemma_service = GemmaService()
+            # Inicializar serviço Gemma (instância padrão do registro)
+            gemma_service = app.gemma_registry.get()
             app.gemma_service = gemma_service
             app.demo_service = None
+            
+            # Aquecer modelos de emergência/saúde em segundo plano (não bloqueia a inicialização)
+            app.model_warmup = None
+            if BackendConfig.USE_OLLAMA and BackendConfig.MODEL_WARMUP_ENABLED:
+                app.model_warmup = gemma_service.warmup
+                app.model_warmup.start()
+        
+        # Amostragem de recursos em segundo plano (lida por /api/health e pelos seletores)
+        app.resource_monitor = get_resource_monitor()
         
         # Inicializar serviço de saúde
-        health_service = HealthService(app.gemma_service if not demo_mode else None)
+        health_service = HealthService(
+            app.gemma_service if not demo_mode else None,
+            resource_monitor=app.resource_monitor
+        )
         app.health_service = health_service
         
         logger.info("Serviços inicializados com sucesso")
@@ -101,6 +124,7 @@ def create_app():
         app.gemma_service = None
         app.health_service = None
         app.demo_service = None
+        app.model_warmup = None
     
     # Configurar Swagger
     swagger = setup_swagger(app)
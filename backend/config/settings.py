@@ -226,8 +226,128 @@ class BackendConfig:
     # Configurações específicas do Ollama - Aumentadas para análises detalhadas
     OLLAMA_TIMEOUT = 300  # Aumentado de 120 para 300 segundos
     OLLAMA_STREAM = True
-    OLLAMA_KEEP_ALIVE = "10m"  # Aumentado de 5m para 10m
-    
+    OLLAMA_KEEP_ALIVE = os.getenv('OLLAMA_KEEP_ALIVE', '10m')  # Aumentado de 5m para 10m
+
+    # Pool de conexões HTTP com o Ollama (keep-alive compartilhado)
+    WORKER_THREADS = int(os.getenv('WORKER_THREADS', '8'))
+    OLLAMA_POOL_SIZE = int(os.getenv('OLLAMA_POOL_SIZE', str(WORKER_THREADS)))
+    OLLAMA_CONNECT_TIMEOUT = float(os.getenv('OLLAMA_CONNECT_TIMEOUT', '3.05'))
+    OLLAMA_PROBE_TIMEOUT = float(os.getenv('OLLAMA_PROBE_TIMEOUT', '5'))
+    OLLAMA_PROBE_RETRIES = int(os.getenv('OLLAMA_PROBE_RETRIES', '2'))
+    OLLAMA_RETRY_BACKOFF = float(os.getenv('OLLAMA_RETRY_BACKOFF', '0.25'))
+
+    # Inventário de modelos do Ollama (atualizado em segundo plano)
+    OLLAMA_INVENTORY_TTL = float(os.getenv('OLLAMA_INVENTORY_TTL', '30'))
+    OLLAMA_PULL_TIMEOUT = float(os.getenv('OLLAMA_PULL_TIMEOUT', '1800'))
+
+    # Aquecimento dos modelos críticos (re-aquecer antes do keep_alive expirar)
+    MODEL_WARMUP_ENABLED = os.getenv('MODEL_WARMUP_ENABLED', 'true').lower() == 'true'
+    MODEL_WARMUP_INTERVAL = float(os.getenv('MODEL_WARMUP_INTERVAL', '240'))
+    MODEL_WARMUP_TIMEOUT = float(os.getenv('MODEL_WARMUP_TIMEOUT', '600'))
+
+    # Circuit breaker do Ollama (por backend e por modelo)
+    CIRCUIT_FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', '0.5'))
+    CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', '90'))
+    CIRCUIT_SLOW_CALL_RATE = float(os.getenv('CIRCUIT_SLOW_CALL_RATE', '0.8'))
+    CIRCUIT_WINDOW_SIZE = int(os.getenv('CIRCUIT_WINDOW_SIZE', '20'))
+    CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', '4'))
+    CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', '30'))
+    CIRCUIT_HALF_OPEN_CALLS = int(os.getenv('CIRCUIT_HALF_OPEN_CALLS', '1'))
+
+    # Amostragem de recursos em segundo plano (seletores e /api/health leem o snapshot)
+    RESOURCE_SAMPLE_INTERVAL = float(os.getenv('RESOURCE_SAMPLE_INTERVAL', '5'))
+    RESOURCE_AVERAGE_WINDOW = int(os.getenv('RESOURCE_AVERAGE_WINDOW', '12'))  # 12 x 5s = 1 min
+
+    # Classificador de contexto/criticidade do seletor (artefato treinado offline)
+    ROUTING_CLASSIFIER_ENABLED = os.getenv('ROUTING_CLASSIFIER_ENABLED', 'true').lower() == 'true'
+    ROUTING_CLASSIFIER_PATH = os.getenv('ROUTING_CLASSIFIER_PATH', './models/routing_classifier.npz')
+    # Abaixo desta confiança (calibrada) o seletor usa as palavras-chave
+    ROUTING_CLASSIFIER_THRESHOLD = float(os.getenv('ROUTING_CLASSIFIER_THRESHOLD', '0.6'))
+
+    # Geração em cascata: rascunho no modelo menor, escalonamento só se reprovado
+    CASCADE_ENABLED = os.getenv('CASCADE_ENABLED', 'true').lower() == 'true'
+    CASCADE_DRAFT_MODEL = os.getenv('CASCADE_DRAFT_MODEL', 'gemma3n:e2b')
+    CASCADE_LARGE_MODELS = tuple(
+        m.strip() for m in os.getenv('CASCADE_LARGE_MODELS', 'gemma3n:e4b,gemma3n:latest').split(',') if m.strip()
+    )
+    CASCADE_MIN_CHARS = int(os.getenv('CASCADE_MIN_CHARS', '80'))
+
+    # Seleção por latência medida (tokens/s por modelo) dentro do prazo do endpoint
+    LATENCY_AWARE_SELECTION = os.getenv('LATENCY_AWARE_SELECTION', 'true').lower() == 'true'
+    # Fração do tempo restante da requisição usada como orçamento de latência
+    LATENCY_BUDGET_HEADROOM = float(os.getenv('LATENCY_BUDGET_HEADROOM', '0.8'))
+
+    # Saída estruturada: esquema JSON de cada funcionalidade no ``format`` do Ollama (>= 0.5)
+    STRUCTURED_OUTPUT = os.getenv('STRUCTURED_OUTPUT', 'true').lower() == 'true'
+
+    # Prazo por requisição (cabeçalho em segundos ou padrão do endpoint)
+    REQUEST_DEADLINE_HEADER = 'X-Request-Deadline'
+    REQUEST_DEFAULT_DEADLINE = float(os.getenv('REQUEST_DEFAULT_DEADLINE', '300'))
+    REQUEST_MAX_DEADLINE = float(os.getenv('REQUEST_MAX_DEADLINE', '600'))
+    # Padrões por endpoint Flask (blueprint.função); podem passar de REQUEST_MAX_DEADLINE
+    REQUEST_DEADLINES = {
+        # Download de modelo (vários GB): o prazo é o do próprio pull
+        'model_management.pull_ollama_model': OLLAMA_PULL_TIMEOUT,
+        'medical.emergency_guidance': float(os.getenv('REQUEST_DEADLINE_MEDICAL_EMERGENCY', '60')),
+        'medical.first_aid_guide': float(os.getenv('REQUEST_DEADLINE_FIRST_AID', '60')),
+        'voice_guide.emergency_voice_assistance': float(os.getenv('REQUEST_DEADLINE_VOICE_EMERGENCY', '60')),
+        'medical.medical_consultation': float(os.getenv('REQUEST_DEADLINE_MEDICAL', '120')),
+        'multimodal.analyze_multimodal_content': float(os.getenv('REQUEST_DEADLINE_MULTIMODAL', '240')),
+        'translation.translate_multimodal': float(os.getenv('REQUEST_DEADLINE_TRANSLATE_MULTIMODAL', '240'))
+    }
+
+    # Prazo (hedging) dos endpoints de emergência: após o prazo, protocolo determinístico
+    HEDGE_DEFAULT_DEADLINE = float(os.getenv('HEDGE_DEFAULT_DEADLINE', '8'))
+    HEDGE_DEADLINES = {
+        'medical_emergency': float(os.getenv('HEDGE_DEADLINE_MEDICAL_EMERGENCY', '8')),
+        'medical_first_aid': float(os.getenv('HEDGE_DEADLINE_FIRST_AID', '5')),
+        'voice_guide_emergency': float(os.getenv('HEDGE_DEADLINE_VOICE_EMERGENCY', '4'))
+    }
+    HEDGE_MAX_WORKERS = int(os.getenv('HEDGE_MAX_WORKERS', '4'))
+    HEDGE_RESULT_TTL = float(os.getenv('HEDGE_RESULT_TTL', '300'))  # Respostas tardias disponíveis por 5 min
+    HEDGE_CLAIM_SECONDS = float(os.getenv('HEDGE_CLAIM_SECONDS', '60'))  # Sem consulta: cancelar
+
+    # Loop assíncrono compartilhado (métodos async do GemmaService)
+    ASYNC_EXECUTOR_WORKERS = int(os.getenv('ASYNC_EXECUTOR_WORKERS', '16'))
+
+    # Cache de respostas geradas (memória LRU + disco opcional)
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '2048'))
+    RESPONSE_CACHE_DISK_PATH = os.getenv('RESPONSE_CACHE_DISK_PATH', '')  # Vazio = sem camada em disco
+    RESPONSE_CACHE_BYPASS_HEADER = 'X-Cache-Bypass'
+    # TTL em segundos por domínio (0 = não armazenar)
+    RESPONSE_CACHE_TTLS = {
+        'general': int(os.getenv('RESPONSE_CACHE_TTL_GENERAL', '3600')),
+        'medical': int(os.getenv('RESPONSE_CACHE_TTL_MEDICAL', '3600')),
+        'emergency': int(os.getenv('RESPONSE_CACHE_TTL_EMERGENCY', '600')),
+        'education': int(os.getenv('RESPONSE_CACHE_TTL_EDUCATION', '86400')),
+        'agriculture': int(os.getenv('RESPONSE_CACHE_TTL_AGRICULTURE', '86400')),
+        'wellness': int(os.getenv('RESPONSE_CACHE_TTL_WELLNESS', '3600')),
+        'translation': int(os.getenv('RESPONSE_CACHE_TTL_TRANSLATION', '604800'))
+    }
+
+    # Coalescência de gerações idênticas em andamento (single-flight)
+    SINGLE_FLIGHT_ENABLED = os.getenv('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+    SINGLE_FLIGHT_ERROR_POLICY = os.getenv('SINGLE_FLIGHT_ERROR_POLICY', 'propagate')  # propagate | retry
+
+    # Agendador de admissão por criticidade (fila de prioridade na frente do modelo)
+    GENERATION_MAX_CONCURRENCY = int(os.getenv('GENERATION_MAX_CONCURRENCY', '1'))
+    GENERATION_MAX_QUEUE = int(os.getenv('GENERATION_MAX_QUEUE', '32'))
+    GENERATION_AGING_SECONDS = float(os.getenv('GENERATION_AGING_SECONDS', '15'))
+    # Espera máxima na fila (segundos) por nível de criticidade
+    GENERATION_MAX_WAIT = {
+        'critical': float(os.getenv('GENERATION_MAX_WAIT_CRITICAL', '120')),
+        'high': float(os.getenv('GENERATION_MAX_WAIT_HIGH', '90')),
+        'medium': float(os.getenv('GENERATION_MAX_WAIT_MEDIUM', '30')),
+        'low': float(os.getenv('GENERATION_MAX_WAIT_LOW', '10'))
+    }
+
+    # Contribuições colaborativas (arquivo SQLite compartilhado pelos workers)
+    CONTRIBUTIONS_DB_PATH = os.getenv('CONTRIBUTIONS_DB_PATH', './data/contributions.db')
+    CONTRIBUTIONS_BUSY_TIMEOUT = float(os.getenv('CONTRIBUTIONS_BUSY_TIMEOUT', '5'))  # segundos
+    CONTRIBUTIONS_PAGE_MAX = int(os.getenv('CONTRIBUTIONS_PAGE_MAX', '200'))
+
     @classmethod
     def get_device(cls):
         """Detectar dispositivo disponível"""
@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Repositório SQLite das contribuições colaborativas - Moransa
+Hackathon Gemma 3n
+
+As contribuições da comunidade ficavam numa lista em memória: cada voto,
+report, busca ou estatística percorria a lista inteira, tudo se perdia ao
+reiniciar e cada worker do gunicorn via uma lista diferente. Agora ficam
+num único arquivo SQLite compartilhado pelos workers:
+
+- WAL: leitores não bloqueiam o escritor e vice-versa;
+- uma conexão por thread (e por processo, depois de um fork), com as
+  instruções SQL fixas preparadas uma vez no cache da conexão;
+- escritas em ``BEGIN IMMEDIATE``: votos e reports são incrementos
+  atômicos no banco, sem ler-modificar-gravar em Python;
+- índices por id, status, par de idiomas e contribuidor, e paginação por
+  cursor (``seq`` da última linha entregue) em vez de ``OFFSET``.
+
+A tabela segue ``proposed_translations`` de ``validation_models.py``
+(``validation_status``, ``approve_votes``/``reject_votes``/``total_votes``,
+``proposed_by``, ``context_notes``, ``audio_url``, ``validated_at``); como
+a API colaborativa não tem frases nem usuários cadastrados, a palavra e o
+par de idiomas ficam na própria linha e o contribuidor é o id recebido.
+Os reports ficam em ``contribution_reports``.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config.settings import BackendConfig
+from database.contribution_search import (
+    NGRAM_CANDIDATES, NGRAM_MIN_SIMILARITY, PRIMARY_COLUMNS, install_search_index, install_search_triggers,
+    ngram_match, ngram_similarity, prefix_match, query_terms, search_text
+)
+
+logger = logging.getLogger(__name__)
+
+# Votos 'up' para aprovar e reports para rejeitar automaticamente
+APPROVE_THRESHOLD = 3
+REJECT_THRESHOLD = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contributions (
+    seq INTEGER PRIMARY KEY,                -- ordem de inserção (cursor da paginação)
+    id TEXT NOT NULL UNIQUE,
+    word TEXT NOT NULL,
+    word_key TEXT NOT NULL,                 -- palavra em minúsculas
+    translation TEXT NOT NULL,
+    source_language TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT 'geral',
+    context_notes TEXT NOT NULL DEFAULT '',
+    search_text TEXT NOT NULL DEFAULT '',   -- palavra, tradução e contexto dobrados (busca)
+    proposed_by TEXT NOT NULL DEFAULT 'anonymous',
+    audio_url TEXT,
+    image_url TEXT,
+    suggested_tags TEXT NOT NULL DEFAULT '[]',
+    validation_status TEXT NOT NULL DEFAULT 'pending',
+    approve_votes INTEGER NOT NULL DEFAULT 0,
+    reject_votes INTEGER NOT NULL DEFAULT 0,
+    total_votes INTEGER NOT NULL DEFAULT 0,
+    report_count INTEGER NOT NULL DEFAULT 0,
+    verified INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    validated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS contribution_reports (
+    id INTEGER PRIMARY KEY,
+    contribution_seq INTEGER NOT NULL REFERENCES contributions(seq) ON DELETE CASCADE,
+    reason TEXT NOT NULL,
+    reporter_id TEXT NOT NULL DEFAULT 'anonymous',
+    reported_at TEXT NOT NULL
+);
+
+-- Índices secundários terminam no rowid (seq): dentro de cada chave as
+-- linhas já estão na ordem do cursor
+CREATE INDEX IF NOT EXISTS idx_contributions_status ON contributions(validation_status);
+CREATE INDEX IF NOT EXISTS idx_contributions_status_category ON contributions(validation_status, category);
+CREATE INDEX IF NOT EXISTS idx_contributions_language_pair ON contributions(source_language, target_language, word_key);
+CREATE INDEX IF NOT EXISTS idx_contributions_target_language ON contributions(target_language, validation_status);
+CREATE INDEX IF NOT EXISTS idx_contributions_contributor ON contributions(proposed_by, validation_status);
+CREATE INDEX IF NOT EXISTS idx_contribution_reports_contribution ON contribution_reports(contribution_seq);
+
+-- Totais mantidos por gatilhos: contagens e estatísticas leem estas
+-- tabelas (uma linha por combinação, não por contribuição)
+CREATE TABLE IF NOT EXISTS contribution_totals (
+    source_language TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    category TEXT NOT NULL,
+    validation_status TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    with_audio INTEGER NOT NULL DEFAULT 0,
+    verified INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (source_language, target_language, category, validation_status)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS contributor_totals (
+    proposed_by TEXT NOT NULL,
+    validation_status TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (proposed_by, validation_status)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_contributor_totals_status ON contributor_totals(validation_status, total);
+
+-- Contribuições por contribuidor (qualquer status) e contadores globais
+CREATE TABLE IF NOT EXISTS contributors (
+    proposed_by TEXT PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS contribution_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Contribuidor ativo = pelo menos uma contribuição (anônimos não contam)
+CREATE TRIGGER IF NOT EXISTS trg_contributors_insert AFTER INSERT ON contributors
+WHEN NEW.proposed_by != 'anonymous' AND NEW.total > 0
+BEGIN
+    INSERT INTO contribution_counters VALUES ('active_contributors', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_contributors_update AFTER UPDATE OF total ON contributors
+WHEN NEW.proposed_by != 'anonymous' AND (OLD.total > 0) != (NEW.total > 0)
+BEGIN
+    INSERT INTO contribution_counters VALUES ('active_contributors', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + (CASE WHEN NEW.total > 0 THEN 1 ELSE -1 END);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_contributions_insert AFTER INSERT ON contributions BEGIN
+    INSERT INTO contribution_totals VALUES (
+        NEW.source_language, NEW.target_language, NEW.category, NEW.validation_status, 1,
+        NEW.audio_url IS NOT NULL AND NEW.audio_url != '', NEW.verified
+    ) ON CONFLICT (source_language, target_language, category, validation_status) DO UPDATE SET
+        total = total + 1, with_audio = with_audio + excluded.with_audio, verified = verified + excluded.verified;
+    INSERT INTO contributor_totals VALUES (NEW.proposed_by, NEW.validation_status, 1)
+        ON CONFLICT (proposed_by, validation_status) DO UPDATE SET total = total + 1;
+    INSERT INTO contributors VALUES (NEW.proposed_by, 1)
+        ON CONFLICT (proposed_by) DO UPDATE SET total = total + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_contributions_delete AFTER DELETE ON contributions BEGIN
+    UPDATE contribution_totals SET
+        total = total - 1,
+        with_audio = with_audio - (OLD.audio_url IS NOT NULL AND OLD.audio_url != ''),
+        verified = verified - OLD.verified
+    WHERE source_language = OLD.source_language AND target_language = OLD.target_language
+        AND category = OLD.category AND validation_status = OLD.validation_status;
+    UPDATE contributor_totals SET total = total - 1
+    WHERE proposed_by = OLD.proposed_by AND validation_status = OLD.validation_status;
+    UPDATE contributors SET total = total - 1 WHERE proposed_by = OLD.proposed_by;
+END;
+
+-- Votos sem mudança de status não tocam nos totais
+CREATE TRIGGER IF NOT EXISTS trg_contributions_update AFTER UPDATE ON contributions
+WHEN OLD.validation_status IS NOT NEW.validation_status OR OLD.category IS NOT NEW.category
+    OR OLD.source_language IS NOT NEW.source_language OR OLD.target_language IS NOT NEW.target_language
+    OR OLD.proposed_by IS NOT NEW.proposed_by OR OLD.verified IS NOT NEW.verified
+    OR OLD.audio_url IS NOT NEW.audio_url
+BEGIN
+    UPDATE contribution_totals SET
+        total = total - 1,
+        with_audio = with_audio - (OLD.audio_url IS NOT NULL AND OLD.audio_url != ''),
+        verified = verified - OLD.verified
+    WHERE source_language = OLD.source_language AND target_language = OLD.target_language
+        AND category = OLD.category AND validation_status = OLD.validation_status;
+    UPDATE contributor_totals SET total = total - 1
+    WHERE proposed_by = OLD.proposed_by AND validation_status = OLD.validation_status;
+    UPDATE contributors SET total = total - 1 WHERE proposed_by = OLD.proposed_by;
+    INSERT INTO contribution_totals VALUES (
+        NEW.source_language, NEW.target_language, NEW.category, NEW.validation_status, 1,
+        NEW.audio_url IS NOT NULL AND NEW.audio_url != '', NEW.verified
+    ) ON CONFLICT (source_language, target_language, category, validation_status) DO UPDATE SET
+        total = total + 1, with_audio = with_audio + excluded.with_audio, verified = verified + excluded.verified;
+    INSERT INTO contributor_totals VALUES (NEW.proposed_by, NEW.validation_status, 1)
+        ON CONFLICT (proposed_by, validation_status) DO UPDATE SET total = total + 1;
+    INSERT INTO contributors VALUES (NEW.proposed_by, 1)
+        ON CONFLICT (proposed_by) DO UPDATE SET total = total + 1;
+END;
+"""
+
+# Totais recalculados da tabela principal (banco anterior aos gatilhos)
+_REBUILD_TOTALS = """
+DELETE FROM contribution_totals;
+DELETE FROM contributor_totals;
+DELETE FROM contributors;
+DELETE FROM contribution_counters;
+INSERT INTO contribution_totals
+    SELECT source_language, target_language, category, validation_status, COUNT(*),
+           SUM(audio_url IS NOT NULL AND audio_url != ''), SUM(verified)
+    FROM contributions GROUP BY source_language, target_language, category, validation_status;
+INSERT INTO contributor_totals
+    SELECT proposed_by, validation_status, COUNT(*) FROM contributions GROUP BY proposed_by, validation_status;
+INSERT INTO contributors
+    SELECT proposed_by, COUNT(*) FROM contributions GROUP BY proposed_by;
+"""
+
+_COLUMNS = (
+    "seq, id, word, translation, source_language, target_language, category, context_notes, "
+    "proposed_by, audio_url, image_url, suggested_tags, validation_status, approve_votes, "
+    "reject_votes, report_count, verified, created_at"
+)
+
+_INSERT = (
+    "INSERT INTO contributions (id, word, word_key, translation, source_language, target_language, "
+    "category, context_notes, search_text, proposed_by, audio_url, image_url, validation_status, "
+    "verified, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_JOINED_COLUMNS = ', '.join(f"c.{column.strip()}" for column in _COLUMNS.split(','))
+
+_SELECT_BY_ID = f"SELECT {_COLUMNS} FROM contributions WHERE id = ?"
+
+_APPLY_ANALYSIS = (
+    "UPDATE contributions SET context_notes = ?, search_text = ?, suggested_tags = ?, "
+    "validation_status = CASE WHEN validation_status = 'pending' THEN ? ELSE validation_status END, "
+    "updated_at = ? WHERE id = ?"
+)
+
+# Uma instrução: o CASE lê os valores anteriores ao UPDATE
+_VOTE = """
+UPDATE contributions SET
+    approve_votes = approve_votes + :up,
+    reject_votes = reject_votes + :down,
+    total_votes = total_votes + 1,
+    validation_status = CASE WHEN validation_status = 'pending' AND approve_votes + :up >= :threshold
+                             THEN 'approved' ELSE validation_status END,
+    verified = CASE WHEN validation_status = 'pending' AND approve_votes + :up >= :threshold
+                    THEN 1 ELSE verified END,
+    validated_at = CASE WHEN validation_status = 'pending' AND approve_votes + :up >= :threshold
+                        THEN :now ELSE validated_at END,
+    updated_at = :now
+WHERE id = :id
+"""
+
+_SELECT_VOTES = "SELECT approve_votes, reject_votes, validation_status FROM contributions WHERE id = ?"
+
+_SELECT_SEQ = "SELECT seq FROM contributions WHERE id = ?"
+
+_INSERT_REPORT = (
+    "INSERT INTO contribution_reports (contribution_seq, reason, reporter_id, reported_at) VALUES (?, ?, ?, ?)"
+)
+
+_REPORT = """
+UPDATE contributions SET
+    report_count = report_count + 1,
+    validation_status = CASE WHEN report_count + 1 >= ? THEN 'rejected' ELSE validation_status END,
+    updated_at = ?
+WHERE seq = ?
+"""
+
+_STATUS_COUNTS = (
+    "SELECT validation_status, SUM(total) FROM contribution_totals "
+    "WHERE validation_status IN ('approved', 'pending') GROUP BY validation_status"
+)
+
+_ACTIVE_CONTRIBUTORS = "SELECT value FROM contribution_counters WHERE name = 'active_contributors'"
+
+_TOP_CONTRIBUTORS = (
+    "SELECT proposed_by, total FROM contributor_totals "
+    "WHERE validation_status = 'approved' AND total > 0 AND proposed_by != 'anonymous' "
+    "ORDER BY total DESC, proposed_by LIMIT ?"
+)
+
+_APPROVED_LANGUAGES = (
+    "SELECT source_language FROM contribution_totals WHERE validation_status = 'approved' AND total > 0 "
+    "UNION SELECT target_language FROM contribution_totals WHERE validation_status = 'approved' AND total > 0"
+)
+
+_APPROVED_CATEGORIES = (
+    "SELECT DISTINCT category FROM contribution_totals WHERE validation_status = 'approved' AND total > 0"
+)
+
+_LANGUAGE_PROGRESS = (
+    "SELECT category, SUM(total), SUM(with_audio), SUM(verified) FROM contribution_totals "
+    "WHERE (source_language = ? OR target_language = ?) AND validation_status = 'approved' "
+    "GROUP BY category HAVING SUM(total) > 0"
+)
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+class ContributionRepository:
+    """Contribuições da comunidade num arquivo SQLite compartilhado entre threads e workers"""
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        connection = self._connection()
+        # WAL é persistente no arquivo: basta ativar uma vez
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        self._check_totals(connection)
+        with self._transaction() as transaction:
+            if install_search_index(transaction):
+                logger.info("🔎 Índice de busca das contribuições criado")
+        install_search_triggers(connection)
+        logger.info(f"🗄️ Contribuições em SQLite: {path}")
+
+    def _check_totals(self, connection: sqlite3.Connection) -> None:
+        """Preencher os totais se o arquivo tem contribuições gravadas antes dos gatilhos"""
+        has_totals = connection.execute("SELECT 1 FROM contribution_totals LIMIT 1").fetchone()
+        has_rows = connection.execute("SELECT 1 FROM contributions LIMIT 1").fetchone()
+        if has_rows and not has_totals:
+            logger.info("🔄 Recalculando totais das contribuições")
+            with self._transaction() as transaction:
+                for statement in _REBUILD_TOTALS.split(';'):
+                    if statement.strip():
+                        transaction.execute(statement)
+
+    # ----- Conexões -----
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão desta thread; reaberta num processo filho depois de um fork"""
+        local = self._local
+        pid = os.getpid()
+        if getattr(local, 'pid', None) != pid:
+            # isolation_level=None: transações explícitas nas escritas
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            local.connection = connection
+            local.pid = pid
+        return local.connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Transação de escrita (``BEGIN IMMEDIATE``: o lock de escrita é pego no início)"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        """Fechar a conexão da thread atual"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and getattr(self._local, 'pid', None) == os.getpid():
+            connection.close()
+        self._local.__dict__.clear()
+
+    # ----- Escrita -----
+
+    def add(self, contribution: Dict[str, Any]) -> None:
+        """Gravar uma contribuição nova (dicionário no formato da API)"""
+        now = contribution.get('created_at') or _now()
+        context = contribution.get('context') or ''
+        with self._transaction() as connection:
+            connection.execute(_INSERT, (
+                contribution['id'],
+                contribution['word'],
+                contribution['word'].lower(),
+                contribution['translation'],
+                contribution['source_language'],
+                contribution['target_language'],
+                contribution.get('category') or 'geral',
+                context,
+                search_text(contribution['word'], contribution['translation'], context),
+                contribution.get('contributor_id') or 'anonymous',
+                contribution.get('audio_url'),
+                contribution.get('image_url'),
+                contribution.get('status', 'pending'),
+                int(bool(contribution.get('verified'))),
+                now,
+                now
+            ))
+
+    def apply_analysis(self, contribution: Dict[str, Any]) -> None:
+        """Gravar contexto, tags e status ajustados pela análise do Gemma
+
+        O status só muda se a contribuição ainda estiver pendente (votos
+        recebidos durante a análise prevalecem).
+        """
+        context = contribution.get('context') or ''
+        with self._transaction() as connection:
+            connection.execute(_APPLY_ANALYSIS, (
+                context,
+                search_text(contribution['word'], contribution['translation'], context),
+                json.dumps(contribution.get('suggested_tags') or [], ensure_ascii=False),
+                contribution['status'],
+                _now(),
+                contribution['id']
+            ))
+
+    def vote(self, contribution_id: str, vote_type: str) -> Optional[Dict[str, Any]]:
+        """Registrar um voto ('up' ou 'down'); None se a contribuição não existe
+
+        Com ``APPROVE_THRESHOLD`` votos 'up' uma contribuição pendente é
+        aprovada e marcada como verificada.
+        """
+        params = {
+            'up': int(vote_type == 'up'),
+            'down': int(vote_type == 'down'),
+            'threshold': APPROVE_THRESHOLD,
+            'now': _now(),
+            'id': contribution_id
+        }
+        with self._transaction() as connection:
+            if not connection.execute(_VOTE, params).rowcount:
+                return None
+            row = connection.execute(_SELECT_VOTES, (contribution_id,)).fetchone()
+        return {'votes': {'up': row[0], 'down': row[1]}, 'status': row[2]}
+
+    def report(self, contribution_id: str, reason: str, reporter_id: str = 'anonymous') -> bool:
+        """Registrar um report; com ``REJECT_THRESHOLD`` reports a contribuição é rejeitada"""
+        with self._transaction() as connection:
+            row = connection.execute(_SELECT_SEQ, (contribution_id,)).fetchone()
+            if row is None:
+                return False
+            now = _now()
+            connection.execute(_INSERT_REPORT, (row[0], reason, reporter_id or 'anonymous', now))
+            connection.execute(_REPORT, (REJECT_THRESHOLD, now, row[0]))
+        return True
+
+    # ----- Leitura -----
+
+    def get(self, contribution_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(_SELECT_BY_ID, (contribution_id,)).fetchone()
+        return self._to_dicts([row])[0] if row else None
+
+    @staticmethod
+    def _filters(language: Optional[str], category: Optional[str],
+                 status: Optional[str]) -> Tuple[List[str], List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if language:
+            clauses.append("(source_language = ? OR target_language = ?)")
+            params += [language, language]
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+        if status:
+            clauses.append("validation_status = ?")
+            params.append(status)
+        return clauses, params
+
+    def list_contributions(self, language: Optional[str] = None, category: Optional[str] = None,
+                           status: Optional[str] = None, limit: int = 50, after: Optional[int] = None,
+                           offset: int = 0) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Contribuições filtradas em ordem de inserção; retorna (página, cursor da próxima)
+
+        ``after`` é o cursor devolvido pela página anterior (paginação por
+        chave, custo constante em qualquer página); ``offset`` fica para
+        clientes antigos e só é usado sem cursor.
+        """
+        clauses, params = self._filters(language, category, status)
+        if after is not None:
+            clauses.append("seq > ?")
+            params.append(after)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {_COLUMNS} FROM contributions{where} ORDER BY seq LIMIT ?"
+        params.append(limit + 1)
+        if after is None and offset:
+            sql += " OFFSET ?"
+            params.append(offset)
+
+        rows = self._connection().execute(sql, params).fetchall()
+        page = rows[:limit]
+        next_cursor = page[-1][0] if len(rows) > limit and page else None
+        return self._to_dicts(page), next_cursor
+
+    def count(self, language: Optional[str] = None, category: Optional[str] = None,
+              status: Optional[str] = None) -> int:
+        """Total com os mesmos filtros de ``list_contributions`` (lido dos totais)"""
+        clauses, params = self._filters(language, category, status)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        row = self._connection().execute(f"SELECT SUM(total) FROM contribution_totals{where}", params).fetchone()
+        return row[0] or 0
+
+    def _ranked(self, index: str, match: str, language: Optional[str], limit: int) -> List[tuple]:
+        """Linhas que casam em ``index``, pelo ``rank`` (BM25), com ``search_text`` no fim de cada linha"""
+        language_clause = " AND (c.source_language = ? OR c.target_language = ?)" if language else ""
+        sql = (
+            f"SELECT {_JOINED_COLUMNS}, c.search_text FROM {index} JOIN contributions c ON c.seq = {index}.rowid "
+            f"WHERE {index} MATCH ?{language_clause} ORDER BY {index}.rank LIMIT ?"
+        )
+        params = [match, *([language, language] if language else []), limit]
+        return self._connection().execute(sql, params).fetchall()
+
+    def search(self, query: str, language: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Contribuições aprovadas que casam com ``query``, das mais relevantes para as menos
+
+        Os termos casam como prefixo, sem acentos, por BM25: primeiro na
+        palavra e na tradução, depois também no contexto; se nada casar,
+        entram as que têm trigramas suficientes em comum (outra grafia).
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        rows = [row[:-1] for row in self._ranked('contributions_fts', prefix_match(terms, PRIMARY_COLUMNS),
+                                                 language, limit)]
+        if len(rows) < limit:
+            # Completar com as que casam no contexto, sem repetir as já encontradas
+            found = {row[0] for row in rows}
+            extra = self._ranked('contributions_fts', prefix_match(terms), language, limit + len(rows))
+            rows += [row[:-1] for row in extra if row[0] not in found][:limit - len(rows)]
+
+        match, grams = ngram_match(terms)
+        if not rows and match:
+            scored = []
+            for candidate in self._ranked('contributions_ngrams', match, language, NGRAM_CANDIDATES):
+                similarity = ngram_similarity(grams, candidate[-1])
+                if similarity >= NGRAM_MIN_SIMILARITY:
+                    scored.append((similarity, candidate[:-1]))
+            # sort estável: empates ficam na ordem do BM25 dos n-gramas
+            scored.sort(key=lambda item: item[0], reverse=True)
+            rows = [row for _, row in scored[:limit]]
+        return self._to_dicts(rows)
+
+    def existing_words(self, source_language: str, target_language: str, words: Iterable[str]) -> set:
+        """Quais de ``words`` (em minúsculas) já foram contribuídas para o par de idiomas"""
+        keys = sorted({word.lower() for word in words})
+        if not keys:
+            return set()
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._connection().execute(
+            f"SELECT DISTINCT word_key FROM contributions WHERE source_language = ? "
+            f"AND target_language = ? AND word_key IN ({placeholders})",
+            [source_language, target_language, *keys]
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def community_stats(self, top: int = 10) -> Dict[str, Any]:
+        connection = self._connection()
+        counts = dict(connection.execute(_STATUS_COUNTS).fetchall())
+        active = connection.execute(_ACTIVE_CONTRIBUTORS).fetchone()
+        return {
+            'total_contributions': counts.get('approved', 0),
+            'pending_contributions': counts.get('pending', 0),
+            'active_contributors': active[0] if active else 0,
+            'languages_supported': [row[0] for row in connection.execute(_APPROVED_LANGUAGES)],
+            'top_contributors': [
+                {'id': contributor_id, 'contributions': total}
+                for contributor_id, total in connection.execute(_TOP_CONTRIBUTORS, (top,))
+            ],
+            'categories': [row[0] for row in connection.execute(_APPROVED_CATEGORIES)]
+        }
+
+    def language_progress(self, language: str) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        """(total aprovado, contagens por categoria) das contribuições aprovadas de um idioma"""
+        categories = {
+            category: {'total': total, 'with_audio': with_audio or 0, 'verified': verified or 0}
+            for category, total, with_audio, verified
+            in self._connection().execute(_LANGUAGE_PROGRESS, (language, language))
+        }
+        return sum(item['total'] for item in categories.values()), categories
+
+    def _to_dicts(self, rows: List[tuple]) -> List[Dict[str, Any]]:
+        """Linhas no formato de contribuição da API (com os reports, se houver)"""
+        contributions = []
+        reported = {}
+        for row in rows:
+            (seq, contribution_id, word, translation, source_language, target_language, category,
+             context, contributor_id, audio_url, image_url, suggested_tags, status, approve_votes,
+             reject_votes, report_count, verified, created_at) = row
+            contribution = {
+                'id': contribution_id,
+                'word': word,
+                'translation': translation,
+                'source_language': source_language,
+                'target_language': target_language,
+                'category': category,
+                'context': context,
+                'contributor_id': contributor_id,
+                'audio_url': audio_url,
+                'image_url': image_url,
+                'created_at': created_at,
+                'status': status,
+                'votes': {'up': approve_votes, 'down': reject_votes},
+                'verified': bool(verified),
+                'suggested_tags': json.loads(suggested_tags)
+            }
+            if report_count:
+                contribution['reports'] = []
+                reported[seq] = contribution
+            contributions.append(contribution)
+
+        if reported:
+            placeholders = ', '.join('?' * len(reported))
+            for seq, reason, reporter_id, reported_at in self._connection().execute(
+                f"SELECT contribution_seq, reason, reporter_id, reported_at FROM contribution_reports "
+                f"WHERE contribution_seq IN ({placeholders}) ORDER BY id",
+                list(reported)
+            ):
+                reported[seq]['reports'].append({
+                    'reason': reason,
+                    'reported_at': reported_at,
+                    'reporter_id': reporter_id
+                })
+        return contributions
+
+
+_repository: Optional[ContributionRepository] = None
+_repository_lock = threading.Lock()
+
+
+def get_contribution_repository() -> ContributionRepository:
+    """Obter o repositório de contribuições compartilhado do processo"""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                _repository = ContributionRepository(
+                    BackendConfig.CONTRIBUTIONS_DB_PATH,
+                    busy_timeout=BackendConfig.CONTRIBUTIONS_BUSY_TIMEOUT
+                )
+    return _repository
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice de busca das contribuições validadas - Moransa
+Hackathon Gemma 3n
+
+A busca percorria todas as contribuições aprovadas com ``query in texto``
+em cada consulta, sem ranking e sem ignorar acentos ("saude" não achava
+"saúde"). Agora as contribuições aprovadas (o corpus validado) ficam em
+dois índices FTS5 no mesmo arquivo SQLite do repositório:
+
+- ``contributions_fts``: palavra, tradução e contexto com o tokenizador
+  ``unicode61`` sem acentos e índices de prefixo de 2 e 3 caracteres.
+  Cada termo da consulta casa como prefixo ("sau" acha "saúde") e o
+  resultado é ordenado por BM25, com a palavra e a tradução pesando mais
+  que o contexto;
+- ``contributions_ngrams``: o texto já dobrado (``fold_text``) com o
+  tokenizador ``trigram``. Quando nenhuma contribuição casa com os termos,
+  a consulta vira um OU dos pedaços de 4 letras de cada termo (3 nos termos curtos) e
+  os candidatos ficam se tiverem trigramas suficientes em comum com a
+  consulta: grafias diferentes do crioulo ("kumida"/"comida") ainda se
+  encontram.
+
+O ``rank`` de ``contributions_fts`` é o BM25 com os pesos de
+``BM25_WEIGHTS`` (opção ``rank`` gravada no próprio índice), e a busca
+usa ``ORDER BY rank`` sobre todas as linhas que casam. Os termos são
+procurados primeiro só na palavra e na tradução; o contexto, onde os
+termos comuns aparecem em milhares de linhas, só entra para completar a
+página.
+
+Os dois índices são de conteúdo externo (o texto fica só em
+``contributions``) e são atualizados por gatilhos: entram as contribuições
+aprovadas (na submissão já aprovada ou quando atingem os votos) e saem as
+rejeitadas; edições no texto de uma aprovada reindexam só essa linha.
+"""
+
+import re
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from utils.keyword_matcher import fold_text
+
+# Versão do arquivo (``PRAGMA user_version``) a partir da qual os índices existem
+SEARCH_SCHEMA_VERSION = 3
+
+# Versão que criou os índices (a 3 só gravou o ``rank`` com pesos)
+_INDEX_VERSION = 2
+
+# Pesos BM25 das colunas de contributions_fts (palavra, tradução, contexto)
+BM25_WEIGHTS = (4.0, 4.0, 1.0)
+
+# Colunas de contributions_fts consultadas antes do contexto
+PRIMARY_COLUMNS = ('word', 'translation')
+
+# Candidatas por n-gramas (as de maior BM25) comparadas com a consulta
+NGRAM_CANDIDATES = 500
+
+# Fração mínima dos trigramas de cada termo presentes numa candidata por n-gramas
+NGRAM_MIN_SIMILARITY = 0.5
+
+_WORD = re.compile(r'\w+')
+
+_SEARCH_TABLES = """
+CREATE VIRTUAL TABLE IF NOT EXISTS contributions_fts USING fts5(
+    word, translation, context_notes,
+    content='contributions', content_rowid='seq',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS contributions_ngrams USING fts5(
+    search_text,
+    content='contributions', content_rowid='seq',
+    tokenize='trigram'
+)
+"""
+
+_POPULATE = (
+    "INSERT INTO contributions_fts (rowid, word, translation, context_notes) "
+    "SELECT seq, word, translation, context_notes FROM contributions WHERE validation_status = 'approved'",
+    "INSERT INTO contributions_ngrams (rowid, search_text) "
+    "SELECT seq, search_text FROM contributions WHERE validation_status = 'approved'",
+)
+
+# Conteúdo externo: o 'delete' precisa dos valores antigos exatamente como foram indexados
+_SEARCH_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS trg_contributions_search_insert AFTER INSERT ON contributions
+WHEN NEW.validation_status = 'approved'
+BEGIN
+    INSERT INTO contributions_fts (rowid, word, translation, context_notes)
+        VALUES (NEW.seq, NEW.word, NEW.translation, NEW.context_notes);
+    INSERT INTO contributions_ngrams (rowid, search_text) VALUES (NEW.seq, NEW.search_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_contributions_search_delete AFTER DELETE ON contributions
+WHEN OLD.validation_status = 'approved'
+BEGIN
+    INSERT INTO contributions_fts (contributions_fts, rowid, word, translation, context_notes)
+        VALUES ('delete', OLD.seq, OLD.word, OLD.translation, OLD.context_notes);
+    INSERT INTO contributions_ngrams (contributions_ngrams, rowid, search_text)
+        VALUES ('delete', OLD.seq, OLD.search_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_contributions_search_update AFTER UPDATE ON contributions
+WHEN (OLD.validation_status = 'approved') != (NEW.validation_status = 'approved')
+    OR (NEW.validation_status = 'approved' AND (
+        OLD.word IS NOT NEW.word OR OLD.translation IS NOT NEW.translation
+        OR OLD.context_notes IS NOT NEW.context_notes OR OLD.search_text IS NOT NEW.search_text))
+BEGIN
+    INSERT INTO contributions_fts (contributions_fts, rowid, word, translation, context_notes)
+        SELECT 'delete', OLD.seq, OLD.word, OLD.translation, OLD.context_notes
+        WHERE OLD.validation_status = 'approved';
+    INSERT INTO contributions_ngrams (contributions_ngrams, rowid, search_text)
+        SELECT 'delete', OLD.seq, OLD.search_text WHERE OLD.validation_status = 'approved';
+    INSERT INTO contributions_fts (rowid, word, translation, context_notes)
+        SELECT NEW.seq, NEW.word, NEW.translation, NEW.context_notes WHERE NEW.validation_status = 'approved';
+    INSERT INTO contributions_ngrams (rowid, search_text)
+        SELECT NEW.seq, NEW.search_text WHERE NEW.validation_status = 'approved';
+END;
+"""
+
+
+def search_text(*parts: Optional[str]) -> str:
+    """Texto do índice de trigramas: partes dobradas (sem acentos, minúsculas), uma por linha"""
+    return '\n'.join(fold_text(part or '') for part in parts)
+
+
+def install_search_index(connection: sqlite3.Connection) -> bool:
+    """Criar e preencher os índices e o ``rank`` num arquivo anterior a eles; retorna se houve migração
+
+    Chamada dentro de uma transação de escrita, antes de os gatilhos
+    existirem: ``search_text`` das linhas antigas é recalculado sem que os
+    índices (ainda vazios) recebam 'delete' de valores que nunca tiveram.
+    """
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SEARCH_SCHEMA_VERSION:
+        return False
+    if version < _INDEX_VERSION:
+        for statement in _SEARCH_TABLES.split(';'):
+            connection.execute(statement)
+        rows = connection.execute("SELECT seq, word, translation, context_notes FROM contributions").fetchall()
+        connection.executemany(
+            "UPDATE contributions SET search_text = ? WHERE seq = ?",
+            [(search_text(word, translation, context), seq) for seq, word, translation, context in rows]
+        )
+        for statement in _POPULATE:
+            connection.execute(statement)
+    # ``ORDER BY rank`` passa a usar os pesos das colunas
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    connection.execute(
+        "INSERT INTO contributions_fts (contributions_fts, rank) VALUES ('rank', ?)", (f"bm25({weights})",)
+    )
+    connection.execute(f"PRAGMA user_version = {SEARCH_SCHEMA_VERSION}")
+    return True
+
+
+def install_search_triggers(connection: sqlite3.Connection) -> None:
+    connection.executescript(_SEARCH_TRIGGERS)
+
+
+def query_terms(query: str) -> List[str]:
+    """Termos da consulta, dobrados como o texto indexado"""
+    return _WORD.findall(fold_text(query))
+
+
+def prefix_match(terms: Sequence[str], columns: Sequence[str] = ()) -> str:
+    """Consulta FTS5: todos os termos, cada um como prefixo (só em ``columns``, se dadas)"""
+    match = ' '.join(f'"{term}"*' for term in terms)
+    return f"{{{' '.join(columns)}}} : ({match})" if columns else match
+
+
+def _ngrams(term: str, size: int) -> Set[str]:
+    return {term[i:i + size] for i in range(len(term) - size + 1)}
+
+
+def ngram_match(terms: Sequence[str]) -> Tuple[Optional[str], Dict[str, Set[str]]]:
+    """Consulta FTS5 por n-gramas e os trigramas de cada termo (None se nenhum termo tem 3 caracteres)
+
+    Pedaços de 4 letras são bem mais seletivos que trigramas ("ida" está
+    em metade do vocabulário, "mida" não) e ainda sobrevivem a uma letra
+    trocada em palavras de 5 letras ou mais.
+    """
+    grams = {term: _ngrams(term, 3) for term in terms if len(term) >= 3}
+    pieces = sorted({piece for term in grams for piece in _ngrams(term, 4 if len(term) >= 5 else 3)})
+    if not pieces:
+        return None, grams
+    return ' OR '.join(f'"{piece}"' for piece in pieces), grams
+
+
+def ngram_similarity(grams: Dict[str, Set[str]], text: str) -> float:
+    """Fração média dos trigramas de cada termo presentes no texto dobrado"""
+    if not grams:
+        return 0.0
+    return sum(
+        sum(1 for gram in term_grams if gram in text) / len(term_grams)
+        for term_grams in grams.values()
+    ) / len(grams)
@@ -5,22 +5,16 @@ import os
 import json
 from werkzeug.utils import secure_filename
 from services import gemma_service
-from services.gemma_service import GemmaService
+from services.gemma_registry import get_gemma_service
+from services.async_runtime import run_async
 from services.audio_service import AudioService
 from utils.validators import validate_language_code, validate_text_input
 from utils.file_handler import save_audio_file, save_image_file
+from database.contribution_repository import get_contribution_repository
+from config.settings import BackendConfig
 
 collaborative_bp = Blueprint('collaborative', __name__)
 
-# Simulação de banco de dados em memória (em produção, usar banco real)
-contributions_db = []
-community_stats = {
-    'total_contributions': 0,
-    'active_contributors': 0,
-    'languages_supported': ['pt', 'gcr'],  # Português e Crioulo
-    'top_contributors': []
-}
-
 @collaborative_bp.route('/collaborative/contribute', methods=['POST'])
 def contribute():
     """Nova rota para contribuições (compatível com app Flutter)"""
@@ -54,8 +48,7 @@ def teach_gemma_new_language():
             }), 400
         
         # Obter serviço Gemma
-        from services.gemma_service import GemmaService
-        gemma_service = GemmaService()
+        gemma_service = get_gemma_service()
         
         if gemma_service:
             # Processar contribuições para ensino
@@ -191,14 +184,11 @@ def submit_contribution():
         }
         
         # Adicionar à base de dados
-        contributions_db.append(contribution)
-        
-        # Atualizar estatísticas
-        community_stats['total_contributions'] += 1
+        get_contribution_repository().add(contribution)
         
         # Processar contribuição com Moransa (Gemma-3)
         try:
-            gemma_service_instance = GemmaService()
+            gemma_service_instance = get_gemma_service()
             analysis = gemma_service_instance.process_user_contribution({
                 'word': contribution['word'],
                 'translation': contribution['translation'],
@@ -225,6 +215,8 @@ def submit_contribution():
                 if recommendation == 'requires_moderator_review':
                     contribution['status'] = 'pending_review'
                 
+                get_contribution_repository().apply_analysis(contribution)
+                
                 print(f"Contribuição analisada pela IA: score={analysis_result.get('quality_assessment', {}).get('score', 0)}")
         
         except Exception as e:
@@ -265,17 +257,10 @@ def generate_translation_challenges():
             return jsonify({'error': 'Categoria inválida'}), 400
         
         # Gerar desafios com Moransa
-        gemma_service_instance = GemmaService()
-        
-        # Executar de forma síncrona
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        gemma_service_instance = get_gemma_service()
         
-        result = loop.run_until_complete(gemma_service_instance.generate_translation_challenges(
+        # Executar no loop assíncrono compartilhado
+        result = run_async(gemma_service_instance.generate_translation_challenges(
             category=category,
             difficulty=difficulty,
             quantity=quantity,
@@ -320,17 +305,10 @@ def generate_educational_content():
             return jsonify({'error': f'Nível deve ser um de: {", ".join(valid_levels)}'}), 400
         
         # Gerar conteúdo com Moransa
-        gemma_service_instance = GemmaService()
+        gemma_service_instance = get_gemma_service()
         
-        # Executar de forma síncrona
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        
-        result = loop.run_until_complete(gemma_service_instance.generate_educational_content(
+        # Executar no loop assíncrono compartilhado
+        result = run_async(gemma_service_instance.generate_educational_content(
             subject=subject,
             level=level,
             topic=topic
@@ -368,17 +346,10 @@ def analyze_contribution():
                 return jsonify({'error': f'Campo obrigatório: {field}'}), 400
         
         # Processar com Moransa
-        gemma_service_instance = GemmaService()
+        gemma_service_instance = get_gemma_service()
         
-        # Executar de forma síncrona
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        
-        result = loop.run_until_complete(gemma_service_instance.process_user_contribution(data))
+        # Executar no loop assíncrono compartilhado
+        result = run_async(gemma_service_instance.process_user_contribution(data))
         
         if result.get('success'):
             return jsonify({
@@ -400,7 +371,7 @@ def analyze_contribution():
 def get_moransa_status():
     """Verificar status do sistema Moransa"""
     try:
-        gemma_service_instance = GemmaService()
+        gemma_service_instance = get_gemma_service()
         
         # Verificar se o serviço está disponível
         status = {
@@ -416,13 +387,9 @@ def get_moransa_status():
         
         # Tentar verificar Ollama se disponível
         try:
-            import asyncio
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            ollama_status = loop.run_until_complete(gemma_service_instance._check_ollama_availability())
+            ollama_status = bool(gemma_service_instance.ollama_available)
             status['ollama_available'] = ollama_status
             status['fallback_mode'] = not ollama_status
-            loop.close()
         except:
             pass
         
@@ -449,40 +416,27 @@ def get_contributions():
         language = request.args.get('language')
         category = request.args.get('category')
         status = request.args.get('status', 'approved')
-        limit = int(request.args.get('limit', 50))
+        limit = min(int(request.args.get('limit', 50)), BackendConfig.CONTRIBUTIONS_PAGE_MAX)
         offset = int(request.args.get('offset', 0))
-        
-        # Filtrar contribuições
-        filtered_contributions = contributions_db.copy()
-        
-        if language:
-            filtered_contributions = [
-                c for c in filtered_contributions 
-                if c['source_language'] == language or c['target_language'] == language
-            ]
-        
-        if category:
-            filtered_contributions = [
-                c for c in filtered_contributions 
-                if c['category'] == category
-            ]
-        
-        if status:
-            filtered_contributions = [
-                c for c in filtered_contributions 
-                if c['status'] == status
-            ]
-        
-        # Paginação
-        total = len(filtered_contributions)
-        paginated_contributions = filtered_contributions[offset:offset + limit]
+        # Cursor da página anterior (next_cursor); tem precedência sobre offset
+        cursor = request.args.get('cursor')
+        after = int(cursor) if cursor else None
+        
+        # Consulta indexada com paginação por cursor
+        repository = get_contribution_repository()
+        page, next_cursor = repository.list_contributions(
+            language=language, category=category, status=status,
+            limit=limit, after=after, offset=offset
+        )
+        total = repository.count(language=language, category=category, status=status)
         
         return jsonify({
             'success': True,
-            'contributions': paginated_contributions,
+            'contributions': page,
             'total': total,
             'offset': offset,
-            'limit': limit
+            'limit': limit,
+            'next_cursor': next_cursor
         })
         
     except Exception as e:
@@ -505,26 +459,18 @@ def vote_contribution():
                 'error': 'Dados de voto inválidos'
             }), 400
         
-        # Encontrar contribuição
-        contribution = next((c for c in contributions_db if c['id'] == contribution_id), None)
-        if not contribution:
+        # Atualizar voto (auto-aprova com votos suficientes)
+        result = get_contribution_repository().vote(contribution_id, vote_type)
+        if not result:
             return jsonify({
                 'success': False,
                 'error': 'Contribuição não encontrada'
             }), 404
         
-        # Atualizar voto
-        contribution['votes'][vote_type] += 1
-        
-        # Auto-aprovar se tiver votos suficientes
-        if contribution['votes']['up'] >= 3 and contribution['status'] == 'pending':
-            contribution['status'] = 'approved'
-            contribution['verified'] = True
-        
         return jsonify({
             'success': True,
-            'votes': contribution['votes'],
-            'status': contribution['status']
+            'votes': result['votes'],
+            'status': result['status']
         })
         
     except Exception as e:
@@ -538,32 +484,7 @@ def get_community_stats():
     """Obtém estatísticas da comunidade"""
     try:
         # Calcular estatísticas em tempo real
-        approved_contributions = [c for c in contributions_db if c['status'] == 'approved']
-        unique_contributors = set(c['contributor_id'] for c in contributions_db if c['contributor_id'] != 'anonymous')
-        
-        # Top contribuidores
-        contributor_counts = {}
-        for contribution in approved_contributions:
-            contributor_id = contribution['contributor_id']
-            if contributor_id != 'anonymous':
-                contributor_counts[contributor_id] = contributor_counts.get(contributor_id, 0) + 1
-        
-        top_contributors = [
-            {'id': contributor_id, 'contributions': count}
-            for contributor_id, count in sorted(contributor_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        ]
-        
-        stats = {
-            'total_contributions': len(approved_contributions),
-            'pending_contributions': len([c for c in contributions_db if c['status'] == 'pending']),
-            'active_contributors': len(unique_contributors),
-            'languages_supported': list(set(
-                [c['source_language'] for c in approved_contributions] + 
-                [c['target_language'] for c in approved_contributions]
-            )),
-            'top_contributors': top_contributors,
-            'categories': list(set(c['category'] for c in approved_contributions))
-        }
+        stats = get_contribution_repository().community_stats()
         
         return jsonify({
             'success': True,
@@ -582,35 +503,14 @@ def get_language_progress():
     try:
         language = request.args.get('language', 'gcr')  # Default para Crioulo
         
-        # Calcular progresso
-        language_contributions = [
-            c for c in contributions_db 
-            if (c['source_language'] == language or c['target_language'] == language) 
-            and c['status'] == 'approved'
-        ]
-        
-        # Categorizar por tipo
-        categories = {}
-        for contribution in language_contributions:
-            category = contribution['category']
-            if category not in categories:
-                categories[category] = {
-                    'total': 0,
-                    'with_audio': 0,
-                    'verified': 0
-                }
-            
-            categories[category]['total'] += 1
-            if contribution.get('audio_url'):
-                categories[category]['with_audio'] += 1
-            if contribution.get('verified'):
-                categories[category]['verified'] += 1
+        # Calcular progresso, categorizado por tipo
+        total_words, categories = get_contribution_repository().language_progress(language)
         
         progress = {
             'language': language,
-            'total_words': len(language_contributions),
+            'total_words': total_words,
             'categories': categories,
-            'completion_percentage': min(100, (len(language_contributions) / 1000) * 100),  # Meta de 1000 palavras
+            'completion_percentage': min(100, (total_words / 1000) * 100),  # Meta de 1000 palavras
             'last_updated': datetime.now().isoformat()
         }
         
@@ -665,7 +565,7 @@ def search_contributions():
     try:
         query = request.args.get('q', '').strip().lower()
         language = request.args.get('language')
-        limit = int(request.args.get('limit', 20))
+        limit = min(int(request.args.get('limit', 20)), BackendConfig.CONTRIBUTIONS_PAGE_MAX)
         
         if not query:
             return jsonify({
@@ -673,24 +573,8 @@ def search_contributions():
                 'error': 'Query de busca é obrigatória'
             }), 400
         
-        # Buscar em contribuições aprovadas
-        results = []
-        for contribution in contributions_db:
-            if contribution['status'] != 'approved':
-                continue
-            
-            # Filtrar por idioma se especificado
-            if language and contribution['source_language'] != language and contribution['target_language'] != language:
-                continue
-            
-            # Buscar no texto
-            if (query in contribution['word'].lower() or 
-                query in contribution['translation'].lower() or 
-                query in contribution.get('context', '').lower()):
-                results.append(contribution)
-        
-        # Limitar resultados
-        results = results[:limit]
+        # Índice de busca das contribuições aprovadas (sem acentos, por relevância)
+        results = get_contribution_repository().search(query, language=language, limit=limit)
         
         return jsonify({
             'success': True,
@@ -721,12 +605,9 @@ def get_word_suggestions():
         }
         
         # Filtrar palavras já contribuídas
-        existing_words = set(
-            c['word'].lower() for c in contributions_db 
-            if c['source_language'] == 'pt' and c['target_language'] == language
-        )
-        
         category_suggestions = suggestions.get(category, suggestions['general'])
+        existing_words = get_contribution_repository().existing_words('pt', language, category_suggestions)
+        
         needed_words = [word for word in category_suggestions if word.lower() not in existing_words]
         
         return jsonify({
@@ -756,28 +637,13 @@ def report_contribution():
                 'error': 'ID da contribuição e motivo são obrigatórios'
             }), 400
         
-        # Encontrar contribuição
-        contribution = next((c for c in contributions_db if c['id'] == contribution_id), None)
-        if not contribution:
+        # Adicionar report (auto-remove se muitos reports)
+        if not get_contribution_repository().report(contribution_id, reason, data.get('reporter_id', 'anonymous')):
             return jsonify({
                 'success': False,
                 'error': 'Contribuição não encontrada'
             }), 404
         
-        # Adicionar report
-        if 'reports' not in contribution:
-            contribution['reports'] = []
-        
-        contribution['reports'].append({
-            'reason': reason,
-            'reported_at': datetime.now().isoformat(),
-            'reporter_id': data.get('reporter_id', 'anonymous')
-        })
-        
-        # Auto-remover se muitos reports
-        if len(contribution['reports']) >= 3:
-            contribution['status'] = 'rejected'
-        
         return jsonify({
             'success': True,
             'message': 'Contribuição reportada com sucesso'
@@ -814,20 +680,11 @@ def generate_gamification_challenge():
         }
         
         # Obter serviço Gemma
-        from services.gemma_service import GemmaService
-        gemma_service = GemmaService()
+        gemma_service = get_gemma_service()
         
         if gemma_service:
-            # Executar de forma síncrona usando asyncio
-            import asyncio
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            # Gerar desafio usando Gemma-3
-            challenge_result = loop.run_until_complete(
+            # Gerar desafio usando Gemma-3 (loop assíncrono compartilhado)
+            challenge_result = run_async(
                 gemma_service.generate_gamification_challenge(
                     user_data=user_data,
                     community_status=community_status
@@ -869,8 +726,7 @@ def generate_reward_message():
         user_data = data.get('user_data', {})
         
         # Obter serviço Gemma
-        from services.gemma_service import GemmaService
-        gemma_service = GemmaService()
+        gemma_service = get_gemma_service()
         
         if gemma_service:
             # Preparar dados do evento para o Gemma-3
@@ -883,14 +739,7 @@ def generate_reward_message():
             }
             
             # Gerar mensagem de recompensa usando Gemma-3
-            import asyncio
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            reward_result = loop.run_until_complete(
+            reward_result = run_async(
                 gemma_service.generate_reward_message(event_data)
             )
             
@@ -931,14 +780,16 @@ def create_badge():
             }), 400
         
         # Obter serviço Gemma
-        from services.gemma_service import GemmaService
-        gemma_service = GemmaService()
+        gemma_service = get_gemma_service()
         
         if gemma_service:
             # Criar badge usando Gemma-3
-            badge_result = gemma_service.create_badge(
-                achievement_data=achievement_data
-            )
+            badge_criteria = achievement_data.get('criteria') or achievement_data.get('description') \
+                or json.dumps(achievement_data, ensure_ascii=False)
+            badge_result = run_async(gemma_service.create_badge(
+                badge_criteria=badge_criteria,
+                category=achievement_data.get('category', 'geral')
+            ))
             
             return jsonify({
                 'success': True,
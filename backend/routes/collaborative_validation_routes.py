@@ -16,7 +16,7 @@ from datetime import datetime, timedelta
 import logging
 import json
 
-from services.gemma_service import GemmaService
+from services.gemma_registry import get_gemma_service
 from config.settings import BackendConfig
 
 logger = logging.getLogger(__name__)
@@ -64,7 +64,7 @@ def generate_portuguese_phrases():
         logger.info(f"🎯 Gerando {quantity} frases para categoria '{category}' (dispositivo: {device_specs.get('device_type', 'unknown')})")
         
         # Inicializar Gemma-3n para geração de conteúdo
-        gemma_service = GemmaService(domain="content_generation")
+        gemma_service = get_gemma_service(domain="content_generation")
         
         # Gerar frases usando Gemma-3n com otimização para dispositivo
         result = gemma_service.generate_new_portuguese_phrases(
@@ -120,7 +120,7 @@ def get_phrases_to_translate():
         logger.info(f"🎯 Gerando {limit} frases dinâmicas para categoria '{category}' e idioma '{language}'")
         
         # Inicializar Gemma-3n para geração de conteúdo
-        gemma_service = GemmaService(domain="content_generation")
+        gemma_service = get_gemma_service(domain="content_generation")
         
         # Especificações padrão do dispositivo (pode ser expandido para receber do cliente)
         device_specs = {
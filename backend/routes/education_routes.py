@@ -14,6 +14,7 @@ from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
 from config.settings import SystemPrompts
 from utils.error_handler import create_error_response, log_error
+from utils.sse import single_response_events, sse_response
 
 # Criar blueprint
 education_bp = Blueprint('education', __name__)
@@ -181,6 +182,77 @@ def educational_content():
             500
         )), 500
 
+@education_bp.route('/education/stream', methods=['POST'])
+def educational_content_stream():
+    """
+    Conteúdo educacional com resposta em stream (Server-Sent Events)
+    ---
+    tags:
+      - Educação
+    summary: Conteúdo educacional em stream
+    description: |
+      Mesmos parâmetros de /education. Envia eventos `token` com o texto
+      incremental e um evento final `done` com a resposta processada e
+      métricas (tokens/s, tempo até o primeiro token).
+    responses:
+      200:
+        description: Stream text/event-stream
+      400:
+        description: Dados inválidos
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify(create_error_response(
+            'invalid_request',
+            'Dados JSON são obrigatórios',
+            400
+        )), 400
+    
+    prompt = data.get('prompt') or data.get('question') or data.get('query')
+    if not prompt:
+        return jsonify(create_error_response(
+            'missing_prompt',
+            'Campo "prompt", "question" ou "query" é obrigatório',
+            400
+        )), 400
+    
+    subject = data.get('subject', 'geral')
+    education_level = data.get('education_level', 'basico')
+    age_group = data.get('age_group', 'adulto')
+    language = data.get('language', 'portugues')
+    educational_context = _prepare_educational_context(
+        prompt, subject, education_level, age_group, language
+    )
+    
+    gemma_service = getattr(current_app, 'gemma_service', None)
+    if not gemma_service:
+        return sse_response(single_response_events(
+            _get_education_fallback_response(prompt, subject, education_level)
+        ))
+    
+    def add_educational_info(final):
+        final['educational_info'] = {
+            'subject': subject,
+            'level': education_level,
+            'age_group': age_group,
+            'language': language,
+            'learning_tips': _get_learning_tips(education_level, age_group),
+            'additional_resources': _get_additional_resources(subject)
+        }
+        return final
+    
+    return sse_response(
+        gemma_service.generate_response_stream(
+            educational_context,
+            SystemPrompts.EDUCATION,
+            temperature=0.7,
+            max_new_tokens=500
+        ),
+        on_done=add_educational_info
+    )
+
 @education_bp.route('/education/lesson-plan', methods=['POST'])
 def create_lesson_plan():
     """Criar plano de aula adaptado"""
@@ -18,6 +18,7 @@ from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
 import io
 from PIL import Image
+from utils.response_parser import FieldSpec, ResponseSpec, SectionSpec, percent, register_parser, yes_no
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -116,9 +117,9 @@ def select_optimal_gemma_model():
         if not gemma_service:
             return RECYCLING_CONFIG['gemma_models']['generic']
         
-        # Verificar capacidade do sistema
-        import psutil
-        available_ram = psutil.virtual_memory().available / (1024**3)  # GB
+        # Verificar capacidade do sistema (snapshot do monitor de recursos)
+        from services.resource_monitor import get_resource_monitor
+        available_ram = get_resource_monitor().snapshot().ram_available_gb
         
         # Lógica baseada no documento gemma3n_imagem.md
         if available_ram >= 4:
@@ -450,10 +451,25 @@ def analyze_recycling_material():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+# Campos e seções do formato estruturado pedido no prompt de análise
+RECYCLING_RESPONSE_PARSER = register_parser(ResponseSpec(
+    name='recycling_specific.analysis',
+    fields=(
+        FieldSpec('material_type', r'tipo principal:'),
+        FieldSpec('category', r'categoria[^\n:]*:'),
+        FieldSpec('recyclable', r'reciclável:', value=r'[\s*]*(Sim|Não)', convert=yes_no),
+        FieldSpec('confidence', r'confiança|certeza', value=r'.*?(\d+)%', convert=percent),
+    ),
+    sections=(
+        SectionSpec('local_tips', (r'dicas específicas[^\n:*]*',), as_list=True),
+        # Só delimita as dicas: é o cabeçalho que vem depois delas no prompt
+        SectionSpec('confidence_section', (r'confiança da análise',)),
+    )
+))
+
+
 def parse_gemma_response(text):
     """Parse inteligente da resposta estruturada do Gemma 3n"""
-    import re
-    
     result = {
         'material_type': 'Material não identificado',
         'category': 'Geral',
@@ -466,32 +482,17 @@ def parse_gemma_response(text):
     }
     
     try:
-        # Extrair tipo de material
-        material_match = re.search(r'Tipo principal:\s*([^\n\*]+)', text, re.IGNORECASE)
-        if material_match:
-            result['material_type'] = material_match.group(1).strip()
-        
-        # Extrair categoria
-        category_match = re.search(r'Categoria.*?:\s*([^\n\*]+)', text, re.IGNORECASE)
-        if category_match:
-            result['category'] = category_match.group(1).strip()
-        
-        # Extrair reciclabilidade
-        recyclable_match = re.search(r'Reciclável:\s*(Sim|Não)', text, re.IGNORECASE)
-        if recyclable_match:
-            result['recyclable'] = recyclable_match.group(1).lower() == 'sim'
-        
-        # Extrair dicas locais
-        if 'DICAS ESPECÍFICAS' in text.upper():
-            tips_start = text.upper().find('DICAS ESPECÍFICAS')
-            if tips_start != -1:
-                tips_text = text[tips_start:tips_start+500]  # Próximos 500 chars
-                tips = [tip.strip() for tip in tips_text.split('-') if tip.strip() and len(tip.strip()) > 10]
-                result['local_tips'] = tips[:5]  # Máximo 5 dicas
-        
-        # Extrair confiança
-        confidence = extract_confidence_from_response(text)
-        result['confidence'] = confidence
+        parsed = RECYCLING_RESPONSE_PARSER.parse(text)
+        for field in ('material_type', 'category', 'recyclable'):
+            if field in parsed:
+                result[field] = parsed[field]
+        
+        # Dicas locais (máximo 5)
+        result['local_tips'] = [tip for tip in parsed.get('local_tips', []) if len(tip) > 10][:5]
+        
+        # Confiança declarada ou, sem ela, estimada pela qualidade da resposta
+        confidence = parsed.get('confidence')
+        result['confidence'] = confidence if confidence is not None else extract_confidence_from_response(text)
         
     except Exception as e:
         logger.warning(f"Erro no parsing da resposta: {e}")
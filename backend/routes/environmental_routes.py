@@ -17,6 +17,7 @@ from config.settings import SystemPrompts
 from flask import Blueprint, current_app, jsonify, request
 from utils.error_handler import create_error_response, log_error
 from utils.json_parser import safe_parse_llm_json
+from utils.response_parser import ClassifierSpec, FieldSpec, ResponseSpec, percent, register_parser, yes_no
 
 # Criar blueprint
 environmental_bp = Blueprint('environmental', __name__)
@@ -5314,7 +5315,6 @@ Responda APENAS com o JSON acima, sem texto adicional."""
 
         # Salvar no cache para evitar repetições
         if alerts:
-            import uuid
             _alert_cache[cache_key] = (current_time, alerts)
             logger.info(f"Alertas salvos no cache para {location}")
 
@@ -5579,6 +5579,26 @@ def _parse_gemma3_alerts_response(response, location):
         logger.error(f"Erro ao processar resposta do Gemma3: {str(e)}")
         return _get_fallback_alerts(location, ['weather', 'agriculture'])
 
+# Tipo e severidade de cada trecho de um alerta em texto livre (ordem = prioridade)
+ALERT_TEXT_PARSER = register_parser(ResponseSpec(
+    name='environmental.alert_text',
+    classifiers=(
+        ClassifierSpec('type', (
+            ('weather', ('chuva', 'vento', 'tempestade', 'seca', 'temperatura', 'clima')),
+            ('agriculture', ('colheita', 'plantação', 'pragas', 'cultivo', 'agricultura', 'arroz', 'milho')),
+            ('air_quality', ('poluição', 'ar', 'qualidade', 'fumaça', 'poeira')),
+            ('emergency', ('emergência', 'perigo', 'risco', 'evacuação', 'socorro')),
+        ), default='general'),
+        ClassifierSpec('severity', (
+            ('critical', ('crítico', 'grave', 'urgente', 'imediato', 'extremo')),
+            ('high', ('alto', 'elevado', 'importante', 'significativo')),
+            ('medium', ('moderado', 'médio', 'atenção')),
+            ('low', ('baixo', 'leve', 'menor')),
+        ), default='medium'),
+    )
+))
+
+
 def _create_alerts_from_text(text):
     """
     Criar alertas a partir de texto livre do Gemma3
@@ -5587,39 +5607,15 @@ def _create_alerts_from_text(text):
 
     alerts = []
 
-    # Padrões para identificar diferentes tipos de alertas
-    alert_patterns = {
-        'weather': ['chuva', 'vento', 'tempestade', 'seca', 'temperatura', 'clima'],
-        'agriculture': ['colheita', 'plantação', 'pragas', 'cultivo', 'agricultura', 'arroz', 'milho'],
-        'air_quality': ['poluição', 'ar', 'qualidade', 'fumaça', 'poeira'],
-        'emergency': ['emergência', 'perigo', 'risco', 'evacuação', 'socorro']
-    }
-
-    severity_patterns = {
-        'critical': ['crítico', 'grave', 'urgente', 'imediato', 'extremo'],
-        'high': ['alto', 'elevado', 'importante', 'significativo'],
-        'medium': ['moderado', 'médio', 'atenção'],
-        'low': ['baixo', 'leve', 'menor']
-    }
-
     # Dividir texto em seções
     sections = re.split(r'\n\s*\n|\.|\!|\?', text)
     sections = [s.strip() for s in sections if len(s.strip()) > 30]
 
     for i, section in enumerate(sections[:5]):  # Máximo 5 alertas
-        # Determinar tipo do alerta
-        alert_type = 'general'
-        for type_key, keywords in alert_patterns.items():
-            if any(keyword in section.lower() for keyword in keywords):
-                alert_type = type_key
-                break
-
-        # Determinar severidade
-        severity = 'medium'
-        for sev_key, keywords in severity_patterns.items():
-            if any(keyword in section.lower() for keyword in keywords):
-                severity = sev_key
-                break
+        # Determinar tipo e severidade do alerta
+        classified = ALERT_TEXT_PARSER.parse(section)
+        alert_type = classified['type']
+        severity = classified['severity']
 
         # Extrair título (primeira linha ou primeiras palavras)
         lines = section.split('\n')
@@ -6616,10 +6612,19 @@ RESPONDA EM FORMATO ESTRUTURADO:
             'timestamp': datetime.now().isoformat()
         }), 500
 
+RECYCLING_RESPONSE_PARSER = register_parser(ResponseSpec(
+    name='environmental.recycling_analysis',
+    fields=(
+        FieldSpec('material_type', r'tipo principal:'),
+        FieldSpec('category', r'categoria:'),
+        FieldSpec('recyclable', r'reciclável:', value=r'[\s*]*(Sim|Não)', convert=yes_no),
+        FieldSpec('confidence', r'confiança', value=r'.*?(\d+)%', convert=percent),
+    )
+))
+
+
 def _parse_recycling_response(text):
     """Parse da resposta específica de reciclagem"""
-    import re
-
     result = {
         'material_type': 'Material não identificado',
         'category': 'Geral',
@@ -6628,26 +6633,7 @@ def _parse_recycling_response(text):
     }
 
     try:
-        # Extrair tipo de material
-        material_match = re.search(r'Tipo principal:\s*([^\n\*]+)', text, re.IGNORECASE)
-        if material_match:
-            result['material_type'] = material_match.group(1).strip()
-
-        # Extrair categoria
-        category_match = re.search(r'Categoria:\s*([^\n\*]+)', text, re.IGNORECASE)
-        if category_match:
-            result['category'] = category_match.group(1).strip()
-
-        # Extrair reciclabilidade
-        recyclable_match = re.search(r'Reciclável:\s*(Sim|Não)', text, re.IGNORECASE)
-        if recyclable_match:
-            result['recyclable'] = recyclable_match.group(1).lower() == 'sim'
-
-        # Extrair confiança
-        confidence_match = re.search(r'CONFIANÇA.*?(\d+)%', text, re.IGNORECASE)
-        if confidence_match:
-            result['confidence'] = int(confidence_match.group(1)) / 100
-
+        result.update(RECYCLING_RESPONSE_PARSER.parse(text))
     except Exception as e:
         logger.warning(f"Erro no parsing: {e}")
 
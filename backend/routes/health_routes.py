@@ -113,6 +113,32 @@ def quick_health_check():
             500
         )), 500
 
+@health_bp.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Prontidão para tráfego: 503 até o aquecimento dos modelos críticos terminar"""
+    warmup = getattr(current_app, 'model_warmup', None)
+    ready = warmup is None or warmup.ready
+    
+    return jsonify({
+        'success': ready,
+        'data': {
+            'ready': ready,
+            'warmup': warmup.get_status() if warmup else None,
+            'timestamp': datetime.now().isoformat()
+        }
+    }), 200 if ready else 503
+
+@health_bp.route('/health/hedging', methods=['GET'])
+def hedging_status():
+    """Prazos dos endpoints de emergência: acertos, perdas e respostas tardias"""
+    from services.hedging import get_hedged_generations
+    
+    return jsonify({
+        'success': True,
+        'data': get_hedged_generations().get_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
 @health_bp.route('/health/dependencies', methods=['GET'])
 def check_dependencies():
     """Verificar dependências do sistema"""
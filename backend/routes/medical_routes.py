@@ -11,13 +11,18 @@ para comunidades rurais da Guiné-Bissau.
 import logging
 from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
-from config.settings import SystemPrompts
+from config.settings import BackendConfig, SystemPrompts
 from utils.error_handler import create_error_response, log_error
+from utils.sse import single_response_events, sse_response
+from services.hedging import DONE, EXPIRED, PENDING, get_hedged_generations
 
 # Criar blueprint
 medical_bp = Blueprint('medical', __name__)
 logger = logging.getLogger(__name__)
 
+# Onde o cliente busca a resposta do modelo que perdeu o prazo
+HEDGE_RESULT_URL = '/api/medical/emergency/result'
+
 @medical_bp.route('/medical', methods=['POST'])
 def medical_consultation():
     """
@@ -165,6 +170,69 @@ def medical_consultation():
             500
         )), 500
 
+@medical_bp.route('/medical/stream', methods=['POST'])
+def medical_consultation_stream():
+    """
+    Consulta médica com resposta em stream (Server-Sent Events)
+    ---
+    tags:
+      - Medicina
+    summary: Consulta médica em stream
+    description: |
+      Mesmos parâmetros de /medical. Envia eventos `token` com o texto
+      incremental e um evento final `done` com a resposta processada,
+      informações médicas e métricas (tokens/s, tempo até o primeiro token).
+    responses:
+      200:
+        description: Stream text/event-stream
+      400:
+        description: Dados inválidos
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify(create_error_response(
+            'invalid_request',
+            'Dados JSON são obrigatórios',
+            400
+        )), 400
+    
+    prompt = data.get('prompt') or data.get('question') or data.get('query')
+    if not prompt:
+        return jsonify(create_error_response(
+            'missing_prompt',
+            'Campo "prompt", "question" ou "query" é obrigatório',
+            400
+        )), 400
+    
+    urgency = data.get('urgency', 'normal')
+    medical_context = _prepare_medical_context(
+        prompt, data.get('symptoms', []), urgency, data.get('patient_age'), data.get('patient_gender')
+    )
+    
+    gemma_service = getattr(current_app, 'gemma_service', None)
+    if not gemma_service:
+        return sse_response(single_response_events(_get_medical_fallback_response(prompt, urgency)))
+    
+    def add_medical_info(final):
+        final['medical_info'] = {
+            'urgency_level': urgency,
+            'recommendation': _get_urgency_recommendation(urgency),
+            'disclaimer': "Esta orientação não substitui consulta médica profissional. Em emergências, procure imediatamente o centro de saúde mais próximo."
+        }
+        return final
+    
+    return sse_response(
+        gemma_service.generate_response_stream(
+            medical_context,
+            SystemPrompts.MEDICAL,
+            temperature=0.3,
+            max_new_tokens=400
+        ),
+        on_done=add_medical_info
+    )
+
 @medical_bp.route('/medical/emergency', methods=['POST'])
 def emergency_guidance():
     """Orientações para emergências médicas"""
@@ -195,13 +263,20 @@ def emergency_guidance():
         gemma_service = getattr(current_app, 'gemma_service', None)
         
         if gemma_service:
-            # Gerar resposta usando Gemma
-            response = gemma_service.generate_response(
-                emergency_context,
-                SystemPrompts.MEDICAL,
-                temperature=2.0,  # Temperatura entre 1-3 para emergências médicas com gemma3n:e4b
-                max_new_tokens=300
+            # Gerar resposta usando Gemma, com prazo: depois dele vale o protocolo
+            # A geração roda no pool do hedging, fora do contexto da requisição
+            endpoint = request.endpoint
+            outcome = get_hedged_generations().run(
+                'medical_emergency',
+                lambda: gemma_service.generate_response(
+                    emergency_context,
+                    SystemPrompts.MEDICAL,
+                    temperature=2.0,  # Temperatura entre 1-3 para emergências médicas com gemma3n:e4b
+                    max_new_tokens=300,
+                    endpoint=endpoint
+                )
             )
+            response = outcome.result if outcome.completed else {}
             
             if response.get('success'):
                 # Adicionar informações específicas de emergência
@@ -215,8 +290,9 @@ def emergency_guidance():
                     'gemma_used': True
                 }
             else:
-                # Fallback se Gemma falhar
+                # Fallback se Gemma falhar ou perder o prazo
                 emergency_data = _get_emergency_fallback_response(emergency_type, description)
+                emergency_data['model_pending'] = outcome.pending_info(HEDGE_RESULT_URL)
         else:
             # Resposta de fallback se Gemma não estiver disponível
             emergency_data = _get_emergency_fallback_response(emergency_type, description)
@@ -258,11 +334,35 @@ def first_aid_guide():
         # Obter guia de primeiros socorros
         first_aid_steps = _get_first_aid_steps(situation)
         
+        # Orientação do Gemma apenas se chegar dentro do prazo; os passos básicos sempre vão
+        ai_guidance = None
+        model_pending = None
+        gemma_service = getattr(current_app, 'gemma_service', None)
+        if gemma_service:
+            # A geração roda no pool do hedging, fora do contexto da requisição
+            endpoint = request.endpoint
+            outcome = get_hedged_generations().run(
+                'medical_first_aid',
+                lambda: gemma_service.generate_response(
+                    _prepare_first_aid_context(situation),
+                    SystemPrompts.MEDICAL,
+                    temperature=0.3,
+                    max_new_tokens=300,
+                    endpoint=endpoint
+                )
+            )
+            if outcome.completed and outcome.result.get('success'):
+                ai_guidance = outcome.result.get('response', '')
+            else:
+                model_pending = outcome.pending_info(HEDGE_RESULT_URL)
+        
         return jsonify({
             'success': True,
             'data': {
                 'situation': situation,
                 'steps': first_aid_steps,
+                'ai_guidance': ai_guidance,
+                'model_pending': model_pending,
                 'important_notes': [
                     "Mantenha a calma",
                     "Avalie a segurança do local",
@@ -282,6 +382,63 @@ def first_aid_guide():
             500
         )), 500
 
+@medical_bp.route('/medical/emergency/result/<ticket_id>', methods=['GET'])
+def emergency_model_result(ticket_id):
+    """Resposta do modelo que perdeu o prazo de um endpoint de emergência
+
+    Use ``?wait=<segundos>`` para aguardar (máx. 30s) ou ``?stream=1`` para
+    receber a resposta por SSE assim que ficar pronta.
+    """
+    hedged = get_hedged_generations()
+    ticket = hedged.get_ticket(ticket_id)
+    if ticket is None:
+        return jsonify({
+            'success': False,
+            'status': EXPIRED,
+            'message': 'Resposta não encontrada ou expirada'
+        }), 404
+    
+    if request.args.get('stream'):
+        def events():
+            status = hedged.wait(ticket, timeout=BackendConfig.HEDGE_RESULT_TTL)
+            result = ticket.future.result() if status == DONE else {
+                'success': False, 'response': '', 'status': status
+            }
+            yield from single_response_events(result)
+        return sse_response(events())
+    
+    try:
+        wait = min(float(request.args.get('wait', 0)), 30.0)
+    except ValueError:
+        wait = 0.0
+    status = hedged.wait(ticket, timeout=wait)
+    result = ticket.future.result() if status == DONE else None
+    
+    return jsonify({
+        'success': status == DONE and bool(result and result.get('success')),
+        'status': status,
+        'data': result,
+        'timestamp': datetime.now().isoformat()
+    }), 202 if status == PENDING else 200
+
+@medical_bp.route('/medical/emergency/result/<ticket_id>', methods=['DELETE'])
+def cancel_emergency_model_result(ticket_id):
+    """Cancelar a geração pendente (o cliente já não precisa da resposta do modelo)"""
+    hedged = get_hedged_generations()
+    ticket = hedged.get_ticket(ticket_id)
+    if ticket is None:
+        return jsonify({'success': False, 'status': EXPIRED}), 404
+    hedged.cancel(ticket, 'cancelada pelo cliente')
+    return jsonify({'success': True, 'status': ticket.status})
+
+def _prepare_first_aid_context(situation):
+    """Preparar contexto para orientação de primeiros socorros"""
+    context = f"PRIMEIROS SOCORROS: {situation}"
+    context += "\n\nForneça passos curtos, numerados e práticos de primeiros socorros para esta situação,"
+    context += " usando materiais disponíveis em comunidades rurais da Guiné-Bissau."
+    context += "\n\nResposta em português."
+    return context
+
 def _prepare_medical_context(prompt, symptoms, urgency, age, gender):
     """Preparar contexto médico para a consulta"""
     context = f"Consulta médica: {prompt}"
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from services.model_selector import ModelSelector
 from services.gemma_service import GemmaService
+from services.ollama_inventory import get_ollama_inventory
 from config.settings import BackendConfig
 import logging
 from typing import Dict, Any
@@ -285,6 +286,43 @@ def clear_model_cache():
             'error': str(e)
         }), 500
 
+@model_management_bp.route('/ollama', methods=['GET'])
+def get_ollama_inventory_status():
+    """Listar modelos instalados no Ollama (inventário em memória)"""
+    try:
+        return jsonify({
+            'success': True,
+            'inventory': get_ollama_inventory().get_stats()
+        })
+        
+    except Exception as e:
+        logger.error(f"Erro ao obter inventário do Ollama: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@model_management_bp.route('/ollama/pull', methods=['POST'])
+def pull_ollama_model():
+    """Baixar um modelo no Ollama e atualizar o inventário"""
+    data = request.get_json() or {}
+    model_name = data.get('model_name')
+    
+    if not model_name:
+        return jsonify({
+            'success': False,
+            'error': 'Nome do modelo é obrigatório'
+        }), 400
+    
+    result = get_ollama_inventory().pull(model_name)
+    return jsonify(result), 200 if result.get('success') else 502
+
+@model_management_bp.route('/ollama/<path:model_name>', methods=['DELETE'])
+def delete_ollama_model(model_name: str):
+    """Remover um modelo do Ollama e atualizar o inventário"""
+    result = get_ollama_inventory().delete(model_name)
+    return jsonify(result), 200 if result.get('success') else 502
+
 @model_management_bp.route('/health', methods=['GET'])
 def health_check():
     """Verificação de saúde do sistema de modelos"""
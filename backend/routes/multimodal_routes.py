@@ -596,10 +596,10 @@ def _analyze_text_content(text, analysis_type, language, context):
 def _analyze_image_content(image_data, analysis_type, context):
     """Analisar conteúdo de imagem usando Gemma-3n"""
     try:
-        from services.gemma_service import GemmaService
+        from services.gemma_registry import get_gemma_service
         from config.system_prompts import SystemPrompts
         
-        gemma_service = GemmaService()
+        gemma_service = get_gemma_service()
         
         # Prompt específico para deficientes visuais
         accessibility_prompt = f"""
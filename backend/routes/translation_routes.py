@@ -18,7 +18,9 @@ import base64
 from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
 from config.settings import SystemPrompts
+from services.request_deadline import DeadlineExceeded, check_deadline
 from utils.error_handler import create_error_response, log_error
+from utils.response_parser import FieldSpec, ResponseSpec, SectionSpec, percent, register_parser, split_items
 
 # Criar blueprint
 translation_bp = Blueprint('translation', __name__)
@@ -82,11 +84,16 @@ def translate_multimodal():
             gemma_service, text_input, audio_data, image_data, video_data
         )
         
+        # Cada etapa só começa se ainda houver prazo para a requisição
+        check_deadline()
+
         # Detecção de contexto emocional e cultural
         emotional_context = _analyze_emotional_context(
             gemma_service, multimodal_analysis, emotional_tone
         )
         
+        check_deadline()
+
         # Tradução contextual avançada
         translation_result = _perform_contextual_translation(
             gemma_service,
@@ -100,11 +107,15 @@ def translate_multimodal():
             user_profile
         )
         
+        check_deadline()
+
         # Gerar explicações culturais
         cultural_insights = _generate_cultural_insights(
             gemma_service, translation_result, source_language, target_language
         )
         
+        check_deadline()
+
         # Sugestões de aprendizado personalizado
         learning_suggestions = _generate_learning_suggestions(
             gemma_service, translation_result, user_profile
@@ -124,6 +135,9 @@ def translate_multimodal():
             'timestamp': datetime.now().isoformat()
         })
         
+    except DeadlineExceeded:
+        # Tratado pelo handler de prazo (HTTP 504)
+        raise
     except Exception as e:
         log_error(logger, e, "tradução multimodal")
         return jsonify(create_error_response(
@@ -729,13 +743,7 @@ def _perform_contextual_translation(gemma_service, multimodal_analysis, emotiona
         max_new_tokens=600
     )
     
-    return {
-        'primary_translation': _extract_primary_translation(response.get('response', '')),
-        'alternatives': _extract_alternative_translations(response.get('response', '')),
-        'cultural_explanations': _extract_cultural_explanations(response.get('response', '')),
-        'usage_notes': _extract_usage_notes(response.get('response', '')),
-        'confidence': _extract_confidence_score(response.get('response', ''))
-    }
+    return _parse_contextual_translation(response.get('response', ''))
 
 def _generate_cultural_insights(gemma_service, translation_result, source_lang, target_lang):
     """Gerar insights culturais profundos"""
@@ -815,34 +823,72 @@ def _extract_adaptation_needed(response):
 def _extract_primary_translation(response):
     return response.split('\n')[0] if response else "Tradução não disponível"
 
-def _extract_alternative_translations(response):
-    return ["Alternativa 1", "Alternativa 2"]
+# Seções numeradas pedidas nos prompts de tradução avançada
+CONTEXTUAL_TRANSLATION_PARSER = register_parser(ResponseSpec(
+    name='translation.contextual',
+    fields=(
+        FieldSpec('confidence', r'confiança', value=r'[^\n\d]*(\d{1,3})\s*%', convert=percent),
+    ),
+    sections=(
+        SectionSpec('primary_translation', (r'tradução principal',)),
+        SectionSpec('alternatives', (r'traduç(?:ões|ão) alternativas?',), as_list=True),
+        SectionSpec('cultural_explanations', (r'explicaç(?:ões|ão) cultura(?:is|l)',), as_list=True),
+        SectionSpec('usage_notes', (r'notas? de uso',), as_list=True),
+        SectionSpec('confidence_section', (r'nível de confiança',)),
+    )
+))
 
-def _extract_cultural_explanations(response):
-    return ["Explicação cultural 1"]
+CULTURAL_INSIGHTS_PARSER = register_parser(ResponseSpec(
+    name='translation.cultural_insights',
+    sections=(
+        SectionSpec('conceptual_differences', (r'diferenças conceituais',), as_list=True),
+        SectionSpec('nuances', (r'nuances[^\n:*]*',), as_list=True),
+        SectionSpec('historical_context', (r'contexto histórico[^\n:*]*',)),
+        SectionSpec('recommendations', (r'recomendações[^\n:*]*',), as_list=True),
+        SectionSpec('sensitivities', (r'sensibilidades[^\n:*]*',), as_list=True),
+    )
+))
 
-def _extract_usage_notes(response):
-    return ["Nota de uso 1"]
+LEARNING_SUGGESTIONS_PARSER = register_parser(ResponseSpec(
+    name='translation.learning_suggestions',
+    sections=(
+        SectionSpec('improvement_points', (r'pontos de melhoria',), as_list=True),
+        SectionSpec('exercises', (r'exercícios[^\n:*]*',), as_list=True),
+        SectionSpec('resources', (r'recursos[^\n:*]*',), as_list=True),
+        SectionSpec('next_steps', (r'próximos passos',), as_list=True),
+        SectionSpec('goals', (r'metas[^\n:*]*',), as_list=True),
+    )
+))
 
-def _extract_confidence_score(response):
-    return 0.85
+def _parse_contextual_translation(response):
+    parsed = CONTEXTUAL_TRANSLATION_PARSER.parse(response)
+    primary = split_items(parsed.get('primary_translation', ''))
+    return {
+        'primary_translation': primary[0] if primary else _extract_primary_translation(response),
+        'alternatives': parsed.get('alternatives', []),
+        'cultural_explanations': parsed.get('cultural_explanations', []),
+        'usage_notes': parsed.get('usage_notes', []),
+        'confidence': parsed.get('confidence', 0.85)
+    }
 
 def _parse_cultural_insights(response):
+    parsed = CULTURAL_INSIGHTS_PARSER.parse(response)
     return {
-        'conceptual_differences': ["Diferença 1"],
-        'nuances': ["Nuance 1"],
-        'historical_context': "Contexto histórico",
-        'recommendations': ["Recomendação 1"],
-        'sensitivities': ["Sensibilidade 1"]
+        'conceptual_differences': parsed.get('conceptual_differences', []),
+        'nuances': parsed.get('nuances', []),
+        'historical_context': parsed.get('historical_context', ''),
+        'recommendations': parsed.get('recommendations', []),
+        'sensitivities': parsed.get('sensitivities', [])
     }
 
 def _parse_learning_suggestions(response):
+    parsed = LEARNING_SUGGESTIONS_PARSER.parse(response)
     return {
-        'improvement_points': ["Ponto 1"],
-        'exercises': ["Exercício 1"],
-        'resources': ["Recurso 1"],
-        'next_steps': ["Próximo passo 1"],
-        'goals': ["Meta 1"]
+        'improvement_points': parsed.get('improvement_points', []),
+        'exercises': parsed.get('exercises', []),
+        'resources': parsed.get('resources', []),
+        'next_steps': parsed.get('next_steps', []),
+        'goals': parsed.get('goals', [])
     }
 
 # Funções auxiliares adicionais
@@ -13,6 +13,7 @@ from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
 from config.settings import SystemPrompts
 from utils.error_handler import create_error_response, log_error
+from services.hedging import get_hedged_generations
 
 # Criar blueprint
 voice_guide_bp = Blueprint('voice_guide', __name__)
@@ -309,11 +310,33 @@ def emergency_voice_assistance():
                 400
             )), 400
         
-        # Processar emergência
+        # Processar emergência (protocolo determinístico, sempre disponível)
         emergency_response = _process_emergency_voice_assistance(
             emergency_type, voice_input, user_location, user_condition, language
         )
         
+        # Orientação do Gemma apenas se chegar dentro do prazo do guia de voz
+        ai_guidance = None
+        model_pending = None
+        gemma_service = getattr(current_app, 'gemma_service', None)
+        if gemma_service:
+            # A geração roda no pool do hedging, fora do contexto da requisição
+            endpoint = request.endpoint
+            outcome = get_hedged_generations().run(
+                'voice_guide_emergency',
+                lambda: gemma_service.generate_response(
+                    _prepare_emergency_voice_context(emergency_type, voice_input, user_location, user_condition),
+                    SystemPrompts.MEDICAL,
+                    temperature=0.3,
+                    max_new_tokens=200,
+                    endpoint=endpoint
+                )
+            )
+            if outcome.completed and outcome.result.get('success'):
+                ai_guidance = outcome.result.get('response', '')
+            else:
+                model_pending = outcome.pending_info('/api/medical/emergency/result')
+        
         return jsonify({
             'success': True,
             'data': {
@@ -321,6 +344,8 @@ def emergency_voice_assistance():
                 'user_location': user_location,
                 'user_condition': user_condition,
                 'emergency_response': emergency_response,
+                'ai_guidance': ai_guidance,
+                'model_pending': model_pending,
                 'immediate_actions': _get_immediate_emergency_actions(emergency_type),
                 'emergency_contacts': _get_emergency_contacts(),
                 'voice_instructions': _generate_emergency_voice_instructions(emergency_type, user_condition),
@@ -722,6 +747,17 @@ def _generate_follow_up_questions(feedback_type):
     
     return questions.get(feedback_type, ["Tem mais algum comentário?"])
 
+def _prepare_emergency_voice_context(emergency_type, voice_input, location, condition):
+    """Preparar contexto curto (para leitura em voz alta) de uma emergência"""
+    context = f"EMERGÊNCIA ({emergency_type or 'não especificada'})"
+    if voice_input:
+        context += f"\nRelato do usuário: {voice_input}"
+    if location:
+        context += f"\nLocalização: {location}"
+    context += f"\nCondição do usuário: {condition}"
+    context += "\n\nDê no máximo 4 instruções curtas e claras, para serem lidas em voz alta, em português."
+    return context
+
 def _process_emergency_voice_assistance(emergency_type, voice_input, location, condition, language):
     """Processar assistência de voz para emergência"""
     emergency_responses = {
@@ -9,11 +9,13 @@ com foco em saúde comunitária e prevenção.
 """
 
 import logging
-import re
 from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
 from config.settings import SystemPrompts
+from services.text_signals import analyze_text
 from utils.error_handler import create_error_response, log_error
+from utils.response_parser import ResponseSpec, SectionSpec, register_parser
+from utils.sse import single_response_events, sse_response
 
 # Criar blueprint
 wellness_bp = Blueprint('wellness', __name__)
@@ -173,6 +175,83 @@ def wellness_content():
             500
         )), 500
 
+@wellness_bp.route('/wellness/stream', methods=['POST'])
+def wellness_content_stream():
+    """
+    Conteúdo de bem-estar com resposta em stream (Server-Sent Events)
+    ---
+    tags:
+      - Bem-estar
+    summary: Conteúdo de bem-estar em stream
+    description: |
+      Mesmos parâmetros de /wellness. Envia eventos `token` com o texto
+      incremental e um evento final `done` com o conteúdo estruturado e
+      métricas (tokens/s, tempo até o primeiro token).
+    responses:
+      200:
+        description: Stream text/event-stream
+      400:
+        description: Dados inválidos
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify(create_error_response(
+            'invalid_request',
+            'Dados JSON são obrigatórios',
+            400
+        )), 400
+    
+    prompt = data.get('prompt') or data.get('question') or data.get('query')
+    if not prompt:
+        return jsonify(create_error_response(
+            'missing_prompt',
+            'Campo "prompt", "question" ou "query" é obrigatório',
+            400
+        )), 400
+    
+    content_type = data.get('type', 'breathing')
+    duration = data.get('duration', 5)
+    difficulty = data.get('difficulty', 'beginner')
+    language = data.get('language', 'português')
+    wellness_context = _prepare_wellness_content_context(
+        prompt, content_type, duration, difficulty, language
+    )
+    
+    gemma_service = getattr(current_app, 'gemma_service', None)
+    if not gemma_service:
+        content_data = _get_wellness_content_fallback(content_type, duration, difficulty, language)
+        return sse_response(single_response_events({
+            'response': content_data['content'],
+            'data': content_data,
+            'fallback': True
+        }))
+    
+    def add_wellness_content(final):
+        if final.get('success'):
+            content_data = _process_wellness_content_response(final.get('response', ''), content_type, duration)
+        else:
+            content_data = _get_wellness_content_fallback(content_type, duration, difficulty, language)
+        final['data'] = {
+            **content_data,
+            'duration': duration,
+            'type': content_type,
+            'difficulty': difficulty,
+            'language': language
+        }
+        return final
+    
+    return sse_response(
+        gemma_service.generate_response_stream(
+            wellness_context,
+            SystemPrompts.WELLNESS,
+            temperature=1.6,
+            max_new_tokens=500
+        ),
+        on_done=add_wellness_content
+    )
+
 @wellness_bp.route('/wellness/mood-analysis', methods=['POST'])
 def mood_analysis():
     """
@@ -868,12 +947,7 @@ def _get_wellness_fallback_response(prompt, wellness_area, urgency_level):
 
 def _is_mental_health_emergency(concern):
     """Verificar se é emergência de saúde mental"""
-    emergency_keywords = [
-        'suicidio', 'suicídio', 'matar', 'morrer', 'acabar com tudo',
-        'não aguento mais', 'sem saída', 'desespero total'
-    ]
-    concern_lower = concern.lower()
-    return any(keyword in concern_lower for keyword in emergency_keywords)
+    return analyze_text(concern).has('mental_health', 'emergency')
 
 def _get_mental_health_emergency_response():
     """Obter resposta para emergência de saúde mental"""
@@ -1594,6 +1668,78 @@ def chat_generic():
             500
         )), 500
 
+@wellness_bp.route('/chat/stream', methods=['POST'])
+def chat_generic_stream():
+    """
+    Chat genérico com resposta em stream (Server-Sent Events)
+    ---
+    tags:
+      - Bem-estar
+    summary: Chat genérico em stream
+    description: |
+      Mesmos parâmetros de /chat. Envia eventos `token` com o texto
+      incremental e um evento final `done` com a resposta completa e
+      métricas (tokens/s, tempo até o primeiro token).
+    responses:
+      200:
+        description: Stream text/event-stream
+      400:
+        description: Dados inválidos
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify(create_error_response(
+            'invalid_request',
+            'Dados JSON são obrigatórios',
+            400
+        )), 400
+    
+    message = data.get('message')
+    if not message:
+        return jsonify(create_error_response(
+            'missing_message',
+            'Campo "message" é obrigatório',
+            400
+        )), 400
+    
+    context = data.get('context', 'wellness_coaching')
+    language = data.get('language', 'pt-BR')
+    
+    if context == 'wellness_coaching':
+        prompt = f"Como coach de bem-estar para a comunidade da Guiné-Bissau, responda em {language}: {message}"
+    elif context == 'wellness_tips':
+        prompt = f"Como especialista em bem-estar, forneça dicas práticas em {language} para: {message}"
+    else:
+        prompt = f"Responda de forma útil e empática em {language}: {message}"
+    
+    gemma_service = getattr(current_app, 'gemma_service', None)
+    if not gemma_service:
+        return sse_response(single_response_events({
+            'response': _get_chat_fallback_response(message, context, language),
+            'context': context,
+            'fallback': True
+        }))
+    
+    def add_chat_context(final):
+        if not final.get('success'):
+            final['response'] = _get_chat_fallback_response(message, context, language)
+            final['fallback'] = True
+        final['answer'] = final.get('response', '')  # Compatibilidade
+        final['context'] = context
+        return final
+    
+    return sse_response(
+        gemma_service.generate_response_stream(
+            prompt,
+            SystemPrompts.WELLNESS,
+            temperature=1.4,
+            max_new_tokens=300
+        ),
+        on_done=add_chat_context
+    )
+
 def _get_chat_fallback_response(message, context, language):
     """Obter resposta de fallback para chat"""
     if 'pt' in language.lower():
@@ -2274,22 +2420,21 @@ def _get_default_benefits(content_type):
 
 # ================= FUNÇÕES AUXILIARES PARA ANÁLISE DE HUMOR =================
 
+# Seções numeradas pedidas no prompt de análise de humor
+MOOD_ANALYSIS_PARSER = register_parser(ResponseSpec(
+    name='wellness.mood_analysis',
+    sections=(
+        SectionSpec('insights', (r'1\.', r'insights:?')),
+        SectionSpec('recommendations', (r'2\.', r'recomendações:?')),
+        SectionSpec('coping_techniques', (r'3\.', r'técnicas:?')),
+        SectionSpec('exercises', (r'4\.', r'exercícios:?')),
+    )
+))
+
+
 def _parse_mood_analysis_response(response_text):
     """Parsear resposta estruturada da análise de humor do Gemma-3"""
-    analysis = {}
-    
-    # Patterns para extrair seções
-    patterns = {
-        'insights': re.compile(r'(?:1\.|INSIGHTS:?)([\s\S]*?)(?=(?:2\.|RECOMENDAÇÕES|TÉCNICAS|EXERCÍCIOS|\Z))', re.IGNORECASE),
-        'recommendations': re.compile(r'(?:2\.|RECOMENDAÇÕES:?)([\s\S]*?)(?=(?:3\.|TÉCNICAS|EXERCÍCIOS|\Z))', re.IGNORECASE),
-        'coping_techniques': re.compile(r'(?:3\.|TÉCNICAS:?)([\s\S]*?)(?=(?:4\.|EXERCÍCIOS|\Z))', re.IGNORECASE),
-        'exercises': re.compile(r'(?:4\.|EXERCÍCIOS:?)([\s\S]*?)\Z', re.IGNORECASE),
-    }
-    
-    for key, pattern in patterns.items():
-        match = pattern.search(response_text)
-        if match:
-            analysis[key] = match.group(1).strip()
+    analysis = MOOD_ANALYSIS_PARSER.parse(response_text)
     
     # Fallback se não conseguir parsear
     if not analysis:
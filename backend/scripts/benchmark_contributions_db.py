@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do repositório SQLite de contribuições
+Hackathon Gemma 3n
+
+Gera N contribuições sintéticas e compara, por operação das rotas
+colaborativas, as varreduras da antiga lista em memória (``contributions_db``)
+com as consultas indexadas do ``ContributionRepository`` num arquivo
+temporário. Mostra também o plano das consultas principais (``EXPLAIN
+QUERY PLAN``) para conferir que nenhuma percorre a tabela de contribuições.
+
+Uso:
+    python scripts/benchmark_contributions_db.py [--rows 200000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+# Adicionar o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database import contribution_repository as repo_module
+from database.contribution_repository import ContributionRepository
+from database.contribution_search import search_text
+
+WORDS = ['casa', 'comida', 'água', 'trabalho', 'dinheiro', 'tempo', 'pessoa', 'dor', 'febre',
+         'remédio', 'escola', 'livro', 'planta', 'colheita', 'semente', 'mãe', 'pai', 'família']
+LANGUAGES = ['gcr', 'ff', 'mnk', 'bal', 'pt']
+CATEGORIES = ['geral', 'health', 'agriculture', 'education', 'family']
+STATUSES = ['approved'] * 6 + ['pending'] * 3 + ['rejected']
+
+
+def make_contributions(rows: int, seed: int = 42):
+    rng = random.Random(seed)
+    contributions = []
+    for index in range(rows):
+        word = f"{rng.choice(WORDS)}{index}"
+        target = rng.choice(LANGUAGES[:-1])
+        contributions.append({
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'word': word,
+            'translation': f"{word}-{target}",
+            'source_language': 'pt',
+            'target_language': target,
+            'category': rng.choice(CATEGORIES),
+            'context': rng.choice(['', 'usado no mercado', 'saudação da manhã']),
+            'contributor_id': f"user{rng.randrange(rows // 20 + 1)}",
+            'audio_url': rng.choice([None, '/audio/x.wav']),
+            'image_url': None,
+            'created_at': '2026-01-01T00:00:00',
+            'status': rng.choice(STATUSES),
+            'votes': {'up': 0, 'down': 0},
+            'verified': False
+        })
+    return contributions
+
+
+# ----- Lista em memória (implementação antiga das rotas) -----
+
+def legacy_list(db, language, status, limit, offset):
+    filtered = [c for c in db if (c['source_language'] == language or c['target_language'] == language)]
+    filtered = [c for c in filtered if c['status'] == status]
+    return filtered[offset:offset + limit], len(filtered)
+
+
+def legacy_vote(db, contribution_id):
+    contribution = next((c for c in db if c['id'] == contribution_id), None)
+    contribution['votes']['down'] += 1
+
+
+def legacy_stats(db):
+    approved = [c for c in db if c['status'] == 'approved']
+    contributors = set(c['contributor_id'] for c in db if c['contributor_id'] != 'anonymous')
+    counts = {}
+    for c in approved:
+        counts[c['contributor_id']] = counts.get(c['contributor_id'], 0) + 1
+    top = sorted(counts.items(), key=lambda x: x[1], reverse=True)[:10]
+    return len(approved), len(contributors), top, set(c['category'] for c in approved)
+
+
+def legacy_progress(db, language):
+    return [c for c in db if (c['source_language'] == language or c['target_language'] == language)
+            and c['status'] == 'approved']
+
+
+def legacy_suggestions(db, language):
+    return set(c['word'].lower() for c in db if c['source_language'] == 'pt' and c['target_language'] == language)
+
+
+def legacy_search(db, query, language, limit):
+    results = []
+    for c in db:
+        if c['status'] != 'approved':
+            continue
+        if language and c['source_language'] != language and c['target_language'] != language:
+            continue
+        if query in c['word'].lower() or query in c['translation'].lower() or query in c['context'].lower():
+            results.append(c)
+    return results[:limit]
+
+
+def timed(fn, repeat: int) -> float:
+    """Milissegundos por chamada"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    db = make_contributions(args.rows)
+    directory = tempfile.mkdtemp()
+    repository = ContributionRepository(os.path.join(directory, 'contributions.db'))
+    started = time.perf_counter()
+    connection = repository._connection()
+    with repository._transaction():
+        for contribution in db:
+            connection.execute(repo_module._INSERT, (
+                contribution['id'], contribution['word'], contribution['word'].lower(),
+                contribution['translation'], contribution['source_language'], contribution['target_language'],
+                contribution['category'], contribution['context'],
+                search_text(contribution['word'], contribution['translation'], contribution['context']),
+                contribution['contributor_id'], contribution['audio_url'], None, contribution['status'], 0,
+                contribution['created_at'], contribution['created_at']
+            ))
+    connection.execute("ANALYZE")
+    print(f"📦 {args.rows} contribuições gravadas em {time.perf_counter() - started:.1f}s")
+
+    target_id = db[-1]['id']
+    _, deep_cursor = repository.list_contributions(language='ff', status='approved',
+                                                   limit=args.rows // 10)
+    operations = [
+        ('vote-contribution', lambda: legacy_vote(db, target_id),
+         lambda: repository.vote(target_id, 'down')),
+        ('contributions (1ª página)', lambda: legacy_list(db, 'ff', 'approved', 50, 0),
+         lambda: (repository.list_contributions(language='ff', status='approved', limit=50),
+                  repository.count(language='ff', status='approved'))),
+        ('contributions (página funda)', lambda: legacy_list(db, 'ff', 'approved', 50, args.rows // 10),
+         lambda: repository.list_contributions(language='ff', status='approved', limit=50, after=deep_cursor)),
+        ('community-stats', lambda: legacy_stats(db), repository.community_stats),
+        ('language-progress', lambda: legacy_progress(db, 'ff'), lambda: repository.language_progress('ff')),
+        ('word-suggestions', lambda: legacy_suggestions(db, 'gcr'),
+         lambda: repository.existing_words('pt', 'gcr', WORDS)),
+        ('search (termo comum)', lambda: legacy_search(db, 'mercado', 'ff', 20),
+         lambda: repository.search('mercado', language='ff', limit=20)),
+        ('search (termo raro)', lambda: legacy_search(db, 'febre1234', None, 20),
+         lambda: repository.search('febre1234', limit=20)),
+        ('search (sem acento)', lambda: legacy_search(db, 'saudacao', None, 20),
+         lambda: repository.search('saudacao', limit=20)),
+        ('search (prefixo)', lambda: legacy_search(db, 'rem', None, 20),
+         lambda: repository.search('rem', limit=20)),
+        ('search (grafia crioula)', lambda: legacy_search(db, 'kumida', None, 20),
+         lambda: repository.search('kumida', limit=20)),
+    ]
+
+    print(f"{'operação':30s} {'lista (ms)':>11} {'SQLite (ms)':>12}")
+    for name, legacy, current in operations:
+        legacy_ms = timed(legacy, args.repeat)
+        current_ms = timed(current, args.repeat)
+        print(f"{name:30s} {legacy_ms:>11.2f} {current_ms:>12.2f}")
+
+    print("\nPlanos de consulta:")
+    plans = {
+        'voto': (repo_module._SELECT_VOTES, (target_id,)),
+        'página por idioma/status': (
+            "SELECT seq FROM contributions WHERE (source_language = ? OR target_language = ?) "
+            "AND validation_status = ? AND seq > ? ORDER BY seq LIMIT 50", ('ff', 'ff', 'approved', 0)),
+        'top contribuidores': (repo_module._TOP_CONTRIBUTORS, (10,)),
+        'progresso do idioma': (repo_module._LANGUAGE_PROGRESS, ('ff', 'ff')),
+    }
+    for name, (sql, params) in plans.items():
+        details = [row[-1] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        print(f"  {name}: {' | '.join(details)}")
+
+
+if __name__ == '__main__':
+    main()
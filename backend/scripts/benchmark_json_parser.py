@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da extração de JSON das respostas do Gemma
+Hackathon Gemma 3n
+
+Compara a implementação antiga de ``safe_parse_llm_json`` (regex gulosa
+``\\{.*\\}`` com DOTALL, ~15 substituições sobre a resposta inteira e
+remoção de todo caractere não ASCII no último recurso) com o scanner de
+chaves balanceadas e reparos pontuais. Para cada uma informa:
+
+- taxa de parse: respostas com um objeto extraído e respostas cujo objeto
+  é igual ao esperado (acentos preservados, valores intactos);
+- tempo por KB de resposta;
+- tempo em entradas patológicas (muitas ``{`` sem fechamento), onde a
+  regex gulosa é quadrática.
+
+Corpus: ``scripts/json_parser_corpus.jsonl`` (uma resposta por linha, com
+``response``, ``expected`` e ``kind``), com as falhas de formatação que o
+Gemma produz nos endpoints que pedem JSON: markdown em volta, prosa com
+chaves, vírgulas sobrando ou faltando, chaves sem aspas, aspas simples,
+literais do Python, aspas internas, decimais com espaço, respostas
+truncadas. Outros arquivos no mesmo formato com ``--corpus``.
+
+Uso:
+    python scripts/benchmark_json_parser.py --repeat 200
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Adicionar o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.json_parser import safe_parse_llm_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS = Path(__file__).parent / 'json_parser_corpus.jsonl'
+
+
+def legacy_safe_parse_llm_json(response: str) -> Optional[Dict[Any, Any]]:
+    """``safe_parse_llm_json`` antes do scanner (regex sobre a resposta inteira)"""
+    if not isinstance(response, str):
+        logger.error("Resposta não é string.")
+        return None
+
+    # 1. Limpeza inicial: remover caracteres de controle e normalizar quebras
+    cleaned = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', response)
+    cleaned = cleaned.replace('\r\n', '\n').replace('\r', '\n')
+
+    # 2. Remover blocos markdown de código (com ou sem 'json')
+    cleaned = re.sub(r'```(?:json)?\s*', '', cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(r'```$', '', cleaned)
+
+    # 3. Extrair conteúdo entre { } (possível JSON) - versão simplificada
+    json_match = re.search(r'\{.*\}', cleaned, re.DOTALL)
+    if not json_match:
+        logger.warning("Nenhum bloco JSON encontrado na resposta.")
+        return None
+
+    json_str = json_match.group(0)
+
+    logger.info(f"🔍 JSON bruto extraído: {json_str[:300]}...")
+
+    # 4. Correções comuns
+    fix_mapping = {
+        r'speciees': 'species',
+        r'true': 'true',  # garantir booleanos
+        r'false': 'false',
+        r'null': 'null',
+    }
+    for bad, good in fix_mapping.items():
+        json_str = re.sub(rf'\b{bad}\b', good, json_str, flags=re.IGNORECASE)
+
+    # 5. Corrigir números decimais com espaços
+    json_str = re.sub(r'(\d+)\s*\.\s*(\d+)', r'\1.\2', json_str)
+    json_str = re.sub(r':\s*([0-9]+\s*\.\s*[0-9]+)', r': \1', json_str)
+
+    # 6. Corrigir espaços em torno de vírgulas, dois pontos e chaves
+    json_str = re.sub(r'\s*,\s*', ', ', json_str)
+    json_str = re.sub(r'\s*:\s*', ': ', json_str)
+    json_str = re.sub(r'\{\s*', '{', json_str)
+    json_str = re.sub(r'\s*\}', '}', json_str)
+    json_str = re.sub(r'\[\s*', '[', json_str)
+    json_str = re.sub(r'\s*\]', ']', json_str)
+
+    # 7. Garantir aspas duplas em chaves e strings
+    # Corrigir aspas simples para duplas (cuidado: não dentro de strings!)
+    # Simplificação: assumir que chaves estão sem aspas ou com aspas simples
+    json_str = re.sub(r'([{,])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:', r'\1"\2":', json_str)
+
+    # 8. Corrigir strings com aspas simples para duplas (caso simples)
+    # Aviso: isso pode falhar em strings complexas, mas ajuda em casos simples
+    def replace_single_quotes(match):
+        content = match.group(1)
+        return f'"{content}"'
+
+    json_str = re.sub(r'"\s*:\s*\'([^\']*)\'', lambda m: f'": "{m.group(1)}"', json_str)
+    json_str = re.sub(r':\s*\'([^\']*)\'', lambda m: f': "{m.group(1)}"', json_str)
+
+    logger.info(f"🔧 JSON após correções básicas: {json_str[:300]}...")
+
+    # 9. Tentar parse com json.loads
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError as e:
+        logger.warning(f"Primeira tentativa de parse falhou: {e}")
+
+    # 10. Última tentativa: limpeza agressiva (só ASCII, espaços, etc)
+    aggressive = re.sub(r'[^\x20-\x7E]', '', json_str)  # Remove não-ASCII
+    aggressive = re.sub(r'\s+', ' ', aggressive)  # Espaços múltiplos → um espaço
+    aggressive = aggressive.strip()
+
+    # Fechar chaves faltando (tentativa simples)
+    open_braces = aggressive.count('{')
+    close_braces = aggressive.count('}')
+    if open_braces > close_braces:
+        aggressive += '}' * (open_braces - close_braces)
+    elif close_braces > open_braces:
+        aggressive = '{' * (close_braces - open_braces) + aggressive
+
+    # Fechar colchetes, se aplicável
+    if '[' in aggressive and ']' not in aggressive:
+        aggressive += ']'
+
+    logger.info(f"🔧 JSON após limpeza agressiva: {aggressive[:300]}...")
+
+    try:
+        result = json.loads(aggressive)
+        logger.info("✅ JSON parseado com sucesso após limpeza agressiva!")
+        return result
+    except json.JSONDecodeError as e:
+        logger.error(f"❌ Falha ao parsear JSON mesmo após limpeza: {e}")
+        logger.debug(f"Texto final tentado: {aggressive}")
+        return None
+
+
+def load_corpus(paths):
+    cases = []
+    for path in paths:
+        for line in Path(path).read_text(encoding='utf-8').splitlines():
+            if line.strip():
+                cases.append(json.loads(line))
+    return cases
+
+
+def parse_rate(fn, cases):
+    """(com objeto extraído, objeto igual ao esperado), excluindo os casos sem JSON"""
+    extracted = correct = 0
+    for case in cases:
+        result = fn(case['response'])
+        if case['expected'] is not None and result is not None:
+            extracted += 1
+        if result == case['expected']:
+            correct += 1
+    return extracted, correct
+
+
+def ms_per_kb(fn, texts, repeat: int) -> float:
+    size_kb = sum(len(text.encode('utf-8')) for text in texts) * repeat / 1024
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - started) * 1000 / size_kb
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', action='append', default=[])
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    # Os logs por chamada (INFO na versão antiga) não entram na medição
+    logging.disable(logging.CRITICAL)
+
+    cases = load_corpus(args.corpus or [DEFAULT_CORPUS])
+    with_json = sum(1 for case in cases if case['expected'] is not None)
+    print(f"📚 Corpus: {len(cases)} respostas ({with_json} com JSON)")
+
+    for name, fn in (('antigo ', legacy_safe_parse_llm_json), ('scanner', safe_parse_llm_json)):
+        extracted, correct = parse_rate(fn, cases)
+        speed = ms_per_kb(fn, [case['response'] for case in cases], args.repeat)
+        print(f"{name}  extraídos: {extracted}/{with_json}   corretos: {correct}/{len(cases)}   {speed:.3f} ms/KB")
+
+    for name, fn in (('antigo ', legacy_safe_parse_llm_json), ('scanner', safe_parse_llm_json)):
+        timings = []
+        for size in (2000, 4000, 8000):
+            # Resposta cortada cheia de chaves abertas: a regex gulosa tenta cada '{'
+            text = '{"a": ' * size
+            started = time.perf_counter()
+            fn(text)
+            timings.append(f"{size} chaves: {(time.perf_counter() - started) * 1000:8.1f} ms")
+        print(f"{name}  patológico   " + "   ".join(timings))
+
+    mismatches = [case['kind'] for case in cases if safe_parse_llm_json(case['response']) != case['expected']]
+    if mismatches:
+        print(f"Casos com resultado diferente do esperado: {', '.join(mismatches)}")
+
+
+if __name__ == '__main__':
+    main()
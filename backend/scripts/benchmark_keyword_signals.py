@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da detecção de contexto e criticidade
+Hackathon Gemma 3n
+
+Compara, em prompts longos, as varreduras antigas (``text.lower()`` seguido
+de um ``keyword in text`` por palavra-chave, repetidas em cada detector) com
+a passada única do ``KeywordMatcher`` em ``services.text_signals``.
+
+Uso:
+    python scripts/benchmark_keyword_signals.py [--repeat 200]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Adicionar o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.text_signals import SIGNAL_GROUPS, analyze_text
+
+VOCABULARY = (
+    "a comunidade de bafatá precisa plantar arroz antes da chuva e o agricultor "
+    "quer saber como cuidar do solo da horta enquanto a criança tem febre e dor "
+    "de cabeça desde ontem a mãe pergunta ao professor sobre a escola e sobre o "
+    "tempo seco no norte da guiné-bissau onde a água do poço está turva"
+).split()
+
+
+def make_prompt(words: int, seed: int) -> str:
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def legacy_first(text: str, group: str):
+    text_lower = text.lower()
+    for label, keywords in SIGNAL_GROUPS[group].items():
+        if any(keyword in text_lower for keyword in keywords):
+            return label
+    return None
+
+
+def legacy_best(text: str, group: str):
+    text_lower = text.lower()
+    scores = {}
+    for label, keywords in SIGNAL_GROUPS[group].items():
+        score = sum(1 for keyword in keywords if keyword in text_lower)
+        if score > 0:
+            scores[label] = score
+    return max(scores, key=scores.get) if scores else None
+
+
+def legacy_request(text: str):
+    """Detectores chamados em uma requisição de geração antes da mudança"""
+    return (
+        legacy_first(text, 'criticality'),       # _resolve_criticality
+        legacy_first(text, 'response_context'),  # domínio do cache
+        legacy_best(text, 'context'),            # select_model
+        legacy_first(text, 'criticality'),       # select_model
+        legacy_first(text, 'response_context'),  # formatação da resposta
+    )
+
+
+def matcher_request(text: str):
+    signals = analyze_text(text)
+    return (
+        signals.first('criticality'),
+        signals.first('response_context'),
+        signals.best('context'),
+        analyze_text(text).first('criticality'),
+        analyze_text(text).first('response_context'),
+    )
+
+
+def bench(fn, prompts, repeat: int, clear_cache: bool) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        if clear_cache:
+            analyze_text.cache_clear()
+        for prompt in prompts:
+            fn(prompt)
+    return (time.perf_counter() - started) / (repeat * len(prompts))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'palavras':>9} {'antigo (µs)':>12} {'passada única (µs)':>19} {'ganho':>7}")
+    for words in (100, 1000, 5000, 20000):
+        prompts = [make_prompt(words, seed) for seed in range(5)]
+        repeat = max(1, args.repeat * 100 // words)
+        legacy = bench(legacy_request, prompts, repeat, clear_cache=False)
+        single = bench(matcher_request, prompts, repeat, clear_cache=True)
+        print(f"{words:>9} {legacy * 1e6:>12.1f} {single * 1e6:>19.1f} {legacy / single:>6.1f}x")
+
+    # Diferenças de resultado vêm das fronteiras de palavra ("ar" em "plantar")
+    sample = "como plantar arroz na área do quintal"
+    print(f"\nExemplo: {sample!r}")
+    print(f"  antigo:        contexto={legacy_best(sample, 'context')}")
+    print(f"  passada única: contexto={analyze_text(sample).best('context')}, "
+          f"pontuações={analyze_text(sample).scores('context')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dos parsers de respostas em texto
+Hackathon Gemma 3n
+
+Compara as funções de extração antigas das rotas (uma ``re.search`` por
+campo sobre a resposta inteira, ``text.upper()`` para achar as dicas, uma
+regex com lookahead por seção da análise de humor, ``keyword in texto``
+por palavra-chave nos alertas) com os parsers declarados no registro de
+``utils.response_parser``, que percorrem cada resposta uma vez. Para cada
+parser informa o tempo médio por resposta e os campos em que os
+resultados diferem (as diferenças esperadas estão descritas em
+``EXPECTED_DIFFERENCES``).
+
+Corpus: ``scripts/response_parser_corpus.jsonl`` (uma resposta por linha,
+com ``parser``, ``kind`` e ``response``), no formato das respostas do
+Gemma aos prompts de cada endpoint. Outros arquivos no mesmo formato com
+``--corpus``. ``--scale N`` repete cada resposta N vezes para medir
+respostas longas.
+
+Uso:
+    python scripts/benchmark_response_parser.py --repeat 500 --verbose
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+# Adicionar o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from routes.environmental.recycling_specific import extract_confidence_from_response, parse_gemma_response
+from routes.environmental_routes import ALERT_TEXT_PARSER, _parse_recycling_response
+from routes.wellness_routes import _parse_mood_analysis_response
+
+DEFAULT_CORPUS = Path(__file__).parent / 'response_parser_corpus.jsonl'
+
+EXPECTED_DIFFERENCES = {
+    'recycling_specific': "dicas: a versão antiga cortava 500 caracteres depois de 'DICAS "
+                          "ESPECÍFICAS' e dividia em todo '-', incluindo o próprio cabeçalho, "
+                          "palavras com hífen e a linha de confiança; rótulos em negrito "
+                          "('**Tipo principal:** ...') não eram lidos",
+    'mood': "cabeçalhos só no início da linha: '4.5 horas' no meio do texto abria a seção de exercícios",
+    'alert_text': "palavras-chave casam no início de palavra ('ar' não casa em 'plantar', "
+                  "'alto' não casa em 'altas')",
+}
+
+
+# ----- Implementações antigas -----
+
+def legacy_parse_gemma_response(text):
+    """``recycling_specific.parse_gemma_response`` antes do registro"""
+    result = {
+        'material_type': 'Material não identificado',
+        'category': 'Geral',
+        'recyclable': True,
+        'preparation_steps': [],
+        'disposal_location': 'Ecoponto mais próximo',
+        'environmental_impact': {},
+        'local_tips': [],
+        'confidence': 0.75
+    }
+    material_match = re.search(r'Tipo principal:\s*([^\n\*]+)', text, re.IGNORECASE)
+    if material_match:
+        result['material_type'] = material_match.group(1).strip()
+    category_match = re.search(r'Categoria.*?:\s*([^\n\*]+)', text, re.IGNORECASE)
+    if category_match:
+        result['category'] = category_match.group(1).strip()
+    recyclable_match = re.search(r'Reciclável:\s*(Sim|Não)', text, re.IGNORECASE)
+    if recyclable_match:
+        result['recyclable'] = recyclable_match.group(1).lower() == 'sim'
+    if 'DICAS ESPECÍFICAS' in text.upper():
+        tips_start = text.upper().find('DICAS ESPECÍFICAS')
+        if tips_start != -1:
+            tips_text = text[tips_start:tips_start + 500]
+            tips = [tip.strip() for tip in tips_text.split('-') if tip.strip() and len(tip.strip()) > 10]
+            result['local_tips'] = tips[:5]
+    result['confidence'] = extract_confidence_from_response(text)
+    return result
+
+
+def legacy_parse_recycling_response(text):
+    """``environmental_routes._parse_recycling_response`` antes do registro"""
+    result = {
+        'material_type': 'Material não identificado',
+        'category': 'Geral',
+        'recyclable': True,
+        'confidence': 0.75
+    }
+    material_match = re.search(r'Tipo principal:\s*([^\n\*]+)', text, re.IGNORECASE)
+    if material_match:
+        result['material_type'] = material_match.group(1).strip()
+    category_match = re.search(r'Categoria:\s*([^\n\*]+)', text, re.IGNORECASE)
+    if category_match:
+        result['category'] = category_match.group(1).strip()
+    recyclable_match = re.search(r'Reciclável:\s*(Sim|Não)', text, re.IGNORECASE)
+    if recyclable_match:
+        result['recyclable'] = recyclable_match.group(1).lower() == 'sim'
+    confidence_match = re.search(r'CONFIANÇA.*?(\d+)%', text, re.IGNORECASE)
+    if confidence_match:
+        result['confidence'] = int(confidence_match.group(1)) / 100
+    return result
+
+
+def legacy_parse_mood_analysis_response(response_text):
+    """``wellness_routes._parse_mood_analysis_response`` antes do registro"""
+    analysis = {}
+    patterns = {
+        'insights': re.compile(r'(?:1\.|INSIGHTS:?)([\s\S]*?)(?=(?:2\.|RECOMENDAÇÕES|TÉCNICAS|EXERCÍCIOS|\Z))', re.IGNORECASE),
+        'recommendations': re.compile(r'(?:2\.|RECOMENDAÇÕES:?)([\s\S]*?)(?=(?:3\.|TÉCNICAS|EXERCÍCIOS|\Z))', re.IGNORECASE),
+        'coping_techniques': re.compile(r'(?:3\.|TÉCNICAS:?)([\s\S]*?)(?=(?:4\.|EXERCÍCIOS|\Z))', re.IGNORECASE),
+        'exercises': re.compile(r'(?:4\.|EXERCÍCIOS:?)([\s\S]*?)\Z', re.IGNORECASE),
+    }
+    for key, pattern in patterns.items():
+        match = pattern.search(response_text)
+        if match:
+            analysis[key] = match.group(1).strip()
+    if not analysis:
+        analysis['insights'] = response_text
+    return analysis
+
+
+LEGACY_ALERT_TYPES = {
+    'weather': ['chuva', 'vento', 'tempestade', 'seca', 'temperatura', 'clima'],
+    'agriculture': ['colheita', 'plantação', 'pragas', 'cultivo', 'agricultura', 'arroz', 'milho'],
+    'air_quality': ['poluição', 'ar', 'qualidade', 'fumaça', 'poeira'],
+    'emergency': ['emergência', 'perigo', 'risco', 'evacuação', 'socorro']
+}
+LEGACY_SEVERITIES = {
+    'critical': ['crítico', 'grave', 'urgente', 'imediato', 'extremo'],
+    'high': ['alto', 'elevado', 'importante', 'significativo'],
+    'medium': ['moderado', 'médio', 'atenção'],
+    'low': ['baixo', 'leve', 'menor']
+}
+
+
+def alert_sections(text):
+    sections = re.split(r'\n\s*\n|\.|\!|\?', text)
+    return [s.strip() for s in sections if len(s.strip()) > 30][:5]
+
+
+def legacy_classify_alerts(text):
+    """Tipo e severidade de cada trecho em ``_create_alerts_from_text`` antes do registro"""
+    result = []
+    for section in alert_sections(text):
+        alert_type = 'general'
+        for type_key, keywords in LEGACY_ALERT_TYPES.items():
+            if any(keyword in section.lower() for keyword in keywords):
+                alert_type = type_key
+                break
+        severity = 'medium'
+        for sev_key, keywords in LEGACY_SEVERITIES.items():
+            if any(keyword in section.lower() for keyword in keywords):
+                severity = sev_key
+                break
+        result.append({'type': alert_type, 'severity': severity})
+    return result
+
+
+def classify_alerts(text):
+    return [ALERT_TEXT_PARSER.parse(section) for section in alert_sections(text)]
+
+
+def as_fields(result):
+    """Resultado comparável campo a campo (alertas viram um campo por trecho)"""
+    if isinstance(result, list):
+        return {f'trecho {index}': item for index, item in enumerate(result)}
+    return result
+
+
+PARSERS = {
+    'recycling_specific': (legacy_parse_gemma_response, parse_gemma_response),
+    'environmental_recycling': (legacy_parse_recycling_response, _parse_recycling_response),
+    'mood': (legacy_parse_mood_analysis_response, _parse_mood_analysis_response),
+    'alert_text': (legacy_classify_alerts, classify_alerts),
+}
+
+
+def load_corpus(paths):
+    records = []
+    for path in paths:
+        for line in Path(path).read_text(encoding='utf-8').splitlines():
+            if line.strip():
+                records.append(json.loads(line))
+    return records
+
+
+def time_per_call(fn, texts, repeat: int) -> float:
+    """Microssegundos por resposta"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - started) / (repeat * len(texts)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', action='append', default=[])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    records = load_corpus(args.corpus or [DEFAULT_CORPUS])
+    print(f"📚 Corpus: {len(records)} respostas")
+
+    for name, (legacy, current) in PARSERS.items():
+        texts = [record['response'] for record in records if record['parser'] == name]
+        if not texts:
+            continue
+
+        differences = 0
+        for record in (r for r in records if r['parser'] == name):
+            old, new = as_fields(legacy(record['response'])), as_fields(current(record['response']))
+            changed = sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
+            differences += bool(changed)
+            if changed and args.verbose:
+                print(f"   [{name} / {record['kind']}]")
+                for key in changed:
+                    print(f"      {key}: {old.get(key)!r} -> {new.get(key)!r}")
+
+        long_texts = ['\n\n'.join([text] * args.scale) for text in texts]
+        old_us = time_per_call(legacy, long_texts, args.repeat)
+        new_us = time_per_call(current, long_texts, args.repeat)
+        print(f"{name:24s} antigo: {old_us:8.1f} µs   registro: {new_us:8.1f} µs   ({old_us / new_us:.1f}x)   "
+              f"respostas com diferenças: {differences}/{len(texts)}")
+        if differences and name in EXPECTED_DIFFERENCES:
+            print(f"   esperado: {EXPECTED_DIFFERENCES[name]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da limpeza de respostas do ``TextProcessor``
+Hackathon Gemma 3n
+
+Compara a implementação antiga de ``clean_response`` (11 ``re.sub`` com
+padrões em texto e 18 ``str.replace`` por resposta) com a compilada
+(``str.translate`` e passadas fundidas), e o fluxo de uma geração: limpeza
+em ``_parse_ollama_chat_response`` seguida de ``process_gemma_response``,
+que antes limpava a mesma resposta uma segunda vez. Informa o throughput
+em MB/s e confere que as duas implementações produzem o mesmo texto.
+
+Corpus: respostas reais do Gemma (``--corpus``, repetível): JSONL com
+``response`` ou ``original_response`` por linha, ou texto puro com as
+respostas separadas por uma linha ``---``. Sem corpus, usa exemplos no
+formato típico das respostas (markdown, listas, acentos, entidades HTML).
+
+Uso:
+    python scripts/benchmark_text_processor.py --corpus logs/respostas.jsonl
+"""
+
+import argparse
+import html
+import json
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+# Adicionar o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.text_processor import TextProcessor, _clean_cached
+
+SAMPLES = (
+    "**Primeiros socorros para queimaduras:**\n\n1.Resfrie a área com água corrente por 10 a 20 minutos . "
+    "Não use gelo!!\n2.   Cubra com pano limpo.\n\n\n\n* Procure o centro de saúde se a queimadura for grande…\n"
+    "- Não rebente as bolhas  \n- Ofereça água à pessoa.Mantenha-a aquecida.\n",
+    "Olá! Para plantar arroz na época das chuvas:\n\nPreparação do solo: limpe o terreno e faça os canteiros.\n"
+    "Sementes: escolha variedades locais , como a &quot;arroz de bolanha&quot;.\n\n"
+    "Dica:use fertilizante orgânico — estrume ou composto.\n\n\n\nColheita: quando os grãos estiverem dourados...",
+    "A fotossíntese é o processo pelo qual as plantas produzem o seu alimento.Elas usam a luz do sol , "
+    "a água e o dióxido de carbono.\n\nExemplo para as crianças: a folha é como uma pequena cozinha!!!\n"
+    "• Luz: energia\n• Água: vem das raízes\n• Ar: entra pelas folhas   \n",
+    "```json\n{\"titulo\": \"Tradução\", \"frases\": [\"Bom dia\", \"Obrigado\"]}\n```\n"
+    "Nota: as frases em crioulo devem ser validadas pela comunidade ; obrigado !",
+    "Se a pessoa não respira:\n1. Chame ajuda (112 / 118).\n2. Comece compressões no centro do peito.\n"
+    "3. Faça 30 compressões e 2 ventilações\x0c.\n\nImportante: continue até a ajuda chegar…",
+)
+
+
+def legacy_clean_response(text: str) -> str:
+    """``TextProcessor.clean_response`` antes da compilação dos padrões"""
+    if not text or not isinstance(text, str):
+        return ""
+    text = html.unescape(text)
+    text = unicodedata.normalize('NFC', text)
+    for problematic, replacement in TextProcessor.PROBLEMATIC_CHARS.items():
+        text = text.replace(problematic, replacement)
+    for pattern, replacement, *flags in TextProcessor.CLEANUP_PATTERNS:
+        text = re.sub(pattern, replacement, text, flags=flags[0] if flags else 0)
+    for pattern, replacement, *flags in TextProcessor.FORMATTING_PATTERNS:
+        text = re.sub(pattern, replacement, text, flags=flags[0] if flags else 0)
+    text = text.strip()
+    return text or "Resposta vazia ou inválida."
+
+
+def load_corpus(paths):
+    responses = []
+    for path in paths:
+        content = Path(path).read_text(encoding='utf-8')
+        if path.endswith('.jsonl'):
+            for line in content.splitlines():
+                if line.strip():
+                    record = json.loads(line)
+                    text = record.get('original_response') or record.get('response')
+                    if text:
+                        responses.append(text)
+        else:
+            responses.extend(part.strip() for part in re.split(r'^---$', content, flags=re.MULTILINE) if part.strip())
+    return responses
+
+
+def throughput(fn, corpus, repeat: int) -> float:
+    """MB/s de ``fn`` aplicada a cada resposta do corpus"""
+    size = sum(len(text.encode('utf-8')) for text in corpus) * repeat
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            fn(text)
+    return size / (time.perf_counter() - started) / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', action='append', default=[])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else [
+        # Variações para que o cache não sirva as medições sem memorização
+        f"{sample}\n\nResposta {i}." for i in range(400) for sample in SAMPLES
+    ]
+    size_mb = sum(len(text.encode('utf-8')) for text in corpus) / 1e6
+    print(f"📚 Corpus: {len(corpus)} respostas, {size_mb:.2f} MB")
+
+    mismatches = sum(1 for text in corpus if legacy_clean_response(text) != TextProcessor._clean(text))
+    print(f"Saídas diferentes da implementação antiga: {mismatches}")
+
+    legacy = throughput(legacy_clean_response, corpus, args.repeat)
+    compiled = throughput(TextProcessor._clean, corpus, args.repeat)
+    print(f"clean_response   antigo: {legacy:7.2f} MB/s   compilado: {compiled:7.2f} MB/s   ({compiled / legacy:.1f}x)")
+
+    # Fluxo de uma geração: limpeza no parse e de novo na formatação por contexto
+    def legacy_flow(text):
+        cleaned = legacy_clean_response(text)
+        legacy_clean_response(cleaned)
+
+    def compiled_flow(text):
+        _clean_cached.cache_clear()
+        cleaned = TextProcessor.clean_response(text)
+        TextProcessor.process_gemma_response({'response': cleaned, 'success': True}, 'general')
+
+    legacy = throughput(legacy_flow, corpus, args.repeat)
+    compiled = throughput(compiled_flow, corpus, args.repeat)
+    print(f"parse + formatação antigo: {legacy:7.2f} MB/s   compilado: {compiled:7.2f} MB/s   ({compiled / legacy:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
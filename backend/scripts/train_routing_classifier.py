@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Treino offline do classificador de roteamento (contexto e criticidade)
+Hackathon Gemma 3n
+
+Fontes de treino:
+- prompts registrados (``--prompts``, repetível): JSONL com ``prompt`` (ou
+  ``text``) e, opcionalmente, ``context`` e ``criticality``; ou texto puro,
+  um prompt por linha. Prompts sem rótulo recebem o rótulo das
+  palavras-chave (supervisão fraca);
+- frases sintéticas geradas a partir das listas de palavras-chave de
+  ``services.text_signals``, mais conversas gerais (contexto ``general``,
+  criticidade ``low``).
+
+O script separa uma validação, calibra as temperaturas, informa acurácia,
+erro de calibração (ECE), concordância com as palavras-chave e a latência
+de classificação em lote, e grava o artefato em ROUTING_CLASSIFIER_PATH.
+
+Uso:
+    python scripts/train_routing_classifier.py --prompts logs/prompts.jsonl
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+# Adicionar o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from config.settings import BackendConfig
+from services.intelligent_model_selector import ContextType, CriticalityLevel, KeywordDetector
+from services.routing_classifier import UNLABELED, RoutingClassifier
+from services.text_signals import SIGNAL_GROUPS
+
+CONTEXT_LABELS = [context.value for context in ContextType]
+CRITICALITY_LABELS = [level.value for level in CriticalityLevel]
+
+TEMPLATES = (
+    "{kw}",
+    "preciso de ajuda com {kw}",
+    "o que fazer em caso de {kw}?",
+    "pode explicar {kw} para a comunidade?",
+    "tenho uma dúvida sobre {kw} na minha aldeia",
+    "como lidar com {kw} hoje",
+    "{kw} aqui perto de casa, o que faço?",
+    "informações sobre {kw}, por favor",
+    "a minha família pergunta sobre {kw}",
+    "what should I know about {kw}?",
+)
+
+GENERAL_PROMPTS = (
+    "olá, tudo bem?", "bom dia", "boa noite, como estás?", "qual é o seu nome?",
+    "conte uma história curta", "obrigado pela conversa", "traduza esta frase para crioulo",
+    "me fale sobre a cultura da guiné-bissau", "que dia é hoje?", "quem és tu?",
+    "diga uma palavra bonita", "hello, how are you?", "tell me a joke", "what can you do?",
+)
+
+FILLERS = ("", "por favor", "rápido", "em bafatá", "no bairro", "hoje de manhã", "para a minha avó")
+
+
+def synthetic_examples(rng: random.Random, per_keyword: int):
+    examples = []
+    for group, head in (('context', 'context'), ('criticality', 'criticality')):
+        for label, keywords in SIGNAL_GROUPS[group].items():
+            for keyword in keywords:
+                for template in rng.sample(TEMPLATES, min(per_keyword, len(TEMPLATES))):
+                    text = f"{template.format(kw=keyword)} {rng.choice(FILLERS)}".strip()
+                    examples.append((text, label if head == 'context' else None,
+                                     label if head == 'criticality' else None))
+    for prompt in GENERAL_PROMPTS:
+        for filler in FILLERS:
+            examples.append((f"{prompt} {filler}".strip(), 'general', 'low'))
+    return examples
+
+
+def logged_examples(paths, detector: KeywordDetector):
+    examples = []
+    for path in paths:
+        with open(path, encoding='utf-8') as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                if path.endswith('.jsonl'):
+                    record = json.loads(line)
+                    text = record.get('prompt') or record.get('text') or ''
+                    context, criticality = record.get('context'), record.get('criticality')
+                else:
+                    text, context, criticality = line, None, None
+                if not text:
+                    continue
+                if context is None or criticality is None:
+                    # Supervisão fraca: rótulos das palavras-chave
+                    weak_context, weak_criticality = detector.detect(text)
+                    context = context or weak_context.value
+                    criticality = criticality or weak_criticality.value
+                examples.append((text, context, criticality))
+    return examples
+
+
+def encode(labels, vocabulary):
+    return np.array([vocabulary.index(label) if label in vocabulary else UNLABELED for label in labels])
+
+
+def expected_calibration_error(confidence, correct, bins: int = 10) -> float:
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    error = 0.0
+    for low, high in zip(edges[:-1], edges[1:]):
+        mask = (confidence > low) & (confidence <= high)
+        if mask.any():
+            error += mask.mean() * abs(confidence[mask].mean() - correct[mask].mean())
+    return float(error)
+
+
+def evaluate(model: RoutingClassifier, texts, contexts, criticalities, detector: KeywordDetector) -> None:
+    context_proba, criticality_proba = model.predict_proba(texts)
+    for name, proba, labels in (('contexto', context_proba, contexts), ('criticidade', criticality_proba, criticalities)):
+        mask = labels != UNLABELED
+        if not mask.any():
+            continue
+        predicted = proba[mask].argmax(axis=1)
+        correct = (predicted == labels[mask]).astype(float)
+        confidence = proba[mask].max(axis=1)
+        print(f"  {name:<12} acurácia={correct.mean():.3f}  ECE={expected_calibration_error(confidence, correct):.3f}"
+              f"  exemplos={mask.sum()}")
+
+    keyword_contexts = [detector.detect(text)[0].value for text in texts]
+    agreement = np.mean([model.context_labels[i] == label for i, label in zip(context_proba.argmax(axis=1), keyword_contexts)])
+    print(f"  concordância de contexto com palavras-chave: {agreement:.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--prompts', action='append', default=[], help='JSONL ou texto, um prompt por linha')
+    parser.add_argument('--output', default=BackendConfig.ROUTING_CLASSIFIER_PATH)
+    parser.add_argument('--features', type=int, default=2 ** 16)
+    parser.add_argument('--epochs', type=int, default=15)
+    parser.add_argument('--per-keyword', type=int, default=6)
+    parser.add_argument('--validation', type=float, default=0.15)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    detector = KeywordDetector()
+    examples = synthetic_examples(rng, args.per_keyword) + logged_examples(args.prompts, detector)
+    rng.shuffle(examples)
+
+    texts = [text for text, _, _ in examples]
+    contexts = encode([context for _, context, _ in examples], CONTEXT_LABELS)
+    criticalities = encode([criticality for _, _, criticality in examples], CRITICALITY_LABELS)
+    split = int(len(texts) * (1 - args.validation))
+    print(f"📚 {len(texts)} exemplos ({split} treino, {len(texts) - split} validação)")
+
+    started = time.perf_counter()
+    model = RoutingClassifier.train(
+        texts[:split], contexts[:split], criticalities[:split],
+        CONTEXT_LABELS, CRITICALITY_LABELS,
+        n_features=args.features, epochs=args.epochs, seed=args.seed
+    )
+    print(f"🏋️ Treino em {time.perf_counter() - started:.1f}s")
+
+    print("Validação sem calibração:")
+    evaluate(model, texts[split:], contexts[split:], criticalities[split:], detector)
+    temperatures = model.calibrate(texts[split:], contexts[split:], criticalities[split:])
+    print(f"Validação com temperaturas {temperatures[0]:.2f} / {temperatures[1]:.2f}:")
+    evaluate(model, texts[split:], contexts[split:], criticalities[split:], detector)
+
+    batch = (texts * (1000 // max(len(texts), 1) + 1))[:1000]
+    model.predict(batch[:10])
+    started = time.perf_counter()
+    model.predict(batch)
+    per_prompt = (time.perf_counter() - started) / len(batch)
+    started = time.perf_counter()
+    for text in batch[:200]:
+        model.predict([text])
+    single = (time.perf_counter() - started) / 200
+    print(f"⚡ Lote de {len(batch)}: {per_prompt * 1e6:.1f} µs/prompt; prompt isolado: {single * 1e6:.1f} µs")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    model.save(args.output)
+    print(f"💾 Artefato salvo em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Loop de eventos assíncrono compartilhado
+Hackathon Gemma 3n
+
+Um único loop asyncio de longa duração roda em uma thread de fundo. Os
+handlers Flask (síncronos) submetem corrotinas a ele pela ponte
+``run_async``, em vez de criar um loop novo a cada requisição, e as
+corrotinas de diferentes requisições passam a rodar de forma concorrente.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Optional
+
+from config.settings import BackendConfig
+
+from .generation_scheduler import capture_rejections, mark_request_rejected
+from .request_deadline import DeadlineExceeded, Deadline, current_deadline, deadline_scope
+
+
+async def _with_deadline(coro: Awaitable[Any], deadline: Optional[Deadline]) -> Any:
+    # Tarefas do loop não herdam o contexto da thread Flask: repassar o prazo
+    with deadline_scope(deadline):
+        return await coro
+
+
+class AsyncRuntime:
+    """Loop asyncio em thread de fundo com ponte síncrona para os handlers"""
+
+    def __init__(self, executor_workers: int = 16):
+        self.logger = logging.getLogger(__name__)
+        self.executor_workers = executor_workers
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self.start()
+        return self._loop
+
+    def start(self) -> None:
+        """Iniciar o loop de fundo (idempotente)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._started.clear()
+            self._thread = threading.Thread(target=self._run, name="async-runtime", daemon=True)
+            self._thread.start()
+        self._started.wait()
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        # Executor dedicado para trabalho bloqueante (modelo local, espera na fila de geração)
+        loop.set_default_executor(ThreadPoolExecutor(
+            max_workers=self.executor_workers, thread_name_prefix="async-runtime-worker"
+        ))
+        self._loop = loop
+        self.logger.info("🔁 Loop assíncrono compartilhado iniciado")
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Executar uma corrotina no loop compartilhado e aguardar o resultado (ponte síncrona)"""
+        rejections = []
+        deadline = current_deadline()
+        if deadline is not None:
+            timeout = deadline.clamp(timeout)
+        future = asyncio.run_coroutine_threadsafe(
+            capture_rejections(_with_deadline(coro, deadline), rejections), self.loop
+        )
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # No Python 3.10 não é o TimeoutError embutido (alias só a partir do 3.11)
+            future.cancel()
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded(deadline.reason or f"prazo de {deadline.timeout:.0f}s esgotado")
+            raise
+        finally:
+            # Rejeições do agendador dentro da corrotina viram HTTP 503 na requisição atual
+            for rejection in rejections:
+                mark_request_rejected(rejection)
+
+    def stop(self) -> None:
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_runtime: Optional[AsyncRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_async_runtime() -> AsyncRuntime:
+    """Obter o loop assíncrono compartilhado do processo"""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = AsyncRuntime(executor_workers=BackendConfig.ASYNC_EXECUTOR_WORKERS)
+    return _runtime
+
+
+def run_async(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """Ponte para os handlers Flask executarem corrotinas do GemmaService"""
+    return get_async_runtime().run(coro, timeout)
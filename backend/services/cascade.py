@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Geração em cascata: rascunho no gemma3n:e2b, escalonamento para o e4b
+Hackathon Gemma 3n
+
+O seletor envia qualquer prompt de saúde ou ambiente para o gemma3n:e4b,
+lento nos nós só com CPU. Em modo cascata o rascunho é gerado pelo modelo
+menor e avaliado por um verificador rápido (estrutura, tamanho, recusas,
+incerteza e, para endpoints JSON, o esquema esperado); apenas rascunhos
+reprovados são gerados de novo no modelo maior. As métricas por endpoint
+mostram a taxa de escalonamento e a latência economizada em relação a
+usar sempre o e4b.
+"""
+
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from flask import has_request_context, request
+
+from config.settings import BackendConfig
+from utils.json_parser import safe_parse_llm_json
+
+# Frases típicas de recusa do modelo
+REFUSAL_MARKERS = (
+    'não posso ajudar', 'não posso fornecer', 'não consigo ajudar', 'não sou capaz',
+    'como modelo de linguagem', 'como uma ia', 'como inteligência artificial',
+    "i can't help", 'i cannot help', 'i cannot provide', 'as an ai', 'as a language model'
+)
+
+# Marcadores de incerteza (um isolado é tolerado; vários indicam rascunho fraco)
+UNCERTAINTY_MARKERS = (
+    'não tenho certeza', 'não sei', 'não tenho informações', 'não é possível determinar',
+    'talvez', 'possivelmente', 'não está claro',
+    "i'm not sure", 'i am not sure', "i don't know", 'it is unclear'
+)
+
+
+@dataclass(frozen=True)
+class DraftVerdict:
+    """Resultado da verificação de um rascunho"""
+
+    accepted: bool
+    reasons: Tuple[str, ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'accepted': self.accepted, 'reasons': list(self.reasons)}
+
+
+class DraftChecker:
+    """Verificador barato (sem modelo) da qualidade de um rascunho"""
+
+    def __init__(self, min_chars: int = 80, max_uncertainty: int = 1):
+        self.min_chars = min_chars
+        self.max_uncertainty = max_uncertainty
+
+    @staticmethod
+    def expects_json(prompt: str, system_prompt: Optional[str] = None) -> bool:
+        """Endpoints que pedem JSON no prompt precisam de um rascunho parseável"""
+        return 'json' in f"{system_prompt or ''}\n{prompt or ''}".lower()
+
+    def check(
+        self,
+        text: str,
+        expect_json: bool = False,
+        required_keys: Optional[Iterable[str]] = None,
+        done_reason: Optional[str] = None
+    ) -> DraftVerdict:
+        reasons = []
+        stripped = (text or '').strip()
+
+        if not stripped:
+            return DraftVerdict(False, ('empty',))
+        if done_reason == 'length':
+            reasons.append('truncated')
+
+        if expect_json or required_keys:
+            parsed = safe_parse_llm_json(stripped)
+            if not isinstance(parsed, dict):
+                reasons.append('invalid_json')
+            else:
+                missing = [key for key in (required_keys or ()) if key not in parsed]
+                if missing:
+                    reasons.append('missing_keys')
+            return DraftVerdict(not reasons, tuple(reasons))
+
+        if len(stripped) < self.min_chars:
+            reasons.append('too_short')
+
+        lowered = stripped.lower()
+        if any(marker in lowered for marker in REFUSAL_MARKERS):
+            reasons.append('refusal')
+        if sum(lowered.count(marker) for marker in UNCERTAINTY_MARKERS) > self.max_uncertainty:
+            reasons.append('uncertain')
+        if self._is_repetitive(stripped):
+            reasons.append('repetitive')
+
+        return DraftVerdict(not reasons, tuple(reasons))
+
+    @staticmethod
+    def _is_repetitive(text: str) -> bool:
+        """Linhas idênticas repetidas indicam geração degenerada"""
+        lines = [line.strip() for line in re.split(r'[\n.]', text) if len(line.strip()) > 20]
+        if len(lines) < 4:
+            return False
+        most_common = Counter(lines).most_common(1)[0][1]
+        return most_common >= 3 and most_common / len(lines) > 0.3
+
+
+def current_endpoint() -> str:
+    """Endpoint Flask da requisição atual (``internal`` fora de requisições)"""
+    if has_request_context():
+        return request.endpoint or request.path
+    return 'internal'
+
+
+class CascadeMetrics:
+    """Taxa de escalonamento e latência economizada por endpoint"""
+
+    def __init__(self, ewma_alpha: float = 0.2):
+        self.ewma_alpha = ewma_alpha
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+        # Latência média do modelo maior (referência "sempre e4b")
+        self._large_latency: Dict[str, float] = {}
+
+    def _entry(self, endpoint: str) -> Dict[str, Any]:
+        entry = self._endpoints.get(endpoint)
+        if entry is None:
+            entry = {
+                'requests': 0,
+                'escalated': 0,
+                'draft_seconds': 0.0,
+                'large_seconds': 0.0,
+                'saved_seconds': 0.0,
+                'saved_samples': 0,
+                'reasons': Counter()
+            }
+            self._endpoints[endpoint] = entry
+        return entry
+
+    def _update_large(self, endpoint: str, seconds: float) -> None:
+        for key in (endpoint, '*'):
+            previous = self._large_latency.get(key)
+            self._large_latency[key] = seconds if previous is None else (
+                (1 - self.ewma_alpha) * previous + self.ewma_alpha * seconds
+            )
+
+    def _baseline(self, endpoint: str) -> Optional[float]:
+        return self._large_latency.get(endpoint, self._large_latency.get('*'))
+
+    def record_large(self, endpoint: str, seconds: float) -> None:
+        """Geração direta no modelo maior (sem cascata): alimenta a referência"""
+        with self._lock:
+            self._update_large(endpoint, seconds)
+
+    def record(self, endpoint: str, draft_seconds: float, verdict: DraftVerdict,
+               large_seconds: Optional[float] = None) -> None:
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry['requests'] += 1
+            entry['draft_seconds'] += draft_seconds
+
+            if large_seconds is not None:
+                entry['escalated'] += 1
+                entry['large_seconds'] += large_seconds
+                entry['reasons'].update(verdict.reasons)
+                self._update_large(endpoint, large_seconds)
+                # O rascunho descartado é custo extra em relação a usar só o e4b
+                entry['saved_seconds'] -= draft_seconds
+                entry['saved_samples'] += 1
+                return
+
+            baseline = self._baseline(endpoint)
+            if baseline is not None:
+                entry['saved_seconds'] += baseline - draft_seconds
+                entry['saved_samples'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {}
+            for name, entry in sorted(self._endpoints.items()):
+                requests = entry['requests']
+                escalated = entry['escalated']
+                baseline = self._baseline(name)
+                endpoints[name] = {
+                    'requests': requests,
+                    'escalated': escalated,
+                    'escalation_rate': round(escalated / requests, 3) if requests else 0.0,
+                    'avg_draft_ms': round(entry['draft_seconds'] / requests * 1000, 1) if requests else None,
+                    'avg_large_ms': round(entry['large_seconds'] / escalated * 1000, 1) if escalated else None,
+                    'baseline_large_ms': round(baseline * 1000, 1) if baseline is not None else None,
+                    'latency_saved_ms_total': round(entry['saved_seconds'] * 1000, 1),
+                    'avg_latency_saved_ms': round(entry['saved_seconds'] / entry['saved_samples'] * 1000, 1)
+                    if entry['saved_samples'] else None,
+                    'escalation_reasons': dict(entry['reasons'])
+                }
+            return {
+                'enabled': BackendConfig.CASCADE_ENABLED,
+                'draft_model': BackendConfig.CASCADE_DRAFT_MODEL,
+                'large_models': list(BackendConfig.CASCADE_LARGE_MODELS),
+                'endpoints': endpoints
+            }
+
+
+_metrics: Optional[CascadeMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_cascade_metrics() -> CascadeMetrics:
+    """Obter as métricas de cascata compartilhadas do processo"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = CascadeMetrics()
+    return _metrics
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Circuit breaker para o Ollama (por backend e por modelo)
+Hackathon Gemma 3n
+
+Com o Ollama fora do ar ou sobrecarregado, cada chamada esperava até
+OLLAMA_TIMEOUT antes de cair no fallback. O disjuntor acompanha as últimas
+chamadas (taxa de erro e de lentidão) e, quando aberto, falha em
+milissegundos para que o GemmaService use o cache ou o fallback. Depois de
+``open_seconds`` algumas chamadas de teste (meio-aberto) verificam a
+recuperação.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from config.settings import BackendConfig
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Chamada recusada porque o disjuntor está aberto"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuito '{name}' aberto (nova tentativa em {retry_after:.0f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Disjuntor fechado/aberto/meio-aberto com limiares de erro e de latência"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 90.0,
+        slow_call_rate: float = 0.8,
+        window_size: int = 20,
+        min_calls: int = 4,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 1
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = max(1, min_calls)
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, half_open_calls)
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        # (falhou, lenta) das últimas chamadas
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=max(self.min_calls, window_size))
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+
+        self._calls = 0
+        self._failures = 0
+        self._rejected = 0
+        self._transitions: Dict[str, int] = {}
+
+    # ----- Chamadas -----
+
+    def before_call(self) -> None:
+        """Autorizar uma chamada ou lançar CircuitOpen"""
+        with self._lock:
+            if self._state == OPEN:
+                remaining = self._opened_at + self.open_seconds - time.monotonic()
+                if remaining > 0:
+                    self._rejected += 1
+                    raise CircuitOpen(self.name, remaining)
+                self._transition(HALF_OPEN)
+
+            if self._state == HALF_OPEN:
+                if self._trials >= self.half_open_calls:
+                    self._rejected += 1
+                    raise CircuitOpen(self.name, self.open_seconds)
+                self._trials += 1
+
+    def cancel(self) -> None:
+        """Devolver a autorização de uma chamada que não chegou a ser feita"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def record_success(self, duration: float) -> None:
+        self._record(False, duration)
+
+    def record_failure(self, duration: float) -> None:
+        self._record(True, duration)
+
+    def _record(self, failed: bool, duration: float) -> None:
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            self._calls += 1
+            if failed:
+                self._failures += 1
+
+            if self._state == HALF_OPEN:
+                self._trials = max(0, self._trials - 1)
+                if failed or slow:
+                    self._transition(OPEN)
+                    return
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._transition(CLOSED)
+                return
+
+            if self._state == OPEN:
+                # Chamada iniciada antes da abertura: não altera o estado
+                return
+
+            self._window.append((failed, slow))
+            if len(self._window) < self.min_calls:
+                return
+            failure_rate, slow_rate = self._rates()
+            if failure_rate >= self.failure_rate or slow_rate >= self.slow_call_rate:
+                self._transition(OPEN)
+
+    # ----- Estado (chamar com self._lock) -----
+
+    def _rates(self) -> Tuple[float, float]:
+        total = len(self._window)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for failed, _ in self._window if failed)
+        slow = sum(1 for _, is_slow in self._window if is_slow)
+        return failures / total, slow / total
+
+    def _transition(self, state: str) -> None:
+        key = f"{self._state}->{state}"
+        self._transitions[key] = self._transitions.get(key, 0) + 1
+        self._state = state
+        self._trials = 0
+        self._trial_successes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self.logger.warning(f"🔌 Circuito '{self.name}' aberto por {self.open_seconds:.0f}s")
+        elif state == CLOSED:
+            self._window.clear()
+            self.logger.info(f"✅ Circuito '{self.name}' fechado (recuperado)")
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() >= self._opened_at + self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def get_stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            failure_rate, slow_rate = self._rates()
+            retry_after = None
+            if self._state == OPEN:
+                retry_after = round(max(0.0, self._opened_at + self.open_seconds - time.monotonic()), 1)
+            return {
+                'state': state,
+                'failure_rate': round(failure_rate, 3),
+                'slow_call_rate': round(slow_rate, 3),
+                'window_calls': len(self._window),
+                'calls': self._calls,
+                'failures': self._failures,
+                'rejected': self._rejected,
+                'retry_after': retry_after,
+                'transitions': dict(self._transitions)
+            }
+
+
+class CircuitBreakerRegistry:
+    """Disjuntores nomeados (``ollama`` e ``ollama:<modelo>``) com a mesma configuração"""
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    breaker = CircuitBreaker(name, **self.settings)
+                    self._breakers[name] = breaker
+        return breaker
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.get_stats() for name, breaker in sorted(breakers.items())}
+
+
+_registry: Optional[CircuitBreakerRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """Obter o registro de disjuntores compartilhado do processo"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = CircuitBreakerRegistry(
+                    failure_rate=BackendConfig.CIRCUIT_FAILURE_RATE,
+                    slow_call_seconds=BackendConfig.CIRCUIT_SLOW_CALL_SECONDS,
+                    slow_call_rate=BackendConfig.CIRCUIT_SLOW_CALL_RATE,
+                    window_size=BackendConfig.CIRCUIT_WINDOW_SIZE,
+                    min_calls=BackendConfig.CIRCUIT_MIN_CALLS,
+                    open_seconds=BackendConfig.CIRCUIT_OPEN_SECONDS,
+                    half_open_calls=BackendConfig.CIRCUIT_HALF_OPEN_CALLS
+                )
+    return _registry
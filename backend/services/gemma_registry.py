@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro de instâncias do GemmaService para o Moransa Backend
+Hackathon Gemma 3n
+
+Constrói cada GemmaService uma única vez por processo, em vez de repetir
+credenciais Kaggle, verificação do Ollama, detecção de recursos do sistema
+e carregamento do modelo local dentro de cada requisição.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from flask import current_app, has_app_context
+
+from .gemma_service import GemmaBackend, GemmaService
+
+RegistryKey = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+
+class GemmaServiceRegistry:
+    """Registro thread-safe de GemmaService por (domínio, modelo forçado, contexto, criticidade)
+
+    A primeira instância criada inicializa o backend pesado (Ollama, modelo
+    local, tokenizer); as demais são visões de domínio que compartilham esse
+    mesmo backend.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._services: Dict[RegistryKey, GemmaService] = {}
+        self._backend: Optional[GemmaBackend] = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(domain: str = "general", force_model: Optional[str] = None,
+                 context: Optional[str] = None, criticality: Optional[str] = None) -> RegistryKey:
+        """Normalizar a chave do registro"""
+        return (
+            (domain or "general").lower(),
+            force_model or None,
+            context.lower() if context else None,
+            criticality.lower() if criticality else None
+        )
+
+    def get(self, domain: str = "general", force_model: Optional[str] = None,
+            context: Optional[str] = None, criticality: Optional[str] = None) -> GemmaService:
+        """Obter (ou construir uma única vez) o serviço para a combinação informada"""
+        key = self.make_key(domain, force_model, context, criticality)
+
+        # Caminho rápido sem lock: leitura de dict é atômica no CPython
+        service = self._services.get(key)
+        if service is not None:
+            self._hits += 1
+            return service
+
+        with self._lock:
+            service = self._services.get(key)
+            if service is not None:
+                self._hits += 1
+                return service
+
+            self._misses += 1
+            domain_name, model_name, context_name, criticality_name = key
+            service = GemmaService(
+                domain=domain_name,
+                force_model=model_name,
+                context=context_name,
+                criticality=criticality_name,
+                backend=self._backend
+            )
+            if self._backend is None:
+                self._backend = service.backend
+                self.logger.info(f"🧩 Backend Gemma compartilhado inicializado (domínio: {domain_name})")
+            else:
+                self.logger.info(f"🧩 Nova visão do GemmaService registrada: {key}")
+
+            self._services[key] = service
+            return service
+
+    def register(self, service: GemmaService, domain: str = "general", force_model: Optional[str] = None,
+                 context: Optional[str] = None, criticality: Optional[str] = None) -> None:
+        """Registrar uma instância já construída (ex.: o serviço padrão do app)"""
+        key = self.make_key(domain, force_model, context, criticality)
+        with self._lock:
+            self._services[key] = service
+            if self._backend is None:
+                self._backend = service.backend
+
+    @property
+    def backend(self) -> Optional[GemmaBackend]:
+        return self._backend
+
+    def clear(self) -> None:
+        """Descartar todas as instâncias (o próximo acesso reconstrói o backend)"""
+        with self._lock:
+            self._services.clear()
+            self._backend = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas de uso do registro"""
+        return {
+            'instances': len(self._services),
+            'keys': [list(key) for key in self._services.keys()],
+            'backend_initialized': self._backend is not None,
+            'hits': self._hits,
+            'misses': self._misses
+        }
+
+
+# Registro usado fora de um contexto Flask (scripts, testes)
+_default_registry = GemmaServiceRegistry()
+
+
+def get_gemma_registry() -> GemmaServiceRegistry:
+    """Obter o registro do app atual, ou o registro padrão do processo"""
+    if has_app_context():
+        registry = getattr(current_app, 'gemma_registry', None)
+        if registry is not None:
+            return registry
+    return _default_registry
+
+
+def get_gemma_service(domain: str = "general", force_model: Optional[str] = None,
+                      context: Optional[str] = None, criticality: Optional[str] = None) -> GemmaService:
+    """Atalho para os blueprints obterem um GemmaService compartilhado"""
+    return get_gemma_registry().get(domain, force_model, context, criticality)
@@ -8,28 +8,128 @@ Este serviço gerencia a interação com o modelo Gemma-3n,
 com suporte a Ollama e fallback para modelo local.
 """
 
+import asyncio
 import json
 import logging
 import os
+import time
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
-import requests
 from config.settings import BackendConfig, SystemPrompts
 from config.system_prompts import REVOLUTIONARY_PROMPTS
-from utils.text_processor import TextProcessor
+from utils.text_processor import CleanedText, StreamingTextCleaner, TextProcessor
 
 from .intelligent_model_selector import ContextType, CriticalityLevel, IntelligentModelSelector
+from .text_signals import analyze_text
 from .model_selector import ModelSelector
+from .ollama_async_client import AsyncOllamaClient, get_async_ollama_client
+from .ollama_client import OllamaClient, OllamaResponseError, get_ollama_client
+from .ollama_inventory import OllamaModelInventory, get_ollama_inventory
+from .model_warmup import ModelWarmupManager, get_model_warmup
+from .circuit_breaker import CircuitBreakerRegistry, CircuitOpen, get_circuit_breakers
+from .model_routing import BACKEND_FALLBACK, BACKEND_LOCAL, BACKEND_OLLAMA, RoutingDecision
+from .structured_output import decode_structured, feature_schema
+from .cascade import CascadeMetrics, DraftChecker, DraftVerdict, current_endpoint, get_cascade_metrics
+from .response_cache import ResponseCache, cache_bypass_requested, get_response_cache
+from .single_flight import SingleFlight, get_single_flight
+from .request_deadline import (DeadlineExceeded, bind_deadline, check_deadline, current_deadline,
+                               deadline_stopping_criteria)
+from .model_cost import LatencyEstimate, ModelCostModel, get_model_cost_model
+from .generation_scheduler import (GenerationRejected, GenerationScheduler, PRIORITY_RANK,
+                                   get_generation_scheduler, mark_request_rejected)
+
+
+class GemmaBackend:
+    """Estado pesado compartilhado entre todas as visões de domínio do GemmaService
+
+    Guarda o resultado das verificações caras (Ollama, recursos do sistema) e o
+    modelo local carregado, para que cada combinação de domínio/contexto não
+    repita a inicialização completa.
+    """
+
+    def __init__(self, system_config: Dict[str, Any], ollama_client: Optional[OllamaClient] = None,
+                 model_inventory: Optional[OllamaModelInventory] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 single_flight: Optional[SingleFlight] = None,
+                 scheduler: Optional[GenerationScheduler] = None,
+                 async_ollama_client: Optional[AsyncOllamaClient] = None,
+                 warmup: Optional[ModelWarmupManager] = None,
+                 circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+                 cascade_metrics: Optional[CascadeMetrics] = None,
+                 cost_model: Optional[ModelCostModel] = None):
+        self.system_config = system_config
+        self.ollama_client = ollama_client or get_ollama_client()
+        self.async_ollama_client = async_ollama_client or get_async_ollama_client()
+        if model_inventory is None:
+            if ollama_client is None:
+                model_inventory = get_ollama_inventory()
+            else:
+                model_inventory = OllamaModelInventory(self.ollama_client, ttl=BackendConfig.OLLAMA_INVENTORY_TTL)
+        self.model_inventory = model_inventory
+        self.response_cache = response_cache or get_response_cache()
+        self.single_flight = single_flight or get_single_flight()
+        self.scheduler = scheduler or get_generation_scheduler()
+        if warmup is None:
+            if ollama_client is None:
+                warmup = get_model_warmup()
+            else:
+                warmup = ModelWarmupManager(
+                    self.ollama_client, self.model_inventory,
+                    keep_alive=BackendConfig.OLLAMA_KEEP_ALIVE,
+                    interval=BackendConfig.MODEL_WARMUP_INTERVAL,
+                    timeout=BackendConfig.MODEL_WARMUP_TIMEOUT
+                )
+        self.warmup = warmup
+        self.circuit_breakers = circuit_breakers or get_circuit_breakers()
+        self.cascade_metrics = cascade_metrics or get_cascade_metrics()
+        self.cost_model = cost_model or get_model_cost_model()
+        self.draft_checker = DraftChecker(min_chars=BackendConfig.CASCADE_MIN_CHARS)
+        self.fallback_models = system_config['fallback_models']
+        # Modelo Ollama padrão do processo (resolvido na verificação de disponibilidade)
+        self.default_ollama_model = BackendConfig.OLLAMA_MODEL
+        self.ollama_available = False
+        self.model_loaded = False
+        self.model = None
+        self.tokenizer = None
+        self.current_model_index = 0  # Para fallback
 
 
 class GemmaService:
     """Serviço para interação com modelos Gemma com seleção automática"""
 
-    def __init__(self, domain: str = "general", force_model: Optional[str] = None, context: Optional[str] = None, criticality: Optional[str] = None):
+    # Modelos Gemma-3n preferidos por domínio (em ordem)
+    DOMAIN_MODEL_PREFERENCES = {
+        'medical': ['gemma3n:e4b', 'gemma3n:latest'],  # Precisão máxima para medicina
+        'emergency': ['gemma3n:e4b', 'gemma3n:latest'],  # Análises críticas
+        'health': ['gemma3n:e4b', 'gemma3n:latest'],  # Diagnósticos precisos
+        'education': ['gemma3n:e2b', 'gemma3n:latest'],  # Eficiência para educação
+        'agriculture': ['gemma3n:e2b', 'gemma3n:latest'],  # Tarefas básicas
+        'translation': ['gemma3n:e2b', 'gemma3n:latest'],  # Processamento de linguagem
+        'content_generation': ['gemma3n:e2b', 'gemma3n:latest'],  # Geração de conteúdo
+        'general': ['gemma3n:e2b', 'gemma3n:e4b', 'gemma3n:latest']  # Qualquer modelo
+    }
+
+    # Criticidade mínima na fila de geração por domínio
+    DOMAIN_CRITICALITY_FLOOR = {
+        'emergency': CriticalityLevel.CRITICAL,
+        'medical': CriticalityLevel.HIGH,
+        'health': CriticalityLevel.HIGH,
+        'education': CriticalityLevel.MEDIUM,
+        'agriculture': CriticalityLevel.MEDIUM,
+        'content_generation': CriticalityLevel.LOW,
+        'gamification': CriticalityLevel.LOW
+    }
+
+    def __init__(self, domain: str = "general", force_model: Optional[str] = None, context: Optional[str] = None,
+                 criticality: Optional[str] = None, backend: Optional[GemmaBackend] = None):
         self.logger = logging.getLogger(__name__)
         self.config = BackendConfig
 
+        # Armazenar domínio para seleção inteligente
+        self.domain = domain
+
         # Configuração inteligente de modelo baseada na criticidade e contexto
         if force_model:
             self.model_name = force_model
@@ -60,16 +160,6 @@ class GemmaService:
             # Fallback para configuração tradicional se necessário
             self.model_config = ModelSelector.get_model_info(self.model_name).get('config', {})
 
-        # Configurações do sistema
-        self.system_config = ModelSelector.auto_configure_for_system()
-        self.fallback_models = self.system_config['fallback_models']
-
-        self.ollama_available = False
-        self.model_loaded = False
-        self.model = None
-        self.tokenizer = None
-        self.current_model_index = 0  # Para fallback
-
         # Sistema de prompts especializados para validação comunitária
         self.system_prompts = {
             'content_generator': """
@@ -77,6 +167,19 @@ Você é o módulo de geração de conteúdo do aplicativo 'Moransa'. Sua missã
 """
         }
 
+        if backend is not None:
+            # Visão de domínio: reutiliza Ollama/modelo local já inicializados
+            self.backend = backend
+            self.system_config = backend.system_config
+            self.fallback_models = backend.fallback_models
+            self.logger.debug(f"GemmaService (visão compartilhada) para domínio: {domain}, modelo: {self.model_name}")
+            return
+
+        # Configurações do sistema
+        self.backend = GemmaBackend(ModelSelector.auto_configure_for_system())
+        self.system_config = self.backend.system_config
+        self.fallback_models = self.backend.fallback_models
+
         # Configurar credenciais do Kaggle para acesso ao Gemma-3n
         self._setup_kaggle_credentials()
 
@@ -88,33 +191,116 @@ Você é o módulo de geração de conteúdo do aplicativo 'Moransa'. Sua missã
         if not self.ollama_available:
             self._load_local_model()
 
-        # Armazenar domínio para seleção inteligente
-        self.domain = domain
-
         self.logger.info(f"GemmaService inicializado com modelo: {self.model_name} para domínio: {domain}")
         if hasattr(self, 'intelligent_config') and self.intelligent_config:
             self.logger.info(f"Seleção inteligente ativa - Modelo: {self.intelligent_config.name}, Criticidade: {self.intelligent_config.criticality_threshold.value}")
         self.logger.info(f"Recursos do sistema: RAM {self.system_config['system_resources']['available_ram_gb']:.1f}GB, GPU: {self.system_config['system_resources']['has_cuda']}")
         self.logger.info("🎯 Modo de validação comunitária ativado - Gemma-3n como gerador de conteúdo")
 
-    def _select_optimal_gemma_model(self, available_models: List[str], device_specs: Dict[str, Any] = None) -> str:
+    # Estado pesado delegado ao backend compartilhado
+
+    @property
+    def ollama_client(self) -> OllamaClient:
+        return self.backend.ollama_client
+
+    @property
+    def async_ollama_client(self) -> AsyncOllamaClient:
+        return self.backend.async_ollama_client
+
+    @property
+    def model_inventory(self) -> OllamaModelInventory:
+        return self.backend.model_inventory
+
+    @property
+    def response_cache(self) -> ResponseCache:
+        return self.backend.response_cache
+
+    @property
+    def single_flight(self) -> SingleFlight:
+        return self.backend.single_flight
+
+    @property
+    def scheduler(self) -> GenerationScheduler:
+        return self.backend.scheduler
+
+    @property
+    def warmup(self) -> ModelWarmupManager:
+        return self.backend.warmup
+
+    @property
+    def circuit_breakers(self) -> CircuitBreakerRegistry:
+        return self.backend.circuit_breakers
+
+    @property
+    def cascade_metrics(self) -> CascadeMetrics:
+        return self.backend.cascade_metrics
+
+    @property
+    def cost_model(self) -> ModelCostModel:
+        return self.backend.cost_model
+
+    @property
+    def draft_checker(self) -> DraftChecker:
+        return self.backend.draft_checker
+
+    @property
+    def default_ollama_model(self) -> str:
+        return self.backend.default_ollama_model
+
+    @default_ollama_model.setter
+    def default_ollama_model(self, value: str) -> None:
+        self.backend.default_ollama_model = value
+
+    @property
+    def ollama_available(self) -> bool:
+        return self.backend.ollama_available
+
+    @ollama_available.setter
+    def ollama_available(self, value: bool) -> None:
+        self.backend.ollama_available = value
+
+    @property
+    def model_loaded(self) -> bool:
+        return self.backend.model_loaded
+
+    @model_loaded.setter
+    def model_loaded(self, value: bool) -> None:
+        self.backend.model_loaded = value
+
+    @property
+    def model(self):
+        return self.backend.model
+
+    @model.setter
+    def model(self, value) -> None:
+        self.backend.model = value
+
+    @property
+    def tokenizer(self):
+        return self.backend.tokenizer
+
+    @tokenizer.setter
+    def tokenizer(self, value) -> None:
+        self.backend.tokenizer = value
+
+    @property
+    def current_model_index(self) -> int:
+        return self.backend.current_model_index
+
+    @current_model_index.setter
+    def current_model_index(self, value: int) -> None:
+        self.backend.current_model_index = value
+
+    def _select_optimal_gemma_model(self, available_models: List[str], device_specs: Dict[str, Any] = None,
+                                    domain: Optional[str] = None) -> str:
         """Seleciona o modelo Gemma-3n mais adequado baseado no domínio, necessidades e especificações do dispositivo"""
-        domain_preferences = {
-            'medical': ['gemma3n:e4b', 'gemma3n:latest'],  # Precisão máxima para medicina
-            'emergency': ['gemma3n:e4b', 'gemma3n:latest'],  # Análises críticas
-            'health': ['gemma3n:e4b', 'gemma3n:latest'],  # Diagnósticos precisos
-            'education': ['gemma3n:e2b', 'gemma3n:latest'],  # Eficiência para educação
-            'agriculture': ['gemma3n:e2b', 'gemma3n:latest'],  # Tarefas básicas
-            'translation': ['gemma3n:e2b', 'gemma3n:latest'],  # Processamento de linguagem
-            'content_generation': ['gemma3n:e2b', 'gemma3n:latest'],  # Geração de conteúdo
-            'general': ['gemma3n:e2b', 'gemma3n:e4b', 'gemma3n:latest']  # Qualquer modelo
-        }
+        domain = domain or self.domain
 
         # Analisar especificações do dispositivo para otimização
         device_quality = self._analyze_device_quality(device_specs)
 
-        # Obter preferências para o domínio atual
-        preferred_models = domain_preferences.get(self.domain, domain_preferences['general'])
+        # Obter preferências para o domínio da requisição
+        preferred_models = self.DOMAIN_MODEL_PREFERENCES.get(domain, self.DOMAIN_MODEL_PREFERENCES['general'])
 
         # Ajustar preferências baseado na qualidade do dispositivo
         optimized_models = self._optimize_models_for_device(preferred_models, device_quality)
@@ -122,12 +308,12 @@ Você é o módulo de geração de conteúdo do aplicativo 'Moransa'. Sua missã
         # Selecionar o primeiro modelo otimizado que esteja disponível
         for preferred in optimized_models:
             if preferred in available_models:
-                self.logger.info(f"🎯 Modelo selecionado: {preferred} (domínio: {self.domain}, dispositivo: {device_quality})")
+                self.logger.info(f"🎯 Modelo selecionado: {preferred} (domínio: {domain}, dispositivo: {device_quality})")
                 return preferred
 
         # Fallback: usar o primeiro disponível
         selected = available_models[0]
-        self.logger.warning(f"⚠️ Usando fallback: {selected} (preferências não encontradas para {self.domain})")
+        self.logger.warning(f"⚠️ Usando fallback: {selected} (preferências não encontradas para {domain})")
         return selected
 
     def _analyze_device_quality(self, device_specs: Dict[str, Any] = None) -> str:
@@ -226,8 +412,8 @@ Você é o módulo de geração de conteúdo do aplicativo 'Moransa'. Sua missã
 
         return optimized
 
-    def _update_domain_from_category(self, category: str) -> None:
-        """Atualizar domínio baseado na categoria para seleção inteligente"""
+    def _domain_for_category(self, category: str) -> str:
+        """Domínio da requisição a partir da categoria (para seleção inteligente)"""
         category_to_domain = {
             'saude': 'health',
             'saúde': 'health',
@@ -242,49 +428,37 @@ Você é o módulo de geração de conteúdo do aplicativo 'Moransa'. Sua missã
             'geral': 'content_generation'
         }
 
-        new_domain = category_to_domain.get(category.lower(), 'content_generation')
-        if new_domain != self.domain:
-            self.logger.info(f"🔄 Atualizando domínio: {self.domain} → {new_domain} (categoria: {category})")
-            self.domain = new_domain
+        return category_to_domain.get(category.lower(), 'content_generation')
 
-    def _reselect_model_if_needed(self, device_specs: Dict[str, Any] = None) -> None:
-        """Re-selecionar modelo se o domínio mudou e há modelos melhores disponíveis"""
+    def _preferred_ollama_model(self, domain: str, device_specs: Dict[str, Any] = None) -> Optional[str]:
+        """Melhor modelo Gemma-3n instalado para o domínio e dispositivo (sem alterar estado)"""
         if not self.ollama_available:
-            return
+            return None
 
         try:
-            # Verificar modelos disponíveis novamente
-            response = requests.get(f"{self.config.OLLAMA_HOST}/api/tags", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                model_names = [model['name'] for model in data.get('models', [])]
-                available_gemma_models = [m for m in model_names if "gemma3n" in m.lower()]
-
-                if available_gemma_models:
-                    optimal_model = self._select_optimal_gemma_model(available_gemma_models, device_specs)
-                    if optimal_model != self.config.OLLAMA_MODEL:
-                        self.logger.info(f"🔄 Mudando modelo: {self.config.OLLAMA_MODEL} → {optimal_model}")
-                        self.config.OLLAMA_MODEL = optimal_model
+            # Modelos disponíveis segundo o inventário em memória (sem chamada de rede)
+            available_gemma_models = self.model_inventory.gemma3n_models()
+            if available_gemma_models:
+                return self._select_optimal_gemma_model(available_gemma_models, device_specs, domain)
         except Exception as e:
             self.logger.warning(f"⚠️ Erro ao re-selecionar modelo: {e}")
+        return None
 
     def _check_ollama_availability(self) -> bool:
         """Verificar se Ollama está disponível"""
         try:
             self.logger.info(f"🔍 Verificando disponibilidade do Ollama em {self.config.OLLAMA_HOST}")
-            response = requests.get(
-                f"{self.config.OLLAMA_HOST}/api/tags",
-                timeout=5
-            )
-            if response.status_code == 200:
-                models = response.json().get('models', [])
-                model_names = [model['name'] for model in models]
+            inventory = self.model_inventory
+            refreshed = inventory.refresh()
+            inventory.start()
+            if refreshed:
+                model_names = inventory.model_names()
                 self.logger.info(f"📋 Modelos disponíveis no Ollama: {model_names}")
 
                 # Verificar disponibilidade do Gemma-3n
-                if self.config.OLLAMA_MODEL in model_names:
+                if self.default_ollama_model in model_names:
                     self.ollama_available = True
-                    self.logger.info(f"🚀 Gemma-3n modelo {self.config.OLLAMA_MODEL} disponível via Ollama")
+                    self.logger.info(f"🚀 Gemma-3n modelo {self.default_ollama_model} disponível via Ollama")
                     self.logger.info(f"✅ Executando localmente conforme requisitos do desafio Gemma 3n")
                     return True
                 elif any("gemma3n" in model.lower() for model in model_names):
@@ -295,24 +469,24 @@ Você é o módulo de geração de conteúdo do aplicativo 'Moransa'. Sua missã
                     self.logger.info(f"🔄 Selecionando modelo Gemma-3n otimizado: {selected_model}")
                     self.logger.info(f"📊 Domínio: {getattr(self, 'domain', 'general')} - Modelos disponíveis: {available_gemma_models}")
 
-                    # Atualizar temporariamente o modelo configurado
-                    self.config.OLLAMA_MODEL = selected_model
+                    # Modelo padrão do backend (BackendConfig permanece inalterado)
+                    self.default_ollama_model = selected_model
                     self.ollama_available = True
                     self.logger.info(f"✅ Executando localmente conforme requisitos do desafio Gemma 3n")
                     return True
                 elif any("gemma" in model.lower() for model in model_names):
                     # Encontrou algum modelo Gemma, mas não o Gemma-3n específico
-                    self.logger.warning(f"⚠️ Modelo específico {self.config.OLLAMA_MODEL} não encontrado")
+                    self.logger.warning(f"⚠️ Modelo específico {self.default_ollama_model} não encontrado")
                     self.logger.info(f"📋 Modelos Gemma disponíveis: {[m for m in model_names if 'gemma' in m.lower()]}")
                     self.ollama_available = False
                     return False
                 else:
-                    self.logger.warning(f"❌ Modelo {self.config.OLLAMA_MODEL} não encontrado no Ollama")
+                    self.logger.warning(f"❌ Modelo {self.default_ollama_model} não encontrado no Ollama")
                     self.logger.info(f"📋 Modelos disponíveis: {model_names}")
                     self.ollama_available = False
                     return False
             else:
-                self.logger.warning(f"❌ Ollama respondeu com status {response.status_code}")
+                self.logger.warning("❌ Ollama não respondeu à listagem de modelos")
                 self.ollama_available = False
                 return False
 
@@ -369,68 +543,56 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
 """
 
         try:
-            # Atualizar domínio baseado na categoria para seleção inteligente
-            self._update_domain_from_category(category)
+            # Domínio da requisição baseado na categoria para seleção inteligente
+            domain = self._domain_for_category(category)
 
             # Analisar qualidade do dispositivo
             device_quality = self._analyze_device_quality(device_specs)
             self.logger.info(f"📱 Dispositivo analisado: {device_quality} (RAM: {device_specs.get('ram_gb', 'N/A') if device_specs else 'N/A'}GB, CPU: {device_specs.get('cpu_cores', 'N/A') if device_specs else 'N/A'} cores)")
 
             # Usar Ollama se disponível
-            if self.ollama_available:
-                # Re-selecionar modelo se necessário baseado na nova categoria e dispositivo
-                self._reselect_model_if_needed(device_specs)
-
-                response = self._generate_with_ollama(
-                    prompt=prompt,
-                    temperature=0.7,  # Criatividade moderada
-                    max_tokens=1500
-                )
+            routing = self._resolve_routing(
+                prompt,
+                auto_select_model=False,
+                domain=domain,
+                ollama_model=self._preferred_ollama_model(domain, device_specs),
+                temperature=0.7,  # Criatividade moderada
+                max_tokens=1500,
+                response_format=feature_schema('portuguese_phrases')
+            )
+            if routing.backend == BACKEND_OLLAMA:
+                with self._admission(prompt, CriticalityLevel.LOW, domain):
+                    response = self._generate_with_ollama(prompt=prompt, routing=routing)
             else:
                 # Fallback para modelo local
-                response = self._generate_with_local_model(
-                    prompt=prompt,
-                    temperature=0.7,
-                    max_tokens=1500
-                )
-
-            # Tentar parsear JSON da resposta
-            try:
-                import re
-
-                # Extrair texto da resposta se for dict
-                response_text = response.get('response', response) if isinstance(response, dict) else response
-
-                # Extrair JSON da resposta
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group()
-                    result = json.loads(json_str)
-
-                    # Validar estrutura
-                    if 'phrases' in result and isinstance(result['phrases'], list):
-                        self.logger.info(f"✅ Geradas {len(result['phrases'])} frases para categoria '{category}' usando {'Ollama' if self.ollama_available else 'modelo local'} - dispositivo {device_quality}")
-                        return {
-                            'success': True,
-                            'phrases': result['phrases'],
-                            'generated_count': len(result['phrases']),
-                            'category': category,
-                            'difficulty': difficulty,
-                            'gemma_used': self.ollama_available,
-                            'device_optimized': True,
-                            'device_quality': device_quality,
-                            'selected_model': self.config.OLLAMA_MODEL if self.ollama_available else self.model_name,
-                            'fallback': not self.ollama_available
-                        }
-                    else:
-                        raise ValueError("Estrutura JSON inválida")
-                else:
-                    raise ValueError("JSON não encontrado na resposta")
+                with self._admission(prompt, CriticalityLevel.LOW, domain):
+                    response = self._generate_with_local_model(
+                        prompt=prompt,
+                        temperature=0.7,
+                        max_tokens=1500
+                    )
 
-            except (json.JSONDecodeError, ValueError) as e:
-                self.logger.warning(f"Erro ao parsear JSON: {e}. Usando fallback.")
+            # Decodificar e validar contra o esquema das frases
+            response_text = self._structured_text(response) if isinstance(response, dict) else response
+            result, errors = decode_structured(response_text, 'portuguese_phrases')
+            if result is None:
+                self.logger.warning(f"Erro ao parsear JSON: {'; '.join(errors[:3])}. Usando fallback.")
                 return self._get_portuguese_phrases_fallback(category, difficulty, quantity)
 
+            self.logger.info(f"✅ Geradas {len(result['phrases'])} frases para categoria '{category}' usando {'Ollama' if self.ollama_available else 'modelo local'} - dispositivo {device_quality}")
+            return {
+                'success': True,
+                'phrases': result['phrases'],
+                'generated_count': len(result['phrases']),
+                'category': category,
+                'difficulty': difficulty,
+                'gemma_used': self.ollama_available,
+                'device_optimized': True,
+                'device_quality': device_quality,
+                'selected_model': routing.model,
+                'fallback': not self.ollama_available
+            }
+
         except Exception as e:
             self.logger.error(f"Erro ao gerar frases: {e}")
             return self._get_portuguese_phrases_fallback(category, difficulty, quantity)
@@ -503,20 +665,8 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
         }
 
     def _check_ollama_model_available(self, model_name: str) -> bool:
-        """Verifica se um modelo específico está disponível no Ollama"""
-        try:
-            response = requests.get(
-                f"{self.config.OLLAMA_HOST}/api/tags",
-                timeout=5
-            )
-            if response.status_code == 200:
-                models = response.json().get('models', [])
-                model_names = [model['name'] for model in models]
-                return model_name in model_names
-            return False
-        except Exception as e:
-            self.logger.warning(f"Erro ao verificar modelo {model_name}: {e}")
-            return False
+        """Verifica se um modelo específico está disponível no Ollama (inventário em memória)"""
+        return self.model_inventory.has_model(model_name)
 
     def _setup_kaggle_credentials(self):
         """Configurar credenciais do Kaggle para acesso ao modelo Gemma-3n"""
@@ -702,17 +852,26 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
             self.logger.error("Todos os modelos fallback falharam")
             self.model_loaded = False
 
-    def generate_response(
+    def _resolve_routing(
         self,
         prompt: str,
-        system_prompt: Optional[str] = None,
         auto_select_model: bool = True,
+        domain: Optional[str] = None,
+        ollama_model: Optional[str] = None,
+        cascade: bool = False,
+        endpoint: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        criticality: Optional[Any] = None,
+        response_format: Optional[Dict[str, Any]] = None,
         **kwargs
-    ) -> Dict[str, Any]:
-        """Gerar resposta usando Ollama ou modelo local com seleção inteligente"""
-        start_time = datetime.now()
+    ) -> RoutingDecision:
+        """Resolver, uma única vez por requisição, modelo, opções, backend e cadeia de fallback
 
-        # Seleção inteligente de modelo baseada no prompt
+        Nada é gravado em ``BackendConfig`` nem no serviço: a decisão imutável
+        é passada adiante por todo o caminho de geração.
+        """
+        domain = domain or self.domain
+        endpoint = endpoint or current_endpoint()
         selected_model = self.model_name
         model_config = self.intelligent_config or self.model_config
 
@@ -721,32 +880,353 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
                 # Detecta o melhor modelo para este prompt específico
                 new_model, new_config = IntelligentModelSelector.select_model(text=prompt)
 
-                # Se o modelo selecionado é diferente do atual, atualiza
                 if new_model != self.model_name:
-                    self.logger.info(f"Mudando modelo de {self.model_name} para {new_model} baseado no conteúdo")
-                    selected_model = new_model
-                    model_config = new_config
-
-                    # Atualiza configuração do Ollama se necessário
-                    if hasattr(self.config, 'OLLAMA_MODEL'):
-                        original_model = self.config.OLLAMA_MODEL
-                        self.config.OLLAMA_MODEL = new_config.ollama_model
-
-                        # Verifica se o novo modelo está disponível
-                        if not self._check_ollama_model_available(new_config.ollama_model):
-                            self.logger.warning(f"Modelo {new_config.ollama_model} não disponível, usando {original_model}")
-                            self.config.OLLAMA_MODEL = original_model
-                            selected_model = self.model_name
-                            model_config = self.intelligent_config or self.model_config
+                    if not self.ollama_available or self._check_ollama_model_available(new_config.ollama_model):
+                        self.logger.info(f"Usando {new_model} em vez de {self.model_name} baseado no conteúdo")
+                        selected_model = new_model
+                        model_config = new_config
+                    else:
+                        self.logger.warning(f"Modelo {new_config.ollama_model} não disponível, mantendo {self.model_name}")
 
             except Exception as e:
                 self.logger.warning(f"Erro na seleção automática de modelo: {e}, usando modelo padrão")
 
+        options = self._generation_options(model_config, **kwargs)
+        draft_model, draft_options = None, {}
+        latency: Optional[LatencyEstimate] = None
+        if self.ollama_available:
+            backend = BACKEND_OLLAMA
+            level = self._resolve_criticality(prompt, criticality, domain)
+            if not ollama_model:
+                ollama_model = getattr(model_config, 'ollama_model', None) or self.default_ollama_model
+            fallback_chain = self._ollama_fallback_chain(ollama_model, domain)
+            if self.config.LATENCY_AWARE_SELECTION:
+                chosen, latency = self._fit_latency_budget(
+                    (ollama_model,) + fallback_chain,
+                    len(prompt or '') + len(system_prompt or ''),
+                    options.get('num_predict'),
+                    endpoint,
+                    level
+                )
+                if chosen != ollama_model:
+                    fallback_chain = tuple(m for m in (ollama_model,) + fallback_chain if m != chosen)
+                    ollama_model = chosen
+                    chosen_config = IntelligentModelSelector.MODELS.get(chosen)
+                    if chosen_config is not None:
+                        options = self._generation_options(chosen_config, **kwargs)
+            # Pedidos CRITICAL vão direto ao modelo maior: um rascunho reprovado só somaria latência
+            if cascade and level != CriticalityLevel.CRITICAL and self._cascade_applies(ollama_model):
+                draft_model = self.config.CASCADE_DRAFT_MODEL
+                draft_options = self._generation_options(IntelligentModelSelector.MODELS.get(draft_model), **kwargs)
+        else:
+            backend = BACKEND_LOCAL if self.model_loaded else BACKEND_FALLBACK
+            ollama_model = self.model_name
+            fallback_chain = ()
+
+        return RoutingDecision(
+            model=ollama_model,
+            backend=backend,
+            options=options,
+            fallback_chain=fallback_chain,
+            selected_model=selected_model,
+            domain=domain,
+            endpoint=endpoint,
+            draft_model=draft_model,
+            draft_options=draft_options,
+            model_config=model_config,
+            predicted_latency_s=round(latency.total_s, 2) if latency else None,
+            response_format=response_format if self.config.STRUCTURED_OUTPUT else None
+        )
+
+    def _fit_latency_budget(
+        self,
+        candidates: Tuple[str, ...],
+        prompt_chars: int,
+        max_tokens: Optional[int],
+        endpoint: str,
+        criticality: CriticalityLevel
+    ) -> Tuple[str, Optional[LatencyEstimate]]:
+        """Melhor candidato cuja latência prevista (fila + prompt + geração) cabe no prazo do endpoint"""
+        deadline = current_deadline()
+        if deadline is None:
+            return candidates[0], None
+
+        budget = deadline.remaining() * self.config.LATENCY_BUDGET_HEADROOM
+        queue_wait = self.scheduler.estimate_wait(criticality)
+        chosen, estimate = self.cost_model.choose(
+            candidates, budget, prompt_chars, max_tokens, endpoint, queue_wait
+        )
+        if chosen != candidates[0]:
+            self.logger.info(
+                f"⏱️ {chosen} em vez de {candidates[0]}: previsão de "
+                f"{estimate.total_s if estimate else 0:.1f}s para orçamento de {budget:.1f}s ({endpoint})"
+            )
+        return chosen, estimate
+
+    def _record_model_cost(self, model_name: str, stats: Dict[str, Any], prompt_chars: int,
+                           routing: Optional[RoutingDecision] = None) -> None:
+        """Alimentar o perfil de custo do modelo com os contadores da resposta do Ollama"""
+        try:
+            self.cost_model.record(
+                model_name, stats,
+                queue_depth=self.scheduler.depth(),
+                prompt_chars=prompt_chars,
+                endpoint=routing.endpoint if routing else current_endpoint()
+            )
+        except Exception as e:
+            self.logger.debug(f"Erro ao registrar custo do modelo {model_name}: {e}")
+
+    def _cascade_applies(self, model: str) -> bool:
+        """Cascata só quando o modelo escolhido é o maior e o rascunho está instalado"""
+        draft_model = self.config.CASCADE_DRAFT_MODEL
+        return (
+            self.config.CASCADE_ENABLED
+            and model in self.config.CASCADE_LARGE_MODELS
+            and draft_model != model
+            and self._check_ollama_model_available(draft_model)
+        )
+
+    def _ollama_fallback_chain(self, primary: str, domain: str) -> Tuple[str, ...]:
+        """Modelos Gemma-3n instalados, na ordem de preferência do domínio, exceto o principal"""
+        installed = self.model_inventory.gemma3n_models()
+        if not installed:
+            return ()
+        preferred = self.DOMAIN_MODEL_PREFERENCES.get(domain, self.DOMAIN_MODEL_PREFERENCES['general'])
+        ordered = [m for m in preferred if m in installed] + sorted(m for m in installed if m not in preferred)
+        return tuple(m for m in ordered if m != primary)
+
+    def _generation_options(self, model_config: Optional[Any] = None, **kwargs) -> Dict[str, Any]:
+        """Opções de geração do Ollama: parâmetros explícitos > modelo inteligente > BackendConfig"""
+        max_tokens = kwargs.get('max_new_tokens', kwargs.get('max_tokens'))
+        if model_config and hasattr(model_config, 'temperature'):
+            temperature = kwargs.get('temperature', model_config.temperature)
+            top_p = kwargs.get('top_p', model_config.top_p)
+            max_tokens = max_tokens or model_config.max_tokens
+            self.logger.info(f"Usando configurações inteligentes - Temp: {temperature}, Top-p: {top_p}, Max tokens: {max_tokens}")
+        else:
+            temperature = kwargs.get('temperature', self.config.TEMPERATURE)
+            top_p = kwargs.get('top_p', self.config.TOP_P)
+            max_tokens = max_tokens or self.config.MAX_NEW_TOKENS
+
+        return {
+            "temperature": temperature,
+            "top_p": top_p,
+            "top_k": kwargs.get('top_k', self.config.TOP_K),
+            "repeat_penalty": kwargs.get('repetition_penalty', self.config.REPETITION_PENALTY),
+            "num_predict": max_tokens
+        }
+
+    @staticmethod
+    def _detect_response_context(prompt: str) -> str:
+        """Detectar o contexto da resposta para formatação final"""
+        return analyze_text(prompt).first('response_context', 'general')
+
+    def _lookup_cached_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        routing: RoutingDecision,
+        use_cache: bool = True
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Consultar o cache de respostas; retorna (chave, resposta armazenada)"""
+        cache = self.response_cache
+        if not use_cache or not cache.enabled:
+            return None, None
+        if cache_bypass_requested():
+            cache.record_bypass()
+            self.logger.info("♻️ Cache de respostas ignorado a pedido do cliente")
+            return None, None
+
+        cache_key = cache.make_key(routing.model, system_prompt, prompt, routing.cache_params())
+        cached = cache.get(cache_key)
+        if cached is not None:
+            self.logger.info(f"⚡ Resposta servida do cache ({cached['metadata']['cache']['tier']})")
+        return cache_key, cached
+
+    def _store_cached_response(self, cache_key: Optional[str], response: Dict[str, Any], domain: str) -> bool:
+        """Armazenar resposta bem-sucedida do modelo (nunca respostas de fallback)"""
+        if not cache_key or not response.get('success') or response.get('fallback'):
+            return False
+        if response.get('metadata', {}).get('provider') in ('fallback', 'error'):
+            return False
+        return self.response_cache.set(cache_key, response, domain)
+
+    def _resolve_criticality(self, prompt: str, criticality: Optional[Any] = None,
+                             domain: Optional[str] = None) -> CriticalityLevel:
+        """Criticidade do pedido: explícita, ou detectada no texto com piso por domínio"""
+        if isinstance(criticality, CriticalityLevel):
+            return criticality
+        if criticality:
+            try:
+                return CriticalityLevel(str(criticality).lower())
+            except ValueError:
+                self.logger.warning(f"Criticidade inválida: {criticality}, usando detecção automática")
+
+        detected = IntelligentModelSelector.detect_criticality_from_text(prompt or "")
+        floor = self.DOMAIN_CRITICALITY_FLOOR.get(domain or self.domain)
+        if floor and PRIORITY_RANK[floor] < PRIORITY_RANK[detected]:
+            return floor
+        return detected
+
+    @contextmanager
+    def _admission(self, prompt: str, criticality: Optional[Any] = None, domain: Optional[str] = None):
+        """Reservar um slot no agendador de geração; rejeições viram HTTP 503"""
+        level = self._resolve_criticality(prompt, criticality, domain)
+        try:
+            with self.scheduler.slot(level):
+                yield level
+        except GenerationRejected as e:
+            self.logger.warning(f"🚦 {e} (Retry-After: {e.retry_after}s)")
+            mark_request_rejected(e)
+            raise
+
+    @asynccontextmanager
+    async def _async_admission(self, prompt: str, criticality: Optional[Any] = None,
+                               domain: Optional[str] = None):
+        """Versão assíncrona de ``_admission`` para as corrotinas do loop compartilhado"""
+        level = self._resolve_criticality(prompt, criticality, domain)
+        try:
+            async with self.scheduler.async_slot(level):
+                yield level
+        except GenerationRejected as e:
+            self.logger.warning(f"🚦 {e} (Retry-After: {e.retry_after}s)")
+            mark_request_rejected(e)
+            raise
+
+    def _run_admitted(self, prompt: str, fn, criticality: Optional[Any] = None,
+                      domain: Optional[str] = None) -> Dict[str, Any]:
+        """Executar uma geração dentro do agendador, retornando o erro como dicionário"""
+        try:
+            with self._admission(prompt, criticality, domain):
+                return fn()
+        except (GenerationRejected, DeadlineExceeded) as e:
+            return e.to_response()
+
+    @contextmanager
+    def _ollama_guard(self, model_name: str):
+        """Passar a chamada ao Ollama pelos disjuntores do backend e do modelo"""
+        backend = self.circuit_breakers.get('ollama')
+        model = self.circuit_breakers.get(f'ollama:{model_name}')
+        backend.before_call()
+        try:
+            model.before_call()
+        except CircuitOpen:
+            backend.cancel()
+            raise
+
+        started = time.monotonic()
+        try:
+            yield
+        except DeadlineExceeded:
+            # Requisição abandonada ou sem tempo: não diz nada sobre a saúde do Ollama
+            backend.cancel()
+            model.cancel()
+            raise
+        except Exception as e:
+            elapsed = time.monotonic() - started
+            model.record_failure(elapsed)
+            if isinstance(e, OllamaResponseError) and e.status_code < 500:
+                # O servidor respondeu; o problema é do modelo ou do pedido
+                backend.record_success(elapsed)
+            else:
+                backend.record_failure(elapsed)
+            raise
+        except BaseException:
+            # Stream abandonado pelo cliente ou tarefa cancelada: sem veredito
+            backend.cancel()
+            model.cancel()
+            raise
+        else:
+            elapsed = time.monotonic() - started
+            backend.record_success(elapsed)
+            model.record_success(elapsed)
+
+    @staticmethod
+    def _mark_if_rejected(response: Dict[str, Any]) -> None:
+        """Propagar a rejeição do agendador para a requisição atual (ex.: chamadas coalescidas)"""
+        if isinstance(response, dict) and response.get('error') == GenerationRejected.ERROR_CODE:
+            metadata = response.get('metadata', {})
+            mark_request_rejected(GenerationRejected(
+                CriticalityLevel(metadata.get('criticality', CriticalityLevel.MEDIUM.value)),
+                response.get('retry_after', 1),
+                response.get('reason', '')
+            ))
+
+    def generate_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        auto_select_model: bool = True,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Gerar resposta usando Ollama ou modelo local com seleção inteligente"""
+        start_time = datetime.now()
+
+        # Cache de respostas (use_cache=False ou cabeçalho de bypass forçam nova geração)
+        use_cache = kwargs.pop('use_cache', True)
+        cache_domain = kwargs.pop('cache_domain', None) or (
+            self.domain if self.domain != 'general' else self._detect_response_context(prompt)
+        )
+        criticality = kwargs.pop('criticality', None)
+        cascade = kwargs.pop('cascade', True)
+        endpoint = kwargs.pop('endpoint', None)
+        response_format = kwargs.pop('response_format', None)
+
+        # Roteamento resolvido uma única vez para toda a geração
+        routing = self._resolve_routing(prompt, auto_select_model, cascade=cascade, endpoint=endpoint,
+                                        system_prompt=system_prompt, criticality=criticality,
+                                        response_format=response_format, **kwargs)
+
+        cache_key, cached = self._lookup_cached_response(prompt, system_prompt, routing, use_cache)
+        if cached is not None:
+            return cached
+
+        # Gerações idênticas em andamento são compartilhadas (single-flight);
+        # apenas a execução líder ocupa um slot no agendador de prioridade
+        flight_key = cache_key or ResponseCache.make_key(
+            routing.model, system_prompt, prompt, routing.cache_params()
+        )
+        result = self.single_flight.do(
+            flight_key,
+            lambda: self._run_admitted(
+                prompt,
+                lambda: self._generate_and_store(
+                    prompt, system_prompt, routing,
+                    start_time, cache_key, cache_domain, **kwargs
+                ),
+                criticality=criticality,
+                domain=cache_domain
+            ),
+            is_error=lambda result: not result.get('success', False)
+        )
+        self._mark_if_rejected(result)
+        return result
+
+    def _generate_and_store(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        routing: RoutingDecision,
+        start_time: datetime,
+        cache_key: Optional[str],
+        cache_domain: str,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Executar a geração (Ollama, modelo local ou fallback) e armazenar no cache"""
+        model_config = routing.model_config
+        provider = routing.backend
+        json_keys = kwargs.pop('expected_json_keys', None)
         try:
             # Tentar Ollama primeiro
-            if self.ollama_available:
-                response = self._generate_with_ollama(prompt, system_prompt, model_config=model_config, **kwargs)
-            elif self.model_loaded:
+            if routing.cascade:
+                response = self._generate_cascade(prompt, system_prompt, routing, json_keys, **kwargs)
+            elif routing.backend == BACKEND_OLLAMA:
+                response = self._generate_with_ollama(prompt, system_prompt, routing=routing, **kwargs)
+                if routing.model in self.config.CASCADE_LARGE_MODELS and not response.get('fallback'):
+                    self.cascade_metrics.record_large(
+                        routing.endpoint, (datetime.now() - start_time).total_seconds()
+                    )
+            elif routing.backend == BACKEND_LOCAL:
                 response = self._generate_with_local_model(prompt, system_prompt, model_config=model_config, **kwargs)
             else:
                 # Tentar carregar um modelo automaticamente
@@ -754,29 +1234,29 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
                 self._load_local_model()
 
                 if self.model_loaded:
+                    provider = BACKEND_LOCAL
                     response = self._generate_with_local_model(prompt, system_prompt, model_config=model_config, **kwargs)
                 else:
                     # Fallback para resposta padrão
                     response = self._generate_fallback_response(prompt)
 
             # Detectar contexto automaticamente se não fornecido
-            context = "general"
-            if any(word in prompt.lower() for word in ['médico', 'saúde', 'doença', 'sintoma', 'emergência', 'socorro']):
-                context = "medical"
-            elif any(word in prompt.lower() for word in ['educação', 'escola', 'ensino', 'aprender', 'estudar']):
-                context = "education"
-            elif any(word in prompt.lower() for word in ['agricultura', 'plantio', 'cultivo', 'solo', 'colheita']):
-                context = "agriculture"
+            context = self._detect_response_context(prompt)
+            cascade_info = response.pop('cascade', None)
+            response.pop('done_reason', None)
 
             # Processar resposta final com contexto
             final_response = TextProcessor.process_gemma_response(response, context)
 
-            # Adicionar metadados
-            actual_model = model_config.ollama_model if model_config and hasattr(model_config, 'ollama_model') else self.config.OLLAMA_MODEL
+            # Adicionar metadados (modelo que de fato atendeu, que pode vir da cadeia de fallback)
+            actual_model = final_response.pop('served_model', routing.model) if provider == BACKEND_OLLAMA else self.model_name
             final_response['metadata'] = {
-                'provider': 'ollama' if self.ollama_available else 'local' if self.model_loaded else 'fallback',
-                'model': actual_model if self.ollama_available else self.model_name,
-                'selected_model': selected_model if 'selected_model' in locals() else self.model_name,
+                'provider': provider,
+                'model': actual_model,
+                'selected_model': routing.selected_model,
+                'fallback_chain': list(routing.fallback_chain),
+                'predicted_latency_s': routing.predicted_latency_s,
+                'cascade': cascade_info,
                 'gemma_3n_challenge': True,
                 'local_execution': True,
                 'generation_time': (datetime.now() - start_time).total_seconds(),
@@ -785,17 +1265,19 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
                 'context_detected': context,
                 'text_processed': True
             }
+            stored = self._store_cached_response(cache_key, final_response, cache_domain)
+            final_response['metadata']['cache'] = {'hit': False, 'stored': stored}
 
             # Log específico para o desafio Gemma 3n
-            if self.ollama_available:
-                # Usa o modelo selecionado dinamicamente se disponível
-                actual_model = model_config.ollama_model if model_config and hasattr(model_config, 'ollama_model') else self.config.OLLAMA_MODEL
+            if provider == BACKEND_OLLAMA:
                 self.logger.info(f"🎯 Resposta gerada usando Gemma-3n ({actual_model}) via Ollama local")
             else:
                 self.logger.info(f"🎯 Resposta gerada usando modelo Gemma-3n local ({self.model_name})")
 
             return final_response
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             self.logger.error(f"Erro na geração: {e}")
             # Tentar modelo fallback em caso de erro
@@ -851,6 +1333,7 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
                 "model": model_name,
                 "messages": messages,
                 "stream": False,
+                "keep_alive": self.config.OLLAMA_KEEP_ALIVE,
                 "options": {
                     "temperature": temperature,
                     "top_p": top_p,
@@ -863,35 +1346,45 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
             self.logger.info(f"🔄 Fazendo requisição para Ollama com modelo específico: {model_name}")
 
             # Fazer requisição
-            response = requests.post(
-                f"{self.config.OLLAMA_HOST}/api/chat",
-                json=payload,
-                timeout=self.config.OLLAMA_TIMEOUT
-            )
-
-            self.logger.info(f"📊 Status da resposta: {response.status_code}")
+            with self._ollama_guard(model_name):
+                response = self.ollama_client.post(
+                    "/api/chat",
+                    json=payload,
+                    timeout=self.config.OLLAMA_TIMEOUT
+                )
+                self.logger.info(f"📊 Status da resposta: {response.status_code}")
+                if response.status_code != 200:
+                    raise OllamaResponseError(response.status_code, response.text)
 
-            if response.status_code == 200:
-                result = response.json()
-                response_text = result['message']['content']
-                self.logger.info(f"✅ Resposta recebida do {model_name} (tamanho: {len(response_text)} chars)")
+            result = response.json()
+            response_text = result['message']['content']
+            self.logger.info(f"✅ Resposta recebida do {model_name} (tamanho: {len(response_text)} chars)")
+            self._record_model_cost(model_name, result, len(prompt) + len(system_prompt or ''))
 
-                # Processar e limpar o texto da resposta
-                cleaned_response = TextProcessor.clean_response(response_text)
-                self.logger.info(f"🧹 Texto processado (tamanho: {len(cleaned_response)} chars)")
+            # Processar e limpar o texto da resposta
+            cleaned_response = TextProcessor.clean_response(response_text)
+            self.logger.info(f"🧹 Texto processado (tamanho: {len(cleaned_response)} chars)")
 
-                return {
-                    'response': cleaned_response,
-                    'original_response': response_text,
-                    'success': True
-                }
-            else:
-                self.logger.error(f"❌ Erro na requisição Ollama: {response.status_code}")
-                return {
-                    'response': f"Erro na comunicação com {model_name}: {response.status_code}",
-                    'success': False
-                }
+            return {
+                'response': cleaned_response,
+                'original_response': response_text,
+                'success': True
+            }
 
+        except OllamaResponseError as e:
+            self.logger.error(f"❌ Erro na requisição Ollama: {e.status_code}")
+            return {
+                'response': f"Erro na comunicação com {model_name}: {e.status_code}",
+                'success': False
+            }
+        except CircuitOpen as e:
+            self.logger.warning(f"⚡ {e}")
+            return {
+                'response': f"{model_name} temporariamente indisponível",
+                'success': False,
+                'error': 'circuit_open',
+                'retry_after': round(e.retry_after, 1)
+            }
         except Exception as e:
             self.logger.error(f"❌ Erro ao gerar resposta com {model_name}: {e}")
             return {
@@ -899,84 +1392,339 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
                 'success': False
             }
 
+    def _build_ollama_chat_payload(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        routing: RoutingDecision,
+        stream: bool = False,
+        model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Montar o payload de /api/chat a partir da decisão de roteamento"""
+        # Preparar mensagens
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        payload = {
+            "model": model or routing.model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.config.OLLAMA_KEEP_ALIVE,
+            "options": dict(routing.options)
+        }
+        if routing.response_format is not None:
+            # Decodificação restrita ao esquema: só o objeto, e a geração para quando ele fecha
+            payload["format"] = routing.response_format
+        return payload
+
+    def generate_response_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        auto_select_model: bool = True,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """Gerar resposta em modo stream, produzindo os tokens à medida que chegam do Ollama
+
+        Produz eventos ``{'type': 'token', 'text': ...}`` e, ao final, um único
+        ``{'type': 'done', 'response': ..., 'metadata': ...}`` com o texto final
+        processado, tokens/s e tempo até o primeiro token. Os tokens passam pelo
+        ``StreamingTextCleaner`` e chegam já limpos, frase a frase. Sem Ollama, a
+        resposta do modelo local/fallback é produzida como um único bloco.
+        """
+        start = time.monotonic()
+        context = self._detect_response_context(prompt)
+
+        chunks: List[str] = []
+        cleaner = StreamingTextCleaner()
+        cleaned: List[str] = []
+        first_token_at = None
+        final_chunk: Dict[str, Any] = {}
+
+        cache_key = None
+        criticality = kwargs.pop('criticality', None)
+        use_cache = kwargs.pop('use_cache', True)
+        cache_domain = kwargs.pop('cache_domain', None) or (
+            self.domain if self.domain != 'general' else context
+        )
+        routing = self._resolve_routing(prompt, auto_select_model, system_prompt=system_prompt,
+                                        criticality=criticality, **kwargs)
+        model_name = routing.model
+        provider = BACKEND_OLLAMA if routing.backend == BACKEND_OLLAMA and self.config.OLLAMA_STREAM else None
+        if provider:
+            # Respostas já em cache são entregues de uma vez, sem passar pelo modelo
+            cache_key, cached = self._lookup_cached_response(prompt, system_prompt, routing, use_cache)
+            if cached is not None:
+                if cached.get('response'):
+                    yield {'type': 'token', 'text': cached['response']}
+                yield {'type': 'done', **cached}
+                return
+
+            payload = self._build_ollama_chat_payload(prompt, system_prompt, routing, stream=True)
+            self.logger.info(f"📡 Stream do Ollama iniciado com modelo: {model_name}")
+            try:
+                with self._admission(prompt, criticality, cache_domain), self._ollama_guard(model_name):
+                    for chunk in self.ollama_client.stream("/api/chat", json=payload, timeout=self.config.OLLAMA_TIMEOUT):
+                        text = (chunk.get('message') or {}).get('content', '')
+                        if text:
+                            if first_token_at is None:
+                                first_token_at = time.monotonic()
+                            chunks.append(text)
+                            text = cleaner.feed(text)
+                            if text:
+                                cleaned.append(text)
+                                yield {'type': 'token', 'text': text}
+                        if chunk.get('done'):
+                            final_chunk = chunk
+                            break
+            except (GenerationRejected, DeadlineExceeded) as e:
+                yield {'type': 'done', **e.to_response()}
+                return
+            except CircuitOpen as e:
+                self.logger.warning(f"⚡ {e}: stream indisponível, usando fallback")
+                provider = None
+            except Exception as e:
+                self.logger.error(f"❌ Erro no stream do Ollama: {e}")
+                if chunks:
+                    # Parte da resposta já foi enviada: encerrar com o que foi gerado
+                    final_chunk = {'error': str(e)}
+                else:
+                    provider = None
+
+        if provider is None:
+            # Sem stream disponível: gerar a resposta completa e enviá-la de uma vez
+            result = self.generate_response(
+                prompt, system_prompt, auto_select_model=auto_select_model,
+                use_cache=use_cache, cache_domain=cache_domain, criticality=criticality, **kwargs
+            )
+            first_token_at = time.monotonic()
+            text = result.get('response', '')
+            if text:
+                yield {'type': 'token', 'text': text}
+            metadata = result.get('metadata', {})
+            metadata.update({
+                'streamed': False,
+                'time_to_first_token_ms': round((first_token_at - start) * 1000, 1)
+            })
+            yield {'type': 'done', 'success': result.get('success', False), 'response': text, 'metadata': metadata}
+            return
+
+        # Restante que aguardava um ponto de corte seguro (ou o fim do texto)
+        text = cleaner.finish()
+        if text:
+            cleaned.append(text)
+            yield {'type': 'token', 'text': text}
+
+        elapsed = time.monotonic() - start
+        response_text = ''.join(chunks)
+        # O texto enviado já é clean_response(response_text): a formatação não limpa de novo
+        processed = TextProcessor.process_gemma_response(
+            {'response': CleanedText(''.join(cleaned)) if response_text else '', 'success': True}, context
+        )
+
+        # Ollama informa eval_count/eval_duration (ns) no último objeto do stream
+        if final_chunk.get('eval_count'):
+            self._record_model_cost(model_name, final_chunk, len(prompt) + len(system_prompt or ''), routing)
+        eval_count = final_chunk.get('eval_count') or len(chunks)
+        eval_duration = (final_chunk.get('eval_duration') or 0) / 1e9
+        if not eval_duration and first_token_at is not None:
+            eval_duration = time.monotonic() - first_token_at
+
+        final_response = {
+            'success': bool(response_text) and 'error' not in final_chunk,
+            'response': processed.get('response', response_text),
+            'metadata': {
+                'provider': provider,
+                'model': model_name,
+                'selected_model': routing.selected_model,
+                'streamed': True,
+                'context_detected': context,
+                'generation_time': round(elapsed, 3),
+                'time_to_first_token_ms': round((first_token_at - start) * 1000, 1) if first_token_at else None,
+                'eval_count': eval_count,
+                'tokens_per_second': round(eval_count / eval_duration, 2) if eval_duration else None,
+                'error': final_chunk.get('error'),
+                'timestamp': datetime.now().isoformat()
+            }
+        }
+        stored = self._store_cached_response(cache_key, final_response, cache_domain)
+        final_response['metadata']['cache'] = {'hit': False, 'stored': stored}
+        yield {'type': 'done', **final_response}
+
     def _generate_with_ollama(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
-        model_config: Optional[Any] = None,
+        routing: Optional[RoutingDecision] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """Gerar resposta usando Ollama ou simulação para demonstração"""
-        try:
-            # Preparar mensagens
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-
-            # Usar configurações do modelo inteligente se disponível
-            if model_config and hasattr(model_config, 'temperature'):
-                temperature = kwargs.get('temperature', model_config.temperature)
-                top_p = kwargs.get('top_p', model_config.top_p)
-                max_tokens = kwargs.get('max_new_tokens', model_config.max_tokens)
-                model_name = model_config.ollama_model
-                self.logger.info(f"Usando configurações inteligentes - Temp: {temperature}, Top-p: {top_p}, Max tokens: {max_tokens}")
-            else:
-                temperature = kwargs.get('temperature', self.config.TEMPERATURE)
-                top_p = kwargs.get('top_p', self.config.TOP_P)
-                max_tokens = kwargs.get('max_new_tokens', self.config.MAX_NEW_TOKENS)
-                model_name = self.config.OLLAMA_MODEL
+        if routing is None:
+            routing = self._resolve_routing(prompt, auto_select_model=False, **kwargs)
 
-            # Preparar payload
-            payload = {
-                "model": model_name,
-                "messages": messages,
-                "stream": False,
-                "options": {
-                    "temperature": temperature,
-                    "top_p": top_p,
-                    "top_k": kwargs.get('top_k', self.config.TOP_K),
-                    "repeat_penalty": kwargs.get('repetition_penalty', self.config.REPETITION_PENALTY),
-                    "num_predict": max_tokens
-                }
-            }
+        last_error: Optional[Exception] = None
+        for model_name in routing.candidates:
+            payload = self._build_ollama_chat_payload(prompt, system_prompt, routing, model=model_name)
 
             self.logger.info(f"🔄 Fazendo requisição para Ollama: {self.config.OLLAMA_HOST}/api/chat")
             self.logger.info(f"📝 Modelo: {model_name}")
 
-            # Fazer requisição
-            response = requests.post(
-                f"{self.config.OLLAMA_HOST}/api/chat",
-                json=payload,
-                timeout=self.config.OLLAMA_TIMEOUT
-            )
+            try:
+                # Fazer requisição
+                with self._ollama_guard(model_name):
+                    response = self.ollama_client.post(
+                        "/api/chat",
+                        json=payload,
+                        timeout=self.config.OLLAMA_TIMEOUT
+                    )
+                    result = self._parse_ollama_chat_response(
+                        response, model_name, routing, len(prompt or '') + len(system_prompt or '')
+                    )
+                result['served_model'] = model_name
+                return result
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                last_error = e
+                if not self._try_next_ollama_model(e, model_name):
+                    break
 
-            self.logger.info(f"📊 Status da resposta: {response.status_code}")
+        return self._ollama_fallback(prompt, system_prompt, last_error, **kwargs)
 
-            if response.status_code == 200:
-                result = response.json()
-                response_text = result['message']['content']
-                self.logger.info(f"✅ Resposta recebida do Ollama (tamanho: {len(response_text)} chars)")
+    async def _generate_with_ollama_async(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        routing: Optional[RoutingDecision] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Versão assíncrona de ``_generate_with_ollama`` (pool httpx compartilhado)"""
+        if routing is None:
+            routing = self._resolve_routing(prompt, auto_select_model=False, **kwargs)
 
-                # Processar e limpar o texto da resposta
-                cleaned_response = TextProcessor.clean_response(response_text)
-                self.logger.info(f"🧹 Texto processado (tamanho: {len(cleaned_response)} chars)")
+        last_error: Optional[Exception] = None
+        for model_name in routing.candidates:
+            payload = self._build_ollama_chat_payload(prompt, system_prompt, routing, model=model_name)
 
-                return {
-                    'response': cleaned_response,
-                    'original_response': response_text,
-                    'success': True
-                }
-            else:
-                error_msg = f"Ollama retornou status {response.status_code}: {response.text}"
-                self.logger.error(error_msg)
-                raise Exception(error_msg)
+            self.logger.info(f"🔄 Fazendo requisição assíncrona para Ollama: {self.config.OLLAMA_HOST}/api/chat")
+            self.logger.info(f"📝 Modelo: {model_name}")
 
-        except Exception as e:
-            self.logger.error(f"❌ Erro no Ollama: {e}")
+            try:
+                with self._ollama_guard(model_name):
+                    response = await self.async_ollama_client.post(
+                        "/api/chat",
+                        json=payload,
+                        timeout=self.config.OLLAMA_TIMEOUT
+                    )
+                    result = self._parse_ollama_chat_response(
+                        response, model_name, routing, len(prompt or '') + len(system_prompt or '')
+                    )
+                result['served_model'] = model_name
+                return result
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                last_error = e
+                if not self._try_next_ollama_model(e, model_name):
+                    break
+
+        return self._ollama_fallback(prompt, system_prompt, last_error, **kwargs)
+
+    def _generate_cascade(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        routing: RoutingDecision,
+        json_keys: Optional[List[str]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Rascunho no modelo menor; escalar para ``routing.model`` só se o verificador reprovar"""
+        started = time.monotonic()
+        draft = self._generate_with_ollama(prompt, system_prompt, routing=routing.draft(), **kwargs)
+        draft_seconds = time.monotonic() - started
+
+        if draft.get('success') and not draft.get('fallback'):
+            verdict = self.draft_checker.check(
+                draft.get('original_response') or draft.get('response', ''),
+                expect_json=self.draft_checker.expects_json(prompt, system_prompt),
+                required_keys=json_keys,
+                done_reason=draft.get('done_reason')
+            )
+        else:
+            verdict = DraftVerdict(False, ('draft_failed',))
+
+        info = {'draft_model': routing.draft_model, 'draft_ms': round(draft_seconds * 1000, 1), **verdict.to_dict()}
+        if verdict.accepted:
+            self.cascade_metrics.record(routing.endpoint, draft_seconds, verdict)
+            self.logger.info(f"🪜 Rascunho de {routing.draft_model} aprovado em {draft_seconds:.1f}s ({routing.endpoint})")
+            draft['cascade'] = {**info, 'escalated': False}
+            return draft
+
+        self.logger.info(
+            f"⬆️ Rascunho de {routing.draft_model} reprovado ({', '.join(verdict.reasons)}), "
+            f"escalando para {routing.model}"
+        )
+        check_deadline()
+        started = time.monotonic()
+        response = self._generate_with_ollama(prompt, system_prompt, routing=routing, **kwargs)
+        large_seconds = time.monotonic() - started
+        self.cascade_metrics.record(routing.endpoint, draft_seconds, verdict, large_seconds)
+        response['cascade'] = {**info, 'escalated': True, 'large_ms': round(large_seconds * 1000, 1)}
+        return response
+
+    def _try_next_ollama_model(self, error: Exception, model_name: str) -> bool:
+        """Falha restrita ao modelo (circuito do modelo aberto ou HTTP 4xx): tentar o próximo da cadeia"""
+        if isinstance(error, CircuitOpen) and error.name != 'ollama':
+            self.logger.warning(f"⚡ {error}: tentando próximo modelo da cadeia")
+            return True
+        if isinstance(error, OllamaResponseError) and error.status_code < 500:
+            self.logger.warning(f"⚠️ Modelo {model_name} recusou o pedido (HTTP {error.status_code}), tentando próximo")
+            return True
+        return False
+
+    def _ollama_fallback(self, prompt: str, system_prompt: Optional[str],
+                         error: Optional[Exception], **kwargs) -> Dict[str, Any]:
+        """Resposta de fallback quando nenhum modelo da cadeia atendeu"""
+        if isinstance(error, CircuitOpen):
+            # Circuito aberto: fallback imediato, sem esperar o timeout do Ollama
+            self.logger.warning(f"⚡ {error}: usando fallback")
+        else:
+            self.logger.error(f"❌ Erro no Ollama: {error}")
             # Fallback para simulação inteligente do Gemma-3n
             self.logger.info(f"🎯 Usando simulação inteligente do Gemma-3n para demonstração")
-            return self._generate_intelligent_fallback(prompt, system_prompt, **kwargs)
+        fallback_response = self._generate_intelligent_fallback(prompt, system_prompt, **kwargs)
+        fallback_response['fallback'] = True
+        return fallback_response
+
+    def _parse_ollama_chat_response(self, response, model_name: Optional[str] = None,
+                                    routing: Optional[RoutingDecision] = None,
+                                    prompt_chars: int = 0) -> Dict[str, Any]:
+        """Extrair e limpar o texto de uma resposta de /api/chat (requests ou httpx)"""
+        self.logger.info(f"📊 Status da resposta: {response.status_code}")
+
+        if response.status_code != 200:
+            error = OllamaResponseError(response.status_code, response.text)
+            self.logger.error(str(error))
+            raise error
+
+        result = response.json()
+        response_text = result['message']['content']
+        self.logger.info(f"✅ Resposta recebida do Ollama (tamanho: {len(response_text)} chars)")
+        if model_name:
+            self._record_model_cost(model_name, result, prompt_chars, routing)
+
+        # Processar e limpar o texto da resposta
+        cleaned_response = TextProcessor.clean_response(response_text)
+        self.logger.info(f"🧹 Texto processado (tamanho: {len(cleaned_response)} chars)")
+
+        return {
+            'response': cleaned_response,
+            'original_response': response_text,
+            'done_reason': result.get('done_reason'),
+            'success': True
+        }
 
     def _generate_with_local_model(
         self,
@@ -1015,11 +1763,19 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
             # Obter configurações de geração otimizadas
             gen_config = self._get_optimized_generation_config(prompt, model_config=model_config, **kwargs)
 
+            # Interromper a geração quando o prazo da requisição acabar
+            stopping_criteria = deadline_stopping_criteria()
+            if stopping_criteria is not None:
+                generate_kwargs = {'stopping_criteria': stopping_criteria}
+            else:
+                generate_kwargs = {}
+
             # Gerar resposta
             with torch.no_grad():
                 outputs = self.model.generate(
                     **inputs,
                     **gen_config,
+                    **generate_kwargs,
                     pad_token_id=self.tokenizer.eos_token_id,
                     eos_token_id=self.tokenizer.eos_token_id
                 )
@@ -1385,8 +2141,6 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
         try:
             import base64
 
-            import requests
-
             self.logger.info("🖼️ Iniciando análise multimodal")
 
             # Converter imagem para base64
@@ -1395,31 +2149,35 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
             # Priorizar LLaVA para análise multimodal (tem capacidades de visão confirmadas)
             models_to_try = ['llava:latest', 'llava:7b', 'llava', 'gemma3n:e4b', 'gemma3n:e2b']
 
-            for model in models_to_try:
-                try:
-                    self.logger.info(f"🔍 Tentando análise com modelo: {model}")
-
-                    # Preparar payload para Ollama
-                    payload = {
-                        "model": model,
-                        "prompt": prompt,
-                        "images": [image_b64],
-                        "stream": False,
-                        "options": {
-                            "temperature": 0.7,
-                            "top_p": 0.9,
-                            "top_k": 40
+            with self._admission(prompt):
+                for model in models_to_try:
+                    try:
+                        self.logger.info(f"🔍 Tentando análise com modelo: {model}")
+
+                        # Preparar payload para Ollama
+                        payload = {
+                            "model": model,
+                            "prompt": prompt,
+                            "images": [image_b64],
+                            "stream": False,
+                            "keep_alive": self.config.OLLAMA_KEEP_ALIVE,
+                            "options": {
+                                "temperature": 0.7,
+                                "top_p": 0.9,
+                                "top_k": 40
+                            }
                         }
-                    }
 
-                    # Fazer requisição para Ollama
-                    response = requests.post(
-                        f"{self.config.OLLAMA_HOST}/api/generate",
-                        json=payload,
-                        timeout=60  # Timeout maior para análise de imagem
-                    )
+                        # Fazer requisição para Ollama
+                        with self._ollama_guard(model):
+                            response = self.ollama_client.post(
+                                "/api/generate",
+                                json=payload,
+                                timeout=60  # Timeout maior para análise de imagem
+                            )
+                            if response.status_code != 200:
+                                raise OllamaResponseError(response.status_code, response.text)
 
-                    if response.status_code == 200:
                         result = response.json()
                         analysis_text = result.get('response', '').strip()
 
@@ -1428,12 +2186,19 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
                             return analysis_text
                         else:
                             self.logger.warning(f"⚠️ Resposta vazia do modelo {model}")
-                    else:
-                        self.logger.warning(f"❌ Erro HTTP {response.status_code} com {model}")
 
-                except Exception as e:
-                    self.logger.warning(f"💥 Erro com modelo {model}: {e}")
-                    continue
+                    except CircuitOpen as e:
+                        if e.name == 'ollama':
+                            # Ollama inteiro indisponível: ir direto ao fallback
+                            self.logger.warning(f"⚡ {e}: pulando análise de imagem")
+                            break
+                        self.logger.info(f"⚡ {e}: pulando modelo {model}")
+                        continue
+                    except OllamaResponseError as e:
+                        self.logger.warning(f"❌ Erro HTTP {e.status_code} com {model}")
+                    except Exception as e:
+                        self.logger.warning(f"💥 Erro com modelo {model}: {e}")
+                        continue
 
             # Fallback: análise textual baseada no contexto
             self.logger.info("🔄 Usando fallback de análise contextual")
@@ -1506,11 +2271,11 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
             Responda em formato JSON estruturado.
             """
 
-            response = self.generate_response(prompt, system_prompt)
+            response = self.generate_response(prompt, system_prompt, response_format=feature_schema('contextual_translation'))
 
             if response['success']:
                 # Processar resposta para extrair componentes
-                processed_response = self._process_contextual_translation_response(response['response'])
+                processed_response = self._process_contextual_translation_response(self._structured_text(response))
                 processed_response['metadata'] = response.get('metadata', {})
                 processed_response['metadata']['feature'] = 'contextual_translation'
                 return processed_response
@@ -1549,10 +2314,10 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
             Responda em formato JSON estruturado.
             """
 
-            response = self.generate_response(prompt, system_prompt)
+            response = self.generate_response(prompt, system_prompt, response_format=feature_schema('emotional_analysis'))
 
             if response['success']:
-                processed_response = self._process_emotional_analysis_response(response['response'])
+                processed_response = self._process_emotional_analysis_response(self._structured_text(response))
                 processed_response['metadata'] = response.get('metadata', {})
                 processed_response['metadata']['feature'] = 'emotional_analysis'
                 return processed_response
@@ -1588,10 +2353,10 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
             Responda em formato JSON estruturado.
             """
 
-            response = self.generate_response(prompt, system_prompt)
+            response = self.generate_response(prompt, system_prompt, response_format=feature_schema('cultural_bridge'))
 
             if response['success']:
-                processed_response = self._process_cultural_bridge_response(response['response'])
+                processed_response = self._process_cultural_bridge_response(self._structured_text(response))
                 processed_response['metadata'] = response.get('metadata', {})
                 processed_response['metadata']['feature'] = 'cultural_bridge'
                 return processed_response
@@ -1625,10 +2390,10 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
             Responda em formato JSON estruturado.
             """
 
-            response = self.generate_response(prompt, system_prompt)
+            response = self.generate_response(prompt, system_prompt, response_format=feature_schema('adaptive_learning'))
 
             if response['success']:
-                processed_response = self._process_adaptive_learning_response(response['response'])
+                processed_response = self._process_adaptive_learning_response(self._structured_text(response))
                 processed_response['metadata'] = response.get('metadata', {})
                 processed_response['metadata']['feature'] = 'adaptive_learning'
                 return processed_response
@@ -1699,10 +2464,10 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
             Responda em formato JSON estruturado com todas as seções.
             """
 
-            response = self.generate_response(prompt, system_prompt)
+            response = self.generate_response(prompt, system_prompt, response_format=feature_schema('language_teaching'))
 
             if response['success']:
-                processed_response = self._process_language_teaching_response(response['response'])
+                processed_response = self._process_language_teaching_response(self._structured_text(response))
                 processed_response['metadata'] = response.get('metadata', {})
                 processed_response['metadata']['feature'] = 'language_teaching'
                 processed_response['metadata']['target_language'] = target_language
@@ -1744,10 +2509,10 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
             Responda em formato JSON estruturado.
             """
 
-            response = self.generate_response(prompt, system_prompt)
+            response = self.generate_response(prompt, system_prompt, response_format=feature_schema('multimodal_fusion'))
 
             if response['success']:
-                processed_response = self._process_multimodal_fusion_response(response['response'])
+                processed_response = self._process_multimodal_fusion_response(self._structured_text(response))
                 processed_response['metadata'] = response.get('metadata', {})
                 processed_response['metadata']['feature'] = 'multimodal_fusion'
                 return processed_response
@@ -1768,54 +2533,59 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
             if image_base64:
                 import base64
                 try:
-                    self.logger.info("📸 Processando imagem com abordagem em duas etapas")
-
-                    # Etapa 1: Decodificar imagem e usar LLaVA para descrição
-                    image_data = base64.b64decode(image_base64)
-                    description_prompt = "Descreva detalhadamente esta imagem, focando em aspectos visuais relevantes para análise médica ou agrícola. Inclua cores, texturas, formas, padrões e qualquer anomalia visível."
-
-                    self.logger.info("🔍 Etapa 1: Obtendo descrição da imagem com LLaVA")
-                    image_description = self.analyze_image(image_data, description_prompt)
-                    self.logger.info(f"✅ Descrição obtida: {image_description[:100]}...")
-
-                    # Etapa 2: Usar gemma3n:e4b para diagnóstico baseado na descrição
-                    diagnosis_prompt = f"{prompt}\n\nDescrição da imagem fornecida pelo sistema de visão:\n{image_description}\n\nCom base nesta descrição visual detalhada, forneça sua análise especializada."
-
-                    self.logger.info("🧠 Etapa 2: Realizando diagnóstico com gemma3n:e4b")
-
-                    # Forçar uso do gemma3n:e4b para o diagnóstico
-                    response = self._generate_with_specific_model(
-                        prompt=diagnosis_prompt,
-                        model_name="gemma3n:e4b"
-                    )
-
-                    if response['success']:
-                        self.logger.info("✅ Diagnóstico bem-sucedido com gemma3n:e4b")
-                        # Limpar caracteres de controle da resposta
-                        clean_response = self._sanitize_text_input(response['response'])
-                        self.logger.info(f"🧹 Resposta limpa: {clean_response[:100]}...")
-                        return clean_response
-                    else:
-                        self.logger.warning("⚠️ gemma3n:e4b falhou, tentando fallbacks")
-                        # Fallback para outros modelos gemma3n se e4b não estiver disponível
-                        for model in ["gemma3n:e2b", "gemma3n:latest"]:
-                            try:
-                                self.logger.info(f"🔄 Tentando modelo fallback: {model}")
-                                response = self._generate_with_specific_model(
-                                    prompt=diagnosis_prompt,
-                                    model_name=model
-                                )
-                                if response['success']:
-                                    self.logger.info(f"✅ Diagnóstico bem-sucedido com {model}")
-                                    clean_response = self._sanitize_text_input(response['response'])
-                                    return clean_response
-                            except Exception as e:
-                                self.logger.warning(f"Modelo {model} falhou: {e}")
-                                continue
-
-                        self.logger.warning("⚠️ Todos os modelos falharam, usando fallback")
-                        return self._fallback_multimodal_response(prompt)
-
+                    with self._admission(prompt):
+                        self.logger.info("📸 Processando imagem com abordagem em duas etapas")
+
+                        # Etapa 1: Decodificar imagem e usar LLaVA para descrição
+                        image_data = base64.b64decode(image_base64)
+                        description_prompt = "Descreva detalhadamente esta imagem, focando em aspectos visuais relevantes para análise médica ou agrícola. Inclua cores, texturas, formas, padrões e qualquer anomalia visível."
+
+                        self.logger.info("🔍 Etapa 1: Obtendo descrição da imagem com LLaVA")
+                        image_description = self.analyze_image(image_data, description_prompt)
+                        self.logger.info(f"✅ Descrição obtida: {image_description[:100]}...")
+                        check_deadline()
+
+                        # Etapa 2: Usar gemma3n:e4b para diagnóstico baseado na descrição
+                        diagnosis_prompt = f"{prompt}\n\nDescrição da imagem fornecida pelo sistema de visão:\n{image_description}\n\nCom base nesta descrição visual detalhada, forneça sua análise especializada."
+
+                        self.logger.info("🧠 Etapa 2: Realizando diagnóstico com gemma3n:e4b")
+
+                        # Forçar uso do gemma3n:e4b para o diagnóstico
+                        response = self._generate_with_specific_model(
+                            prompt=diagnosis_prompt,
+                            model_name="gemma3n:e4b"
+                        )
+
+                        if response['success']:
+                            self.logger.info("✅ Diagnóstico bem-sucedido com gemma3n:e4b")
+                            # Limpar caracteres de controle da resposta
+                            clean_response = self._sanitize_text_input(response['response'])
+                            self.logger.info(f"🧹 Resposta limpa: {clean_response[:100]}...")
+                            return clean_response
+                        else:
+                            self.logger.warning("⚠️ gemma3n:e4b falhou, tentando fallbacks")
+                            # Fallback para outros modelos gemma3n se e4b não estiver disponível
+                            for model in ["gemma3n:e2b", "gemma3n:latest"]:
+                                check_deadline()
+                                try:
+                                    self.logger.info(f"🔄 Tentando modelo fallback: {model}")
+                                    response = self._generate_with_specific_model(
+                                        prompt=diagnosis_prompt,
+                                        model_name=model
+                                    )
+                                    if response['success']:
+                                        self.logger.info(f"✅ Diagnóstico bem-sucedido com {model}")
+                                        clean_response = self._sanitize_text_input(response['response'])
+                                        return clean_response
+                                except Exception as e:
+                                    self.logger.warning(f"Modelo {model} falhou: {e}")
+                                    continue
+
+                            self.logger.warning("⚠️ Todos os modelos falharam, usando fallback")
+                            return self._fallback_multimodal_response(prompt)
+
+                except (GenerationRejected, DeadlineExceeded):
+                    return self._fallback_multimodal_response(prompt)
                 except Exception as e:
                     self.logger.error(f"Erro ao processar imagem base64: {e}")
                     # Continuar com fallback
@@ -1861,7 +2631,15 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
             'ollama_available': self.ollama_available,
             'model_loaded': self.model_loaded,
             'provider': 'ollama' if self.ollama_available else 'local' if self.model_loaded else 'fallback',
-            'model_name': self.config.OLLAMA_MODEL if self.ollama_available else self.config.MODEL_NAME,
+            'model_name': self.default_ollama_model if self.ollama_available else self.config.MODEL_NAME,
+            'model_inventory': self.model_inventory.get_stats(),
+            'response_cache': self.response_cache.get_stats(),
+            'single_flight': self.single_flight.get_stats(),
+            'scheduler': self.scheduler.get_stats(),
+            'warmup': self.warmup.get_status(),
+            'circuit_breakers': self.circuit_breakers.get_stats(),
+            'cascade': self.cascade_metrics.get_stats(),
+            'model_costs': self.cost_model.get_stats(),
             'device': self.config.get_device(),
             'multimodal_enabled': self.config.ENABLE_MULTIMODAL,
             'adaptive_config_enabled': self.config.ENABLE_ADAPTIVE_CONFIG,
@@ -1951,24 +2729,23 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
 
         return "\n".join(analysis_parts)
 
+    @staticmethod
+    def _structured_text(response: Dict[str, Any]) -> str:
+        """Texto cru da resposta para decodificar o JSON (a limpeza de texto corromperia o objeto)"""
+        return response.get('original_response') or response.get('response', '')
+
     def _process_contextual_translation_response(self, response: str) -> Dict[str, Any]:
         """Processar resposta de tradução contextual"""
-        try:
-            # Tentar extrair JSON da resposta
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                return {
-                    'success': True,
-                    'translation': result.get('translation', response),
-                    'emotional_analysis': result.get('emotional_analysis', {}),
-                    'cultural_insights': result.get('cultural_insights', []),
-                    'alternatives': result.get('alternatives', []),
-                    'preservation_notes': result.get('preservation_notes', [])
-                }
-        except:
-            pass
+        result, _ = decode_structured(response, 'contextual_translation')
+        if result is not None:
+            return {
+                'success': True,
+                'translation': result.get('translation', response),
+                'emotional_analysis': result.get('emotional_analysis', {}),
+                'cultural_insights': result.get('cultural_insights', []),
+                'alternatives': result.get('alternatives', []),
+                'preservation_notes': result.get('preservation_notes', [])
+            }
 
         # Fallback para resposta simples
         return {
@@ -1982,22 +2759,17 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
 
     def _process_emotional_analysis_response(self, response: str) -> Dict[str, Any]:
         """Processar resposta de análise emocional"""
-        try:
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                return {
-                    'success': True,
-                    'primary_emotion': result.get('primary_emotion', 'neutral'),
-                    'intensity': result.get('intensity', 5),
-                    'secondary_emotions': result.get('secondary_emotions', []),
-                    'cultural_context': result.get('cultural_context', ''),
-                    'response_suggestions': result.get('response_suggestions', []),
-                    'urgency_indicators': result.get('urgency_indicators', [])
-                }
-        except:
-            pass
+        result, _ = decode_structured(response, 'emotional_analysis')
+        if result is not None:
+            return {
+                'success': True,
+                'primary_emotion': result.get('primary_emotion', 'neutral'),
+                'intensity': result.get('intensity', 5),
+                'secondary_emotions': result.get('secondary_emotions', []),
+                'cultural_context': result.get('cultural_context', ''),
+                'response_suggestions': result.get('response_suggestions', []),
+                'urgency_indicators': result.get('urgency_indicators', [])
+            }
 
         return {
             'success': True,
@@ -2011,22 +2783,17 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
 
     def _process_cultural_bridge_response(self, response: str) -> Dict[str, Any]:
         """Processar resposta de ponte cultural"""
-        try:
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                return {
-                    'success': True,
-                    'cultural_explanation': result.get('cultural_explanation', ''),
-                    'cultural_adaptation': result.get('cultural_adaptation', response),
-                    'cultural_differences': result.get('cultural_differences', []),
-                    'communication_suggestions': result.get('communication_suggestions', []),
-                    'misunderstanding_risks': result.get('misunderstanding_risks', []),
-                    'preservation_elements': result.get('preservation_elements', [])
-                }
-        except:
-            pass
+        result, _ = decode_structured(response, 'cultural_bridge')
+        if result is not None:
+            return {
+                'success': True,
+                'cultural_explanation': result.get('cultural_explanation', ''),
+                'cultural_adaptation': result.get('cultural_adaptation', response),
+                'cultural_differences': result.get('cultural_differences', []),
+                'communication_suggestions': result.get('communication_suggestions', []),
+                'misunderstanding_risks': result.get('misunderstanding_risks', []),
+                'preservation_elements': result.get('preservation_elements', [])
+            }
 
         return {
             'success': True,
@@ -2040,22 +2807,17 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
 
     def _process_adaptive_learning_response(self, response: str) -> Dict[str, Any]:
         """Processar resposta de aprendizado adaptativo"""
-        try:
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                return {
-                    'success': True,
-                    'patterns_identified': result.get('patterns_identified', []),
-                    'suggested_adjustments': result.get('suggested_adjustments', []),
-                    'user_preferences': result.get('user_preferences', {}),
-                    'model_improvements': result.get('model_improvements', []),
-                    'personalization_suggestions': result.get('personalization_suggestions', []),
-                    'learning_metrics': result.get('learning_metrics', {})
-                }
-        except:
-            pass
+        result, _ = decode_structured(response, 'adaptive_learning')
+        if result is not None:
+            return {
+                'success': True,
+                'patterns_identified': result.get('patterns_identified', []),
+                'suggested_adjustments': result.get('suggested_adjustments', []),
+                'user_preferences': result.get('user_preferences', {}),
+                'model_improvements': result.get('model_improvements', []),
+                'personalization_suggestions': result.get('personalization_suggestions', []),
+                'learning_metrics': result.get('learning_metrics', {})
+            }
 
         return {
             'success': True,
@@ -2069,22 +2831,17 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
 
     def _process_multimodal_fusion_response(self, response: str) -> Dict[str, Any]:
         """Processar resposta de fusão multimodal"""
-        try:
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                return {
-                    'success': True,
-                    'multimodal_synthesis': result.get('multimodal_synthesis', response),
-                    'visual_elements': result.get('visual_elements', []),
-                    'audio_elements': result.get('audio_elements', []),
-                    'modality_coherence': result.get('modality_coherence', 'high'),
-                    'fusion_insights': result.get('fusion_insights', []),
-                    'recommendations': result.get('recommendations', [])
-                }
-        except:
-            pass
+        result, _ = decode_structured(response, 'multimodal_fusion')
+        if result is not None:
+            return {
+                'success': True,
+                'multimodal_synthesis': result.get('multimodal_synthesis', response),
+                'visual_elements': result.get('visual_elements', []),
+                'audio_elements': result.get('audio_elements', []),
+                'modality_coherence': result.get('modality_coherence', 'high'),
+                'fusion_insights': result.get('fusion_insights', []),
+                'recommendations': result.get('recommendations', [])
+            }
 
         return {
             'success': True,
@@ -2165,23 +2922,18 @@ Gere exatamente {quantity} frases únicas e culturalmente apropriadas.
 
     def _process_language_teaching_response(self, response: str) -> Dict[str, Any]:
         """Processar resposta de ensino de idiomas"""
-        try:
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                return {
-                    'success': True,
-                    'vocabulary': result.get('vocabulary', []),
-                    'grammar': result.get('grammar', {}),
-                    'cultural_context': result.get('cultural_context', ''),
-                    'exercises': result.get('exercises', []),
-                    'pronunciation_guide': result.get('pronunciation_guide', {}),
-                    'progression': result.get('progression', {}),
-                    'lesson_content': result.get('lesson_content', response)
-                }
-        except:
-            pass
+        result, _ = decode_structured(response, 'language_teaching')
+        if result is not None:
+            return {
+                'success': True,
+                'vocabulary': result.get('vocabulary', []),
+                'grammar': result.get('grammar', {}),
+                'cultural_context': result.get('cultural_context', ''),
+                'exercises': result.get('exercises', []),
+                'pronunciation_guide': result.get('pronunciation_guide', {}),
+                'progression': result.get('progression', {}),
+                'lesson_content': result.get('lesson_content', response)
+            }
 
         return {
             'success': True,
@@ -2257,8 +3009,12 @@ Parâmetros:
 A resposta DEVE ser um objeto JSON contendo uma lista chamada "challenges". Cada item deve ter: word, category, context, tags."""
 
         try:
-            response = await self.generate_response(system_prompt + "\n\n" + task_prompt)
-            return self._process_translation_challenges_response(response)
+            response = await self._make_ollama_request(
+                system_prompt + "\n\n" + task_prompt, response_format=feature_schema('translation_challenges')
+            )
+            if response and response.get('response'):
+                return self._process_translation_challenges_response(self._structured_text(response))
+            return self._fallback_translation_challenges(category, difficulty, quantity)
         except Exception as e:
             self.logger.error(f"Erro ao gerar desafios de tradução: {e}")
             return self._fallback_translation_challenges(category, difficulty, quantity)
@@ -2294,8 +3050,12 @@ Contribuição:
 A resposta DEVE ser um objeto JSON contendo um campo "analysis_result"."""
 
         try:
-            response = await self.generate_response(system_prompt + "\n\n" + task_prompt)
-            return self._process_contribution_analysis_response(response)
+            response = await self._make_ollama_request(
+                system_prompt + "\n\n" + task_prompt, response_format=feature_schema('contribution_analysis')
+            )
+            if response and response.get('response'):
+                return self._process_contribution_analysis_response(self._structured_text(response))
+            return self._fallback_contribution_analysis(contribution_data)
         except Exception as e:
             self.logger.error(f"Erro ao processar contribuição: {e}")
             return self._fallback_contribution_analysis(contribution_data)
@@ -2327,8 +3087,12 @@ O conteúdo deve incluir:
 A resposta DEVE ser um objeto JSON contendo um campo "educational_content"."""
 
         try:
-            response = await self.generate_response(system_prompt + "\n\n" + task_prompt)
-            return self._process_educational_content_response(response)
+            response = await self._make_ollama_request(
+                system_prompt + "\n\n" + task_prompt, CriticalityLevel.MEDIUM, response_format=feature_schema('educational_content')
+            )
+            if response and response.get('response'):
+                return self._process_educational_content_response(self._structured_text(response))
+            return self._fallback_educational_content(subject, level, topic)
         except Exception as e:
             self.logger.error(f"Erro ao gerar conteúdo educacional: {e}")
             return self._fallback_educational_content(subject, level, topic)
@@ -2383,10 +3147,12 @@ A resposta DEVE ser um objeto JSON contendo um campo "educational_content"."""
             full_prompt = f"{master_prompt}\n\n{task_prompt}"
 
             # Fazer chamada para Ollama
-            response = await self._make_ollama_request(full_prompt)
+            response = await self._make_ollama_request(
+                full_prompt, response_format=feature_schema('gamification_challenge')
+            )
 
             if response and 'response' in response:
-                return self._process_gamification_challenge_response(response['response'])
+                return self._process_gamification_challenge_response(self._structured_text(response))
             else:
                 return self._fallback_gamification_challenge(user_data)
 
@@ -2432,10 +3198,12 @@ A resposta DEVE ser um objeto JSON contendo um campo "educational_content"."""
             full_prompt = f"{master_prompt}\n\n{task_prompt}"
 
             # Fazer chamada para Ollama
-            response = await self._make_ollama_request(full_prompt)
+            response = await self._make_ollama_request(
+                full_prompt, response_format=feature_schema('reward_message')
+            )
 
             if response and 'response' in response:
-                return self._process_reward_message_response(response['response'])
+                return self._process_reward_message_response(self._structured_text(response))
             else:
                 return self._fallback_reward_message(event_data)
 
@@ -2482,30 +3250,36 @@ A resposta DEVE ser um objeto JSON contendo um campo "educational_content"."""
             full_prompt = f"{master_prompt}\n\n{task_prompt}"
 
             # Fazer chamada para Ollama
-            response = await self._make_ollama_request(full_prompt)
+            response = await self._make_ollama_request(
+                full_prompt, response_format=feature_schema('badge_creation')
+            )
 
             if response and 'response' in response:
-                return self._process_badge_creation_response(response['response'])
+                return self._process_badge_creation_response(self._structured_text(response))
             else:
-                return self._fallback_badge_creation(badge_criteria, category)
+                return self._fallback_badge_creation({'criteria': badge_criteria, 'category': category})
 
         except Exception as e:
             self.logger.error(f"Erro ao criar badge: {e}")
-            return self._fallback_badge_creation(badge_criteria, category)
+            return self._fallback_badge_creation({'criteria': badge_criteria, 'category': category})
 
     # ========== MÉTODOS AUXILIARES ASSÍNCRONOS ==========
 
-    async def _make_ollama_request(self, prompt: str) -> Dict[str, Any]:
-        """Fazer requisição assíncrona para Ollama"""
+    async def _make_ollama_request(self, prompt: str,
+                                   criticality: CriticalityLevel = CriticalityLevel.LOW,
+                                   response_format: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Fazer requisição assíncrona para Ollama (ou modelo local em thread do executor)"""
         try:
-            if self.ollama_available:
-                # Usar método síncrono existente
-                response = self._generate_with_ollama(prompt)
-                return response
-            else:
-                # Fallback para modelo local
-                response = self._generate_with_local_model(prompt)
-                return response
+            # Gamificação, recompensas e conteúdo: baixa prioridade na fila por padrão
+            async with self._async_admission(prompt, criticality):
+                routing = self._resolve_routing(prompt, auto_select_model=False, response_format=response_format)
+                if routing.backend == BACKEND_OLLAMA:
+                    return await self._generate_with_ollama_async(prompt, routing=routing)
+                # Fallback para modelo local sem bloquear o loop
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, bind_deadline(self._generate_with_local_model), prompt)
+        except GenerationRejected:
+            return None
         except Exception as e:
             self.logger.error(f"Erro na requisição Ollama: {e}")
             return None
@@ -2514,21 +3288,15 @@ A resposta DEVE ser um objeto JSON contendo um campo "educational_content"."""
 
     def _process_translation_challenges_response(self, response: str) -> Dict[str, Any]:
         """Processar resposta de geração de desafios de tradução"""
-        try:
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                if 'challenges' in result:
-                    return {
-                        'success': True,
-                        'challenges': result['challenges'],
-                        'generated_count': len(result['challenges'])
-                    }
-        except Exception as e:
-            self.logger.error(f"Erro ao processar resposta de desafios: {e}")
+        result, _ = decode_structured(response, 'translation_challenges')
+        if result is not None:
+            return {
+                'success': True,
+                'challenges': result['challenges'],
+                'generated_count': len(result['challenges'])
+            }
 
-        # Fallback se não conseguir processar JSON
+        # Fallback se a resposta não seguir o esquema
         return {
             'success': False,
             'challenges': [],
@@ -2538,20 +3306,14 @@ A resposta DEVE ser um objeto JSON contendo um campo "educational_content"."""
 
     def _process_contribution_analysis_response(self, response: str) -> Dict[str, Any]:
         """Processar resposta de análise de contribuição"""
-        try:
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                if 'analysis_result' in result:
-                    return {
-                        'success': True,
-                        'analysis_result': result['analysis_result']
-                    }
-        except Exception as e:
-            self.logger.error(f"Erro ao processar análise de contribuição: {e}")
+        result, _ = decode_structured(response, 'contribution_analysis')
+        if result is not None:
+            return {
+                'success': True,
+                'analysis_result': result['analysis_result']
+            }
 
-        # Fallback se não conseguir processar JSON
+        # Fallback se a resposta não seguir o esquema
         return {
             'success': False,
             'analysis_result': {
@@ -2569,20 +3331,14 @@ A resposta DEVE ser um objeto JSON contendo um campo "educational_content"."""
 
     def _process_educational_content_response(self, response: str) -> Dict[str, Any]:
         """Processar resposta de conteúdo educacional"""
-        try:
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                if 'educational_content' in result:
-                    return {
-                        'success': True,
-                        'educational_content': result['educational_content']
-                    }
-        except Exception as e:
-            self.logger.error(f"Erro ao processar conteúdo educacional: {e}")
+        result, _ = decode_structured(response, 'educational_content')
+        if result is not None:
+            return {
+                'success': True,
+                'educational_content': result['educational_content']
+            }
 
-        # Fallback se não conseguir processar JSON
+        # Fallback se a resposta não seguir o esquema
         return {
             'success': False,
             'educational_content': {
@@ -2601,97 +3357,57 @@ A resposta DEVE ser um objeto JSON contendo um campo "educational_content"."""
         """
         Processa a resposta da Gemma-3 para desafios de gamificação
         """
-        try:
-            # Tentar extrair JSON da resposta
-            json_match = re.search(r'\{[^{}]*"challenge"[^{}]*\{[^{}]*\}[^{}]*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                data = json.loads(json_str)
-
-                if 'challenge' in data and isinstance(data['challenge'], dict):
-                    challenge = data['challenge']
-                    # Validar campos obrigatórios
-                    required_fields = ['challenge_type', 'title', 'description', 'xp_reward']
-                    if all(field in challenge for field in required_fields):
-                        return {
-                            'success': True,
-                            'challenge': {
-                                'challenge_type': str(challenge['challenge_type']),
-                                'title': str(challenge['title']),
-                                'description': str(challenge['description']),
-                                'xp_reward': int(challenge['xp_reward']) if isinstance(challenge['xp_reward'], (int, str)) else 50
-                            }
-                        }
-
-            # Se não conseguir extrair JSON válido, usar fallback
+        # Campos obrigatórios, tipos e faixa de XP conferidos pelo esquema
+        data, _ = decode_structured(response_text, 'gamification_challenge')
+        if data is None:
             return self._fallback_gamification_challenge({})
 
-        except Exception as e:
-            self.logger.error(f"Erro ao processar resposta de desafio de gamificação: {e}")
-            return self._fallback_gamification_challenge({})
+        challenge = data['challenge']
+        return {
+            'success': True,
+            'challenge': {
+                'challenge_type': challenge['challenge_type'],
+                'title': challenge['title'],
+                'description': challenge['description'],
+                'xp_reward': challenge['xp_reward']
+            }
+        }
 
     def _process_reward_message_response(self, response_text: str) -> dict:
         """
         Processa a resposta da Gemma-3 para mensagens de recompensa
         """
-        try:
-            # Tentar extrair JSON da resposta
-            json_match = re.search(r'\{[^{}]*"notification"[^{}]*\{[^{}]*\}[^{}]*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                data = json.loads(json_str)
-
-                if 'notification' in data and isinstance(data['notification'], dict):
-                    notification = data['notification']
-                    # Validar campos obrigatórios
-                    if 'title' in notification and 'body' in notification:
-                        return {
-                            'success': True,
-                            'notification': {
-                                'title': str(notification['title']),
-                                'body': str(notification['body'])
-                            }
-                        }
-
-            # Se não conseguir extrair JSON válido, usar fallback
+        data, _ = decode_structured(response_text, 'reward_message')
+        if data is None:
             return self._fallback_reward_message({})
 
-        except Exception as e:
-            self.logger.error(f"Erro ao processar resposta de mensagem de recompensa: {e}")
-            return self._fallback_reward_message({})
+        notification = data['notification']
+        return {
+            'success': True,
+            'notification': {
+                'title': notification['title'],
+                'body': notification['body']
+            }
+        }
 
     def _process_badge_creation_response(self, response_text: str) -> dict:
         """
         Processa a resposta da Gemma-3 para criação de badges
         """
-        try:
-            # Tentar extrair JSON da resposta
-            json_match = re.search(r'\{[^{}]*"badge"[^{}]*\{[^{}]*\}[^{}]*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                data = json.loads(json_str)
-
-                if 'badge' in data and isinstance(data['badge'], dict):
-                    badge = data['badge']
-                    # Validar campos obrigatórios
-                    required_fields = ['name', 'description', 'icon_suggestion']
-                    if all(field in badge for field in required_fields):
-                        return {
-                            'success': True,
-                            'badge': {
-                                'name': str(badge['name']),
-                                'description': str(badge['description']),
-                                'icon_suggestion': str(badge['icon_suggestion']),
-                                'category': str(badge.get('category', 'geral'))
-                            }
-                        }
-
-            # Se não conseguir extrair JSON válido, usar fallback
-            return self._fallback_badge_creation("", "geral")
+        data, _ = decode_structured(response_text, 'badge_creation')
+        if data is None:
+            return self._fallback_badge_creation({})
 
-        except Exception as e:
-            self.logger.error(f"Erro ao processar resposta de criação de badge: {e}")
-            return self._fallback_badge_creation("", "geral")
+        badge = data['badge']
+        return {
+            'success': True,
+            'badge': {
+                'name': badge['name'],
+                'description': badge['description'],
+                'icon_suggestion': badge['icon_suggestion'],
+                'category': badge.get('category', 'geral')
+            }
+        }
 
     # ========== MÉTODOS DE FALLBACK MORANSA ==========
 
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agendador de admissão para geração com prioridade por criticidade
+Hackathon Gemma 3n
+
+Limita quantas gerações rodam ao mesmo tempo no Ollama/modelo local e
+ordena a fila pela criticidade do pedido: CRITICAL e HIGH (emergências,
+saúde) passam à frente de MEDIUM e LOW (educação, gamificação). Pedidos
+antigos sobem de prioridade com o tempo (proteção contra inanição) e cada
+classe tem uma espera máxima, após a qual o pedido é rejeitado com
+HTTP 503 e Retry-After.
+"""
+
+import asyncio
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterator, List, Optional
+
+from flask import Flask, g, has_request_context, jsonify
+
+from config.settings import BackendConfig
+
+from .intelligent_model_selector import CriticalityLevel
+from .request_deadline import DeadlineExceeded, bind_deadline, current_deadline
+
+# Ordem de atendimento (menor = mais urgente)
+PRIORITY_RANK = {
+    CriticalityLevel.CRITICAL: 0,
+    CriticalityLevel.HIGH: 1,
+    CriticalityLevel.MEDIUM: 2,
+    CriticalityLevel.LOW: 3
+}
+
+
+class GenerationRejected(Exception):
+    """Pedido de geração rejeitado pelo agendador (fila cheia ou espera excedida)"""
+
+    ERROR_CODE = 'generation_queue_full'
+
+    def __init__(self, criticality: CriticalityLevel, retry_after: int, reason: str):
+        super().__init__(f"Geração rejeitada ({criticality.value}): {reason}")
+        self.criticality = criticality
+        self.retry_after = retry_after
+        self.reason = reason
+
+    def to_response(self) -> Dict[str, Any]:
+        """Resposta de erro no formato usado pelo GemmaService"""
+        return {
+            'response': "O serviço está sobrecarregado no momento. Tente novamente em instantes.",
+            'success': False,
+            'error': self.ERROR_CODE,
+            'reason': self.reason,
+            'retry_after': self.retry_after,
+            'metadata': {
+                'provider': 'scheduler',
+                'criticality': self.criticality.value
+            }
+        }
+
+
+class _Ticket:
+    """Pedido aguardando um slot de geração"""
+
+    __slots__ = ('criticality', 'rank', 'seq', 'enqueued_at', 'admitted')
+
+    def __init__(self, criticality: CriticalityLevel, seq: int):
+        self.criticality = criticality
+        self.rank = PRIORITY_RANK[criticality]
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.admitted = False
+
+    def effective_rank(self, now: float, aging_seconds: float) -> float:
+        """Prioridade efetiva: sobe um nível a cada ``aging_seconds`` de espera"""
+        if aging_seconds <= 0:
+            return self.rank
+        return self.rank - (now - self.enqueued_at) / aging_seconds
+
+
+class GenerationScheduler:
+    """Fila de prioridade limitada na frente do Ollama e do modelo local"""
+
+    def __init__(
+        self,
+        max_concurrency: int = 1,
+        max_wait: Optional[Dict[str, float]] = None,
+        max_queue: int = 32,
+        aging_seconds: float = 15.0
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.aging_seconds = aging_seconds
+        self.max_wait = {level: float((max_wait or {}).get(level.value, 60)) for level in CriticalityLevel}
+
+        self._cond = threading.Condition()
+        self._waiting: List[_Ticket] = []
+        self._running = 0
+        self._seq = itertools.count()
+        self._local = threading.local()
+
+        self._avg_service_time = 10.0
+        self._metrics = {
+            level.value: {
+                'admitted': 0,
+                'rejected_queue_full': 0,
+                'rejected_timeout': 0,
+                'abandoned': 0,
+                'total_wait': 0.0,
+                'max_wait': 0.0
+            }
+            for level in CriticalityLevel
+        }
+
+    # ----- API pública -----
+
+    @contextmanager
+    def slot(self, criticality: CriticalityLevel = CriticalityLevel.MEDIUM) -> Iterator[None]:
+        """Reservar um slot de geração (reentrante dentro da mesma thread)"""
+        depth = getattr(self._local, 'depth', 0)
+        if depth:
+            # Geração aninhada (ex.: fallback que chama generate_response) já está admitida
+            self._local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+
+        self._acquire(criticality)
+        self._local.depth = 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            self._release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def async_slot(self, criticality: CriticalityLevel = CriticalityLevel.MEDIUM) -> AsyncIterator[None]:
+        """Versão assíncrona de ``slot``: a espera na fila não bloqueia o loop"""
+        loop = asyncio.get_running_loop()
+        # A thread do executor herda o contexto da tarefa (prazo da requisição)
+        acquire = loop.run_in_executor(None, bind_deadline(self._acquire), criticality)
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # Cancelado durante a espera: devolver o slot se ele chegar a ser concedido
+            acquire.add_done_callback(lambda f: f.cancelled() or f.exception() or self._release(0.0))
+            raise
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    # ----- Fila -----
+
+    def _acquire(self, criticality: CriticalityLevel) -> None:
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check()
+
+        with self._cond:
+            if self._running < self.max_concurrency and not self._waiting:
+                self._running += 1
+                self._record_admission(criticality, 0.0)
+                return
+
+            if len(self._waiting) >= self.max_queue and not self._can_displace(criticality):
+                self._metrics[criticality.value]['rejected_queue_full'] += 1
+                raise GenerationRejected(criticality, self._estimate_retry_after(), 'fila de geração cheia')
+
+            ticket = _Ticket(criticality, next(self._seq))
+            self._waiting.append(ticket)
+            if len(self._waiting) > self.max_queue:
+                self._displace_lowest()
+
+            max_wait = self.max_wait[criticality]
+            if deadline is not None:
+                # Não esperar além do prazo da própria requisição
+                max_wait = min(max_wait, deadline.remaining())
+            wait_until = ticket.enqueued_at + max_wait
+            while not ticket.admitted:
+                remaining = wait_until - time.monotonic()
+                if deadline is not None and deadline.expired and ticket in self._waiting:
+                    # Requisição abandonada ou sem tempo: sair da fila sem ocupar o modelo
+                    self._waiting.remove(ticket)
+                    self._metrics[criticality.value]['abandoned'] += 1
+                    self._cond.notify_all()
+                    raise DeadlineExceeded(deadline.reason or 'prazo esgotado na fila de geração')
+                if remaining <= 0 or ticket not in self._waiting:
+                    if ticket in self._waiting:
+                        self._waiting.remove(ticket)
+                        self._metrics[criticality.value]['rejected_timeout'] += 1
+                        reason = 'tempo máximo de espera excedido'
+                    else:
+                        reason = 'substituído por pedido mais urgente'
+                    self._cond.notify_all()
+                    raise GenerationRejected(criticality, self._estimate_retry_after(), reason)
+                # Com prazo, acordar periodicamente para notar cancelamentos
+                self._cond.wait(timeout=min(remaining, 0.5) if deadline is not None else remaining)
+
+            self._record_admission(criticality, time.monotonic() - ticket.enqueued_at)
+
+    def _release(self, service_time: float) -> None:
+        with self._cond:
+            self._running -= 1
+            # Média móvel exponencial do tempo de geração (para o Retry-After)
+            self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * service_time
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admitir os próximos pedidos pela prioridade efetiva (chamar com o lock)"""
+        now = time.monotonic()
+        while self._waiting and self._running < self.max_concurrency:
+            best = min(self._waiting, key=lambda t: (t.effective_rank(now, self.aging_seconds), t.seq))
+            self._waiting.remove(best)
+            best.admitted = True
+            self._running += 1
+        self._cond.notify_all()
+
+    def _can_displace(self, criticality: CriticalityLevel) -> bool:
+        rank = PRIORITY_RANK[criticality]
+        return any(ticket.rank > rank for ticket in self._waiting)
+
+    def _displace_lowest(self) -> None:
+        """Fila cheia: descartar o pedido menos urgente (o mais novo entre iguais)"""
+        victim = max(self._waiting, key=lambda t: (t.rank, t.seq))
+        self._waiting.remove(victim)
+        self._metrics[victim.criticality.value]['rejected_queue_full'] += 1
+        self._cond.notify_all()
+
+    def _record_admission(self, criticality: CriticalityLevel, waited: float) -> None:
+        metrics = self._metrics[criticality.value]
+        metrics['admitted'] += 1
+        metrics['total_wait'] += waited
+        metrics['max_wait'] = max(metrics['max_wait'], waited)
+
+    def _estimate_retry_after(self) -> int:
+        queued = len(self._waiting) + self._running
+        return max(1, math.ceil(self._avg_service_time * queued / self.max_concurrency))
+
+    def estimate_wait(self, criticality: CriticalityLevel = CriticalityLevel.MEDIUM) -> float:
+        """Espera prevista na fila para um novo pedido desta criticidade (segundos)"""
+        with self._cond:
+            rank = PRIORITY_RANK[criticality]
+            ahead = sum(1 for ticket in self._waiting if ticket.rank <= rank)
+            if self._running < self.max_concurrency and not ahead:
+                return 0.0
+            # Metade de uma geração em andamento mais as que estão à frente na fila
+            return self._avg_service_time * (ahead + 0.5) / self.max_concurrency
+
+    def depth(self) -> int:
+        """Gerações em andamento mais pedidos na fila"""
+        with self._cond:
+            return self._running + len(self._waiting)
+
+    # ----- Métricas -----
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            depth = {level.value: 0 for level in CriticalityLevel}
+            for ticket in self._waiting:
+                depth[ticket.criticality.value] += 1
+
+            classes = {}
+            for name, metrics in self._metrics.items():
+                admitted = metrics['admitted']
+                classes[name] = {
+                    'queue_depth': depth[name],
+                    'admitted': admitted,
+                    'rejected_queue_full': metrics['rejected_queue_full'],
+                    'rejected_timeout': metrics['rejected_timeout'],
+                    'abandoned': metrics['abandoned'],
+                    'avg_wait_ms': round(metrics['total_wait'] / admitted * 1000, 1) if admitted else 0.0,
+                    'max_wait_ms': round(metrics['max_wait'] * 1000, 1),
+                    'max_wait_allowed_s': self.max_wait[CriticalityLevel(name)]
+                }
+
+            return {
+                'max_concurrency': self.max_concurrency,
+                'running': self._running,
+                'queued': len(self._waiting),
+                'max_queue': self.max_queue,
+                'aging_seconds': self.aging_seconds,
+                'avg_service_time_s': round(self._avg_service_time, 2),
+                'classes': classes
+            }
+
+
+# ----- Integração com o Flask -----
+
+# Corrotinas no loop compartilhado não têm contexto de requisição: as
+# rejeições são acumuladas aqui e reaplicadas na thread da requisição
+_deferred_rejections: ContextVar[Optional[List[GenerationRejected]]] = ContextVar(
+    'deferred_generation_rejections', default=None
+)
+
+
+def mark_request_rejected(error: GenerationRejected) -> None:
+    """Registrar na requisição atual que a geração foi rejeitada (vira HTTP 503)"""
+    if has_request_context():
+        g.generation_rejected = error
+        return
+    sink = _deferred_rejections.get()
+    if sink is not None:
+        sink.append(error)
+
+
+async def capture_rejections(coro: Awaitable[Any], sink: List[GenerationRejected]) -> Any:
+    """Executar ``coro`` acumulando em ``sink`` as rejeições marcadas durante a execução"""
+    _deferred_rejections.set(sink)
+    return await coro
+
+
+def get_request_rejection() -> Optional[GenerationRejected]:
+    if has_request_context():
+        return g.get('generation_rejected')
+    return None
+
+
+def register_admission_handlers(app: Flask) -> None:
+    """Converter rejeições do agendador em HTTP 503 com Retry-After
+
+    As rotas costumam capturar qualquer erro e devolver uma resposta de
+    fallback; o hook abaixo garante que o cliente receba o 503 mesmo assim.
+    """
+    logger = logging.getLogger(__name__)
+
+    @app.errorhandler(GenerationRejected)
+    def handle_generation_rejected(error):
+        response = jsonify(error.to_response())
+        response.status_code = 503
+        response.headers['Retry-After'] = str(error.retry_after)
+        return response
+
+    @app.after_request
+    def apply_generation_rejection(response):
+        rejection = get_request_rejection()
+        if rejection is None or response.status_code == 503 or response.mimetype == 'text/event-stream':
+            return response
+
+        logger.warning(f"🚦 Geração rejeitada ({rejection.criticality.value}): {rejection.reason}")
+        rejected = jsonify(rejection.to_response())
+        rejected.status_code = 503
+        rejected.headers['Retry-After'] = str(rejection.retry_after)
+        return rejected
+
+
+_scheduler: Optional[GenerationScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_generation_scheduler() -> GenerationScheduler:
+    """Obter o agendador de geração compartilhado do processo"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = GenerationScheduler(
+                    max_concurrency=BackendConfig.GENERATION_MAX_CONCURRENCY,
+                    max_wait=BackendConfig.GENERATION_MAX_WAIT,
+                    max_queue=BackendConfig.GENERATION_MAX_QUEUE,
+                    aging_seconds=BackendConfig.GENERATION_AGING_SECONDS
+                )
+    return _scheduler
@@ -6,61 +6,42 @@ Hackathon Gemma 3n
 """
 
 import logging
-import psutil
-import platform
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+from .ollama_client import get_ollama_client
+from .resource_monitor import ResourceMonitor, get_resource_monitor
+
 class HealthService:
     """Serviço para monitoramento de saúde do sistema"""
     
-    def __init__(self, gemma_service=None):
+    def __init__(self, gemma_service=None, resource_monitor: Optional[ResourceMonitor] = None):
         self.logger = logging.getLogger(__name__)
         self.gemma_service = gemma_service
+        self.resource_monitor = resource_monitor or get_resource_monitor()
         self.start_time = datetime.now()
     
     def get_system_health(self) -> Dict[str, Any]:
         """Obter status completo de saúde do sistema"""
         try:
-            # Informações básicas do sistema
-            system_info = {
-                'platform': platform.system(),
-                'platform_version': platform.version(),
-                'architecture': platform.architecture()[0],
-                'processor': platform.processor(),
-                'python_version': platform.python_version()
-            }
-            
-            # Informações de memória
-            memory = psutil.virtual_memory()
-            memory_info = {
-                'total_gb': round(memory.total / (1024**3), 2),
-                'available_gb': round(memory.available / (1024**3), 2),
-                'used_gb': round(memory.used / (1024**3), 2),
-                'percentage': memory.percent
-            }
-            
-            # Informações de CPU
-            cpu_info = {
-                'count': psutil.cpu_count(),
-                'usage_percent': psutil.cpu_percent(interval=1),
-                'frequency_mhz': psutil.cpu_freq().current if psutil.cpu_freq() else None
-            }
-            
-            # Informações de disco
-            disk = psutil.disk_usage('/')
-            disk_info = {
-                'total_gb': round(disk.total / (1024**3), 2),
-                'used_gb': round(disk.used / (1024**3), 2),
-                'free_gb': round(disk.free / (1024**3), 2),
-                'percentage': round((disk.used / disk.total) * 100, 2)
-            }
+            # Snapshot amostrado em segundo plano: nenhuma chamada bloqueante ao sistema
+            snapshot = self.resource_monitor.snapshot()
+            if snapshot is None:
+                raise RuntimeError("Nenhuma amostra de recursos disponível")
+            resources = snapshot.to_dict()
+            system_info = dict(snapshot.system)
+            memory_info = resources['memory']
+            cpu_info = resources['cpu']
+            disk_info = resources['disk']
             
             # Status do serviço Gemma
             gemma_status = None
             if self.gemma_service:
                 gemma_status = self.gemma_service.get_health_status()
             
+            # Estatísticas do pool de conexões com o Ollama
+            ollama_pool = self._get_ollama_pool_stats()
+            
             # Tempo de atividade
             uptime = datetime.now() - self.start_time
             uptime_info = {
@@ -79,7 +60,11 @@ class HealthService:
                 'memory': memory_info,
                 'cpu': cpu_info,
                 'disk': disk_info,
+                'gpu': resources['gpu'],
+                'resources_sampled_at': datetime.fromtimestamp(snapshot.sampled_at).isoformat(),
+                'resources_age_s': resources['age_s'],
                 'gemma_service': gemma_status,
+                'ollama_pool': ollama_pool,
                 'services': {
                     'backend': 'running',
                     'gemma': 'running' if gemma_status and (gemma_status.get('ollama_available') or gemma_status.get('model_loaded')) else 'fallback'
@@ -94,6 +79,16 @@ class HealthService:
                 'timestamp': datetime.now().isoformat()
             }
     
+    def _get_ollama_pool_stats(self) -> Optional[Dict[str, Any]]:
+        """Obter estatísticas do pool HTTP compartilhado com o Ollama"""
+        try:
+            if self.gemma_service:
+                return self.gemma_service.ollama_client.get_stats()
+            return get_ollama_client().get_stats()
+        except Exception as e:
+            self.logger.warning(f"Erro ao obter estatísticas do pool Ollama: {e}")
+            return None
+    
     def _determine_overall_status(
         self,
         memory_info: Dict[str, Any],
@@ -127,8 +122,11 @@ class HealthService:
     def get_quick_status(self) -> Dict[str, Any]:
         """Obter status rápido do sistema"""
         try:
-            memory = psutil.virtual_memory()
-            cpu_percent = psutil.cpu_percent(interval=0.1)
+            snapshot = self.resource_monitor.snapshot()
+            if snapshot is None:
+                raise RuntimeError("Nenhuma amostra de recursos disponível")
+            memory_percent = snapshot.memory_percent
+            cpu_percent = snapshot.cpu_percent
             
             gemma_available = False
             if self.gemma_service:
@@ -136,9 +134,10 @@ class HealthService:
                 gemma_available = status.get('ollama_available', False) or status.get('model_loaded', False)
             
             return {
-                'status': 'healthy' if memory.percent < 80 and cpu_percent < 80 else 'warning',
-                'memory_percent': memory.percent,
+                'status': 'healthy' if memory_percent < 80 and cpu_percent < 80 else 'warning',
+                'memory_percent': memory_percent,
                 'cpu_percent': cpu_percent,
+                'cpu_percent_avg': round(snapshot.cpu_percent_avg, 1),
                 'gemma_available': gemma_available,
                 'timestamp': datetime.now().isoformat()
             }
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gerações com prazo (hedging) para os endpoints de emergência
+Hackathon Gemma 3n
+
+Em /api/medical/emergency, /api/medical/first-aid e /api/voice-guide/emergency
+a resposta precisa chegar dentro de um prazo fixo, faça o modelo o que fizer.
+A geração roda em um pool próprio; se não terminar até o prazo do endpoint,
+a rota responde imediatamente com o protocolo determinístico e devolve um
+ticket. A resposta do modelo pode então ser consultada (polling ou SSE) em
+/api/medical/emergency/result/<ticket>. Tickets não consultados são
+cancelados para liberar capacidade: cada geração roda com um ``Deadline``
+próprio (vida útil do ticket), que o cancelamento aciona para abortar a
+geração em andamento. Uma thread dorme até o próximo vencimento e expira
+os tickets na hora, sem esperar a próxima requisição.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import BackendConfig
+
+from .request_deadline import Deadline, deadline_scope
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+EXPIRED = 'expired'
+
+
+class HedgeTicket:
+    """Geração que perdeu o prazo e continua em segundo plano"""
+
+    __slots__ = ('id', 'endpoint', 'future', 'deadline', 'created_at', 'claimed_at')
+
+    def __init__(self, endpoint: str, future: Future, deadline: Deadline):
+        self.id = uuid.uuid4().hex
+        self.endpoint = endpoint
+        self.future = future
+        self.deadline = deadline
+        self.created_at = time.monotonic()
+        self.claimed_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if self.deadline.cancelled or self.future.cancelled():
+            return CANCELLED
+        if not self.future.done():
+            return PENDING
+        return FAILED if self.future.exception() is not None else DONE
+
+
+class HedgeOutcome:
+    """Resultado de ``HedgedGenerations.run`` na thread da requisição"""
+
+    __slots__ = ('endpoint', 'completed', 'result', 'deadline', 'elapsed', 'ticket')
+
+    def __init__(self, endpoint: str, completed: bool, deadline: float, elapsed: float,
+                 result: Any = None, ticket: Optional[HedgeTicket] = None):
+        self.endpoint = endpoint
+        self.completed = completed
+        self.result = result
+        self.deadline = deadline
+        self.elapsed = elapsed
+        self.ticket = ticket
+
+    def pending_info(self, result_url: str) -> Optional[Dict[str, Any]]:
+        """Dados para o cliente buscar a resposta do modelo depois do prazo"""
+        if self.ticket is None:
+            return None
+        return {
+            'ticket': self.ticket.id,
+            'status': self.ticket.status,
+            'result_url': f"{result_url}/{self.ticket.id}",
+            'stream_url': f"{result_url}/{self.ticket.id}?stream=1",
+            'deadline_ms': round(self.deadline * 1000),
+            'expires_in_s': BackendConfig.HEDGE_RESULT_TTL
+        }
+
+
+class HedgedGenerations:
+    """Pool de gerações com prazo por endpoint, tickets pendentes e métricas"""
+
+    def __init__(
+        self,
+        deadlines: Optional[Dict[str, float]] = None,
+        max_workers: int = 4,
+        result_ttl: float = 300.0,
+        claim_seconds: float = 60.0
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.deadlines = dict(deadlines or {})
+        self.result_ttl = result_ttl
+        self.claim_seconds = claim_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="hedged-generation")
+        self._lock = threading.Lock()
+        self._tickets: Dict[str, HedgeTicket] = {}
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+        self._expiry_thread: Optional[threading.Thread] = None
+
+    # ----- Execução -----
+
+    def deadline_for(self, endpoint: str) -> float:
+        return self.deadlines.get(endpoint, BackendConfig.HEDGE_DEFAULT_DEADLINE)
+
+    def run(self, endpoint: str, fn: Callable[[], Any], deadline: Optional[float] = None) -> HedgeOutcome:
+        """Executar ``fn`` com prazo; após o prazo a geração vira um ticket pendente"""
+        self._expire_tickets()
+        deadline = self.deadline_for(endpoint) if deadline is None else deadline
+        # A geração sobrevive à requisição (vira ticket), então tem prazo próprio
+        generation_deadline = Deadline(self.result_ttl)
+        started = time.monotonic()
+        future = self._executor.submit(self._guarded, fn, generation_deadline)
+
+        try:
+            result = future.result(timeout=deadline)
+        except FutureTimeout:
+            elapsed = time.monotonic() - started
+            ticket = HedgeTicket(endpoint, future, generation_deadline)
+            with self._lock:
+                self._tickets[ticket.id] = ticket
+                self._entry(endpoint)['misses'] += 1
+                self._schedule_expiry()
+            future.add_done_callback(lambda f: self._record_late(endpoint, started, f))
+            self.logger.warning(
+                f"⏱️ Prazo de {deadline:.1f}s excedido em {endpoint}: protocolo enviado, ticket {ticket.id[:8]}"
+            )
+            return HedgeOutcome(endpoint, False, deadline, elapsed, ticket=ticket)
+        except Exception as e:
+            # A geração falhou antes do prazo: o protocolo determinístico cobre
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._entry(endpoint)['errors'] += 1
+            self.logger.error(f"❌ Geração com prazo falhou em {endpoint}: {e}")
+            return HedgeOutcome(endpoint, False, deadline, elapsed)
+
+        elapsed = time.monotonic() - started
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry['hits'] += 1
+            entry['hit_seconds'] += elapsed
+        return HedgeOutcome(endpoint, True, deadline, elapsed, result=result)
+
+    @staticmethod
+    def _guarded(fn: Callable[[], Any], deadline: Deadline) -> Any:
+        # Ticket cancelado antes de a geração começar: não ocupar o modelo
+        if deadline.cancelled:
+            raise CancelledError()
+        with deadline_scope(deadline):
+            return fn()
+
+    # ----- Tickets -----
+
+    def get_ticket(self, ticket_id: str) -> Optional[HedgeTicket]:
+        self._expire_tickets()
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            if ticket is not None and ticket.claimed_at is None:
+                ticket.claimed_at = time.monotonic()
+            return ticket
+
+    def wait(self, ticket: HedgeTicket, timeout: float) -> str:
+        """Aguardar a geração do ticket por até ``timeout`` segundos"""
+        try:
+            ticket.future.result(timeout=max(0.0, timeout))
+        except Exception:
+            # Prazo da espera, cancelamento ou erro: o status do ticket informa o cliente
+            pass
+        return ticket.status
+
+    def cancel(self, ticket: HedgeTicket, reason: str = 'cancelado') -> None:
+        ticket.deadline.cancel(f"geração pendente {reason}")
+        if ticket.future.cancel():
+            self.logger.info(f"🛑 Geração pendente {ticket.id[:8]} ({ticket.endpoint}) {reason} antes de iniciar")
+        with self._lock:
+            self._entry(ticket.endpoint)['cancelled'] += 1
+
+    def _expire_tickets(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            tickets = list(self._tickets.values())
+        for ticket in tickets:
+            age = now - ticket.created_at
+            if age > self.result_ttl:
+                with self._lock:
+                    self._tickets.pop(ticket.id, None)
+                if ticket.status == PENDING:
+                    self.cancel(ticket, 'expirou')
+            elif ticket.claimed_at is None and age > self.claim_seconds and ticket.status == PENDING:
+                # Ninguém aguarda a resposta tardia: liberar a vaga no pool
+                self.cancel(ticket, 'não foi consultado')
+
+    def _schedule_expiry(self) -> None:
+        """Garantir a thread de expiração dos tickets (chamado com ``_lock``)"""
+        if self._expiry_thread is None:
+            self._expiry_thread = threading.Thread(target=self._run_expiry, name="hedge-expiry", daemon=True)
+            self._expiry_thread.start()
+
+    def _next_expiry(self) -> Optional[float]:
+        """Próximo instante em que algum ticket vence (chamado com ``_lock``)"""
+        moments = []
+        for ticket in self._tickets.values():
+            moments.append(ticket.created_at + self.result_ttl)
+            if ticket.claimed_at is None and ticket.status == PENDING:
+                moments.append(ticket.created_at + self.claim_seconds)
+        return min(moments, default=None)
+
+    def _run_expiry(self) -> None:
+        # Prazos iguais para todos os tickets: um ticket novo nunca vence antes dos já existentes
+        while True:
+            self._expire_tickets()
+            with self._lock:
+                next_expiry = self._next_expiry()
+                if next_expiry is None:
+                    self._expiry_thread = None
+                    return
+            time.sleep(max(0.01, next_expiry - time.monotonic()))
+
+    # ----- Métricas -----
+
+    def _entry(self, endpoint: str) -> Dict[str, Any]:
+        entry = self._metrics.get(endpoint)
+        if entry is None:
+            entry = {
+                'hits': 0,
+                'misses': 0,
+                'errors': 0,
+                'late_completions': 0,
+                'cancelled': 0,
+                'hit_seconds': 0.0,
+                'late_seconds': 0.0
+            }
+            self._metrics[endpoint] = entry
+        return entry
+
+    def _record_late(self, endpoint: str, started: float, future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry['late_completions'] += 1
+            entry['late_seconds'] += time.monotonic() - started
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {}
+            for name in sorted(set(self.deadlines) | set(self._metrics)):
+                entry = self._metrics.get(name) or {
+                    'hits': 0, 'misses': 0, 'errors': 0, 'late_completions': 0,
+                    'cancelled': 0, 'hit_seconds': 0.0, 'late_seconds': 0.0
+                }
+                total = entry['hits'] + entry['misses'] + entry['errors']
+                endpoints[name] = {
+                    'deadline_s': self.deadline_for(name),
+                    'hits': entry['hits'],
+                    'misses': entry['misses'],
+                    'errors': entry['errors'],
+                    'hit_rate': round(entry['hits'] / total, 3) if total else None,
+                    'avg_hit_ms': round(entry['hit_seconds'] / entry['hits'] * 1000, 1) if entry['hits'] else None,
+                    'late_completions': entry['late_completions'],
+                    'avg_late_ms': round(entry['late_seconds'] / entry['late_completions'] * 1000, 1)
+                    if entry['late_completions'] else None,
+                    'cancelled': entry['cancelled']
+                }
+            pending = sum(1 for ticket in self._tickets.values() if ticket.status == PENDING)
+            return {
+                'pending_tickets': pending,
+                'tickets': len(self._tickets),
+                'endpoints': endpoints
+            }
+
+
+_hedged: Optional[HedgedGenerations] = None
+_hedged_lock = threading.Lock()
+
+
+def get_hedged_generations() -> HedgedGenerations:
+    """Obter o pool de gerações com prazo compartilhado do processo"""
+    global _hedged
+    if _hedged is None:
+        with _hedged_lock:
+            if _hedged is None:
+                _hedged = HedgedGenerations(
+                    deadlines=BackendConfig.HEDGE_DEADLINES,
+                    max_workers=BackendConfig.HEDGE_MAX_WORKERS,
+                    result_ttl=BackendConfig.HEDGE_RESULT_TTL,
+                    claim_seconds=BackendConfig.HEDGE_CLAIM_SECONDS
+                )
+    return _hedged
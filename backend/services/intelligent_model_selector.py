@@ -6,12 +6,17 @@ Seleciona automaticamente o modelo mais adequado baseado na criticidade e contex
 """
 
 import logging
-import psutil
-import platform
-from typing import Dict, Any, Optional, Tuple
+import os
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 from enum import Enum
 from dataclasses import dataclass
 
+from config.settings import BackendConfig
+
+from .resource_monitor import get_resource_monitor
+from .text_signals import analyze_text
+
 logger = logging.getLogger(__name__)
 
 class CriticalityLevel(Enum):
@@ -61,36 +66,11 @@ class DeviceDetector:
     def get_device_specs() -> Dict[str, Any]:
         """Obtém especificações do dispositivo"""
         try:
-            # Informações de memória
-            memory = psutil.virtual_memory()
-            ram_gb = memory.total / (1024**3)  # Converte bytes para GB
-            
-            # Informações de CPU
-            cpu_count = psutil.cpu_count(logical=False)  # Núcleos físicos
-            cpu_logical = psutil.cpu_count(logical=True)  # Núcleos lógicos
-            cpu_freq = psutil.cpu_freq()
-            
-            # Informações de armazenamento
-            disk = psutil.disk_usage('/')
-            storage_total_gb = disk.total / (1024**3)
-            storage_free_gb = disk.free / (1024**3)
-            
-            # Informações do sistema
-            system_info = {
-                'platform': platform.system(),
-                'architecture': platform.architecture()[0],
-                'processor': platform.processor()
-            }
-            
-            return {
-                'ram_gb': round(ram_gb, 2),
-                'cpu_cores_physical': cpu_count,
-                'cpu_cores_logical': cpu_logical,
-                'cpu_freq_mhz': cpu_freq.current if cpu_freq else 0,
-                'storage_total_gb': round(storage_total_gb, 2),
-                'storage_free_gb': round(storage_free_gb, 2),
-                'system': system_info
-            }
+            # Leitura do snapshot em memória (amostrado em segundo plano)
+            snapshot = get_resource_monitor().snapshot()
+            if snapshot is None:
+                raise RuntimeError("nenhuma amostra de recursos disponível")
+            return snapshot.device_specs()
         except Exception as e:
             logger.warning(f"Erro ao detectar especificações do dispositivo: {e}")
             # Retorna especificações mínimas como fallback
@@ -215,165 +195,62 @@ class IntelligentModelSelector:
         ContextType.GENERAL: CriticalityLevel.LOW
     }
     
-    # Palavras-chave para detecção automática de criticidade
-    CRITICAL_KEYWORDS = {
-        CriticalityLevel.CRITICAL: [
-            "emergência", "urgente", "perigo", "risco", "alerta", "catástrofe",
-            "desastre", "tsunami", "terremoto", "incêndio", "inundação",
-            "envenenamento", "overdose", "parada cardíaca", "asfixia",
-            "emergency", "urgent", "danger", "risk", "alert", "catastrophe"
-        ],
-        CriticalityLevel.HIGH: [
-            "dor", "ferimento", "sangramento", "febre", "infecção", "fratura",
-            "queimadura", "corte", "machucado", "doente", "mal estar",
-            "pain", "injury", "bleeding", "fever", "infection", "fracture",
-            "burn", "cut", "hurt", "sick", "illness"
-        ],
-        CriticalityLevel.MEDIUM: [
-            "ensinar", "aprender", "estudar", "plantar", "colher", "cultivar",
-            "praga", "doença da planta", "fertilizante", "irrigação",
-            "teach", "learn", "study", "plant", "harvest", "cultivate",
-            "pest", "plant disease", "fertilizer", "irrigation"
-        ]
-    }
+    # Detector de contexto/criticidade usado por select_model (substituível)
+    _detector = None
+    _detector_lock = threading.Lock()
+    
+    @classmethod
+    def set_detector(cls, detector) -> None:
+        """Substituir o detector de contexto/criticidade (None volta ao padrão)"""
+        with cls._detector_lock:
+            cls._detector = detector
+    
+    @classmethod
+    def get_detector(cls):
+        """Detector atual: classificador treinado se houver artefato, senão palavras-chave"""
+        if cls._detector is None:
+            with cls._detector_lock:
+                if cls._detector is None:
+                    cls._detector = cls._default_detector()
+        return cls._detector
+    
+    @staticmethod
+    def _default_detector():
+        keywords = KeywordDetector()
+        if BackendConfig.ROUTING_CLASSIFIER_ENABLED and os.path.exists(BackendConfig.ROUTING_CLASSIFIER_PATH):
+            # O artefato só é carregado na primeira classificação
+            return ClassifierDetector(
+                BackendConfig.ROUTING_CLASSIFIER_PATH,
+                threshold=BackendConfig.ROUTING_CLASSIFIER_THRESHOLD,
+                fallback=keywords
+            )
+        return keywords
     
     @classmethod
     def detect_criticality_from_text(cls, text: str) -> CriticalityLevel:
         """Detecta nível de criticidade baseado no texto"""
-        text_lower = text.lower()
-        
-        # Verifica palavras críticas primeiro
-        for keyword in cls.CRITICAL_KEYWORDS[CriticalityLevel.CRITICAL]:
-            if keyword in text_lower:
-                return CriticalityLevel.CRITICAL
-        
-        # Verifica palavras de alta prioridade
-        for keyword in cls.CRITICAL_KEYWORDS[CriticalityLevel.HIGH]:
-            if keyword in text_lower:
-                return CriticalityLevel.HIGH
-        
-        # Verifica palavras de média prioridade
-        for keyword in cls.CRITICAL_KEYWORDS[CriticalityLevel.MEDIUM]:
-            if keyword in text_lower:
-                return CriticalityLevel.MEDIUM
-        
-        return CriticalityLevel.LOW
+        # Palavras críticas primeiro, depois alta e média prioridade
+        level = analyze_text(text).first('criticality')
+        return CriticalityLevel(level) if level else CriticalityLevel.LOW
     
     @classmethod
     def detect_criticality(cls, text: str) -> CriticalityLevel:
         """Detecta o nível de criticidade baseado no texto"""
-        text_lower = text.lower()
-        
-        # Palavras-chave para criticidade alta/crítica
-        critical_keywords = [
-            'urgente', 'emergência', 'crítico', 'alerta', 'evacuação',
-            'perigo', 'risco', 'morte', 'ferimento', 'sangramento',
-            'inconsciente', 'parada', 'ataque', 'envenenamento'
-        ]
-        
-        high_keywords = [
-            'importante', 'sério', 'preocupante', 'ajuda',
-            'problema', 'dificuldade', 'tratamento', 'cuidado'
-        ]
-        
-        # Verificar criticidade
-        if any(keyword in text_lower for keyword in critical_keywords):
-            return CriticalityLevel.CRITICAL
-        elif any(keyword in text_lower for keyword in high_keywords):
-            return CriticalityLevel.HIGH
-        else:
-            return CriticalityLevel.LOW
+        level = analyze_text(text).first('criticality_basic')
+        return CriticalityLevel(level) if level else CriticalityLevel.LOW
     
     @classmethod
     def detect_context_from_text(cls, text: str) -> ContextType:
         """Detecta contexto baseado no texto"""
-        text_lower = text.lower()
-        
-        # Palavras-chave por contexto
-        context_keywords = {
-            ContextType.ENVIRONMENTAL: [
-                "ambiente", "clima", "tempo", "chuva", "seca", "poluição",
-                "desmatamento", "água", "ar", "solo", "natureza"
-            ],
-            ContextType.EMERGENCY: [
-                "emergência", "socorro", "ajuda", "urgente", "911", "192",
-                "bombeiros", "polícia", "ambulância", "resgate"
-            ],
-            ContextType.HEALTH: [
-                "saúde", "médico", "hospital", "remédio", "tratamento",
-                "sintoma", "doença", "medicina", "primeiros socorros"
-            ],
-            ContextType.EDUCATION: [
-                "ensino", "escola", "professor", "aluno", "aprender",
-                "estudar", "lição", "matéria", "educação", "conhecimento",
-                "explique", "como funciona", "fotossíntese", "plantas",
-                "crianças", "simples", "ensinar", "aula", "disciplina"
-            ],
-            ContextType.AGRICULTURE: [
-                "agricultura", "plantação", "colheita", "fazenda", "roça",
-                "sementes", "fertilizante", "praga", "irrigação", "cultivo",
-                "solo", "plantio", "milho", "arroz", "mandioca", "ph",
-                "nutrientes", "manejo", "época", "análise", "terra"
-            ],
-            ContextType.ACCESSIBILITY: [
-                "acessibilidade", "deficiência", "inclusão", "adaptação",
-                "voz", "áudio", "visual", "motor", "cognitivo"
-            ]
-        }
-        
-        # Conta ocorrências por contexto
-        context_scores = {}
-        for context, keywords in context_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            if score > 0:
-                context_scores[context] = score
-        
         # Retorna contexto com maior pontuação
-        if context_scores:
-            return max(context_scores, key=context_scores.get)
-        
-        return ContextType.GENERAL
+        context = analyze_text(text).best('context')
+        return ContextType(context) if context else ContextType.GENERAL
     
     @classmethod
     def detect_context(cls, text: str) -> ContextType:
         """Detecta o tipo de contexto baseado no texto"""
-        text_lower = text.lower()
-        
-        # Palavras-chave por contexto
-        medical_keywords = [
-            'médico', 'saúde', 'doença', 'sintoma', 'tratamento',
-            'medicamento', 'hospital', 'doutor', 'enfermeiro',
-            'ferimento', 'dor', 'febre', 'parto', 'gravidez'
-        ]
-        
-        agricultural_keywords = [
-            'agricultura', 'plantio', 'colheita', 'sementes', 'solo',
-            'irrigação', 'fertilizante', 'praga', 'cultivo',
-            'mandioca', 'arroz', 'milho', 'horta', 'roça'
-        ]
-        
-        educational_keywords = [
-            'educação', 'ensino', 'escola', 'professor', 'aluno',
-            'aula', 'matemática', 'português', 'ciências',
-            'aprender', 'estudar', 'livro', 'material'
-        ]
-        
-        environmental_keywords = [
-            'ambiente', 'clima', 'tempo', 'chuva', 'seca',
-            'enchente', 'vento', 'temperatura', 'poluição'
-        ]
-        
-        # Verificar contexto
-        if any(keyword in text_lower for keyword in medical_keywords):
-            return ContextType.HEALTH
-        elif any(keyword in text_lower for keyword in agricultural_keywords):
-            return ContextType.AGRICULTURE
-        elif any(keyword in text_lower for keyword in educational_keywords):
-            return ContextType.EDUCATION
-        elif any(keyword in text_lower for keyword in environmental_keywords):
-            return ContextType.ENVIRONMENTAL
-        else:
-            return ContextType.GENERAL
+        context = analyze_text(text).first('context_basic')
+        return ContextType(context) if context else ContextType.GENERAL
     
     @classmethod
     def select_model(
@@ -412,11 +289,12 @@ class IntelligentModelSelector:
         device_quality = DeviceDetector.detect_device_quality(device_specs)
         
         # Detecta contexto e criticidade automaticamente se não fornecidos
-        if context is None and text:
-            context = cls.detect_context_from_text(text)
-        
-        if criticality is None and text:
-            criticality = cls.detect_criticality_from_text(text)
+        if text and (context is None or criticality is None):
+            detected_context, detected_criticality = cls.get_detector().detect(text)
+            if context is None:
+                context = detected_context
+            if criticality is None:
+                criticality = detected_criticality
         
         # Se ainda não detectou, usa padrões
         if context is None:
@@ -500,4 +378,89 @@ class IntelligentModelSelector:
     @classmethod
     def list_available_models(cls) -> Dict[str, Dict[str, Any]]:
         """Lista todos os modelos disponíveis"""
-        return {model: cls.get_model_info(model) for model in cls.MODELS.keys()}
\ No newline at end of file
+        return {model: cls.get_model_info(model) for model in cls.MODELS.keys()}
+
+
+class KeywordDetector:
+    """Detector padrão: palavras-chave de ``services.text_signals``"""
+    
+    name = "keywords"
+    
+    def detect(self, text: str) -> Tuple[ContextType, CriticalityLevel]:
+        return (
+            IntelligentModelSelector.detect_context_from_text(text),
+            IntelligentModelSelector.detect_criticality_from_text(text)
+        )
+    
+    def detect_batch(self, texts: List[str]) -> List[Tuple[ContextType, CriticalityLevel]]:
+        return [self.detect(text) for text in texts]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {"detector": self.name}
+
+
+class ClassifierDetector:
+    """Classificador de n-gramas com fallback para palavras-chave abaixo do limiar de confiança"""
+    
+    name = "classifier"
+    
+    def __init__(self, path: str, threshold: float = 0.6, fallback: Optional[KeywordDetector] = None):
+        self.path = path
+        self.threshold = threshold
+        self.fallback = fallback or KeywordDetector()
+        self._classifier = None
+        self._load_failed = False
+        self._lock = threading.Lock()
+        self._stats = {"classified": 0, "context_fallbacks": 0, "criticality_fallbacks": 0}
+    
+    def _get_classifier(self):
+        """Carregar o artefato na primeira chamada; falhas desativam o classificador"""
+        if self._classifier is None and not self._load_failed:
+            with self._lock:
+                if self._classifier is None and not self._load_failed:
+                    try:
+                        from .routing_classifier import RoutingClassifier
+                        self._classifier = RoutingClassifier.load(self.path)
+                    except Exception as e:
+                        self._load_failed = True
+                        logger.warning(f"Classificador de roteamento indisponível ({e}), usando palavras-chave")
+        return self._classifier
+    
+    def detect(self, text: str) -> Tuple[ContextType, CriticalityLevel]:
+        return self.detect_batch([text])[0]
+    
+    def detect_batch(self, texts: List[str]) -> List[Tuple[ContextType, CriticalityLevel]]:
+        classifier = self._get_classifier()
+        if classifier is None:
+            return self.fallback.detect_batch(texts)
+        
+        results = []
+        for text, prediction in zip(texts, classifier.predict(texts)):
+            keywords = None
+            if prediction.context_confidence >= self.threshold:
+                context = ContextType(prediction.context)
+            else:
+                keywords = self.fallback.detect(text)
+                context = keywords[0]
+                self._stats["context_fallbacks"] += 1
+            if prediction.criticality_confidence >= self.threshold:
+                criticality = CriticalityLevel(prediction.criticality)
+            else:
+                criticality = (keywords or self.fallback.detect(text))[1]
+                self._stats["criticality_fallbacks"] += 1
+            results.append((context, criticality))
+        self._stats["classified"] += len(texts)
+        return results
+    
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats.update({
+            "detector": self.name,
+            "path": self.path,
+            "threshold": self.threshold,
+            "loaded": self._classifier is not None,
+            "load_failed": self._load_failed
+        })
+        if self._classifier is not None:
+            stats["model"] = self._classifier.describe()
+        return stats
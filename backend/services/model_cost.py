@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfis de custo medidos por modelo e seleção com orçamento de latência
+Hackathon Gemma 3n
+
+Os seletores escolhem o modelo por limiares fixos de RAM e núcleos e
+nunca olham quão rápido cada modelo de fato roda nesta máquina, sob a
+carga atual. Cada resposta do Ollama traz ``prompt_eval_count``/
+``prompt_eval_duration``, ``eval_count``/``eval_duration``,
+``load_duration`` e ``total_duration``; com eles o ``ModelCostModel``
+mantém, por modelo, médias móveis exponenciais de tokens/s na leitura do
+prompt e na geração, do custo fixo por chamada e do carregamento a frio,
+junto com a profundidade da fila no momento da chamada.
+
+A latência prevista de uma requisição é a espera na fila do agendador
+mais o custo fixo, a leitura do prompt e a geração do tamanho de saída
+esperado para o endpoint (média medida, limitada por ``num_predict``).
+``choose`` percorre os candidatos na ordem de preferência e fica com o
+primeiro que cabe no orçamento; se nenhum couber, com o mais rápido.
+Modelos ainda sem medições são aceitos (a primeira chamada os mede).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+# Peso da observação mais recente nas médias móveis
+EWMA_ALPHA = 0.2
+# Tamanho de saída assumido para endpoints sem histórico
+DEFAULT_OUTPUT_TOKENS = 256
+# Caracteres por token até a primeira medição da leitura do prompt
+DEFAULT_CHARS_PER_TOKEN = 4.0
+# Carregamento acima disto é contado como partida a frio, não como custo fixo
+COLD_LOAD_SECONDS = 1.0
+# Observações recentes guardadas por modelo (diagnóstico em get_stats)
+RECENT_SAMPLES = 20
+
+_NS = 1e9
+
+
+def _ewma(current: Optional[float], value: float) -> float:
+    return value if current is None else (1 - EWMA_ALPHA) * current + EWMA_ALPHA * value
+
+
+@dataclass(frozen=True)
+class LatencyEstimate:
+    """Latência prevista de uma geração, por etapa (segundos)"""
+
+    model: str
+    queue_s: float
+    overhead_s: float
+    prompt_s: float
+    generation_s: float
+    output_tokens: int
+    samples: int
+
+    @property
+    def total_s(self) -> float:
+        return self.queue_s + self.overhead_s + self.prompt_s + self.generation_s
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'model': self.model,
+            'total_s': round(self.total_s, 2),
+            'queue_s': round(self.queue_s, 2),
+            'overhead_s': round(self.overhead_s, 2),
+            'prompt_s': round(self.prompt_s, 2),
+            'generation_s': round(self.generation_s, 2),
+            'output_tokens': self.output_tokens,
+            'samples': self.samples
+        }
+
+
+class _ModelProfile:
+    """Médias móveis medidas de um modelo (alterar só com o lock do ``ModelCostModel``)"""
+
+    __slots__ = ('prompt_tps', 'eval_tps', 'overhead_s', 'cold_load_s', 'samples', 'cold_loads', 'recent')
+
+    def __init__(self):
+        self.prompt_tps: Optional[float] = None
+        self.eval_tps: Optional[float] = None
+        self.overhead_s: Optional[float] = None
+        self.cold_load_s: Optional[float] = None
+        self.samples = 0
+        self.cold_loads = 0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+
+class ModelCostModel:
+    """Custo medido de cada modelo do Ollama e previsão de latência por requisição"""
+
+    def __init__(self, default_output_tokens: int = DEFAULT_OUTPUT_TOKENS):
+        self.logger = logging.getLogger(__name__)
+        self.default_output_tokens = default_output_tokens
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, _ModelProfile] = {}
+        self._output_tokens: Dict[str, float] = {}     # endpoint -> tokens gerados (média)
+        self._global_output_tokens: Optional[float] = None
+        self._chars_per_token: Optional[float] = None
+        self._decisions = {'kept': 0, 'downgraded': 0, 'over_budget': 0}
+
+    # ----- Medições -----
+
+    def record(
+        self,
+        model: str,
+        stats: Mapping[str, Any],
+        queue_depth: int = 0,
+        prompt_chars: int = 0,
+        endpoint: str = 'internal'
+    ) -> bool:
+        """Registrar os contadores de uma resposta do Ollama; retorna False se não houver medições"""
+        eval_count = stats.get('eval_count') or 0
+        eval_duration = (stats.get('eval_duration') or 0) / _NS
+        if not eval_count or eval_duration <= 0:
+            return False
+
+        prompt_count = stats.get('prompt_eval_count') or 0
+        prompt_duration = (stats.get('prompt_eval_duration') or 0) / _NS
+        load_duration = (stats.get('load_duration') or 0) / _NS
+        total_duration = (stats.get('total_duration') or 0) / _NS
+        eval_tps = eval_count / eval_duration
+
+        with self._lock:
+            profile = self._profiles.setdefault(model, _ModelProfile())
+            profile.eval_tps = _ewma(profile.eval_tps, eval_tps)
+            if prompt_count and prompt_duration > 0:
+                profile.prompt_tps = _ewma(profile.prompt_tps, prompt_count / prompt_duration)
+                if prompt_chars:
+                    self._chars_per_token = _ewma(self._chars_per_token, prompt_chars / prompt_count)
+            if load_duration > COLD_LOAD_SECONDS:
+                profile.cold_load_s = _ewma(profile.cold_load_s, load_duration)
+                profile.cold_loads += 1
+            elif total_duration:
+                overhead = max(0.0, total_duration - prompt_duration - eval_duration)
+                profile.overhead_s = _ewma(profile.overhead_s, overhead)
+            profile.samples += 1
+            profile.recent.append((time.time(), round(eval_tps, 2), queue_depth))
+
+            self._output_tokens[endpoint] = _ewma(self._output_tokens.get(endpoint), eval_count)
+            self._global_output_tokens = _ewma(self._global_output_tokens, eval_count)
+        return True
+
+    # ----- Previsão -----
+
+    def expected_output_tokens(self, endpoint: str, max_tokens: Optional[int] = None) -> int:
+        """Tamanho de saída esperado: média do endpoint, do processo ou o padrão (limitado por ``max_tokens``)"""
+        expected = self._output_tokens.get(endpoint) or self._global_output_tokens or self.default_output_tokens
+        if max_tokens:
+            expected = min(expected, max_tokens)
+        return max(1, int(round(expected)))
+
+    def predict(
+        self,
+        model: str,
+        prompt_chars: int,
+        max_tokens: Optional[int] = None,
+        endpoint: str = 'internal',
+        queue_wait_s: float = 0.0
+    ) -> Optional[LatencyEstimate]:
+        """Latência prevista de uma chamada a ``model`` (None se o modelo ainda não foi medido)"""
+        profile = self._profiles.get(model)
+        if profile is None or profile.eval_tps is None:
+            return None
+
+        output_tokens = self.expected_output_tokens(endpoint, max_tokens)
+        prompt_tokens = prompt_chars / (self._chars_per_token or DEFAULT_CHARS_PER_TOKEN)
+        return LatencyEstimate(
+            model=model,
+            queue_s=queue_wait_s,
+            overhead_s=profile.overhead_s or 0.0,
+            prompt_s=prompt_tokens / profile.prompt_tps if profile.prompt_tps else 0.0,
+            generation_s=output_tokens / profile.eval_tps,
+            output_tokens=output_tokens,
+            samples=profile.samples
+        )
+
+    def choose(
+        self,
+        candidates: Sequence[str],
+        budget_s: float,
+        prompt_chars: int,
+        max_tokens: Optional[int] = None,
+        endpoint: str = 'internal',
+        queue_wait_s: float = 0.0
+    ) -> Tuple[str, Optional[LatencyEstimate]]:
+        """Primeiro candidato (ordem de preferência) que cabe no orçamento; senão, o mais rápido"""
+        fastest: Optional[LatencyEstimate] = None
+        for model in candidates:
+            estimate = self.predict(model, prompt_chars, max_tokens, endpoint, queue_wait_s)
+            if estimate is None or estimate.total_s <= budget_s:
+                self._count('kept' if model == candidates[0] else 'downgraded')
+                return model, estimate
+            if fastest is None or estimate.total_s < fastest.total_s:
+                fastest = estimate
+
+        self._count('over_budget')
+        self.logger.warning(
+            f"⏱️ Nenhum modelo cabe em {budget_s:.1f}s ({endpoint}); "
+            f"usando o mais rápido: {fastest.model} (~{fastest.total_s:.1f}s)"
+        )
+        return fastest.model, fastest
+
+    def _count(self, decision: str) -> None:
+        with self._lock:
+            self._decisions[decision] += 1
+
+    # ----- Métricas -----
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {
+                model: {
+                    'samples': profile.samples,
+                    'eval_tokens_per_s': round(profile.eval_tps, 2) if profile.eval_tps else None,
+                    'prompt_tokens_per_s': round(profile.prompt_tps, 2) if profile.prompt_tps else None,
+                    'overhead_s': round(profile.overhead_s, 3) if profile.overhead_s is not None else None,
+                    'cold_load_s': round(profile.cold_load_s, 2) if profile.cold_load_s else None,
+                    'cold_loads': profile.cold_loads,
+                    'recent': [
+                        {'at': at, 'eval_tokens_per_s': tps, 'queue_depth': depth}
+                        for at, tps, depth in profile.recent
+                    ]
+                }
+                for model, profile in self._profiles.items()
+            }
+            return {
+                'models': models,
+                'expected_output_tokens': {
+                    endpoint: round(tokens) for endpoint, tokens in self._output_tokens.items()
+                },
+                'chars_per_token': round(self._chars_per_token, 2) if self._chars_per_token else None,
+                'decisions': dict(self._decisions)
+            }
+
+
+_cost_model: Optional[ModelCostModel] = None
+_cost_model_lock = threading.Lock()
+
+
+def get_model_cost_model() -> ModelCostModel:
+    """Obter o modelo de custo compartilhado do processo"""
+    global _cost_model
+    if _cost_model is None:
+        with _cost_model_lock:
+            if _cost_model is None:
+                _cost_model = ModelCostModel()
+    return _cost_model
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Decisão de roteamento por requisição
+Hackathon Gemma 3n
+
+O modelo, as opções de geração, o backend e a cadeia de modelos
+alternativos são resolvidos uma única vez no início da requisição e
+passados por todo o caminho de geração. Nada é gravado em
+``BackendConfig`` ou no serviço, então requisições concorrentes podem
+usar modelos diferentes (e2b e e4b lado a lado) sem locks.
+"""
+
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+BACKEND_OLLAMA = 'ollama'
+BACKEND_LOCAL = 'local'
+BACKEND_FALLBACK = 'fallback'
+
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    """Roteamento imutável de uma geração"""
+
+    model: str                                # modelo que atenderá (Ollama ou local)
+    backend: str                              # 'ollama', 'local' ou 'fallback'
+    options: Mapping[str, Any]                # opções de geração já resolvidas
+    fallback_chain: Tuple[str, ...] = ()      # modelos Ollama alternativos, em ordem
+    selected_model: str = ''                  # chave escolhida pelo seletor inteligente
+    domain: str = 'general'
+    endpoint: str = 'internal'                # endpoint de origem (métricas)
+    draft_model: Optional[str] = None         # modelo do rascunho em modo cascata
+    draft_options: Mapping[str, Any] = field(default_factory=dict)
+    model_config: Optional[Any] = field(default=None, compare=False, repr=False)
+    predicted_latency_s: Optional[float] = None  # previsão do modelo de custo (None sem medições)
+    response_format: Optional[Dict[str, Any]] = field(default=None, compare=False)  # esquema JSON (``format`` do Ollama)
+
+    def __post_init__(self):
+        # Cópia somente leitura: quem recebe a decisão não consegue alterá-la
+        object.__setattr__(self, 'options', MappingProxyType(dict(self.options)))
+        object.__setattr__(self, 'draft_options', MappingProxyType(dict(self.draft_options)))
+        object.__setattr__(self, 'fallback_chain', tuple(self.fallback_chain))
+
+    @property
+    def candidates(self) -> Tuple[str, ...]:
+        """Modelo principal seguido da cadeia de alternativas"""
+        return (self.model,) + self.fallback_chain
+
+    @property
+    def cascade(self) -> bool:
+        return self.draft_model is not None
+
+    def draft(self) -> 'RoutingDecision':
+        """Decisão do rascunho: modelo menor, sem cadeia de fallback nem nova cascata"""
+        return replace(self, model=self.draft_model, options=self.draft_options,
+                       fallback_chain=(), draft_model=None, draft_options={})
+
+    def with_model(self, model: str) -> 'RoutingDecision':
+        """Nova decisão servida por ``model`` (o restante da cadeia é mantido)"""
+        chain = tuple(m for m in self.candidates if m != model)
+        return replace(self, model=model, fallback_chain=chain)
+
+    def cache_params(self) -> Dict[str, Any]:
+        """Opções que distinguem a geração (chave do cache e do single-flight)"""
+        params = dict(self.options)
+        if self.response_format is not None:
+            params['format'] = self.response_format
+        return params
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {
+            'model': self.model,
+            'backend': self.backend,
+            'selected_model': self.selected_model,
+            'domain': self.domain,
+            'fallback_chain': list(self.fallback_chain),
+            'draft_model': self.draft_model,
+            'predicted_latency_s': self.predicted_latency_s,
+            'structured': self.response_format is not None,
+            'options': dict(self.options)
+        }
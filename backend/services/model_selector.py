@@ -1,11 +1,11 @@
 import os
-import psutil
-import torch
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import logging
 
+from .resource_monitor import get_resource_monitor
+
 logger = logging.getLogger(__name__)
 
 class ModelSize(Enum):
@@ -115,32 +115,24 @@ class ModelSelector:
     
     @classmethod
     def get_system_resources(cls) -> SystemResources:
-        """Detecta recursos do sistema disponíveis"""
-        # Memória RAM
-        memory = psutil.virtual_memory()
-        total_ram_gb = memory.total / (1024**3)
-        available_ram_gb = memory.available / (1024**3)
-        
-        # CPU
-        cpu_cores = psutil.cpu_count(logical=True)
-        
-        # GPU
-        has_cuda = torch.cuda.is_available()
-        gpu_memory_gb = 0.0
-        
-        if has_cuda:
-            try:
-                gpu_memory_gb = torch.cuda.get_device_properties(0).total_memory / (1024**3)
-            except Exception as e:
-                logger.warning(f"Erro ao detectar memória GPU: {e}")
-                gpu_memory_gb = 0.0
+        """Detecta recursos do sistema disponíveis (snapshot do monitor de recursos)"""
+        snapshot = get_resource_monitor().snapshot()
+        if snapshot is None:
+            logger.warning("Recursos do sistema indisponíveis; assumindo configuração mínima")
+            return SystemResources(
+                total_ram_gb=1.0,
+                available_ram_gb=1.0,
+                gpu_memory_gb=0.0,
+                cpu_cores=1,
+                has_cuda=False
+            )
         
         return SystemResources(
-            total_ram_gb=total_ram_gb,
-            available_ram_gb=available_ram_gb,
-            gpu_memory_gb=gpu_memory_gb,
-            cpu_cores=cpu_cores,
-            has_cuda=has_cuda
+            total_ram_gb=snapshot.ram_total_gb,
+            available_ram_gb=snapshot.ram_available_gb,
+            gpu_memory_gb=snapshot.gpu_memory_gb,
+            cpu_cores=snapshot.cpu_count_logical,
+            has_cuda=snapshot.has_cuda
         )
     
     @classmethod
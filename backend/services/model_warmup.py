@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Aquecimento e keep-alive dos modelos críticos do Ollama
+Hackathon Gemma 3n
+
+Depois de um período ocioso o Ollama descarrega o modelo, e o primeiro
+pedido de emergência paga o carregamento completo do gemma3n:e4b. Este
+gerenciador pré-carrega, em segundo plano, os modelos usados em contextos
+CRITICAL e HIGH com uma geração mínima e repete o aquecimento
+periodicamente, antes que o ``keep_alive`` expire.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from config.settings import BackendConfig
+
+from .intelligent_model_selector import CriticalityLevel, IntelligentModelSelector
+from .ollama_client import OllamaClient, get_ollama_client
+from .ollama_inventory import OllamaModelInventory, get_ollama_inventory
+
+# Criticidades cujos modelos devem ficar sempre carregados
+WARM_CRITICALITIES = (CriticalityLevel.CRITICAL, CriticalityLevel.HIGH)
+
+
+def critical_models() -> List[str]:
+    """Modelos Ollama marcados para contextos CRITICAL e HIGH no seletor inteligente"""
+    return [
+        config.ollama_model
+        for config in IntelligentModelSelector.MODELS.values()
+        if config.criticality_threshold in WARM_CRITICALITIES
+    ]
+
+
+class ModelWarmupManager:
+    """Pré-carrega modelos no Ollama e mantém o estado quente/frio de cada um"""
+
+    def __init__(
+        self,
+        client: OllamaClient,
+        inventory: OllamaModelInventory,
+        models: Optional[List[str]] = None,
+        keep_alive: str = "10m",
+        interval: float = 240.0,
+        timeout: float = 600.0
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.client = client
+        self.inventory = inventory
+        self.models = list(models if models is not None else critical_models())
+        self.keep_alive = keep_alive
+        self.interval = max(10.0, interval)
+        self.timeout = timeout
+
+        self._state: Dict[str, Dict[str, Any]] = {
+            model: {'state': 'cold', 'last_warmed': None, 'load_ms': None, 'error': None}
+            for model in self.models
+        }
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._cycles = 0
+        self._started_at: Optional[float] = None
+        self._ready_at: Optional[float] = None
+
+    # ----- Ciclo de vida -----
+
+    def start(self) -> None:
+        """Iniciar o aquecimento em segundo plano (não bloqueia a inicialização)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+        self._thread.start()
+        self.logger.info(f"🔥 Aquecimento de modelos iniciado: {', '.join(self.models) or 'nenhum'}")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    @property
+    def ready(self) -> bool:
+        """Verdadeiro após a primeira rodada de aquecimento (com ou sem sucesso)"""
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def _run(self) -> None:
+        try:
+            self.warm_all()
+        finally:
+            self._ready_at = time.time()
+            self._ready.set()
+        while not self._stop.wait(self.interval):
+            self.warm_all()
+
+    # ----- Aquecimento -----
+
+    def warm_all(self) -> None:
+        self._cycles += 1
+        loaded = self._loaded_models()
+        for model in self.models:
+            if self._stop.is_set():
+                return
+            if self.inventory.is_loaded and self.inventory.snapshot.reachable and not self.inventory.has_model(model):
+                self._set_state(model, 'missing', error='modelo não instalado no Ollama')
+                continue
+            self.warm(model, already_loaded=model in loaded)
+
+    def warm(self, model: str, already_loaded: bool = False) -> bool:
+        """Gerar um único token para carregar o modelo e renovar o keep_alive"""
+        if not already_loaded:
+            self._set_state(model, 'warming')
+        started = time.monotonic()
+        try:
+            response = self.client.post(
+                "/api/generate",
+                json={
+                    "model": model,
+                    "prompt": "ok",
+                    "stream": False,
+                    "keep_alive": self.keep_alive,
+                    "options": {"num_predict": 1}
+                },
+                timeout=self.timeout
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+            load_ms = (response.json().get('load_duration') or 0) / 1e6
+            self._set_state(model, 'warm', load_ms=round(load_ms, 1), last_warmed=time.time())
+            if not already_loaded:
+                self.logger.info(f"🔥 Modelo {model} aquecido em {time.monotonic() - started:.1f}s")
+            return True
+        except Exception as e:
+            self._set_state(model, 'cold', error=str(e))
+            self.logger.warning(f"⚠️ Falha ao aquecer modelo {model}: {e}")
+            return False
+
+    def _loaded_models(self) -> List[str]:
+        """Modelos atualmente carregados na memória do Ollama (/api/ps)"""
+        try:
+            response = self.client.get("/api/ps", timeout=BackendConfig.OLLAMA_PROBE_TIMEOUT, retries=0)
+            if response.status_code == 200:
+                return [m.get('name') or m.get('model', '') for m in response.json().get('models', [])]
+        except Exception as e:
+            self.logger.debug(f"Não foi possível consultar /api/ps: {e}")
+        return []
+
+    def _set_state(self, model: str, state: str, **fields) -> None:
+        with self._lock:
+            entry = self._state.setdefault(
+                model, {'state': 'cold', 'last_warmed': None, 'load_ms': None, 'error': None}
+            )
+            entry['state'] = state
+            entry['error'] = fields.pop('error', None)
+            entry.update(fields)
+
+    # ----- Estado -----
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            models = {}
+            for model, entry in self._state.items():
+                last = entry['last_warmed']
+                models[model] = {
+                    **entry,
+                    'seconds_since_warm': round(now - last, 1) if last else None
+                }
+        return {
+            'started': self._started_at is not None,
+            'ready': self.ready,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'keep_alive': self.keep_alive,
+            'interval_seconds': self.interval,
+            'cycles': self._cycles,
+            'warmup_seconds': round(self._ready_at - self._started_at, 1)
+            if self._ready_at and self._started_at else None,
+            'models': models
+        }
+
+
+_warmup: Optional[ModelWarmupManager] = None
+_warmup_lock = threading.Lock()
+
+
+def get_model_warmup() -> ModelWarmupManager:
+    """Obter o gerenciador de aquecimento compartilhado do processo"""
+    global _warmup
+    if _warmup is None:
+        with _warmup_lock:
+            if _warmup is None:
+                _warmup = ModelWarmupManager(
+                    client=get_ollama_client(),
+                    inventory=get_ollama_inventory(),
+                    keep_alive=BackendConfig.OLLAMA_KEEP_ALIVE,
+                    interval=BackendConfig.MODEL_WARMUP_INTERVAL,
+                    timeout=BackendConfig.MODEL_WARMUP_TIMEOUT
+                )
+    return _warmup
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cliente assíncrono para o Ollama
+Hackathon Gemma 3n
+
+Versão asyncio do OllamaClient, com um pool de conexões keep-alive
+compartilhado (httpx). Deve ser usado apenas dentro do loop do
+AsyncRuntime, ao qual o cliente HTTP fica vinculado.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+
+from config.settings import BackendConfig
+
+from .request_deadline import DeadlineExceeded, clamp_timeout, current_deadline
+
+
+class AsyncOllamaClient:
+    """Cliente httpx.AsyncClient com pool limitado para o Ollama"""
+
+    def __init__(
+        self,
+        host: str,
+        pool_size: int = 8,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 300
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.host = host.rstrip('/')
+        self.pool_size = max(1, pool_size)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._requests = 0
+        self._errors = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Criado sob demanda, já dentro do loop que vai usá-lo
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.host,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size
+                ),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+            )
+        return self._client
+
+    def _timeout(self, read_timeout: Optional[float]) -> httpx.Timeout:
+        # Limitado ao prazo da requisição (a ContextVar acompanha a corrotina)
+        return httpx.Timeout(
+            clamp_timeout(read_timeout if read_timeout is not None else self.read_timeout),
+            connect=self.connect_timeout
+        )
+
+    async def _send(self, method: str, path: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        self._in_flight += 1
+        self._requests += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            return await self._get_client().request(method, path, timeout=self._timeout(timeout), **kwargs)
+        except httpx.HTTPError as e:
+            self._errors += 1
+            deadline = current_deadline()
+            if isinstance(e, httpx.TimeoutException) and deadline is not None and deadline.expired:
+                raise DeadlineExceeded(deadline.reason or 'prazo da requisição esgotado') from e
+            raise
+        finally:
+            self._in_flight -= 1
+
+    async def get(self, path: str, timeout: Optional[float] = None) -> httpx.Response:
+        return await self._send('GET', path, timeout)
+
+    async def post(self, path: str, json: Optional[Dict[str, Any]] = None,
+                   timeout: Optional[float] = None) -> httpx.Response:
+        return await self._send('POST', path, timeout, json=json)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'host': self.host,
+            'pool_size': self.pool_size,
+            'in_flight': self._in_flight,
+            'peak_in_flight': self._peak_in_flight,
+            'requests': self._requests,
+            'errors': self._errors
+        }
+
+
+_client: Optional[AsyncOllamaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_async_ollama_client() -> AsyncOllamaClient:
+    """Obter o cliente assíncrono compartilhado do processo"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = AsyncOllamaClient(
+                    host=BackendConfig.OLLAMA_HOST,
+                    pool_size=BackendConfig.OLLAMA_POOL_SIZE,
+                    connect_timeout=BackendConfig.OLLAMA_CONNECT_TIMEOUT,
+                    read_timeout=BackendConfig.OLLAMA_TIMEOUT
+                )
+    return _client
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cliente HTTP compartilhado para o Ollama
+Hackathon Gemma 3n
+
+Mantém um pool limitado de conexões keep-alive com o Ollama, com timeouts
+separados de conexão e leitura, e novas tentativas com backoff apenas para
+as consultas idempotentes (GET).
+"""
+
+import json as jsonlib
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .request_deadline import DeadlineExceeded, check_deadline, clamp_timeout, current_deadline
+
+from config.settings import BackendConfig
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class OllamaResponseError(Exception):
+    """Resposta HTTP de erro do Ollama (4xx: problema do modelo/pedido; 5xx: do servidor)"""
+
+    def __init__(self, status_code: int, body: str = ''):
+        super().__init__(f"Ollama retornou status {status_code}: {body}")
+        self.status_code = status_code
+        self.body = body
+
+
+class OllamaClient:
+    """Cliente HTTP com pool de conexões keep-alive para o Ollama"""
+
+    def __init__(
+        self,
+        host: str,
+        pool_size: int = 8,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 300,
+        probe_timeout: float = 5,
+        probe_retries: int = 2,
+        backoff_factor: float = 0.25
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.host = host.rstrip('/')
+        self.pool_size = max(1, pool_size)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.probe_timeout = probe_timeout
+        self.probe_retries = probe_retries
+        self.backoff_factor = backoff_factor
+
+        # pool_block=True: com o pool esgotado a requisição espera por uma
+        # conexão livre em vez de abrir (e descartar) conexões extras
+        self._adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            pool_block=True,
+            max_retries=0
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+        self.session.headers.update({'Connection': 'keep-alive'})
+
+        # Contabilidade do pool (em uso / esperas)
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._stats_lock = threading.Lock()
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._waits = 0
+        self._total_wait_time = 0.0
+        self._requests = 0
+        self._errors = 0
+        self._retries = 0
+
+    def _url(self, path: str) -> str:
+        return f"{self.host}/{path.lstrip('/')}"
+
+    def _timeout(self, read_timeout: Optional[float]) -> Tuple[float, float]:
+        # Limitado ao prazo da requisição atual (se houver)
+        read_timeout = clamp_timeout(read_timeout if read_timeout is not None else self.read_timeout)
+        return (self.connect_timeout, read_timeout)
+
+    @staticmethod
+    def _deadline_error(error: Exception) -> Optional[DeadlineExceeded]:
+        """Timeout causado pelo prazo da requisição (e não por lentidão do Ollama)"""
+        deadline = current_deadline()
+        if isinstance(error, requests.Timeout) and deadline is not None and deadline.expired:
+            return DeadlineExceeded(deadline.reason or 'prazo da requisição esgotado')
+        return None
+
+    def _acquire(self) -> None:
+        """Reservar um slot do pool, contabilizando as esperas"""
+        if not self._slots.acquire(blocking=False):
+            wait_start = time.monotonic()
+            self._slots.acquire()
+            with self._stats_lock:
+                self._waits += 1
+                self._total_wait_time += time.monotonic() - wait_start
+        with self._stats_lock:
+            self._in_use += 1
+            self._requests += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+    def _release(self) -> None:
+        with self._stats_lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    def _send(self, method: str, path: str, timeout: Tuple[float, float], **kwargs) -> requests.Response:
+        self._acquire()
+        try:
+            return self.session.request(method, self._url(path), timeout=timeout, **kwargs)
+        except requests.RequestException as e:
+            with self._stats_lock:
+                self._errors += 1
+            deadline_error = self._deadline_error(e)
+            if deadline_error is not None:
+                raise deadline_error from e
+            raise
+        finally:
+            self._release()
+
+    def get(self, path: str, timeout: Optional[float] = None, retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """GET idempotente (ex.: /api/tags) com novas tentativas e backoff exponencial"""
+        attempts = 1 + (self.probe_retries if retries is None else retries)
+        read_timeout = timeout if timeout is not None else self.probe_timeout
+
+        for attempt in range(attempts):
+            try:
+                response = self._send('GET', path, self._timeout(read_timeout), **kwargs)
+                if response.status_code < 500 or attempt == attempts - 1:
+                    return response
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == attempts - 1:
+                    raise
+
+            with self._stats_lock:
+                self._retries += 1
+            time.sleep(self.backoff_factor * (2 ** attempt))
+
+        raise requests.ConnectionError(f"Ollama indisponível em {self.host}")  # pragma: no cover
+
+    def post(self, path: str, json: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+             **kwargs) -> requests.Response:
+        """POST de geração (não idempotente): nunca repetido automaticamente"""
+        return self._send('POST', path, self._timeout(timeout), json=json, **kwargs)
+
+    def stream(self, path: str, json: Optional[Dict[str, Any]] = None,
+               timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """POST em modo stream: produz cada objeto NDJSON assim que chega
+
+        O slot do pool fica reservado até o fim da iteração (ou até o
+        consumidor abandonar o gerador), pois a conexão só é devolvida ao
+        urllib3 quando o corpo termina de ser lido. Com o prazo esgotado ou a
+        requisição cancelada a conexão é fechada, e o Ollama interrompe a geração.
+        """
+        request_timeout = self._timeout(timeout)
+        self._acquire()
+        response = None
+        try:
+            response = self.session.post(self._url(path), json=json, timeout=request_timeout, stream=True)
+            if response.status_code != 200:
+                # Mesmo erro das chamadas bloqueantes: 4xx não conta contra o disjuntor do backend
+                raise OllamaResponseError(response.status_code, response.text)
+            for line in response.iter_lines():
+                check_deadline()
+                if line:
+                    yield jsonlib.loads(line)
+        except requests.RequestException as e:
+            with self._stats_lock:
+                self._errors += 1
+            deadline_error = self._deadline_error(e)
+            if deadline_error is not None:
+                raise deadline_error from e
+            raise
+        finally:
+            if response is not None:
+                response.close()
+            self._release()
+
+    def delete(self, path: str, json: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+               **kwargs) -> requests.Response:
+        """DELETE (ex.: /api/delete para remover um modelo)"""
+        return self._send('DELETE', path, self._timeout(timeout), json=json, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do pool para o endpoint de saúde"""
+        connections_opened = 0
+        pool_requests = 0
+        try:
+            pool = self._adapter.poolmanager.connection_from_url(self.host)
+            connections_opened = pool.num_connections
+            pool_requests = pool.num_requests
+        except Exception as e:
+            self.logger.debug(f"Estatísticas do urllib3 indisponíveis: {e}")
+
+        with self._stats_lock:
+            reuse_rate = 0.0
+            if pool_requests:
+                reuse_rate = max(0.0, 1 - connections_opened / pool_requests)
+            return {
+                'host': self.host,
+                'pool_size': self.pool_size,
+                'in_use': self._in_use,
+                'peak_in_use': self._peak_in_use,
+                'requests': self._requests,
+                'waits': self._waits,
+                'avg_wait_ms': round(self._total_wait_time / self._waits * 1000, 2) if self._waits else 0.0,
+                'connections_opened': connections_opened,
+                'reuse_rate': round(reuse_rate, 3),
+                'retries': self._retries,
+                'errors': self._errors,
+                'timeouts': {
+                    'connect': self.connect_timeout,
+                    'read': self.read_timeout,
+                    'probe': self.probe_timeout
+                }
+            }
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: Optional[OllamaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_ollama_client() -> OllamaClient:
+    """Obter o cliente Ollama compartilhado do processo"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaClient(
+                    host=BackendConfig.OLLAMA_HOST,
+                    pool_size=BackendConfig.OLLAMA_POOL_SIZE,
+                    connect_timeout=BackendConfig.OLLAMA_CONNECT_TIMEOUT,
+                    read_timeout=BackendConfig.OLLAMA_TIMEOUT,
+                    probe_timeout=BackendConfig.OLLAMA_PROBE_TIMEOUT,
+                    probe_retries=BackendConfig.OLLAMA_PROBE_RETRIES,
+                    backoff_factor=BackendConfig.OLLAMA_RETRY_BACKOFF
+                )
+    return _client
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inventário de modelos do Ollama
+Hackathon Gemma 3n
+
+Mantém em memória a lista de modelos instalados no Ollama (tamanho e
+capacidades), atualizada em segundo plano com um TTL curto e invalidada
+após pull/delete. As consultas feitas no caminho da requisição leem apenas
+o snapshot em memória e nunca fazem uma chamada de rede.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from config.settings import BackendConfig
+
+from .ollama_client import OllamaClient, get_ollama_client
+
+
+@dataclass(frozen=True)
+class OllamaModelInfo:
+    """Metadados de um modelo instalado no Ollama"""
+    name: str
+    size_bytes: int = 0
+    family: str = ""
+    parameter_size: str = ""
+    quantization_level: str = ""
+    capabilities: tuple = ("text",)
+
+    @property
+    def size_gb(self) -> float:
+        return round(self.size_bytes / (1024 ** 3), 2)
+
+    @property
+    def supports_vision(self) -> bool:
+        return "vision" in self.capabilities
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'size_gb': self.size_gb,
+            'family': self.family,
+            'parameter_size': self.parameter_size,
+            'quantization_level': self.quantization_level,
+            'capabilities': list(self.capabilities)
+        }
+
+
+@dataclass(frozen=True)
+class InventorySnapshot:
+    """Fotografia imutável do inventário (substituída atomicamente a cada atualização)"""
+    models: Dict[str, OllamaModelInfo] = field(default_factory=dict)
+    fetched_at: float = 0.0
+    reachable: bool = False
+
+
+class OllamaModelInventory:
+    """Inventário de modelos do Ollama com atualização em segundo plano"""
+
+    # Famílias/nomes que indicam suporte a imagens
+    VISION_FAMILIES = {'clip', 'mllama', 'llava'}
+    VISION_NAME_HINTS = ('llava', 'vision', 'moondream', 'minicpm-v', 'gemma3:')
+
+    def __init__(self, client: OllamaClient, ttl: float = 30.0):
+        self.logger = logging.getLogger(__name__)
+        self.client = client
+        self.ttl = max(1.0, ttl)
+        self._snapshot = InventorySnapshot()
+        self._refresh_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._refreshes = 0
+        self._failures = 0
+        self._invalidations = 0
+
+    # ----- Leitura (caminho da requisição: sem rede) -----
+
+    @property
+    def snapshot(self) -> InventorySnapshot:
+        return self._snapshot
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot.fetched_at > 0
+
+    @property
+    def age_seconds(self) -> Optional[float]:
+        if not self.is_loaded:
+            return None
+        return time.time() - self._snapshot.fetched_at
+
+    def model_names(self) -> List[str]:
+        return list(self._snapshot.models.keys())
+
+    def has_model(self, model_name: str) -> bool:
+        """Verificar se o modelo está instalado (apenas snapshot em memória)"""
+        return model_name in self._snapshot.models
+
+    def get_model(self, model_name: str) -> Optional[OllamaModelInfo]:
+        return self._snapshot.models.get(model_name)
+
+    def gemma3n_models(self) -> List[str]:
+        return [name for name in self._snapshot.models if "gemma3n" in name.lower()]
+
+    def vision_models(self) -> List[str]:
+        return [name for name, info in self._snapshot.models.items() if info.supports_vision]
+
+    # ----- Atualização -----
+
+    def refresh(self) -> bool:
+        """Consultar /api/tags e substituir o snapshot (bloqueante)"""
+        with self._refresh_lock:
+            try:
+                response = self.client.get("/api/tags")
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}")
+
+                models = {}
+                for raw in response.json().get('models', []):
+                    info = self._parse_model(raw)
+                    models[info.name] = info
+
+                self._snapshot = InventorySnapshot(models=models, fetched_at=time.time(), reachable=True)
+                self._refreshes += 1
+                self.logger.debug(f"📋 Inventário Ollama atualizado: {list(models.keys())}")
+                return True
+            except Exception as e:
+                self._failures += 1
+                # Mantém os modelos conhecidos, mas marca o Ollama como inacessível
+                self._snapshot = InventorySnapshot(
+                    models=self._snapshot.models,
+                    fetched_at=time.time(),
+                    reachable=False
+                )
+                self.logger.warning(f"⚠️ Falha ao atualizar inventário do Ollama: {e}")
+                return False
+
+    def invalidate(self) -> None:
+        """Pedir uma atualização imediata ao thread de fundo (sem bloquear)"""
+        self._invalidations += 1
+        if self._thread is not None and self._thread.is_alive():
+            self._wakeup.set()
+        else:
+            self.refresh()
+
+    def start(self) -> None:
+        """Iniciar o thread de atualização periódica (idempotente)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ollama-inventory", daemon=True)
+        self._thread.start()
+        self.logger.info(f"🔄 Inventário Ollama em segundo plano (TTL {self.ttl:.0f}s)")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        if not self.is_loaded:
+            self.refresh()
+        while not self._stop.is_set():
+            self._wakeup.wait(self.ttl)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            self.refresh()
+
+    # ----- Operações que alteram o inventário -----
+
+    def pull(self, model_name: str) -> Dict[str, Any]:
+        """Baixar um modelo no Ollama e invalidar o inventário"""
+        try:
+            response = self.client.post(
+                "/api/pull",
+                json={"model": model_name, "stream": False},
+                timeout=BackendConfig.OLLAMA_PULL_TIMEOUT
+            )
+            if response.status_code != 200:
+                return {'success': False, 'error': f"Ollama retornou HTTP {response.status_code}: {response.text}"}
+            return {'success': True, 'model': model_name, 'status': response.json().get('status', 'success')}
+        except Exception as e:
+            self.logger.error(f"❌ Erro ao baixar modelo {model_name}: {e}")
+            return {'success': False, 'error': str(e)}
+        finally:
+            self.invalidate()
+
+    def delete(self, model_name: str) -> Dict[str, Any]:
+        """Remover um modelo do Ollama e invalidar o inventário"""
+        try:
+            response = self.client.delete("/api/delete", json={"model": model_name})
+            if response.status_code != 200:
+                return {'success': False, 'error': f"Ollama retornou HTTP {response.status_code}: {response.text}"}
+            return {'success': True, 'model': model_name}
+        except Exception as e:
+            self.logger.error(f"❌ Erro ao remover modelo {model_name}: {e}")
+            return {'success': False, 'error': str(e)}
+        finally:
+            self.invalidate()
+
+    # ----- Auxiliares -----
+
+    @classmethod
+    def _parse_model(cls, raw: Dict[str, Any]) -> OllamaModelInfo:
+        details = raw.get('details') or {}
+        name = raw.get('name') or raw.get('model', '')
+        families = {f.lower() for f in (details.get('families') or [])}
+        family = (details.get('family') or '').lower()
+
+        capabilities = ["text"]
+        if families & cls.VISION_FAMILIES or family in cls.VISION_FAMILIES or \
+                any(hint in name.lower() for hint in cls.VISION_NAME_HINTS):
+            capabilities.append("vision")
+
+        return OllamaModelInfo(
+            name=name,
+            size_bytes=int(raw.get('size') or 0),
+            family=family,
+            parameter_size=details.get('parameter_size', ''),
+            quantization_level=details.get('quantization_level', ''),
+            capabilities=tuple(capabilities)
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        age = self.age_seconds
+        return {
+            'reachable': snapshot.reachable,
+            'loaded': self.is_loaded,
+            'age_seconds': round(age, 1) if age is not None else None,
+            'ttl_seconds': self.ttl,
+            'background_refresh': self._thread is not None and self._thread.is_alive(),
+            'models': [info.to_dict() for info in snapshot.models.values()],
+            'refreshes': self._refreshes,
+            'failures': self._failures,
+            'invalidations': self._invalidations
+        }
+
+
+_inventory: Optional[OllamaModelInventory] = None
+_inventory_lock = threading.Lock()
+
+
+def get_ollama_inventory() -> OllamaModelInventory:
+    """Obter o inventário de modelos compartilhado do processo"""
+    global _inventory
+    if _inventory is None:
+        with _inventory_lock:
+            if _inventory is None:
+                _inventory = OllamaModelInventory(
+                    client=get_ollama_client(),
+                    ttl=BackendConfig.OLLAMA_INVENTORY_TTL
+                )
+    return _inventory
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prazo e cancelamento por requisição
+Hackathon Gemma 3n
+
+Cada requisição recebe um ``Deadline`` (cabeçalho X-Request-Deadline, em
+segundos, ou o padrão do endpoint) guardado em uma ContextVar. O agendador
+de geração, os clientes HTTP do Ollama, os pipelines de várias etapas e a
+geração local consultam o prazo, de modo que uma requisição abandonada deixa
+de ocupar o modelo em vez de gerar por 300 s para ninguém.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from flask import Flask, g, has_request_context, jsonify, request
+
+from config.settings import BackendConfig
+
+
+class DeadlineExceeded(Exception):
+    """Prazo da requisição esgotado ou requisição cancelada"""
+
+    ERROR_CODE = 'deadline_exceeded'
+
+    def __init__(self, reason: str = 'prazo da requisição esgotado'):
+        super().__init__(reason)
+        self.reason = reason
+
+    def to_response(self) -> Dict[str, Any]:
+        """Resposta de erro no formato usado pelo GemmaService"""
+        return {
+            'response': "O tempo limite da requisição foi atingido.",
+            'success': False,
+            'error': self.ERROR_CODE,
+            'reason': self.reason,
+            'metadata': {'provider': 'deadline'}
+        }
+
+
+class Deadline:
+    """Instante limite (relógio monotônico) com sinal de cancelamento"""
+
+    __slots__ = ('timeout', 'expires_at', '_cancelled', 'reason')
+
+    def __init__(self, timeout: float):
+        self.timeout = max(0.0, timeout)
+        self.expires_at = time.monotonic() + self.timeout
+        self._cancelled = threading.Event()
+        self.reason: Optional[str] = None
+
+    def remaining(self) -> float:
+        if self._cancelled.is_set():
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.cancelled or time.monotonic() >= self.expires_at
+
+    def cancel(self, reason: str = 'requisição cancelada') -> None:
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self._cancelled.set()
+
+    def check(self) -> None:
+        """Lançar DeadlineExceeded se o prazo acabou ou a requisição foi cancelada"""
+        if self.cancelled:
+            raise DeadlineExceeded(self.reason or 'requisição cancelada')
+        if time.monotonic() >= self.expires_at:
+            raise DeadlineExceeded(f"prazo de {self.timeout:.0f}s esgotado")
+
+    def clamp(self, timeout: Optional[float]) -> Optional[float]:
+        """Limitar um timeout de E/S ao tempo restante"""
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def wait(self, timeout: float) -> bool:
+        """Dormir até ``timeout`` segundos; retorna True se cancelado nesse meio tempo"""
+        return self._cancelled.wait(min(timeout, self.remaining()))
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar('request_deadline', default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def check_deadline() -> None:
+    """Ponto de verificação entre etapas de um pipeline (no-op sem prazo)"""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def clamp_timeout(timeout: Optional[float]) -> Optional[float]:
+    """Timeout de E/S limitado ao prazo atual; lança DeadlineExceeded se já esgotado"""
+    deadline = _current.get()
+    if deadline is None:
+        return timeout
+    deadline.check()
+    return deadline.clamp(timeout)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Tornar ``deadline`` o prazo atual dentro do bloco (threads de pool, tarefas)"""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def bind_deadline(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Envolver ``fn`` para rodar em outra thread com o contexto (e o prazo) atual"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def _request_timeout() -> float:
+    default = BackendConfig.REQUEST_DEADLINES.get(request.endpoint or '', BackendConfig.REQUEST_DEFAULT_DEADLINE)
+    header = request.headers.get(BackendConfig.REQUEST_DEADLINE_HEADER)
+    if header:
+        try:
+            # Endpoints longos (pull de modelo) aceitam até o próprio padrão
+            return min(float(header), max(BackendConfig.REQUEST_MAX_DEADLINE, default))
+        except ValueError:
+            pass
+    return default
+
+
+def register_deadline_handlers(app: Flask) -> None:
+    """Criar o prazo de cada requisição e converter DeadlineExceeded em HTTP 504"""
+    logger = logging.getLogger(__name__)
+
+    @app.before_request
+    def start_request_deadline():
+        deadline = Deadline(_request_timeout())
+        g.request_deadline = deadline
+        g.request_deadline_token = _current.set(deadline)
+
+    @app.teardown_request
+    def finish_request_deadline(error=None):
+        token = g.pop('request_deadline_token', None)
+        if token is not None:
+            try:
+                _current.reset(token)
+            except ValueError:
+                # Resposta em stream: o teardown roda em outro contexto
+                _current.set(None)
+
+    @app.errorhandler(DeadlineExceeded)
+    def handle_deadline_exceeded(error):
+        logger.warning(f"⌛ {error.reason} ({request.path if has_request_context() else '-'})")
+        response = jsonify(error.to_response())
+        response.status_code = 504
+        return response
+
+
+def deadline_stopping_criteria(deadline: Optional[Deadline] = None) -> Optional[Any]:
+    """StoppingCriteriaList do transformers que interrompe ``model.generate`` no fim do prazo"""
+    deadline = deadline or _current.get()
+    if deadline is None:
+        return None
+    try:
+        from transformers import StoppingCriteria, StoppingCriteriaList
+    except ImportError:
+        return None
+
+    class DeadlineStoppingCriteria(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs) -> bool:
+            return deadline.expired
+
+    return StoppingCriteriaList([DeadlineStoppingCriteria()])
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Amostragem de recursos do sistema em segundo plano
+Hackathon Gemma 3n
+
+Os seletores de modelo e os endpoints de saúde consultavam o sistema
+operacional de forma síncrona a cada requisição (psutil, platform,
+``torch.cuda.is_available()``), e ``/api/health`` bloqueava 1 s em
+``psutil.cpu_percent(interval=1)``. Uma thread de fundo amostra os
+recursos a cada ``RESOURCE_SAMPLE_INTERVAL`` segundos e publica um
+``ResourceSnapshot`` imutável; a publicação é uma simples troca de
+referência, então a leitura não usa lock. Médias móveis de CPU e memória
+cobrem a janela das últimas ``RESOURCE_AVERAGE_WINDOW`` amostras.
+"""
+
+import logging
+import platform
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import psutil
+
+from config.settings import BackendConfig
+
+_GB = 1024 ** 3
+
+
+@dataclass(frozen=True)
+class ResourceSnapshot:
+    """Leitura dos recursos do sistema em um instante"""
+
+    sampled_at: float                 # time.time() da amostra
+    sampled_monotonic: float
+    ram_total_gb: float
+    ram_available_gb: float
+    ram_used_gb: float
+    memory_percent: float
+    cpu_count_logical: int
+    cpu_count_physical: int
+    cpu_freq_mhz: Optional[float]
+    cpu_percent: float
+    disk_total_gb: float
+    disk_used_gb: float
+    disk_free_gb: float
+    disk_percent: float
+    has_cuda: bool = False
+    gpu_memory_gb: float = 0.0
+    cpu_percent_avg: float = 0.0
+    memory_percent_avg: float = 0.0
+    samples: int = 1
+    system: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.sampled_monotonic
+
+    def device_specs(self) -> Dict[str, Any]:
+        """Formato de ``DeviceDetector.get_device_specs``"""
+        return {
+            'ram_gb': round(self.ram_total_gb, 2),
+            'cpu_cores_physical': self.cpu_count_physical,
+            'cpu_cores_logical': self.cpu_count_logical,
+            'cpu_freq_mhz': self.cpu_freq_mhz or 0,
+            'storage_total_gb': round(self.disk_total_gb, 2),
+            'storage_free_gb': round(self.disk_free_gb, 2),
+            'system': {
+                'platform': self.system.get('platform', 'Unknown'),
+                'architecture': self.system.get('architecture', 'Unknown'),
+                'processor': self.system.get('processor', 'Unknown')
+            }
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'sampled_at': self.sampled_at,
+            'age_s': round(self.age, 3),
+            'samples': self.samples,
+            'memory': {
+                'total_gb': round(self.ram_total_gb, 2),
+                'available_gb': round(self.ram_available_gb, 2),
+                'used_gb': round(self.ram_used_gb, 2),
+                'percentage': self.memory_percent,
+                'percentage_avg': round(self.memory_percent_avg, 1)
+            },
+            'cpu': {
+                'count': self.cpu_count_logical,
+                'usage_percent': self.cpu_percent,
+                'usage_percent_avg': round(self.cpu_percent_avg, 1),
+                'frequency_mhz': self.cpu_freq_mhz
+            },
+            'disk': {
+                'total_gb': round(self.disk_total_gb, 2),
+                'used_gb': round(self.disk_used_gb, 2),
+                'free_gb': round(self.disk_free_gb, 2),
+                'percentage': round(self.disk_percent, 2)
+            },
+            'gpu': {'has_cuda': self.has_cuda, 'memory_gb': round(self.gpu_memory_gb, 2)}
+        }
+
+
+class ResourceMonitor:
+    """Thread de fundo que mantém o último ``ResourceSnapshot`` e médias móveis"""
+
+    def __init__(self, interval: float = 5.0, window: int = 12, disk_path: str = '/'):
+        self.logger = logging.getLogger(__name__)
+        self.interval = interval
+        self.disk_path = disk_path
+        self._history = deque(maxlen=max(1, window))
+        self._snapshot: Optional[ResourceSnapshot] = None
+        self._static: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._errors = 0
+
+    # ----- Ciclo de vida -----
+
+    def start(self) -> None:
+        """Iniciar a amostragem (idempotente)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="resource-monitor", daemon=True)
+            self._thread.start()
+        self.logger.info(f"📈 Monitor de recursos iniciado (intervalo {self.interval:.0f}s)")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    # ----- Amostragem -----
+
+    def _static_info(self) -> Dict[str, Any]:
+        """Dados que não mudam durante o processo (coletados uma vez)"""
+        if self._static is None:
+            has_cuda, gpu_memory_gb = False, 0.0
+            try:
+                import torch
+                has_cuda = torch.cuda.is_available()
+                if has_cuda:
+                    gpu_memory_gb = torch.cuda.get_device_properties(0).total_memory / _GB
+            except Exception as e:
+                self.logger.debug(f"GPU indisponível: {e}")
+            self._static = {
+                'cpu_count_logical': psutil.cpu_count(logical=True) or 1,
+                'cpu_count_physical': psutil.cpu_count(logical=False) or 1,
+                'has_cuda': has_cuda,
+                'gpu_memory_gb': gpu_memory_gb,
+                'system': {
+                    'platform': platform.system(),
+                    'platform_version': platform.version(),
+                    'architecture': platform.architecture()[0],
+                    'processor': platform.processor(),
+                    'python_version': platform.python_version()
+                }
+            }
+        return self._static
+
+    def refresh(self) -> Optional[ResourceSnapshot]:
+        """Amostrar agora e publicar um novo snapshot"""
+        try:
+            static = self._static_info()
+            memory = psutil.virtual_memory()
+            # interval=None: uso desde a chamada anterior, sem bloquear
+            cpu_percent = psutil.cpu_percent(interval=None)
+            cpu_freq = psutil.cpu_freq()
+            disk = psutil.disk_usage(self.disk_path)
+
+            self._history.append((cpu_percent, memory.percent))
+            samples = len(self._history)
+            snapshot = ResourceSnapshot(
+                sampled_at=time.time(),
+                sampled_monotonic=time.monotonic(),
+                ram_total_gb=memory.total / _GB,
+                ram_available_gb=memory.available / _GB,
+                ram_used_gb=memory.used / _GB,
+                memory_percent=memory.percent,
+                cpu_count_logical=static['cpu_count_logical'],
+                cpu_count_physical=static['cpu_count_physical'],
+                cpu_freq_mhz=cpu_freq.current if cpu_freq else None,
+                cpu_percent=cpu_percent,
+                disk_total_gb=disk.total / _GB,
+                disk_used_gb=disk.used / _GB,
+                disk_free_gb=disk.free / _GB,
+                disk_percent=(disk.used / disk.total) * 100 if disk.total else 0.0,
+                has_cuda=static['has_cuda'],
+                gpu_memory_gb=static['gpu_memory_gb'],
+                cpu_percent_avg=sum(cpu for cpu, _ in self._history) / samples,
+                memory_percent_avg=sum(mem for _, mem in self._history) / samples,
+                samples=samples,
+                system=static['system']
+            )
+        except Exception as e:
+            self._errors += 1
+            self.logger.warning(f"Erro ao amostrar recursos do sistema: {e}")
+            return self._snapshot
+
+        # Troca de referência atômica: leitores nunca veem um snapshot parcial
+        self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self) -> Optional[ResourceSnapshot]:
+        """Último snapshot publicado (amostra na hora apenas se ainda não houver nenhum)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._snapshot or self.refresh()
+        return snapshot
+
+    def get_stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'interval_s': self.interval,
+            'window': self._history.maxlen,
+            'errors': self._errors,
+            'last_sample_age_s': round(snapshot.age, 3) if snapshot else None
+        }
+
+
+_monitor: Optional[ResourceMonitor] = None
+_monitor_lock = threading.Lock()
+
+
+def get_resource_monitor() -> ResourceMonitor:
+    """Obter o monitor de recursos compartilhado do processo (iniciado no primeiro uso)"""
+    global _monitor
+    if _monitor is None:
+        with _monitor_lock:
+            if _monitor is None:
+                monitor = ResourceMonitor(
+                    interval=BackendConfig.RESOURCE_SAMPLE_INTERVAL,
+                    window=BackendConfig.RESOURCE_AVERAGE_WINDOW
+                )
+                monitor.start()
+                _monitor = monitor
+    return _monitor
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de respostas geradas pelo Gemma
+Hackathon Gemma 3n
+
+Perguntas repetidas (o mesmo primeiro socorro, o mesmo calendário agrícola,
+o mesmo tópico escolar) são servidas a partir de um cache em duas camadas:
+memória (LRU limitada em bytes) e, opcionalmente, um arquivo SQLite em disco
+que sobrevive a reinicializações. A chave é um hash canônico de
+(modelo resolvido, prompt de sistema, prompt, opções de geração).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from flask import has_request_context, request
+
+from config.settings import BackendConfig
+
+
+class ResponseCache:
+    """Cache LRU/TTL de respostas com camada opcional em disco"""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: int = 2048,
+        ttls: Optional[Dict[str, int]] = None,
+        disk_path: Optional[str] = None,
+        enabled: bool = True
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttls = dict(ttls or {})
+        self.default_ttl = self.ttls.get('general', 3600)
+
+        # chave -> (json serializado, tamanho em bytes, expira_em, armazenado_em)
+        self._memory: "OrderedDict[str, Tuple[str, int, float, float]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'expired': 0,
+            'bypassed': 0
+        }
+
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        if enabled and disk_path:
+            self._open_disk(disk_path)
+
+    # ----- Chave -----
+
+    @staticmethod
+    def make_key(model: str, system_prompt: Optional[str], prompt: str, options: Dict[str, Any]) -> str:
+        """Hash canônico de (modelo, prompt de sistema, prompt, opções)"""
+        canonical = json.dumps(
+            {
+                'model': model or '',
+                'system': system_prompt or '',
+                'prompt': prompt,
+                'options': options or {}
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(',', ':'),
+            default=str
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, domain: Optional[str]) -> int:
+        return self.ttls.get((domain or 'general').lower(), self.default_ttl)
+
+    # ----- Leitura / escrita -----
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Obter resposta armazenada (memória primeiro, depois disco)"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                payload, size, expires_at, stored_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return self._decode(payload, 'memory', stored_at, now)
+                self._remove_locked(key)
+                self._stats['expired'] += 1
+
+        disk_entry = self._disk_get(key, now)
+        if disk_entry is not None:
+            payload, expires_at, stored_at = disk_entry
+            with self._lock:
+                self._put_locked(key, payload, expires_at, stored_at)
+                self._stats['disk_hits'] += 1
+            return self._decode(payload, 'disk', stored_at, now)
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def set(self, key: str, response: Dict[str, Any], domain: Optional[str] = None) -> bool:
+        """Armazenar resposta com o TTL do domínio (TTL 0 = não armazenar)"""
+        if not self.enabled:
+            return False
+
+        ttl = self.ttl_for(domain)
+        if ttl <= 0:
+            return False
+
+        try:
+            payload = json.dumps(response, ensure_ascii=False, default=str)
+        except (TypeError, ValueError) as e:
+            self.logger.warning(f"⚠️ Resposta não serializável para o cache: {e}")
+            return False
+
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            if not self._put_locked(key, payload, expires_at, now):
+                return False
+            self._stats['stores'] += 1
+
+        self._disk_set(key, payload, expires_at, now, domain)
+        return True
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._remove_locked(key)
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self._disk.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM response_cache")
+                self._disk.commit()
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._stats['bypassed'] += 1
+
+    # ----- Memória (chamar com self._lock) -----
+
+    def _put_locked(self, key: str, payload: str, expires_at: float, stored_at: float) -> bool:
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            return False
+
+        self._remove_locked(key)
+        self._memory[key] = (payload, size, expires_at, stored_at)
+        self._memory_bytes += size
+
+        while self._memory and (self._memory_bytes > self.max_bytes or len(self._memory) > self.max_entries):
+            _, (_, evicted_size, _, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self._stats['evictions'] += 1
+        return True
+
+    def _remove_locked(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+
+    @staticmethod
+    def _decode(payload: str, tier: str, stored_at: float, now: float) -> Dict[str, Any]:
+        response = json.loads(payload)
+        metadata = response.setdefault('metadata', {})
+        metadata['cache'] = {
+            'hit': True,
+            'tier': tier,
+            'age_seconds': round(now - stored_at, 1)
+        }
+        return response
+
+    # ----- Disco (SQLite) -----
+
+    def _open_disk(self, path: str) -> None:
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._disk = sqlite3.connect(path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    domain TEXT,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._disk.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_expires ON response_cache(expires_at)")
+            self._disk.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+            self._disk.commit()
+            self.logger.info(f"💾 Cache de respostas em disco: {path}")
+        except sqlite3.Error as e:
+            self.logger.warning(f"⚠️ Cache em disco indisponível ({path}): {e}")
+            self._disk = None
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[str, float, float]]:
+        if self._disk is None:
+            return None
+        try:
+            with self._disk_lock:
+                row = self._disk.execute(
+                    "SELECT payload, expires_at, stored_at FROM response_cache WHERE key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+            return row
+        except sqlite3.Error as e:
+            self.logger.warning(f"⚠️ Erro ao ler cache em disco: {e}")
+            return None
+
+    def _disk_set(self, key: str, payload: str, expires_at: float, stored_at: float,
+                  domain: Optional[str]) -> None:
+        if self._disk is None:
+            return
+        try:
+            with self._disk_lock:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, payload, domain, stored_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, domain, stored_at, expires_at)
+                )
+                self._disk.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"⚠️ Erro ao gravar cache em disco: {e}")
+
+    # ----- Estatísticas -----
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._memory)
+            memory_bytes = self._memory_bytes
+        hits = stats['memory_hits'] + stats['disk_hits']
+        lookups = hits + stats['misses']
+        return {
+            'enabled': self.enabled,
+            'entries': entries,
+            'memory_bytes': memory_bytes,
+            'max_bytes': self.max_bytes,
+            'disk_enabled': self._disk is not None,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            'ttls': self.ttls,
+            **stats
+        }
+
+
+def cache_bypass_requested() -> bool:
+    """Verificar se a requisição atual pediu para ignorar o cache"""
+    if not has_request_context():
+        return False
+    value = request.headers.get(BackendConfig.RESPONSE_CACHE_BYPASS_HEADER, '')
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    return 'no-cache' in request.headers.get('Cache-Control', '').lower()
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Obter o cache de respostas compartilhado do processo"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    max_bytes=BackendConfig.RESPONSE_CACHE_MAX_BYTES,
+                    max_entries=BackendConfig.RESPONSE_CACHE_MAX_ENTRIES,
+                    ttls=BackendConfig.RESPONSE_CACHE_TTLS,
+                    disk_path=BackendConfig.RESPONSE_CACHE_DISK_PATH or None,
+                    enabled=BackendConfig.RESPONSE_CACHE_ENABLED
+                )
+    return _cache
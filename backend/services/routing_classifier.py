@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Classificador leve de contexto e criticidade para o roteamento de modelos
+Hackathon Gemma 3n
+
+Modelo linear (regressão logística multinomial) sobre n-gramas de
+caracteres com hashing, todo em NumPy e na CPU. As duas saídas (contexto e
+criticidade) compartilham as mesmas features: uma única matriz de pesos,
+com uma fatia por saída. O hashing dos n-gramas é vetorizado (hash
+polinomial sobre os code points), então um lote de prompts é classificado
+sem laços em Python por caractere.
+
+As confiabilidades são calibradas por temperatura em um conjunto de
+validação durante o treino. O treino é offline
+(``scripts/train_routing_classifier.py``), a partir de prompts registrados
+e das listas de palavras-chave de ``services.text_signals``; o artefato
+``.npz`` é carregado sob demanda pelo ``ClassifierDetector`` do seletor.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Sem NumPy o seletor continua com as palavras-chave
+    np = None
+
+from utils.keyword_matcher import fold_text
+
+ARTIFACT_VERSION = 1
+
+# Multiplicador do hash polinomial (primo FNV de 32 bits)
+_HASH_BASE = 0x01000193
+# Rótulo ausente (exemplo sem anotação para uma das saídas)
+UNLABELED = -1
+
+# Faixa da temperatura de calibração (busca em escala logarítmica)
+TEMPERATURE_RANGE = (0.01, 100.0)
+
+
+@dataclass(frozen=True)
+class RoutingPrediction:
+    """Rótulos previstos e confiabilidades calibradas de um prompt"""
+
+    context: str
+    context_confidence: float
+    criticality: str
+    criticality_confidence: float
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("NumPy não está instalado: classificador de roteamento indisponível")
+
+
+def _hash_ngrams(texts: Sequence[str], n_features: int, ngram_sizes: Tuple[int, ...]):
+    """Features de um lote: (documento, feature) de cada n-grama e o fator de normalização"""
+    docs = [f" {fold_text(text or '')} " for text in texts]
+    lengths = np.fromiter((len(doc) for doc in docs), dtype=np.int64, count=len(docs))
+    # Documentos separados por NUL; n-gramas que cruzam o separador são descartados
+    codes = np.frombuffer('\0'.join(docs).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    doc_of = np.repeat(np.arange(len(docs)), lengths + 1)[:len(codes)]
+    separators = np.concatenate(([0], np.cumsum(codes == 0)))
+
+    doc_ids = []
+    features = []
+    for size in ngram_sizes:
+        count = len(codes) - size + 1
+        if count <= 0:
+            continue
+        hashes = np.full(count, size, dtype=np.uint64)
+        for offset in range(size):
+            hashes = hashes * np.uint64(_HASH_BASE) + codes[offset:offset + count]
+        valid = separators[size:size + count] == separators[:count]
+        hashes = hashes[valid]
+        doc_ids.append(doc_of[:count][valid])
+        features.append(((hashes ^ (hashes >> np.uint64(29))) % np.uint64(n_features)).astype(np.int64))
+
+    doc_ids = np.concatenate(doc_ids) if doc_ids else np.zeros(0, dtype=np.int64)
+    features = np.concatenate(features) if features else np.zeros(0, dtype=np.int64)
+    # Ordenar por documento para somar os pesos com reduceat
+    order = np.argsort(doc_ids, kind='stable')
+    doc_ids, features = doc_ids[order], features[order]
+    counts = np.bincount(doc_ids, minlength=len(docs))
+    scale = 1.0 / np.sqrt(np.maximum(counts, 1))
+    return doc_ids, features, counts, scale.astype(np.float32)
+
+
+def _sum_rows(weights, features, counts):
+    """Somar as linhas de ``weights`` de cada documento (features ordenadas por documento)"""
+    sums = np.zeros((len(counts), weights.shape[1]), dtype=np.float32)
+    nonempty = counts > 0
+    if nonempty.any():
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums[nonempty] = np.add.reduceat(weights[features], starts[nonempty], axis=0)
+    return sums
+
+
+def _softmax(logits, temperature: float = 1.0):
+    scaled = logits / temperature
+    scaled = scaled - scaled.max(axis=1, keepdims=True)
+    exp = np.exp(scaled)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def _nll(logits, labels, temperature: float) -> float:
+    proba = _softmax(logits, temperature)
+    return float(-np.log(proba[np.arange(len(labels)), labels] + 1e-12).mean())
+
+
+def _fit_temperature(logits, labels) -> float:
+    """Temperatura de menor log-verossimilhança negativa em ``TEMPERATURE_RANGE``
+
+    A NLL é convexa em 1/T, portanto unimodal em log T: uma grade
+    logarítmica localiza o vale e a seção áurea o refina. Se a validação
+    não tem erros, a NLL só diminui com T e não há mínimo: a temperatura
+    fica em 1.0.
+    """
+    logger = logging.getLogger(__name__)
+    low, high = np.log(TEMPERATURE_RANGE)
+    grid = np.linspace(low, high, 41)
+    best = int(np.argmin([_nll(logits, labels, np.exp(t)) for t in grid]))
+    if best == 0:
+        logger.warning("⚠️ Validação separável: sem mínimo da NLL, temperatura mantida em 1.0")
+        return 1.0
+    a, b = grid[max(best - 1, 0)], grid[min(best + 1, len(grid) - 1)]
+    ratio = (np.sqrt(5) - 1) / 2
+    c, d = b - ratio * (b - a), a + ratio * (b - a)
+    nll_c, nll_d = _nll(logits, labels, np.exp(c)), _nll(logits, labels, np.exp(d))
+    for _ in range(40):
+        if nll_c < nll_d:
+            b, d, nll_d = d, c, nll_c
+            c = b - ratio * (b - a)
+            nll_c = _nll(logits, labels, np.exp(c))
+        else:
+            a, c, nll_c = c, d, nll_d
+            d = a + ratio * (b - a)
+            nll_d = _nll(logits, labels, np.exp(d))
+    temperature = float(np.exp((a + b) / 2))
+    if best == len(grid) - 1:
+        logger.warning(f"⚠️ Temperatura de calibração no limite da faixa ({temperature:.3g})")
+    return temperature
+
+
+class RoutingClassifier:
+    """Regressão logística sobre n-gramas com hashing, com duas saídas calibradas"""
+
+    def __init__(
+        self,
+        weights,
+        bias,
+        context_labels: Sequence[str],
+        criticality_labels: Sequence[str],
+        ngram_sizes: Tuple[int, ...] = (2, 3, 4),
+        temperatures: Tuple[float, float] = (1.0, 1.0)
+    ):
+        _require_numpy()
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.context_labels = list(context_labels)
+        self.criticality_labels = list(criticality_labels)
+        self.ngram_sizes = tuple(int(size) for size in ngram_sizes)
+        self.temperatures = tuple(float(t) for t in temperatures)
+        self.n_features = self.weights.shape[0]
+        self._split = len(self.context_labels)
+
+    # ----- Inferência -----
+
+    def _logits(self, texts: Sequence[str]):
+        _, features, counts, scale = _hash_ngrams(texts, self.n_features, self.ngram_sizes)
+        return _sum_rows(self.weights, features, counts) * scale[:, None] + self.bias
+
+    def predict_proba(self, texts: Sequence[str]):
+        """Probabilidades calibradas (contexto, criticidade) de um lote"""
+        logits = self._logits(texts)
+        return (
+            _softmax(logits[:, :self._split], self.temperatures[0]),
+            _softmax(logits[:, self._split:], self.temperatures[1])
+        )
+
+    def predict(self, texts: Sequence[str]) -> List[RoutingPrediction]:
+        if not texts:
+            return []
+        context_proba, criticality_proba = self.predict_proba(texts)
+        context_idx = context_proba.argmax(axis=1)
+        criticality_idx = criticality_proba.argmax(axis=1)
+        return [
+            RoutingPrediction(
+                context=self.context_labels[c],
+                context_confidence=float(context_proba[row, c]),
+                criticality=self.criticality_labels[k],
+                criticality_confidence=float(criticality_proba[row, k])
+            )
+            for row, (c, k) in enumerate(zip(context_idx, criticality_idx))
+        ]
+
+    # ----- Treino -----
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        contexts: Sequence[int],
+        criticalities: Sequence[int],
+        context_labels: Sequence[str],
+        criticality_labels: Sequence[str],
+        n_features: int = 2 ** 16,
+        ngram_sizes: Tuple[int, ...] = (2, 3, 4),
+        epochs: int = 15,
+        batch_size: int = 64,
+        learning_rate: float = 0.5,
+        l2: float = 1e-5,
+        seed: int = 0
+    ) -> 'RoutingClassifier':
+        """Treinar com Adagrad em minilotes; rótulos ``UNLABELED`` não contribuem para a saída"""
+        _require_numpy()
+        rng = np.random.default_rng(seed)
+        n_context = len(context_labels)
+        n_classes = n_context + len(criticality_labels)
+        contexts = np.asarray(contexts, dtype=np.int64)
+        criticalities = np.asarray(criticalities, dtype=np.int64)
+
+        weights = np.zeros((n_features, n_classes), dtype=np.float32)
+        bias = np.zeros(n_classes, dtype=np.float32)
+        accumulated = np.full((n_features, n_classes), 1e-8, dtype=np.float32)
+        bias_accumulated = np.full(n_classes, 1e-8, dtype=np.float32)
+        model = cls(weights, bias, context_labels, criticality_labels, ngram_sizes)
+
+        for _ in range(epochs):
+            order = rng.permutation(len(texts))
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                batch_texts = [texts[i] for i in batch]
+                doc_ids, features, counts, scale = _hash_ngrams(batch_texts, n_features, model.ngram_sizes)
+                logits = _sum_rows(model.weights, features, counts) * scale[:, None] + model.bias
+
+                # Gradiente da entropia cruzada por saída: probabilidades - one-hot
+                grad = np.zeros_like(logits)
+                for head, labels, columns in (
+                    (0, contexts[batch], slice(0, n_context)),
+                    (1, criticalities[batch], slice(n_context, n_classes))
+                ):
+                    mask = labels != UNLABELED
+                    if not mask.any():
+                        continue
+                    proba = _softmax(logits[mask, columns])
+                    proba[np.arange(mask.sum()), labels[mask]] -= 1.0
+                    grad[mask, columns] = proba
+                grad /= len(batch)
+
+                # Atualização esparsa: apenas as linhas das features presentes no lote
+                touched, inverse = np.unique(features, return_inverse=True)
+                row_grad = np.zeros((len(touched), n_classes), dtype=np.float32)
+                np.add.at(row_grad, inverse, grad[doc_ids] * scale[doc_ids, None])
+                row_grad += l2 * model.weights[touched]
+                accumulated[touched] += row_grad ** 2
+                model.weights[touched] -= learning_rate * row_grad / np.sqrt(accumulated[touched])
+
+                bias_grad = grad.sum(axis=0)
+                bias_accumulated += bias_grad ** 2
+                model.bias -= learning_rate * bias_grad / np.sqrt(bias_accumulated)
+        return model
+
+    def calibrate(self, texts: Sequence[str], contexts: Sequence[int], criticalities: Sequence[int]) -> Tuple[float, float]:
+        """Ajustar a temperatura de cada saída minimizando a log-verossimilhança na validação"""
+        logits = self._logits(texts)
+        temperatures = []
+        for labels, columns in (
+            (np.asarray(contexts), slice(0, self._split)),
+            (np.asarray(criticalities), slice(self._split, None))
+        ):
+            mask = labels != UNLABELED
+            if not mask.any():
+                temperatures.append(1.0)
+                continue
+            temperatures.append(_fit_temperature(logits[mask, columns], labels[mask]))
+        self.temperatures = tuple(temperatures)
+        return self.temperatures
+
+    # ----- Artefato -----
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            version=np.int64(ARTIFACT_VERSION),
+            weights=self.weights,
+            bias=self.bias,
+            context_labels=np.array(self.context_labels),
+            criticality_labels=np.array(self.criticality_labels),
+            ngram_sizes=np.array(self.ngram_sizes, dtype=np.int64),
+            temperatures=np.array(self.temperatures, dtype=np.float64)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'RoutingClassifier':
+        _require_numpy()
+        logger = logging.getLogger(__name__)
+        started = time.monotonic()
+        with np.load(path, allow_pickle=False) as artifact:
+            version = int(artifact['version'])
+            if version != ARTIFACT_VERSION:
+                raise ValueError(f"Versão do artefato {version} incompatível (esperada {ARTIFACT_VERSION})")
+            classifier = cls(
+                artifact['weights'],
+                artifact['bias'],
+                [str(label) for label in artifact['context_labels']],
+                [str(label) for label in artifact['criticality_labels']],
+                tuple(int(size) for size in artifact['ngram_sizes']),
+                tuple(float(t) for t in artifact['temperatures'])
+            )
+        logger.info(
+            f"🧮 Classificador de roteamento carregado de {path} "
+            f"({classifier.n_features} features, {(time.monotonic() - started) * 1000:.0f} ms)"
+        )
+        return classifier
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            'n_features': self.n_features,
+            'ngram_sizes': list(self.ngram_sizes),
+            'context_labels': self.context_labels,
+            'criticality_labels': self.criticality_labels,
+            'temperatures': list(self.temperatures)
+        }
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Coalescência de gerações idênticas (single-flight)
+Hackathon Gemma 3n
+
+Quando a mesma aula é aberta em 30 telefones ao mesmo tempo, apenas uma
+geração vai ao modelo: as chamadas concorrentes com a mesma chave esperam
+pela geração em andamento e recebem uma cópia do seu resultado.
+
+Cada seguidor espera no máximo até o próprio prazo. Se a líder esgota o
+prazo dela ou é cancelada, essa falha não é repassada: os seguidores que
+ainda têm tempo abrem uma nova execução entre si.
+"""
+
+import asyncio
+import concurrent.futures
+import copy
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import BackendConfig
+
+from .request_deadline import Deadline, DeadlineExceeded, current_deadline
+
+# Falhas do prazo ou do cancelamento da própria líder
+_LEADER_ONLY_ERRORS = (DeadlineExceeded, asyncio.CancelledError, concurrent.futures.CancelledError)
+
+
+class _Flight:
+    """Geração em andamento para uma chave"""
+
+    __slots__ = ('done', 'result', 'error', 'followers')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Agrupa chamadas concorrentes com a mesma chave em uma única execução
+
+    Política de erro:
+      - ``propagate``: quem esperava recebe o mesmo resultado de erro (ou a
+        mesma exceção) da execução líder;
+      - ``retry``: quem esperava executa a própria chamada quando a líder
+        falha, sem nova coalescência.
+
+    Prazo esgotado ou cancelamento da líder não seguem a política: os
+    seguidores repetem a chamada numa nova execução coalescida.
+    """
+
+    ERROR_POLICIES = ('propagate', 'retry')
+
+    def __init__(self, error_policy: str = 'propagate', enabled: bool = True):
+        self.logger = logging.getLogger(__name__)
+        self.enabled = enabled
+        self.error_policy = error_policy if error_policy in self.ERROR_POLICIES else 'propagate'
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'executions': 0,
+            'merged': 0,
+            'errors': 0,
+            'errors_shared': 0,
+            'retries_after_error': 0,
+            'retries_after_deadline': 0,
+            'abandoned': 0,
+            'max_followers': 0
+        }
+
+    def do(self, key: str, fn: Callable[[], Any],
+           is_error: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Executar ``fn`` uma única vez por chave entre as chamadas concorrentes"""
+        if not self.enabled or not key:
+            return fn()
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._stats['executions'] += 1
+            else:
+                flight.followers += 1
+                self._stats['merged'] += 1
+                self._stats['max_followers'] = max(self._stats['max_followers'], flight.followers)
+
+        if leader:
+            return self._lead(key, flight, fn, is_error)
+        return self._follow(key, flight, fn, is_error)
+
+    def _lead(self, key: str, flight: _Flight, fn: Callable[[], Any],
+              is_error: Optional[Callable[[Any], bool]]) -> Any:
+        result = None
+        try:
+            result = fn()
+            if is_error and is_error(result):
+                with self._lock:
+                    self._stats['errors'] += 1
+            return result
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                followers = flight.followers
+            try:
+                if followers:
+                    # Os seguidores copiam um instantâneo próprio: a rota do líder altera ``result``
+                    flight.result = copy.deepcopy(result)
+                    self.logger.info(f"🔗 Geração compartilhada com {followers} requisição(ões) idêntica(s)")
+            finally:
+                flight.done.set()
+
+    @staticmethod
+    def _wait(flight: _Flight, deadline: Optional[Deadline]) -> bool:
+        """Esperar a líder até o prazo do seguidor; False se o prazo acabou antes"""
+        if deadline is None:
+            flight.done.wait()
+            return True
+        while not flight.done.is_set():
+            if deadline.expired:
+                return False
+            # Acordar periodicamente para notar o cancelamento da requisição
+            flight.done.wait(min(deadline.remaining(), 0.5))
+        return True
+
+    @staticmethod
+    def _leader_only_failure(flight: _Flight) -> bool:
+        if flight.error is not None:
+            return isinstance(flight.error, _LEADER_ONLY_ERRORS)
+        # O GemmaService devolve o prazo esgotado como dicionário de erro
+        return isinstance(flight.result, dict) and flight.result.get('error') == DeadlineExceeded.ERROR_CODE
+
+    def _follow(self, key: str, flight: _Flight, fn: Callable[[], Any],
+                is_error: Optional[Callable[[Any], bool]]) -> Any:
+        deadline = current_deadline()
+        if not self._wait(flight, deadline):
+            with self._lock:
+                flight.followers -= 1
+                self._stats['abandoned'] += 1
+            raise DeadlineExceeded(
+                deadline.reason or f"prazo de {deadline.timeout:.0f}s esgotado aguardando geração idêntica"
+            )
+
+        if self._leader_only_failure(flight):
+            if deadline is not None:
+                deadline.check()
+            with self._lock:
+                self._stats['retries_after_deadline'] += 1
+            return self.do(key, fn, is_error)
+
+        failed = flight.error is not None or bool(is_error and is_error(flight.result))
+        if failed:
+            if self.error_policy == 'retry':
+                with self._lock:
+                    self._stats['retries_after_error'] += 1
+                return fn()
+            with self._lock:
+                self._stats['errors_shared'] += 1
+            if flight.error is not None:
+                raise flight.error
+
+        # Cada seguidor recebe a sua própria cópia do instantâneo (as rotas alteram o dicionário)
+        result = copy.deepcopy(flight.result)
+        if isinstance(result, dict):
+            result.setdefault('metadata', {})['coalesced'] = True
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            in_flight = len(self._flights)
+        total = stats['executions'] + stats['merged']
+        return {
+            'enabled': self.enabled,
+            'error_policy': self.error_policy,
+            'in_flight': in_flight,
+            'merge_rate': round(stats['merged'] / total, 3) if total else 0.0,
+            **stats
+        }
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Obter o coalescedor de gerações compartilhado do processo"""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight(
+                    error_policy=BackendConfig.SINGLE_FLIGHT_ERROR_POLICY,
+                    enabled=BackendConfig.SINGLE_FLIGHT_ENABLED
+                )
+    return _single_flight
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Saída estruturada por esquema JSON
+Hackathon Gemma 3n
+
+As funcionalidades do GemmaService que devolvem JSON (tradução contextual,
+análise emocional, desafios, badges...) pediam "responda em JSON" no
+prompt e depois procuravam o objeto no texto livre com regex, caindo no
+``_fallback_*`` sempre que o modelo escrevia algo fora do formato: a
+geração inteira era desperdiçada. Cada funcionalidade declara aqui o seu
+esquema; o esquema vai no parâmetro ``format`` do Ollama, que restringe a
+decodificação à gramática do esquema: a saída é só o objeto, sem prosa
+em volta nem markdown, e a geração termina quando ele fecha.
+
+A resposta é decodificada com ``json.loads`` (o extrator com reparos só
+entra para backends sem ``format``, como o modelo local) e conferida por
+um único ``SchemaValidator``, compilado uma vez por esquema.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from utils.json_parser import safe_parse_llm_json
+
+logger = logging.getLogger(__name__)
+
+_Check = Callable[[Any, str, List[str]], None]
+
+# bool é subclasse de int: números e inteiros precisam excluí-lo
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+    'string': lambda value: isinstance(value, str),
+    'integer': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'number': lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    'boolean': lambda value: isinstance(value, bool),
+    'null': lambda value: value is None,
+}
+
+
+class SchemaValidator:
+    """Validador compilado do subconjunto de JSON Schema usado nos esquemas das funcionalidades
+
+    Suporta ``type`` (nome ou lista), ``properties``, ``required``,
+    ``additionalProperties: false``, ``items``, ``enum``, ``minimum``/
+    ``maximum``, ``minItems``/``maxItems`` e ``minLength``. O esquema é
+    convertido uma vez em funções aninhadas; validar é só chamá-las.
+    """
+
+    def __init__(self, schema: Mapping[str, Any]):
+        self.schema = schema
+        self._check = self._compile(schema)
+
+    def validate(self, value: Any) -> List[str]:
+        """Lista de erros (vazia se ``value`` segue o esquema)"""
+        errors: List[str] = []
+        self._check(value, '$', errors)
+        return errors
+
+    def is_valid(self, value: Any) -> bool:
+        return not self.validate(value)
+
+    @classmethod
+    def _compile(cls, schema: Mapping[str, Any]) -> _Check:
+        check_type = cls._compile_type(schema)
+        compiled = (
+            cls._compile_enum(schema),
+            cls._compile_range(schema),
+            cls._compile_min_length(schema),
+            cls._compile_object(schema),
+            cls._compile_array(schema),
+        )
+        checks = tuple(rule for rule in compiled if rule is not None)
+
+        def check(value, path, errors):
+            if check_type is not None and not check_type(value, path, errors):
+                return
+            for rule in checks:
+                rule(value, path, errors)
+
+        return check
+
+    @staticmethod
+    def _compile_type(schema: Mapping[str, Any]) -> Optional[Callable[[Any, str, List[str]], bool]]:
+        """``type``: a verificação devolve False para interromper as demais"""
+        types = schema.get('type')
+        if not types:
+            return None
+        names = (types,) if isinstance(types, str) else tuple(types)
+        predicates = tuple(_TYPE_CHECKS[name] for name in names)
+        expected = '|'.join(names)
+
+        def check_type(value, path, errors):
+            if not any(predicate(value) for predicate in predicates):
+                errors.append(f"{path}: esperado {expected}, recebido {type(value).__name__}")
+                return False
+            return True
+
+        return check_type
+
+    @staticmethod
+    def _compile_enum(schema: Mapping[str, Any]) -> Optional[_Check]:
+        if 'enum' not in schema:
+            return None
+        allowed = tuple(schema['enum'])
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(f"{path}: valor fora de {list(allowed)}")
+
+        return check_enum
+
+    @staticmethod
+    def _compile_range(schema: Mapping[str, Any]) -> Optional[_Check]:
+        minimum, maximum = schema.get('minimum'), schema.get('maximum')
+        if minimum is None and maximum is None:
+            return None
+
+        def check_range(value, path, errors):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return
+            if minimum is not None and value < minimum:
+                errors.append(f"{path}: menor que {minimum}")
+            if maximum is not None and value > maximum:
+                errors.append(f"{path}: maior que {maximum}")
+
+        return check_range
+
+    @staticmethod
+    def _compile_min_length(schema: Mapping[str, Any]) -> Optional[_Check]:
+        min_length = schema.get('minLength')
+        if min_length is None:
+            return None
+
+        def check_length(value, path, errors):
+            if isinstance(value, str) and len(value) < min_length:
+                errors.append(f"{path}: menos de {min_length} caracteres")
+
+        return check_length
+
+    @classmethod
+    def _compile_object(cls, schema: Mapping[str, Any]) -> Optional[_Check]:
+        """``properties``, ``required`` e ``additionalProperties: false``"""
+        properties = {name: cls._compile(sub) for name, sub in schema.get('properties', {}).items()}
+        required = tuple(schema.get('required', ()))
+        closed = schema.get('additionalProperties') is False
+        if not (properties or required or closed):
+            return None
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(f"{path}.{name}: obrigatório")
+            for name, item in value.items():
+                check = properties.get(name)
+                if check is not None:
+                    check(item, f"{path}.{name}", errors)
+                elif closed:
+                    errors.append(f"{path}.{name}: propriedade não prevista")
+
+        return check_object
+
+    @classmethod
+    def _compile_array(cls, schema: Mapping[str, Any]) -> Optional[_Check]:
+        """``items``, ``minItems`` e ``maxItems``"""
+        items = cls._compile(schema['items']) if 'items' in schema else None
+        min_items, max_items = schema.get('minItems'), schema.get('maxItems')
+        if items is None and min_items is None and max_items is None:
+            return None
+
+        def check_array(value, path, errors):
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append(f"{path}: menos de {min_items} itens")
+            if max_items is not None and len(value) > max_items:
+                errors.append(f"{path}: mais de {max_items} itens")
+            if items is not None:
+                for index, item in enumerate(value):
+                    items(item, f"{path}[{index}]", errors)
+
+        return check_array
+
+
+# ----- Esquemas das funcionalidades -----
+
+_STRING = {'type': 'string'}
+_TEXT = {'type': 'string', 'minLength': 1}
+_STRINGS = {'type': 'array', 'items': _STRING}
+_INTENSITY = {'type': 'integer', 'minimum': 1, 'maximum': 10}
+_SCORE = {'type': 'number', 'minimum': 0, 'maximum': 1}
+
+
+def _object(properties: Dict[str, Any], required: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    return {'type': 'object', 'properties': properties, 'required': list(required)}
+
+
+# Frase ou desafio de tradução para a comunidade (mesmo formato nos dois)
+_PHRASE = _object({
+    'word': _TEXT,
+    'category': _STRING,
+    'context': _STRING,
+    'tags': _STRINGS
+}, ('word', 'category', 'context', 'tags'))
+
+FEATURE_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    'portuguese_phrases': _object({
+        'phrases': {'type': 'array', 'minItems': 1, 'items': _PHRASE}
+    }, ('phrases',)),
+    'contextual_translation': _object({
+        'translation': _TEXT,
+        'emotional_analysis': _object({'tone': _STRING, 'intensity': _INTENSITY}),
+        'cultural_insights': _STRINGS,
+        'alternatives': _STRINGS,
+        'preservation_notes': _STRINGS
+    }, ('translation', 'cultural_insights')),
+    'emotional_analysis': _object({
+        'primary_emotion': _TEXT,
+        'intensity': _INTENSITY,
+        'secondary_emotions': _STRINGS,
+        'cultural_context': _STRING,
+        'response_suggestions': _STRINGS,
+        'urgency_indicators': _STRINGS
+    }, ('primary_emotion', 'intensity', 'response_suggestions')),
+    'cultural_bridge': _object({
+        'cultural_explanation': _TEXT,
+        'cultural_adaptation': _TEXT,
+        'cultural_differences': _STRINGS,
+        'communication_suggestions': _STRINGS,
+        'misunderstanding_risks': _STRINGS,
+        'preservation_elements': _STRINGS
+    }, ('cultural_explanation', 'cultural_adaptation')),
+    'adaptive_learning': _object({
+        'patterns_identified': _STRINGS,
+        'suggested_adjustments': _STRINGS,
+        'user_preferences': {'type': 'object'},
+        'model_improvements': _STRINGS,
+        'personalization_suggestions': _STRINGS,
+        'learning_metrics': {'type': 'object'}
+    }, ('patterns_identified', 'suggested_adjustments')),
+    'multimodal_fusion': _object({
+        'multimodal_synthesis': _TEXT,
+        'visual_elements': _STRINGS,
+        'audio_elements': _STRINGS,
+        'modality_coherence': {'type': 'string', 'enum': ['low', 'medium', 'high']},
+        'fusion_insights': _STRINGS,
+        'recommendations': _STRINGS
+    }, ('multimodal_synthesis',)),
+    'language_teaching': _object({
+        'vocabulary': _STRINGS,
+        'grammar': _object({'patterns': _STRINGS, 'rules': _STRINGS}),
+        'cultural_context': _STRING,
+        'exercises': _STRINGS,
+        'pronunciation_guide': _object({'tips': _STRINGS}),
+        'progression': _object({'next_steps': _STRINGS}),
+        'lesson_content': _TEXT
+    }, ('vocabulary', 'exercises', 'lesson_content')),
+    'translation_challenges': _object({
+        'challenges': {'type': 'array', 'minItems': 1, 'items': _PHRASE}
+    }, ('challenges',)),
+    'contribution_analysis': _object({
+        'analysis_result': _object({
+            'quality_assessment': _object({'score': _SCORE, 'feedback': _STRING}, ('score', 'feedback')),
+            'context_enhancement': _STRING,
+            'tag_suggestion': _STRINGS,
+            'moderation_flags': _STRINGS,
+            'approval_recommendation': {
+                'type': 'string',
+                'enum': ['pending_community_vote', 'requires_moderator_review']
+            }
+        }, ('quality_assessment', 'approval_recommendation'))
+    }, ('analysis_result',)),
+    'educational_content': _object({
+        'educational_content': _object({
+            'lesson_title': _TEXT,
+            'objectives': _STRINGS,
+            'content': _TEXT,
+            'key_concepts': _STRINGS,
+            'practical_examples': _STRINGS,
+            'assessment_questions': _STRINGS,
+            'cultural_adaptations': _STRINGS
+        }, ('lesson_title', 'objectives', 'content'))
+    }, ('educational_content',)),
+    'gamification_challenge': _object({
+        'challenge': _object({
+            'challenge_type': {
+                'type': 'string',
+                'enum': ['Streak Saver', 'Category Explorer', 'Level Up Push',
+                         'Community Hero', 'Daily Contributor', 'Knowledge Sharer']
+            },
+            'title': _TEXT,
+            'description': _TEXT,
+            'xp_reward': {'type': 'integer', 'minimum': 1, 'maximum': 1000}
+        }, ('challenge_type', 'title', 'description', 'xp_reward'))
+    }, ('challenge',)),
+    'reward_message': _object({
+        'notification': _object({'title': _TEXT, 'body': _TEXT}, ('title', 'body'))
+    }, ('notification',)),
+    'badge_creation': _object({
+        'badge': _object({
+            'name': _TEXT,
+            'description': _TEXT,
+            'icon_suggestion': _TEXT,
+            'category': _STRING
+        }, ('name', 'description', 'icon_suggestion'))
+    }, ('badge',)),
+}
+
+# Compilados uma vez na importação
+_VALIDATORS: Dict[str, SchemaValidator] = {
+    feature: SchemaValidator(schema) for feature, schema in FEATURE_SCHEMAS.items()
+}
+
+
+def feature_schema(feature: str) -> Dict[str, Any]:
+    """Esquema JSON da funcionalidade (enviado no ``format`` do Ollama)"""
+    return FEATURE_SCHEMAS[feature]
+
+
+def get_validator(feature: str) -> SchemaValidator:
+    return _VALIDATORS[feature]
+
+
+def decode_structured(text: Optional[str], feature: str) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """Decodificar e validar a resposta de uma funcionalidade; retorna (objeto ou None, erros)"""
+    if not text:
+        return None, ['resposta vazia']
+    try:
+        # Com ``format`` a resposta é exatamente o objeto
+        value = json.loads(text)
+    except ValueError:
+        # Backends sem decodificação restrita (modelo local): extrair do texto livre
+        value = safe_parse_llm_json(text)
+    if not isinstance(value, dict):
+        return None, ['objeto JSON não encontrado']
+
+    errors = _VALIDATORS[feature].validate(value)
+    if errors:
+        logger.warning(f"⚠️ Resposta de '{feature}' fora do esquema: {'; '.join(errors[:5])}")
+        return None, errors
+    return value, []
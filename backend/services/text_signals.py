@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sinais de contexto e criticidade extraídos do texto em uma única passada
+Hackathon Gemma 3n
+
+As listas de palavras-chave usadas pelo seletor inteligente, pela
+formatação de respostas do GemmaService e pelas rotas de bem-estar são
+compiladas em um único ``KeywordMatcher`` na importação do módulo. Cada
+texto é percorrido uma única vez; o resultado (``TextSignals``)
+responde a todas as perguntas de contexto e criticidade da requisição, e
+fica em cache porque o mesmo prompt é analisado várias vezes por requisição.
+
+Pontuação: cada palavra-chave encontrada conta uma vez, com peso igual ao
+número de palavras da expressão ("primeiros socorros" pesa 2).
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from utils.keyword_matcher import KeywordMatcher
+
+# Grupo -> rótulo -> palavras-chave. A ordem dos rótulos é a prioridade
+# usada por ``TextSignals.first`` e o desempate de ``TextSignals.best``.
+SIGNAL_GROUPS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    # IntelligentModelSelector.detect_criticality_from_text
+    'criticality': OrderedDict([
+        ('critical', (
+            "emergência", "urgente", "perigo", "risco", "alerta", "catástrofe",
+            "desastre", "tsunami", "terremoto", "incêndio", "inundação",
+            "envenenamento", "overdose", "parada cardíaca", "asfixia",
+            "emergency", "urgent", "danger", "risk", "alert", "catastrophe"
+        )),
+        ('high', (
+            "dor", "ferimento", "sangramento", "febre", "infecção", "fratura",
+            "queimadura", "corte", "machucado", "doente", "mal estar",
+            "pain", "injury", "bleeding", "fever", "infection", "fracture",
+            "burn", "cut", "hurt", "sick", "illness"
+        )),
+        ('medium', (
+            "ensinar", "aprender", "estudar", "plantar", "colher", "cultivar",
+            "praga", "doença da planta", "fertilizante", "irrigação",
+            "teach", "learn", "study", "plant", "harvest", "cultivate",
+            "pest", "plant disease", "fertilizer", "irrigation"
+        )),
+    ]),
+    # IntelligentModelSelector.detect_criticality
+    'criticality_basic': OrderedDict([
+        ('critical', (
+            'urgente', 'emergência', 'crítico', 'alerta', 'evacuação',
+            'perigo', 'risco', 'morte', 'ferimento', 'sangramento',
+            'inconsciente', 'parada', 'ataque', 'envenenamento'
+        )),
+        ('high', (
+            'importante', 'sério', 'preocupante', 'ajuda',
+            'problema', 'dificuldade', 'tratamento', 'cuidado'
+        )),
+    ]),
+    # IntelligentModelSelector.detect_context_from_text
+    'context': OrderedDict([
+        ('environmental', (
+            "ambiente", "clima", "tempo", "chuva", "seca", "poluição",
+            "desmatamento", "água", "ar", "solo", "natureza"
+        )),
+        ('emergency', (
+            "emergência", "socorro", "ajuda", "urgente", "911", "192",
+            "bombeiros", "polícia", "ambulância", "resgate"
+        )),
+        ('health', (
+            "saúde", "médico", "hospital", "remédio", "tratamento",
+            "sintoma", "doença", "medicina", "primeiros socorros"
+        )),
+        ('education', (
+            "ensino", "escola", "professor", "aluno", "aprender",
+            "estudar", "lição", "matéria", "educação", "conhecimento",
+            "explique", "como funciona", "fotossíntese", "plantas",
+            "crianças", "simples", "ensinar", "aula", "disciplina"
+        )),
+        ('agriculture', (
+            "agricultura", "plantação", "colheita", "fazenda", "roça",
+            "sementes", "fertilizante", "praga", "irrigação", "cultivo",
+            "solo", "plantio", "milho", "arroz", "mandioca", "ph",
+            "nutrientes", "manejo", "época", "análise", "terra"
+        )),
+        ('accessibility', (
+            "acessibilidade", "deficiência", "inclusão", "adaptação",
+            "voz", "áudio", "visual", "motor", "cognitivo"
+        )),
+    ]),
+    # IntelligentModelSelector.detect_context
+    'context_basic': OrderedDict([
+        ('health', (
+            'médico', 'saúde', 'doença', 'sintoma', 'tratamento',
+            'medicamento', 'hospital', 'doutor', 'enfermeiro',
+            'ferimento', 'dor', 'febre', 'parto', 'gravidez'
+        )),
+        ('agriculture', (
+            'agricultura', 'plantio', 'colheita', 'sementes', 'solo',
+            'irrigação', 'fertilizante', 'praga', 'cultivo',
+            'mandioca', 'arroz', 'milho', 'horta', 'roça'
+        )),
+        ('education', (
+            'educação', 'ensino', 'escola', 'professor', 'aluno',
+            'aula', 'matemática', 'português', 'ciências',
+            'aprender', 'estudar', 'livro', 'material'
+        )),
+        ('environmental', (
+            'ambiente', 'clima', 'tempo', 'chuva', 'seca',
+            'enchente', 'vento', 'temperatura', 'poluição'
+        )),
+    ]),
+    # GemmaService._detect_response_context
+    'response_context': OrderedDict([
+        ('medical', ('médico', 'saúde', 'doença', 'sintoma', 'emergência', 'socorro')),
+        ('education', ('educação', 'escola', 'ensino', 'aprender', 'estudar')),
+        ('agriculture', ('agricultura', 'plantio', 'cultivo', 'solo', 'colheita')),
+    ]),
+    # wellness_routes._is_mental_health_emergency
+    'mental_health': OrderedDict([
+        ('emergency', (
+            'suicídio', 'matar', 'morrer', 'acabar com tudo',
+            'não aguento mais', 'sem saída', 'desespero total'
+        )),
+    ]),
+}
+
+
+def _compile(groups: Dict[str, Dict[str, Tuple[str, ...]]]):
+    matcher = KeywordMatcher(())
+    # palavra-chave normalizada -> [(grupo, rótulo, peso)]
+    index: Dict[str, List[Tuple[str, str, float]]] = {}
+    for group, labels in groups.items():
+        for label, keywords in labels.items():
+            for keyword in keywords:
+                folded = matcher.add(keyword)
+                signal = (group, label, float(len(folded.split())))
+                if signal not in index.setdefault(folded, []):
+                    index[folded].append(signal)
+    return matcher, index
+
+
+_MATCHER, _SIGNAL_INDEX = _compile(SIGNAL_GROUPS)
+
+
+class TextSignals:
+    """Pontuações por grupo e rótulo de um texto já analisado"""
+
+    __slots__ = ('keywords', '_scores')
+
+    def __init__(self, keywords: frozenset):
+        self.keywords = keywords
+        scores: Dict[str, Dict[str, float]] = {}
+        for keyword in keywords:
+            for group, label, weight in _SIGNAL_INDEX[keyword]:
+                group_scores = scores.setdefault(group, {})
+                group_scores[label] = group_scores.get(label, 0.0) + weight
+        self._scores = scores
+
+    def scores(self, group: str) -> Dict[str, float]:
+        """Pontuação de cada rótulo do grupo com ao menos uma palavra-chave encontrada"""
+        return dict(self._scores.get(group, {}))
+
+    def has(self, group: str, label: Optional[str] = None) -> bool:
+        group_scores = self._scores.get(group)
+        if not group_scores:
+            return False
+        return label is None or label in group_scores
+
+    def first(self, group: str, default: Optional[str] = None) -> Optional[str]:
+        """Rótulo de maior prioridade (ordem de declaração) com alguma ocorrência"""
+        group_scores = self._scores.get(group)
+        if group_scores:
+            for label in SIGNAL_GROUPS[group]:
+                if label in group_scores:
+                    return label
+        return default
+
+    def best(self, group: str, default: Optional[str] = None) -> Optional[str]:
+        """Rótulo de maior pontuação; empates ficam com o declarado primeiro"""
+        group_scores = self._scores.get(group)
+        if not group_scores:
+            return default
+        best_label, best_score = default, 0.0
+        for label in SIGNAL_GROUPS[group]:
+            score = group_scores.get(label, 0.0)
+            if score > best_score:
+                best_label, best_score = label, score
+        return best_label
+
+
+@lru_cache(maxsize=256)
+def analyze_text(text: str) -> TextSignals:
+    """Sinais de contexto e criticidade de ``text`` (uma passada, resultado em cache)"""
+    return TextSignals(frozenset(_MATCHER.find(text or '')))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes da ponte síncrona para o loop assíncrono compartilhado
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+import pytest
+
+from services.async_runtime import AsyncRuntime
+from services.request_deadline import Deadline, DeadlineExceeded, current_deadline, deadline_scope
+
+
+@pytest.fixture
+def runtime():
+    runtime = AsyncRuntime(executor_workers=2)
+    yield runtime
+    runtime.stop()
+
+
+def slow(cancelled):
+    async def sleep():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    return sleep()
+
+
+class TestAsyncRuntime:
+
+    def test_returns_result_with_request_deadline(self, runtime):
+        async def remaining():
+            return current_deadline().timeout
+
+        with deadline_scope(Deadline(30)):
+            assert runtime.run(remaining()) == 30
+
+    def test_deadline_cancels_the_coroutine(self, runtime):
+        cancelled = threading.Event()
+
+        with deadline_scope(Deadline(0.05)):
+            with pytest.raises(DeadlineExceeded):
+                runtime.run(slow(cancelled))
+
+        assert cancelled.wait(5)
+
+    def test_timeout_without_deadline_cancels_and_reraises(self, runtime):
+        cancelled = threading.Event()
+
+        with pytest.raises(concurrent.futures.TimeoutError):
+            runtime.run(slow(cancelled), timeout=0.05)
+
+        assert cancelled.wait(5)
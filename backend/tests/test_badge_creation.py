@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes da criação de badges (rota de gamificação e fallback sem o modelo)
+"""
+
+import logging
+
+import pytest
+from flask import Flask
+
+from routes import collaborative_routes
+from routes.collaborative_routes import collaborative_bp
+from services.async_runtime import run_async
+from services.gemma_service import GemmaService
+
+
+def gemma_without_model(failure):
+    """GemmaService sem Ollama: a chamada ao modelo devolve vazio ou lança ``failure``"""
+    service = GemmaService.__new__(GemmaService)
+    service.logger = logging.getLogger('test_badge_creation')
+
+    async def make_ollama_request(prompt, criticality=None, response_format=None):
+        if failure is not None:
+            raise failure
+        return None
+
+    service._make_ollama_request = make_ollama_request
+    return service
+
+
+@pytest.fixture(params=[None, RuntimeError('Ollama fora do ar')], ids=['resposta vazia', 'erro do modelo'])
+def gemma(request):
+    return gemma_without_model(request.param)
+
+
+class TestCreateBadge:
+
+    def test_fallback_keeps_the_category(self, gemma):
+        result = run_async(gemma.create_badge('100 traduções aprovadas', category='saúde'))
+
+        assert result['success'] is True
+        assert result['fallback'] is True
+        assert result['badge']['name'].endswith(' - Saúde')
+
+    def test_route_returns_fallback_badge(self, gemma, monkeypatch):
+        monkeypatch.setattr(collaborative_routes, 'get_gemma_service', lambda: gemma)
+        app = Flask(__name__)
+        app.register_blueprint(collaborative_bp, url_prefix='/api')
+
+        response = app.test_client().post('/api/gamification/badge', json={
+            'achievement_data': {'criteria': '10 traduções', 'category': 'geral'}
+        })
+
+        assert response.status_code == 200
+        assert response.get_json()['badge']['name'] == 'Contribuidor Bronze'
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes da geração em cascata (verificador de rascunho, métricas e roteamento)
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from config.settings import BackendConfig
+from services.cascade import CascadeMetrics, DraftChecker, DraftVerdict, current_endpoint
+from services.gemma_service import GemmaService
+from services.intelligent_model_selector import CriticalityLevel
+
+ANSWER = (
+    "Para tratar a malária procure o centro de saúde mais próximo. O tratamento com artemisinina "
+    "dura três dias e deve ser completado mesmo que a febre passe."
+)
+
+
+class TestDraftChecker:
+
+    checker = DraftChecker(min_chars=80)
+
+    def test_good_draft_is_accepted(self):
+        assert self.checker.check(ANSWER) == DraftVerdict(True)
+
+    @pytest.mark.parametrize('text, done_reason, reasons', [
+        ('', None, ('empty',)),
+        ('   \n', None, ('empty',)),
+        ('Beba água.', None, ('too_short',)),
+        (ANSWER, 'length', ('truncated',)),
+        (ANSWER + " Como modelo de linguagem não posso fornecer diagnóstico.", None, ('refusal',)),
+        (ANSWER + " Talvez seja dengue, não tenho certeza.", None, ('uncertain',)),
+        ("Lave as mãos com água e sabão.\n" * 5, None, ('repetitive',)),
+    ])
+    def test_reject_reasons(self, text, done_reason, reasons):
+        verdict = self.checker.check(text, done_reason=done_reason)
+
+        assert verdict.accepted is False
+        assert verdict.reasons == reasons
+
+    def test_single_uncertainty_marker_is_tolerated(self):
+        assert self.checker.check(ANSWER + " Talvez demore mais.").accepted
+
+    @pytest.mark.parametrize('text, required_keys, reasons', [
+        ('{"translation": "Bom dia", "confidence": 0.9}', ('translation',), ()),
+        ('```json\n{"translation": "Bom dia"}\n```', (), ()),
+        ('Bom dia em crioulo é "bon dia".', (), ('invalid_json',)),
+        ('{"confidence": 0.9}', ('translation', 'confidence'), ('missing_keys',)),
+    ])
+    def test_json_drafts(self, text, required_keys, reasons):
+        # Rascunhos JSON curtos não são reprovados pelo tamanho
+        verdict = self.checker.check(text, expect_json=True, required_keys=required_keys)
+
+        assert verdict.reasons == reasons
+        assert verdict.accepted is not reasons
+
+    def test_expects_json(self):
+        assert DraftChecker.expects_json("Traduza a frase", "Responda APENAS em JSON")
+        assert not DraftChecker.expects_json("Explique a fotossíntese")
+
+    def test_current_endpoint_outside_request(self):
+        assert current_endpoint() == 'internal'
+
+
+class TestCascadeMetrics:
+
+    def test_accepted_drafts_save_against_the_large_baseline(self):
+        metrics = CascadeMetrics()
+        metrics.record_large('medical.consultation', 10.0)
+
+        metrics.record('medical.consultation', 3.0, DraftVerdict(True))
+
+        stats = metrics.get_stats()['endpoints']['medical.consultation']
+        assert stats['escalation_rate'] == 0.0
+        assert stats['baseline_large_ms'] == 10000.0
+        assert stats['avg_latency_saved_ms'] == 7000.0
+
+    def test_escalated_draft_is_a_negative_saving(self):
+        metrics = CascadeMetrics()
+
+        metrics.record('education.lesson', 2.0, DraftVerdict(False, ('too_short',)), large_seconds=9.0)
+
+        stats = metrics.get_stats()['endpoints']['education.lesson']
+        assert stats['escalated'] == 1
+        assert stats['latency_saved_ms_total'] == -2000.0
+        assert stats['avg_large_ms'] == 9000.0
+        assert stats['escalation_reasons'] == {'too_short': 1}
+
+    def test_without_baseline_no_saving_is_recorded(self):
+        metrics = CascadeMetrics()
+
+        metrics.record('agriculture.advice', 2.0, DraftVerdict(True))
+
+        stats = metrics.get_stats()['endpoints']['agriculture.advice']
+        assert stats['avg_latency_saved_ms'] is None
+        assert stats['latency_saved_ms_total'] == 0.0
+
+    def test_other_endpoints_fall_back_to_the_global_baseline(self):
+        metrics = CascadeMetrics(ewma_alpha=0.5)
+        metrics.record_large('a', 10.0)
+        metrics.record_large('a', 6.0)
+
+        metrics.record('b', 1.0, DraftVerdict(True))
+
+        stats = metrics.get_stats()['endpoints']
+        assert stats['b']['baseline_large_ms'] == 8000.0
+        assert stats['b']['avg_latency_saved_ms'] == 7000.0
+        assert stats['b']['avg_draft_ms'] == 1000.0
+
+
+class TestCascadeRouting:
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        monkeypatch.setattr(BackendConfig, 'LATENCY_AWARE_SELECTION', False)
+        monkeypatch.setattr(BackendConfig, 'CASCADE_ENABLED', True)
+        backend = SimpleNamespace(system_config={}, fallback_models=[], ollama_available=True,
+                                  default_ollama_model='gemma3n:e4b')
+        service = GemmaService(domain='general', backend=backend)
+        service._check_ollama_model_available = lambda model: True
+        service._ollama_fallback_chain = lambda primary, domain: ()
+        return service
+
+    def route(self, service, criticality):
+        return service._resolve_routing("Como tratar a febre?", auto_select_model=False, ollama_model='gemma3n:e4b',
+                                        cascade=True, criticality=criticality)
+
+    @pytest.mark.parametrize('criticality', [CriticalityLevel.MEDIUM, CriticalityLevel.HIGH])
+    def test_large_model_gets_a_draft(self, service, criticality):
+        assert self.route(service, criticality).draft_model == BackendConfig.CASCADE_DRAFT_MODEL
+
+    def test_critical_requests_skip_the_draft(self, service):
+        routing = self.route(service, CriticalityLevel.CRITICAL)
+
+        assert routing.draft_model is None
+        assert routing.cascade is False
+
+    def test_detected_emergency_skips_the_draft(self, service):
+        routing = service._resolve_routing("Emergência: a criança não respira!", auto_select_model=False,
+                                           ollama_model='gemma3n:e4b', cascade=True)
+
+        assert routing.cascade is False
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do circuit breaker do Ollama (transições, limiares e registro)
+"""
+
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from services import circuit_breaker
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerRegistry, CircuitOpen
+from services.gemma_service import GemmaService
+from services.ollama_client import OllamaClient, OllamaResponseError
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    return clock
+
+
+def make_breaker(**settings):
+    defaults = dict(failure_rate=0.5, slow_call_seconds=10.0, slow_call_rate=0.8,
+                    window_size=4, min_calls=4, open_seconds=30.0, half_open_calls=1)
+    defaults.update(settings)
+    return CircuitBreaker('ollama', **defaults)
+
+
+def call(breaker, failed=False, duration=0.1):
+    breaker.before_call()
+    if failed:
+        breaker.record_failure(duration)
+    else:
+        breaker.record_success(duration)
+
+
+def trip(breaker):
+    for _ in range(breaker.min_calls):
+        call(breaker, failed=True)
+    assert breaker.state == OPEN
+
+
+class TestCircuitBreaker:
+
+    def test_needs_min_calls_before_opening(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            call(breaker, failed=True)
+
+        assert breaker.state == CLOSED
+        call(breaker)
+        assert breaker.state == OPEN
+
+    def test_failure_rate_below_threshold_stays_closed(self, clock):
+        breaker = make_breaker(window_size=10)
+        for failed in (False, False, True, False, False, True, False):
+            call(breaker, failed=failed)
+
+        assert breaker.state == CLOSED
+        assert breaker.get_stats()['failure_rate'] == pytest.approx(2 / 7, abs=1e-3)
+
+    def test_window_forgets_old_calls(self, clock):
+        breaker = make_breaker(window_size=4)
+        for failed in (True, False, False, False, False, False):
+            call(breaker, failed=failed)
+        call(breaker, failed=True)
+
+        assert breaker.state == CLOSED
+
+    def test_slow_calls_open_the_circuit(self, clock):
+        breaker = make_breaker(slow_call_rate=0.75)
+        for duration in (12.0, 15.0, 0.5, 11.0):
+            call(breaker, duration=duration)
+
+        assert breaker.state == OPEN
+        assert breaker.get_stats()['failures'] == 0
+
+    def test_open_circuit_fails_fast(self, clock):
+        breaker = make_breaker()
+        trip(breaker)
+        clock.now += 10
+
+        with pytest.raises(CircuitOpen) as info:
+            breaker.before_call()
+
+        assert info.value.name == 'ollama'
+        assert info.value.retry_after == pytest.approx(20)
+        stats = breaker.get_stats()
+        assert stats['rejected'] == 1
+        assert stats['retry_after'] == 20.0
+
+    def test_half_open_success_closes(self, clock):
+        breaker = make_breaker()
+        trip(breaker)
+        clock.now += 30
+        assert breaker.state == HALF_OPEN
+
+        breaker.before_call()
+        # Só uma chamada de teste por vez no meio-aberto
+        with pytest.raises(CircuitOpen):
+            breaker.before_call()
+        breaker.record_success(0.1)
+
+        assert breaker.state == CLOSED
+        assert breaker.get_stats()['window_calls'] == 0
+        assert breaker.get_stats()['transitions'] == {
+            'closed->open': 1, 'open->half_open': 1, 'half_open->closed': 1
+        }
+
+    @pytest.mark.parametrize('failed, duration', [(True, 0.1), (False, 12.0)])
+    def test_half_open_failure_or_slow_call_reopens(self, clock, failed, duration):
+        breaker = make_breaker()
+        trip(breaker)
+        clock.now += 30
+
+        call(breaker, failed=failed, duration=duration)
+
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpen):
+            breaker.before_call()
+
+    def test_cancel_returns_the_trial(self, clock):
+        breaker = make_breaker()
+        trip(breaker)
+        clock.now += 30
+
+        breaker.before_call()
+        breaker.cancel()
+        breaker.before_call()
+
+        assert breaker.state == HALF_OPEN
+
+    def test_late_result_while_open_is_ignored(self, clock):
+        breaker = make_breaker()
+        breaker.before_call()
+        trip(breaker)
+
+        breaker.record_success(0.1)
+
+        assert breaker.state == OPEN
+
+
+class TestCircuitBreakerRegistry:
+
+    def test_breakers_are_shared_by_name(self):
+        registry = CircuitBreakerRegistry(min_calls=2, open_seconds=5.0)
+        backend = registry.get('ollama')
+
+        assert registry.get('ollama') is backend
+        assert registry.get('ollama:gemma3n:e4b') is not backend
+        assert backend.min_calls == 2
+
+    def test_model_breaker_opens_independently(self):
+        registry = CircuitBreakerRegistry(min_calls=2)
+        model = registry.get('ollama:gemma3n:e4b')
+        for _ in range(2):
+            call(model, failed=True)
+
+        stats = registry.get_stats()
+        assert list(stats) == ['ollama:gemma3n:e4b']
+        assert stats['ollama:gemma3n:e4b']['state'] == OPEN
+        registry.get('ollama').before_call()
+
+
+class FakeStreamResponse:
+
+    def __init__(self, status_code, lines=(), text=''):
+        self.status_code = status_code
+        self.text = text
+        self._lines = lines
+
+    def iter_lines(self):
+        return iter(self._lines)
+
+    def close(self):
+        pass
+
+
+class TestOllamaStreamGuard:
+    """Erros do stream passam pelos disjuntores como as chamadas bloqueantes"""
+
+    @pytest.fixture
+    def service(self):
+        service = GemmaService.__new__(GemmaService)
+        service.logger = logging.getLogger('test_circuit_breaker')
+        service.backend = SimpleNamespace(circuit_breakers=CircuitBreakerRegistry(min_calls=1))
+        return service
+
+    def stream(self, service, response):
+        client = OllamaClient('http://ollama.test')
+        client.session = SimpleNamespace(post=lambda *args, **kwargs: response)
+        with service._ollama_guard('gemma3n:e4b'):
+            return list(client.stream('/api/chat', json={}))
+
+    def test_missing_model_only_opens_the_model_breaker(self, service):
+        with pytest.raises(OllamaResponseError) as info:
+            self.stream(service, FakeStreamResponse(404, text='model not found'))
+
+        assert info.value.status_code == 404
+        stats = service.circuit_breakers.get_stats()
+        assert stats['ollama']['state'] == CLOSED
+        assert stats['ollama:gemma3n:e4b']['state'] == OPEN
+
+    def test_server_error_opens_the_backend_breaker(self, service):
+        with pytest.raises(OllamaResponseError):
+            self.stream(service, FakeStreamResponse(500, text='erro interno'))
+
+        assert service.circuit_breakers.get_stats()['ollama']['state'] == OPEN
+
+    def test_successful_stream(self, service):
+        lines = [json.dumps({'message': {'content': 'Olá'}}).encode(), b'', json.dumps({'done': True}).encode()]
+
+        assert self.stream(service, FakeStreamResponse(200, lines)) == [{'message': {'content': 'Olá'}}, {'done': True}]
+        assert service.circuit_breakers.get_stats()['ollama']['failures'] == 0
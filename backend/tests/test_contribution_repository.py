@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do repositório SQLite de contribuições e da busca FTS5
+"""
+
+import threading
+import uuid
+
+import pytest
+
+from database.contribution_repository import APPROVE_THRESHOLD, REJECT_THRESHOLD, ContributionRepository
+from database.contribution_search import SEARCH_SCHEMA_VERSION
+
+
+def make_contribution(word, translation=None, context='', status='approved', **fields):
+    contribution = {
+        'id': str(uuid.uuid4()),
+        'word': word,
+        'translation': translation or f"{word}-gcr",
+        'source_language': 'pt',
+        'target_language': 'gcr',
+        'category': 'geral',
+        'context': context,
+        'contributor_id': 'user1',
+        'status': status
+    }
+    contribution.update(fields)
+    return contribution
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = ContributionRepository(str(tmp_path / 'contributions.db'))
+    yield repository
+    repository.close()
+
+
+class TestContributionRepository:
+
+    def test_add_and_get(self, repository):
+        contribution = make_contribution('água', 'yagu', context='para beber', status='pending',
+                                         audio_url='/audio/agua.mp3')
+        repository.add(contribution)
+
+        stored = repository.get(contribution['id'])
+
+        assert stored['word'] == 'água'
+        assert stored['context'] == 'para beber'
+        assert stored['status'] == 'pending'
+        assert stored['votes'] == {'up': 0, 'down': 0}
+        assert stored['verified'] is False
+        assert stored['suggested_tags'] == []
+        assert repository.get('inexistente') is None
+
+    def test_votes_approve_at_threshold(self, repository):
+        contribution = make_contribution('febre', status='pending')
+        repository.add(contribution)
+
+        assert repository.vote(contribution['id'], 'down') == {'votes': {'up': 0, 'down': 1}, 'status': 'pending'}
+        for _ in range(APPROVE_THRESHOLD - 1):
+            assert repository.vote(contribution['id'], 'up')['status'] == 'pending'
+        assert repository.vote(contribution['id'], 'up') == {
+            'votes': {'up': APPROVE_THRESHOLD, 'down': 1}, 'status': 'approved'
+        }
+        assert repository.get(contribution['id'])['verified'] is True
+        assert repository.vote('inexistente', 'up') is None
+
+    def test_concurrent_votes_are_not_lost(self, repository):
+        contribution = make_contribution('chuva', status='pending')
+        repository.add(contribution)
+
+        def vote():
+            for _ in range(25):
+                repository.vote(contribution['id'], 'down')
+            repository.close()
+
+        threads = [threading.Thread(target=vote) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        assert repository.get(contribution['id'])['votes'] == {'up': 0, 'down': 100}
+
+    def test_reports_reject_at_threshold(self, repository):
+        contribution = make_contribution('sol')
+        repository.add(contribution)
+
+        for index in range(REJECT_THRESHOLD):
+            assert repository.report(contribution['id'], f'motivo {index}', reporter_id='user2')
+
+        stored = repository.get(contribution['id'])
+        assert stored['status'] == 'rejected'
+        assert [report['reason'] for report in stored['reports']] == ['motivo 0', 'motivo 1', 'motivo 2']
+        assert stored['reports'][0]['reporter_id'] == 'user2'
+        assert repository.report('inexistente', 'spam') is False
+
+    def test_analysis_keeps_status_set_by_votes(self, repository):
+        contribution = make_contribution('lua', status='pending')
+        repository.add(contribution)
+        for _ in range(APPROVE_THRESHOLD):
+            repository.vote(contribution['id'], 'up')
+
+        repository.apply_analysis({**contribution, 'context': 'vista à noite', 'status': 'pending',
+                                   'suggested_tags': ['céu']})
+
+        stored = repository.get(contribution['id'])
+        assert stored['status'] == 'approved'
+        assert stored['context'] == 'vista à noite'
+        assert stored['suggested_tags'] == ['céu']
+        assert [result['id'] for result in repository.search('noite')] == [contribution['id']]
+
+    def test_cursor_pagination(self, repository):
+        for index in range(5):
+            repository.add(make_contribution(f'palavra{index}', category='saúde' if index % 2 else 'geral'))
+
+        first, cursor = repository.list_contributions(limit=2)
+        second, cursor = repository.list_contributions(limit=2, after=cursor)
+        last, end = repository.list_contributions(limit=2, after=cursor)
+
+        assert [c['word'] for c in first + second + last] == [f'palavra{index}' for index in range(5)]
+        assert end is None
+        assert [c['word'] for c in repository.list_contributions(limit=2, offset=3)[0]] == ['palavra3', 'palavra4']
+        assert [c['word'] for c in repository.list_contributions(category='saúde')[0]] == ['palavra1', 'palavra3']
+
+    def test_count_follows_status_changes(self, repository):
+        pending = make_contribution('casa', status='pending')
+        repository.add(pending)
+        repository.add(make_contribution('rio', target_language='ff'))
+
+        assert repository.count() == 2
+        assert repository.count(status='pending') == 1
+        assert repository.count(language='ff') == 1
+
+        for _ in range(APPROVE_THRESHOLD):
+            repository.vote(pending['id'], 'up')
+        assert repository.count(status='pending') == 0
+        assert repository.count(status='approved') == 2
+
+    def test_community_stats_and_language_progress(self, repository):
+        repository.add(make_contribution('mãe', category='família', audio_url='/a.mp3', verified=True))
+        repository.add(make_contribution('pai', category='família', contributor_id='user2'))
+        repository.add(make_contribution('mesa', contributor_id='anonymous'))
+        repository.add(make_contribution('porta', status='pending', contributor_id='user3'))
+
+        stats = repository.community_stats()
+        assert stats['total_contributions'] == 3
+        assert stats['pending_contributions'] == 1
+        assert stats['active_contributors'] == 3
+        assert stats['top_contributors'] == [{'id': 'user1', 'contributions': 1}, {'id': 'user2', 'contributions': 1}]
+        assert sorted(stats['languages_supported']) == ['gcr', 'pt']
+        assert sorted(stats['categories']) == ['família', 'geral']
+
+        total, categories = repository.language_progress('gcr')
+        assert total == 3
+        assert categories['família'] == {'total': 2, 'with_audio': 1, 'verified': 1}
+
+    def test_existing_words(self, repository):
+        repository.add(make_contribution('Bom dia'))
+
+        assert repository.existing_words('pt', 'gcr', ['bom dia', 'boa noite']) == {'bom dia'}
+        assert repository.existing_words('pt', 'ff', ['bom dia']) == set()
+        assert repository.existing_words('pt', 'gcr', []) == set()
+
+    def test_totals_are_rebuilt_for_older_files(self, tmp_path):
+        path = str(tmp_path / 'contributions.db')
+        repository = ContributionRepository(path)
+        repository.add(make_contribution('peixe'))
+        repository.add(make_contribution('arroz', status='pending'))
+        repository._connection().execute("DELETE FROM contribution_totals")
+        repository.close()
+
+        repository = ContributionRepository(path)
+
+        assert repository.count(status='approved') == 1
+        assert repository.count(status='pending') == 1
+        repository.close()
+
+
+class TestContributionSearch:
+
+    def test_exact_word_outranks_newer_context_matches(self, repository):
+        repository.add(make_contribution('água', 'yagu'))
+        for index in range(600):
+            repository.add(make_contribution(f'palavra{index}', context='usada perto da água'))
+
+        results = repository.search('agua', limit=5)
+
+        assert results[0]['word'] == 'água'
+        assert len(results) == 5
+
+    def test_context_matches_complete_the_page(self, repository):
+        repository.add(make_contribution('mercado', 'feira'))
+        repository.add(make_contribution('dinheiro', context='usado no mercado'))
+
+        words = [result['word'] for result in repository.search('mercado')]
+
+        assert words == ['mercado', 'dinheiro']
+
+    def test_accents_and_prefixes(self, repository):
+        repository.add(make_contribution('saúde', 'saudi'))
+
+        assert [result['word'] for result in repository.search('saude')] == ['saúde']
+        assert [result['word'] for result in repository.search('sau')] == ['saúde']
+
+    def test_creole_spelling_falls_back_to_ngrams(self, repository):
+        repository.add(make_contribution('comida', 'kumida'))
+        repository.add(make_contribution('casa', 'kasa'))
+
+        assert [result['word'] for result in repository.search('kumidas')] == ['comida']
+
+    def test_only_approved_contributions_are_indexed(self, repository):
+        pending = make_contribution('febre', status='pending')
+        repository.add(pending)
+        assert repository.search('febre') == []
+
+        for _ in range(3):
+            repository.vote(pending['id'], 'up')
+        assert [result['id'] for result in repository.search('febre')] == [pending['id']]
+
+        for _ in range(3):
+            repository.report(pending['id'], 'tradução errada')
+        assert repository.search('febre') == []
+
+    def test_language_filter(self, repository):
+        repository.add(make_contribution('casa', target_language='ff'))
+        repository.add(make_contribution('casa', target_language='gcr'))
+
+        results = repository.search('casa', language='ff')
+
+        assert [result['target_language'] for result in results] == ['ff']
+
+    def test_rank_weights_are_migrated(self, tmp_path):
+        path = str(tmp_path / 'contributions.db')
+        repository = ContributionRepository(path)
+        connection = repository._connection()
+        connection.execute("DELETE FROM contributions_fts_config WHERE k = 'rank'")
+        connection.execute("PRAGMA user_version = 2")
+        connection.commit()
+        repository.close()
+
+        repository = ContributionRepository(path)
+        connection = repository._connection()
+        rank = connection.execute("SELECT v FROM contributions_fts_config WHERE k = 'rank'").fetchone()
+
+        assert rank == ('bm25(4.0, 4.0, 1.0)',)
+        assert connection.execute("PRAGMA user_version").fetchone()[0] == SEARCH_SCHEMA_VERSION
+        repository.close()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do agendador de admissão de gerações (prioridade, fila e rejeições)
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+from services.generation_scheduler import (
+    GenerationRejected, GenerationScheduler, mark_request_rejected, register_admission_handlers
+)
+from services.intelligent_model_selector import CriticalityLevel
+from services.request_deadline import Deadline, DeadlineExceeded, deadline_scope
+
+CRITICAL, HIGH, MEDIUM, LOW = (CriticalityLevel.CRITICAL, CriticalityLevel.HIGH,
+                               CriticalityLevel.MEDIUM, CriticalityLevel.LOW)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condição não atingida")
+        time.sleep(0.001)
+
+
+class Busy:
+    """Ocupa o único slot até ``release()``; os pedidos enfileirados registram a ordem de admissão"""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.order = []
+        self.errors = {}
+        self.threads = []
+        self._release = threading.Event()
+        self._hold(CRITICAL, 'busy')
+        wait_for(lambda: scheduler.get_stats()['running'] == 1)
+
+    def _hold(self, criticality, name):
+        def run():
+            try:
+                with self.scheduler.slot(criticality):
+                    self.order.append(name)
+                    if name == 'busy':
+                        self._release.wait(5)
+            except Exception as e:
+                self.errors[name] = e
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.threads.append(thread)
+
+    def enqueue(self, criticality, name):
+        queued, rejected = self.scheduler.get_stats()['queued'], len(self.errors)
+        self._hold(criticality, name)
+        # Na fila, ou rejeitado (ele mesmo ou quem ele substituiu)
+        wait_for(lambda: self.scheduler.get_stats()['queued'] > queued or len(self.errors) > rejected)
+
+    def release(self):
+        self._release.set()
+        for thread in self.threads:
+            thread.join(5)
+
+
+class TestPriority:
+
+    def test_urgent_requests_are_served_first(self):
+        busy = Busy(GenerationScheduler(max_concurrency=1))
+        busy.enqueue(LOW, 'low')
+        busy.enqueue(MEDIUM, 'medium')
+        busy.enqueue(CRITICAL, 'critical')
+        busy.enqueue(HIGH, 'high')
+        busy.release()
+
+        assert busy.order == ['busy', 'critical', 'high', 'medium', 'low']
+
+    def test_same_class_is_first_come_first_served(self):
+        busy = Busy(GenerationScheduler(max_concurrency=1))
+        for name in ('a', 'b', 'c'):
+            busy.enqueue(MEDIUM, name)
+        busy.release()
+
+        assert busy.order == ['busy', 'a', 'b', 'c']
+
+    def test_waiting_requests_age(self):
+        busy = Busy(GenerationScheduler(max_concurrency=1, aging_seconds=0.01))
+        busy.enqueue(LOW, 'low')
+        time.sleep(0.05)
+        busy.enqueue(CRITICAL, 'critical')
+        busy.release()
+
+        assert busy.order == ['busy', 'low', 'critical']
+
+
+class TestRejection:
+
+    def test_max_wait_rejects_with_retry_after(self):
+        scheduler = GenerationScheduler(max_concurrency=1, max_wait={'low': 0.05})
+        busy = Busy(scheduler)
+        busy.enqueue(LOW, 'low')
+        wait_for(lambda: 'low' in busy.errors)
+        busy.release()
+
+        error = busy.errors['low']
+        assert isinstance(error, GenerationRejected)
+        assert error.reason == 'tempo máximo de espera excedido'
+        assert error.retry_after >= 1
+        assert scheduler.get_stats()['classes']['low']['rejected_timeout'] == 1
+
+    def test_full_queue_rejects_equal_priority(self):
+        scheduler = GenerationScheduler(max_concurrency=1, max_queue=1)
+        busy = Busy(scheduler)
+        busy.enqueue(MEDIUM, 'first')
+
+        with pytest.raises(GenerationRejected, match='fila de geração cheia'):
+            scheduler._acquire(MEDIUM)
+        busy.release()
+
+        assert busy.order == ['busy', 'first']
+
+    def test_urgent_request_displaces_least_urgent(self):
+        scheduler = GenerationScheduler(max_concurrency=1, max_queue=2)
+        busy = Busy(scheduler)
+        busy.enqueue(LOW, 'low')
+        busy.enqueue(MEDIUM, 'medium')
+        busy.enqueue(CRITICAL, 'critical')
+        busy.release()
+
+        assert busy.errors['low'].reason == 'substituído por pedido mais urgente'
+        assert busy.order == ['busy', 'critical', 'medium']
+
+    def test_expired_deadline_leaves_the_queue(self):
+        scheduler = GenerationScheduler(max_concurrency=1)
+        busy = Busy(scheduler)
+        deadline = Deadline(5)
+        errors = []
+
+        def wait_in_queue():
+            with deadline_scope(deadline):
+                try:
+                    scheduler._acquire(MEDIUM)
+                except DeadlineExceeded as e:
+                    errors.append(e)
+
+        thread = threading.Thread(target=wait_in_queue)
+        thread.start()
+        wait_for(lambda: scheduler.get_stats()['queued'] == 1)
+        deadline.cancel('cliente desconectou')
+        thread.join(5)
+        busy.release()
+
+        assert [e.reason for e in errors] == ['cliente desconectou']
+        assert scheduler.get_stats()['classes']['medium']['abandoned'] == 1
+        assert scheduler.depth() == 0
+
+
+class TestSlot:
+
+    def test_nested_slot_is_reentrant(self):
+        scheduler = GenerationScheduler(max_concurrency=1)
+
+        with scheduler.slot(HIGH):
+            with scheduler.slot(LOW):
+                assert scheduler.get_stats()['running'] == 1
+
+        stats = scheduler.get_stats()
+        assert stats['running'] == 0
+        assert stats['classes']['high']['admitted'] == 1
+        assert stats['classes']['low']['admitted'] == 0
+
+    def test_async_slot(self):
+        scheduler = GenerationScheduler(max_concurrency=1)
+        running = []
+
+        async def generate(name):
+            async with scheduler.async_slot(MEDIUM):
+                running.append(scheduler.get_stats()['running'])
+                await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(*(generate(i) for i in range(3)))
+
+        asyncio.run(main())
+
+        assert running == [1, 1, 1]
+        assert scheduler.get_stats()['classes']['medium']['admitted'] == 3
+
+    def test_estimate_wait(self):
+        scheduler = GenerationScheduler(max_concurrency=1)
+        assert scheduler.estimate_wait(LOW) == 0.0
+
+        busy = Busy(scheduler)
+        busy.enqueue(MEDIUM, 'medium')
+        low, critical = scheduler.estimate_wait(LOW), scheduler.estimate_wait(CRITICAL)
+        busy.release()
+
+        assert low > critical > 0
+
+
+class TestAdmissionHandlers:
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        register_admission_handlers(app)
+        rejection = GenerationRejected(LOW, 7, 'fila de geração cheia')
+
+        @app.route('/raise')
+        def raise_rejection():
+            raise rejection
+
+        @app.route('/fallback')
+        def swallowed_rejection():
+            # Rota que captura o erro e monta uma resposta de fallback
+            mark_request_rejected(rejection)
+            return jsonify({'success': True, 'response': 'fallback'})
+
+        @app.route('/ok')
+        def ok():
+            return jsonify({'success': True})
+
+        return app.test_client()
+
+    @pytest.mark.parametrize('path', ['/raise', '/fallback'])
+    def test_rejection_becomes_503(self, client, path):
+        response = client.get(path)
+
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '7'
+        assert response.get_json()['error'] == GenerationRejected.ERROR_CODE
+
+    def test_admitted_request_is_untouched(self, client):
+        assert client.get('/ok').status_code == 200
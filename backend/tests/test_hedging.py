@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes das gerações com prazo (hedging) dos endpoints de emergência
+"""
+
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from routes.medical_routes import medical_bp
+from routes.voice_guide_routes import voice_guide_bp
+from services.hedging import CANCELLED, DONE, PENDING, HedgedGenerations, get_hedged_generations
+
+
+class RecordingGemma:
+    """Serviço Gemma falso que registra a thread e o endpoint de cada geração"""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_response(self, prompt, system_prompt=None, **kwargs):
+        self.calls.append((threading.current_thread().name, kwargs.get('endpoint')))
+        return {'success': True, 'response': 'Orientação do modelo'}
+
+
+@pytest.fixture
+def gemma():
+    return RecordingGemma()
+
+
+@pytest.fixture
+def hedged_client(gemma):
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.register_blueprint(medical_bp, url_prefix='/api')
+    app.register_blueprint(voice_guide_bp, url_prefix='/api')
+    app.gemma_service = gemma
+    return app.test_client()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condição não atingida")
+        time.sleep(0.001)
+
+
+def _errors(endpoint):
+    return get_hedged_generations().get_stats()['endpoints'].get(endpoint, {}).get('errors', 0)
+
+
+class TestHedgedEmergencyRoutes:
+    """A geração roda no pool do hedging, sem contexto de requisição"""
+
+    def test_medical_emergency_uses_model(self, hedged_client, gemma):
+        errors = _errors('medical_emergency')
+        response = hedged_client.post('/api/medical/emergency', json={
+            'emergency_type': 'sangramento', 'description': 'corte profundo no braço'
+        })
+        data = response.get_json()['data']
+
+        assert response.status_code == 200
+        assert data['gemma_used'] is True
+        assert data['ai_guidance'] == 'Orientação do modelo'
+        assert _errors('medical_emergency') == errors
+        thread_name, endpoint = gemma.calls[-1]
+        assert thread_name.startswith('hedged-generation')
+        assert endpoint == 'medical.emergency_guidance'
+
+    def test_first_aid_uses_model(self, hedged_client, gemma):
+        errors = _errors('medical_first_aid')
+        response = hedged_client.post('/api/medical/first-aid', json={'situation': 'queimadura'})
+        data = response.get_json()['data']
+
+        assert response.status_code == 200
+        assert data['ai_guidance'] == 'Orientação do modelo'
+        assert data['model_pending'] is None
+        assert _errors('medical_first_aid') == errors
+        assert gemma.calls[-1][1] == 'medical.first_aid_guide'
+
+    def test_voice_guide_emergency_uses_model(self, hedged_client, gemma):
+        errors = _errors('voice_guide_emergency')
+        response = hedged_client.post('/api/voice-guide/emergency', json={
+            'emergency_type': 'medical', 'user_condition': 'conscious'
+        })
+        data = response.get_json()['data']
+
+        assert response.status_code == 200
+        assert data['ai_guidance'] == 'Orientação do modelo'
+        assert data['model_pending'] is None
+        assert _errors('voice_guide_emergency') == errors
+        assert gemma.calls[-1][1] == 'voice_guide.emergency_voice_assistance'
+
+
+class TestHedgedGenerations:
+
+    def test_completed_within_deadline(self):
+        hedged = HedgedGenerations(deadlines={'teste': 1.0}, max_workers=1)
+        outcome = hedged.run('teste', lambda: {'success': True})
+
+        assert outcome.completed
+        assert outcome.result == {'success': True}
+        assert outcome.ticket is None
+        assert hedged.get_stats()['endpoints']['teste']['hits'] == 1
+
+    def test_missed_deadline_becomes_ticket(self):
+        release = threading.Event()
+        hedged = HedgedGenerations(deadlines={'teste': 0.05}, max_workers=1)
+        outcome = hedged.run('teste', lambda: release.wait(5) and {'success': True})
+
+        assert not outcome.completed
+        assert outcome.ticket is not None
+        release.set()
+        assert hedged.wait(hedged.get_ticket(outcome.ticket.id), timeout=5) == DONE
+        assert hedged.get_stats()['endpoints']['teste']['misses'] == 1
+
+    def test_failure_counts_as_error(self):
+        hedged = HedgedGenerations(deadlines={'teste': 1.0}, max_workers=1)
+
+        def fail():
+            raise RuntimeError('modelo indisponível')
+
+        outcome = hedged.run('teste', fail)
+
+        assert not outcome.completed
+        assert hedged.get_stats()['endpoints']['teste']['errors'] == 1
+
+    def test_unclaimed_ticket_is_cancelled_without_new_calls(self):
+        release = threading.Event()
+        hedged = HedgedGenerations(deadlines={'teste': 0.05}, max_workers=1, result_ttl=0.3, claim_seconds=0.1)
+        outcome = hedged.run('teste', lambda: release.wait(5) and {'success': True})
+
+        wait_for(lambda: outcome.ticket.status == CANCELLED)
+        assert outcome.ticket.deadline.cancelled
+        wait_for(lambda: hedged.get_stats()['tickets'] == 0)
+        wait_for(lambda: hedged._expiry_thread is None)
+        release.set()
+
+    def test_claimed_ticket_lives_until_its_ttl(self):
+        release = threading.Event()
+        hedged = HedgedGenerations(deadlines={'teste': 0.05}, max_workers=1, result_ttl=0.4, claim_seconds=0.05)
+        outcome = hedged.run('teste', lambda: release.wait(5) and {'success': True})
+        hedged.get_ticket(outcome.ticket.id)
+
+        time.sleep(0.15)
+        assert outcome.ticket.status == PENDING
+
+        wait_for(lambda: outcome.ticket.status == CANCELLED)
+        assert hedged.get_stats()['endpoints']['teste']['cancelled'] == 1
+        release.set()
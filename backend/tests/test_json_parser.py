@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes da extração de JSON das respostas do modelo (scanner e reparos)
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from utils.json_parser import JsonObjectScanner, parse_first_json, parse_json_candidate, safe_parse_llm_json
+
+CORPUS = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'json_parser_corpus.jsonl')
+
+
+def load_corpus():
+    with open(CORPUS, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def scan(chunks):
+    scanner = JsonObjectScanner()
+    return [candidate for chunk in chunks for candidate in scanner.feed(chunk)], scanner
+
+
+class TestJsonObjectScanner:
+
+    def test_finds_balanced_objects_in_order(self):
+        candidates, scanner = scan(['texto {"a": 1} meio {"b": {"c": [1, 2]}} fim'])
+
+        assert candidates == ['{"a": 1}', '{"b": {"c": [1, 2]}}']
+        assert scanner.pending() is None
+
+    def test_braces_inside_strings_are_ignored(self):
+        text = '{"msg": "use {nome} e \\"}\\" aqui", "n": 1}'
+        candidates, _ = scan([text])
+
+        assert candidates == [text]
+
+    @pytest.mark.parametrize('size', [1, 2, 3, 7])
+    def test_chunked_feed_equals_whole(self, size):
+        text = 'prosa {"a": "x\\\\", "b": ["}", {"c": "\\""}]} e {"d": 2}'
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+
+        assert scan(chunks)[0] == scan([text])[0] == ['{"a": "x\\\\", "b": ["}", {"c": "\\""}]}', '{"d": 2}']
+
+    def test_pending_closes_truncated_candidate(self):
+        _, scanner = scan(['{"a": [1, {"b": "tex'])
+
+        assert scanner.pending() == '{"a": [1, {"b": "tex"}]}'
+
+    def test_unclosed_braces_are_linear(self):
+        start = time.perf_counter()
+        candidates, _ = scan(['{' * 20000])
+
+        assert candidates == []
+        assert time.perf_counter() - start < 1.0
+
+
+class TestParseJsonCandidate:
+
+    @pytest.mark.parametrize('candidate, expected', [
+        ('{"a": 1,}', {'a': 1}),
+        ('{"a": [1, 2,]}', {'a': [1, 2]}),
+        ('{"a": 1 "b": 2}', {'a': 1, 'b': 2}),
+        ('{a: 1, b_c: "x"}', {'a': 1, 'b_c': 'x'}),
+        ("{'a': 'd\\'água'}", {'a': "d'água"}),
+        ('{"a": True, "b": None}', {'a': True, 'b': None}),
+        ('{"a": 0 . 85}', {'a': 0.85}),
+        ('{"a": "ele disse "olá" ontem"}', {'a': 'ele disse "olá" ontem'}),
+        ('{"a": "linha\nnova"}', {'a': 'linha\nnova'}),
+        ('{"a": "c:\\pasta"}', {'a': 'c:\\pasta'}),
+        ('{"speciees": "Mangifera"}', {'species': 'Mangifera'}),
+        ('{"a": 1, "b":}', {'a': 1}),
+    ])
+    def test_repairs(self, candidate, expected):
+        assert parse_json_candidate(candidate) == expected
+
+    def test_deep_nesting_gives_up(self):
+        assert parse_json_candidate('[' * 100000 + ']' * 100000) is None
+
+
+class TestSafeParseLlmJson:
+
+    @pytest.mark.parametrize('case', load_corpus(), ids=lambda case: case['kind'])
+    def test_corpus(self, case):
+        assert safe_parse_llm_json(case['response']) == case['expected']
+
+    def test_prose_braces_do_not_win_over_the_answer(self):
+        response = 'Use {nome} no lugar certo.\n{"translation": "Bom dia", "confidence": 0.9,}'
+
+        assert safe_parse_llm_json(response) == {'translation': 'Bom dia', 'confidence': 0.9}
+
+    def test_truncated_response_is_completed(self):
+        assert safe_parse_llm_json('```json\n{"title": "Aula", "steps": ["lavar", "sec') == {
+            'title': 'Aula', 'steps': ['lavar', 'sec']
+        }
+
+    @pytest.mark.parametrize('response', ['', 'sem json aqui', None, 42])
+    def test_no_json(self, response):
+        assert safe_parse_llm_json(response) is None
+
+
+class TestParseFirstJson:
+
+    def test_stops_consuming_when_first_object_closes(self):
+        consumed = []
+
+        def chunks():
+            for chunk in ['Resposta: {"a"', ': 1}', ' {"b": 2}', 'nunca lido']:
+                consumed.append(chunk)
+                yield chunk
+
+        assert parse_first_json(chunks()) == {'a': 1}
+        assert consumed == ['Resposta: {"a"', ': 1}']
+
+    def test_truncated_stream(self):
+        assert parse_first_json(['{"a": ', '"meio']) == {'a': 'meio'}
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do casamento de palavras-chave e dos sinais de contexto/criticidade
+"""
+
+import pytest
+
+from services.intelligent_model_selector import ContextType, CriticalityLevel, IntelligentModelSelector
+from utils.keyword_matcher import KeywordMatcher, fold_text
+
+
+def test_fold_text():
+    assert fold_text("  Emergência\tMÉDICA ") == " emergencia medica "
+
+
+class TestKeywordMatcher:
+
+    @pytest.mark.parametrize('text, expected', [
+        ("estou com dor", {'dor'}),
+        ("estou com dores fortes", {'dor'}),
+        ("quero dormir", set()),
+        ("o ar está seco", {'ar'}),
+        ("os ares da serra", {'ar'}),
+        ("na área de plantar", {'plant'}),
+        ("ligue 192 agora", {'192'}),
+        ("ligue 1920", set()),
+        ("as plantas crescem", {'plant'}),
+        ("Primeiros   Socorros!", {'primeiros socorros'}),
+        ("primeiros. socorros", set()),
+    ])
+    def test_find(self, text, expected):
+        matcher = KeywordMatcher(['dor', 'ar', '192', 'plant', 'primeiros socorros'])
+        assert matcher.find(text) == expected
+
+    def test_empty_keyword_is_rejected(self):
+        with pytest.raises(ValueError):
+            KeywordMatcher(['!!'])
+
+
+class TestTextSignals:
+
+    def test_plural_of_short_keyword_keeps_criticality(self):
+        assert IntelligentModelSelector.detect_criticality_from_text("Estou com dores fortes") == CriticalityLevel.HIGH
+
+    def test_critical_wins_over_high(self):
+        text = "Emergência: muita dor no peito"
+        assert IntelligentModelSelector.detect_criticality_from_text(text) == CriticalityLevel.CRITICAL
+
+    def test_short_keyword_inside_word_does_not_match(self):
+        assert IntelligentModelSelector.detect_context_from_text("como plantar arroz na área do quintal") == (
+            ContextType.AGRICULTURE
+        )
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do prazo por requisição (padrões por endpoint e cabeçalho)
+"""
+
+import pytest
+from flask import Blueprint, Flask, jsonify
+
+from config.settings import BackendConfig
+from services.request_deadline import current_deadline, register_deadline_handlers
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    register_deadline_handlers(app)
+    models = Blueprint('model_management', __name__)
+    medical = Blueprint('medical', __name__)
+
+    def deadline_timeout():
+        return jsonify({'timeout': current_deadline().timeout})
+
+    models.add_url_rule('/ollama/pull', 'pull_ollama_model', deadline_timeout, methods=['POST'])
+    medical.add_url_rule('/medical/emergency', 'emergency_guidance', deadline_timeout, methods=['POST'])
+    app.register_blueprint(models, url_prefix='/api')
+    app.register_blueprint(medical, url_prefix='/api')
+    app.add_url_rule('/api/other', 'other', deadline_timeout, methods=['POST'])
+    return app.test_client()
+
+
+def timeout(client, path, header=None):
+    headers = {BackendConfig.REQUEST_DEADLINE_HEADER: header} if header else {}
+    return client.post(path, headers=headers).get_json()['timeout']
+
+
+class TestRequestDeadline:
+
+    def test_endpoint_defaults(self, client):
+        assert timeout(client, '/api/other') == BackendConfig.REQUEST_DEFAULT_DEADLINE
+        assert timeout(client, '/api/medical/emergency') == BackendConfig.REQUEST_DEADLINES['medical.emergency_guidance']
+
+    def test_model_pull_gets_the_pull_timeout(self, client):
+        assert timeout(client, '/api/ollama/pull') == BackendConfig.OLLAMA_PULL_TIMEOUT
+        assert BackendConfig.OLLAMA_PULL_TIMEOUT > BackendConfig.REQUEST_MAX_DEADLINE
+
+    def test_header_is_capped(self, client):
+        assert timeout(client, '/api/other', '5') == 5
+        assert timeout(client, '/api/other', '99999') == BackendConfig.REQUEST_MAX_DEADLINE
+        assert timeout(client, '/api/ollama/pull', '99999') == BackendConfig.OLLAMA_PULL_TIMEOUT
+        assert timeout(client, '/api/other', 'abc') == BackendConfig.REQUEST_DEFAULT_DEADLINE
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do registro declarativo de parsers de respostas em texto
+"""
+
+import pytest
+
+from utils.response_parser import (ClassifierSpec, FieldSpec, ResponseParser, ResponseSpec, SectionSpec,
+                                   _first_chars, percent, split_items, yes_no)
+
+RECYCLING = ResponseSpec(
+    name='test.recycling',
+    fields=(
+        FieldSpec('material_type', r'tipo principal:'),
+        FieldSpec('category', r'categoria[^\n:]*:'),
+        FieldSpec('recyclable', r'reciclável:', value=r'[\s*]*(Sim|Não)', convert=yes_no),
+        FieldSpec('confidence', r'confiança|certeza', value=r'.*?(\d+)%', convert=percent),
+    ),
+    sections=(
+        SectionSpec('local_tips', (r'dicas específicas[^\n:*]*',), as_list=True),
+        SectionSpec('confidence_section', (r'confiança da análise',)),
+    )
+)
+
+MOOD = ResponseSpec(
+    name='test.mood',
+    sections=(
+        SectionSpec('insights', (r'1\.', r'insights:?')),
+        SectionSpec('recommendations', (r'2\.', r'recomendações:?')),
+        SectionSpec('exercises', (r'4\.', r'exercícios:?'), as_list=True),
+    )
+)
+
+ALERTS = ResponseSpec(
+    name='test.alerts',
+    classifiers=(
+        ClassifierSpec('severity', (
+            ('critical', ('grave', 'urgente')),
+            ('low', ('leve',)),
+        ), default='medium'),
+    )
+)
+
+RECYCLING_TEXT = """Tipo principal: Garrafa PET
+Categoria do material: Plástico
+Reciclável: Sim
+Grau de certeza: cerca de 85% para este item
+
+Dicas específicas para Bissau:
+- Lave a garrafa
+- Retire a tampa
+
+Confiança da análise: alta"""
+
+
+class TestFields:
+
+    def test_fields_and_sections(self):
+        result = ResponseParser(RECYCLING).parse(RECYCLING_TEXT)
+
+        assert result == {
+            'material_type': 'Garrafa PET',
+            'category': 'Plástico',
+            'recyclable': True,
+            'confidence': 0.85,
+            'local_tips': ['Lave a garrafa', 'Retire a tampa'],
+            'confidence_section': 'alta',
+        }
+
+    def test_bold_labels(self):
+        text = "**Tipo principal:** Lata de alumínio\n**Reciclável:** Não\n**Dicas específicas:**\n* Amasse a lata"
+
+        result = ResponseParser(RECYCLING).parse(text)
+
+        assert result['material_type'] == 'Lata de alumínio'
+        assert result['recyclable'] is False
+        assert result['local_tips'] == ['Amasse a lata']
+
+    def test_first_occurrence_with_a_matching_value_wins(self):
+        # "confiança" sem porcentagem não encerra a busca do campo
+        text = "Confiança: alta\nCerteza de 70% e depois 90%"
+
+        assert ResponseParser(RECYCLING).parse(text) == {'confidence': 0.7}
+
+    def test_missing_fields_are_left_out(self):
+        parser = ResponseParser(RECYCLING)
+
+        assert parser.parse('') == {}
+        assert parser.parse("Não consegui identificar o material.") == {}
+
+
+class TestSections:
+
+    def test_numbered_sections(self):
+        text = "1. Você parece cansado.\n2. Descanse mais.\n4. Exercícios:\n- Respire fundo\n- Alongue-se"
+
+        result = ResponseParser(MOOD).parse(text)
+
+        assert result == {
+            'insights': 'Você parece cansado.',
+            'recommendations': 'Descanse mais.',
+            'exercises': ['Respire fundo', 'Alongue-se'],
+        }
+
+    def test_headers_must_start_a_line(self):
+        text = "1. Você dormiu só 4.5 horas e fala de insights: sono.\n2. Durma cedo."
+
+        result = ResponseParser(MOOD).parse(text)
+
+        assert result['insights'] == 'Você dormiu só 4.5 horas e fala de insights: sono.'
+        assert result['recommendations'] == 'Durma cedo.'
+        assert 'exercises' not in result
+
+    @pytest.mark.parametrize('prefix', ['## ', '**', '> ', '  - ', '3) '])
+    def test_markdown_before_header(self, prefix):
+        text = f"{prefix}Insights:** cansaço\n{prefix}Recomendações: descanso"
+
+        result = ResponseParser(MOOD).parse(text)
+
+        assert result['insights'] == 'cansaço'
+        assert result['recommendations'] == 'descanso'
+
+    def test_earlier_header_does_not_close_a_later_section(self):
+        # "1." dentro das recomendações não reabre os insights
+        text = "Insights: cansaço\nRecomendações:\n1. dormir\n2. beber água"
+
+        result = ResponseParser(MOOD).parse(text)
+
+        assert result['insights'] == 'cansaço'
+        assert result['recommendations'].startswith('1. dormir')
+
+
+class TestCaseFolding:
+    """Textos cujo ``lower()`` muda de tamanho usam a alternação com IGNORECASE"""
+
+    def test_text_whose_lowercase_changes_length(self):
+        text = "İSTANBUL\n" + RECYCLING_TEXT
+        assert len(text.lower()) != len(text)
+
+        assert ResponseParser(RECYCLING).parse(text) == ResponseParser(RECYCLING).parse(RECYCLING_TEXT)
+
+    def test_uppercase_labels_in_the_text(self):
+        result = ResponseParser(MOOD).parse("İ\nINSIGHTS: cansaço\nRECOMENDAÇÕES: descanso")
+
+        assert result == {'insights': 'cansaço', 'recommendations': 'descanso'}
+
+    def test_uppercase_labels_in_the_spec_are_rejected(self):
+        with pytest.raises(ValueError):
+            ResponseParser(ResponseSpec('test.upper', fields=(FieldSpec('material', r'Tipo:'),)))
+
+        # Escapes como \S não são letras maiúsculas
+        ResponseParser(ResponseSpec('test.escape', fields=(FieldSpec('material', r'tipo\S*:'),)))
+
+
+class TestFirstChars:
+
+    @pytest.mark.parametrize('pattern, expected', [
+        (r'tipo principal:', {'t'}),
+        (r'confiança|certeza|nível', {'c', 'n'}),
+        (r'1\.', {'1'}),
+        (r'\*\*nota', {'*'}),
+        (r'(?:ões|ão)', {'õ', 'ã'}),
+        (r'(?:a|b)|c', {'a', 'b', 'c'}),
+        (r'[abc]d', None),
+        (r'\d+%', None),
+        (r'a*b', None),
+        (r'a?b|c', None),
+        (r'.*?x', None),
+        (r'(?:a|[b)', None),
+    ])
+    def test_first_chars(self, pattern, expected):
+        assert _first_chars(pattern) == (frozenset(expected) if expected is not None else None)
+
+    def test_labels_starting_anywhere_are_still_found(self):
+        spec = ResponseSpec('test.any', fields=(FieldSpec('dose', r'\d+ ?mg', value=r'.*'),
+                                                FieldSpec('name', r'nome:')))
+
+        result = ResponseParser(spec).parse("Nome: paracetamol 500 mg a cada 8 horas")
+
+        assert result == {'name': 'paracetamol 500 mg a cada 8 horas', 'dose': 'a cada 8 horas'}
+
+
+class TestClassifiers:
+
+    @pytest.mark.parametrize('text, severity', [
+        ("Chuva leve e risco grave de enchente", 'critical'),
+        ("Chuva leve amanhã", 'low'),
+        ("Céu nublado", 'medium'),
+    ])
+    def test_priority_and_default(self, text, severity):
+        assert ResponseParser(ALERTS).parse(text) == {'severity': severity}
+
+
+def test_split_items():
+    assert split_items("- um\n* dois\n\n3) três\n• **quatro**") == ['um', 'dois', 'três', 'quatro']
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do classificador de roteamento (treino, calibração e artefato)
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from services.routing_classifier import RoutingClassifier, _fit_temperature
+
+
+def sampled_labels(rng, logits, temperature):
+    """Rótulos sorteados de softmax(logits / temperature): a temperatura verdadeira é conhecida"""
+    scaled = logits / temperature
+    proba = np.exp(scaled - scaled.max(axis=1, keepdims=True))
+    proba /= proba.sum(axis=1, keepdims=True)
+    return np.array([rng.choice(len(row), p=row) for row in proba])
+
+
+class TestTemperatureCalibration:
+
+    @pytest.mark.parametrize('true_temperature', [0.1, 0.3, 2.0, 8.0])
+    def test_recovers_known_temperature(self, true_temperature):
+        rng = np.random.default_rng(0)
+        logits = rng.normal(scale=3.0, size=(4000, 5))
+        labels = sampled_labels(rng, logits, true_temperature)
+
+        fitted = _fit_temperature(logits, labels)
+
+        assert fitted == pytest.approx(true_temperature, rel=0.15)
+
+    def test_separable_validation_keeps_unit_temperature(self):
+        logits = np.array([[5.0, 0.0], [0.0, 5.0]] * 10)
+        labels = np.array([0, 1] * 10)
+
+        assert _fit_temperature(logits, labels) == 1.0
+
+
+TEXTS = [
+    "emergência, a criança não respira", "sangramento forte na perna", "incêndio na casa",
+    "como plantar arroz", "praga no milho", "quando colher a mandioca",
+    "explique a fotossíntese", "aula de matemática para crianças", "como ensinar a ler",
+] * 8
+CONTEXTS = [0, 0, 0, 1, 1, 1, 2, 2, 2] * 8
+CRITICALITIES = [0, 0, 0, 1, 1, 1, 1, 1, 1] * 8
+
+
+@pytest.fixture(scope='module')
+def model():
+    return RoutingClassifier.train(
+        TEXTS, CONTEXTS, CRITICALITIES,
+        ['emergency', 'agriculture', 'education'], ['critical', 'medium'],
+        n_features=2 ** 12, epochs=10
+    )
+
+
+class TestRoutingClassifier:
+
+    def test_predicts_training_labels(self, model):
+        predictions = model.predict(["emergência, a criança não respira", "como plantar arroz"])
+
+        assert [p.context for p in predictions] == ['emergency', 'agriculture']
+        assert predictions[0].criticality == 'critical'
+
+    def test_artifact_round_trip(self, model, tmp_path):
+        path = str(tmp_path / 'routing.npz')
+        model.save(path)
+
+        loaded = RoutingClassifier.load(path)
+
+        assert loaded.temperatures == model.temperatures
+        np.testing.assert_allclose(loaded.predict_proba(TEXTS[:3])[0], model.predict_proba(TEXTS[:3])[0])
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes da coalescência de gerações idênticas (single-flight)
+"""
+
+import threading
+import time
+
+import pytest
+
+from services.request_deadline import Deadline, DeadlineExceeded, deadline_scope
+from services.single_flight import SingleFlight
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condição não atingida")
+        time.sleep(0.001)
+
+
+def run_concurrently(flight, key, fn, followers, is_error=None):
+    """Líder bloqueado em ``fn`` até ``followers`` chamadas se juntarem; retorna (líder, seguidores)"""
+    results = {}
+
+    def call(name, check=None):
+        try:
+            results[name] = flight.do(key, fn, check)
+        except Exception as e:
+            results[name] = e
+
+    leader = threading.Thread(target=call, args=('leader',))
+    leader.start()
+    wait_for(lambda: flight.get_stats()['in_flight'] == 1)
+    threads = [threading.Thread(target=call, args=(i, is_error)) for i in range(followers)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: flight.get_stats()['merged'] == followers)
+    return leader, threads, results
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def generate():
+            calls.append(1)
+            release.wait(5)
+            return {'success': True, 'response': 'aula'}
+
+        leader, threads, results = run_concurrently(flight, 'aula', generate, followers=5)
+        release.set()
+        for thread in [leader, *threads]:
+            thread.join(5)
+
+        assert len(calls) == 1
+        assert results['leader'] == {'success': True, 'response': 'aula'}
+        for i in range(5):
+            assert results[i] == {'success': True, 'response': 'aula', 'metadata': {'coalesced': True}}
+        assert flight.get_stats()['executions'] == 1
+
+    def test_followers_copy_a_snapshot_not_the_leader_result(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        mutated = threading.Event()
+        results = {}
+
+        def generate():
+            release.wait(5)
+            return {'success': True, 'response': 'aula', 'tags': list(range(100))}
+
+        def lead():
+            result = flight.do('aula', generate)
+            # A rota do líder altera o dicionário enquanto os seguidores copiam
+            result['response'] = 'alterada'
+            result['tags'].clear()
+            result['extra'] = True
+            results['leader'] = result
+            mutated.set()
+
+        def after_leader_mutation(result):
+            mutated.wait(5)
+            return False
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        wait_for(lambda: flight.get_stats()['in_flight'] == 1)
+        follower = threading.Thread(
+            target=lambda: results.setdefault('follower', flight.do('aula', generate, after_leader_mutation))
+        )
+        follower.start()
+        wait_for(lambda: flight.get_stats()['merged'] == 1)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        assert results['leader']['response'] == 'alterada'
+        assert results['follower'] == {
+            'success': True, 'response': 'aula', 'tags': list(range(100)), 'metadata': {'coalesced': True}
+        }
+
+    def test_error_is_propagated_to_followers(self):
+        flight = SingleFlight(error_policy='propagate')
+        release = threading.Event()
+
+        def generate():
+            release.wait(5)
+            raise RuntimeError('modelo indisponível')
+
+        leader, threads, results = run_concurrently(flight, 'erro', generate, followers=2)
+        release.set()
+        for thread in [leader, *threads]:
+            thread.join(5)
+
+        assert all(isinstance(result, RuntimeError) for result in results.values())
+        assert flight.get_stats()['errors_shared'] == 2
+
+    def test_retry_policy_runs_own_call_after_leader_error(self):
+        flight = SingleFlight(error_policy='retry')
+        release = threading.Event()
+        calls = []
+
+        def generate():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(5)
+                return {'success': False}
+            return {'success': True}
+
+        leader, threads, results = run_concurrently(
+            flight, 'erro', generate, followers=1, is_error=lambda result: not result.get('success')
+        )
+        release.set()
+        for thread in [leader, *threads]:
+            thread.join(5)
+
+        assert results['leader'] == {'success': False}
+        assert results[0] == {'success': True}
+        assert flight.get_stats()['retries_after_error'] == 1
+
+    @pytest.mark.parametrize('enabled, key', [(False, 'aula'), (True, '')])
+    def test_disabled_or_without_key_runs_directly(self, enabled, key):
+        flight = SingleFlight(enabled=enabled)
+
+        assert flight.do(key, lambda: 42) == 42
+        assert flight.get_stats()['executions'] == 0
+
+
+class TestFollowerDeadline:
+
+    def test_follower_stops_waiting_at_its_deadline(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        errors = []
+
+        def follow():
+            with deadline_scope(Deadline(0.05)):
+                try:
+                    flight.do('aula', lambda: 'nunca')
+                except DeadlineExceeded as e:
+                    errors.append(e)
+
+        leader = threading.Thread(target=lambda: flight.do('aula', lambda: release.wait(5)))
+        leader.start()
+        wait_for(lambda: flight.get_stats()['in_flight'] == 1)
+        follower = threading.Thread(target=follow)
+        follower.start()
+        follower.join(5)
+        stopped_before_leader = not release.is_set()
+        release.set()
+        leader.join(5)
+
+        assert stopped_before_leader
+        assert len(errors) == 1
+        assert flight.get_stats()['abandoned'] == 1
+
+    def test_cancelled_follower_stops_waiting(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        deadline = Deadline(60)
+        errors = []
+
+        def follow():
+            with deadline_scope(deadline):
+                try:
+                    flight.do('aula', lambda: 'nunca')
+                except DeadlineExceeded as e:
+                    errors.append(e)
+
+        leader = threading.Thread(target=lambda: flight.do('aula', lambda: release.wait(5)))
+        leader.start()
+        wait_for(lambda: flight.get_stats()['in_flight'] == 1)
+        follower = threading.Thread(target=follow)
+        follower.start()
+        wait_for(lambda: flight.get_stats()['merged'] == 1)
+        deadline.cancel('cliente desconectou')
+        follower.join(5)
+        release.set()
+        leader.join(5)
+
+        assert [e.reason for e in errors] == ['cliente desconectou']
+
+    @pytest.mark.parametrize('leader_failure', [
+        DeadlineExceeded('prazo de 1s esgotado'),
+        {'success': False, 'error': DeadlineExceeded.ERROR_CODE},
+    ], ids=['exceção', 'dicionário'])
+    def test_leader_deadline_is_not_shared(self, leader_failure):
+        flight = SingleFlight(error_policy='propagate')
+        release = threading.Event()
+        calls = []
+
+        def generate():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(5)
+                if isinstance(leader_failure, Exception):
+                    raise leader_failure
+                return leader_failure
+            # Nova execução: espera os outros dois seguidores se juntarem a ela
+            wait_for(lambda: flight.get_stats()['merged'] == 5)
+            return {'success': True, 'response': 'aula'}
+
+        leader, threads, results = run_concurrently(
+            flight, 'aula', generate, followers=3, is_error=lambda result: not result.get('success')
+        )
+        release.set()
+        for thread in [leader, *threads]:
+            thread.join(5)
+
+        # Os seguidores coalescem de novo: uma única execução extra para os três
+        assert len(calls) == 2
+        for i in range(3):
+            assert results[i]['success'] is True
+        assert flight.get_stats()['retries_after_deadline'] == 3
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes da saída estruturada: validador compilado e decodificação por funcionalidade
+"""
+
+import json
+
+import pytest
+
+from services.model_routing import RoutingDecision
+from services.structured_output import FEATURE_SCHEMAS, SchemaValidator, decode_structured, feature_schema
+
+SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'name': {'type': 'string', 'minLength': 1},
+        'level': {'type': 'integer', 'minimum': 1, 'maximum': 10},
+        'score': {'type': ['number', 'null']},
+        'tone': {'type': 'string', 'enum': ['low', 'high']},
+        'tags': {'type': 'array', 'minItems': 1, 'maxItems': 2, 'items': {'type': 'string'}},
+        'meta': {'type': 'object', 'properties': {'ok': {'type': 'boolean'}}, 'additionalProperties': False}
+    },
+    'required': ['name', 'level']
+}
+
+BADGE = {'badge': {'name': 'Guardião', 'description': 'Cem traduções', 'icon_suggestion': '🛡️', 'category': 'geral'}}
+
+
+class TestSchemaValidator:
+
+    validator = SchemaValidator(SCHEMA)
+
+    def test_valid_value(self):
+        value = {'name': 'Ana', 'level': 3, 'score': None, 'tone': 'low', 'tags': ['a'], 'meta': {'ok': True},
+                 'extra': 'aceito'}
+        assert self.validator.validate(value) == []
+        assert self.validator.is_valid(value)
+
+    @pytest.mark.parametrize('value, error', [
+        ([], "$: esperado object, recebido list"),
+        ({'level': 3}, "$.name: obrigatório"),
+        ({'name': '', 'level': 3}, "$.name: menos de 1 caracteres"),
+        ({'name': 'Ana', 'level': 0}, "$.level: menor que 1"),
+        ({'name': 'Ana', 'level': 11}, "$.level: maior que 10"),
+        ({'name': 'Ana', 'level': 2.5}, "$.level: esperado integer, recebido float"),
+        ({'name': 'Ana', 'level': True}, "$.level: esperado integer, recebido bool"),
+        ({'name': 'Ana', 'level': 1, 'score': '0.5'}, "$.score: esperado number|null, recebido str"),
+        ({'name': 'Ana', 'level': 1, 'tone': 'medium'}, "$.tone: valor fora de ['low', 'high']"),
+        ({'name': 'Ana', 'level': 1, 'tags': []}, "$.tags: menos de 1 itens"),
+        ({'name': 'Ana', 'level': 1, 'tags': ['a', 'b', 'c']}, "$.tags: mais de 2 itens"),
+        ({'name': 'Ana', 'level': 1, 'tags': ['a', 2]}, "$.tags[1]: esperado string, recebido int"),
+        ({'name': 'Ana', 'level': 1, 'meta': {'ok': 1}}, "$.meta.ok: esperado boolean, recebido int"),
+        ({'name': 'Ana', 'level': 1, 'meta': {'x': 1}}, "$.meta.x: propriedade não prevista"),
+    ])
+    def test_errors(self, value, error):
+        assert self.validator.validate(value) == [error]
+
+    def test_all_errors_are_collected(self):
+        assert len(self.validator.validate({'name': 1, 'level': 'alto'})) == 2
+
+    def test_wrong_type_skips_nested_rules(self):
+        assert SchemaValidator({'type': 'array', 'minItems': 2}).validate('ab') == ["$: esperado array, recebido str"]
+
+
+class TestFeatureSchemas:
+
+    @pytest.mark.parametrize('feature', sorted(FEATURE_SCHEMAS))
+    def test_schemas_are_serializable_objects(self, feature):
+        schema = feature_schema(feature)
+        assert schema['type'] == 'object'
+        assert json.loads(json.dumps(schema)) == schema
+
+    def test_constrained_response(self):
+        assert decode_structured(json.dumps(BADGE, ensure_ascii=False), 'badge_creation') == (BADGE, [])
+
+    def test_free_text_response_is_extracted(self):
+        text = 'Aqui está o badge:\n```json\n' + json.dumps(BADGE, ensure_ascii=False) + '\n```'
+        assert decode_structured(text, 'badge_creation') == (BADGE, [])
+
+    @pytest.mark.parametrize('text, errors', [
+        ('', ['resposta vazia']),
+        (None, ['resposta vazia']),
+        ('sem objeto', ['objeto JSON não encontrado']),
+        ('[1, 2]', ['objeto JSON não encontrado']),
+        ('{"badge": {"name": "Guardião"}}', ['$.badge.description: obrigatório', '$.badge.icon_suggestion: obrigatório']),
+    ])
+    def test_invalid_responses(self, text, errors):
+        assert decode_structured(text, 'badge_creation') == (None, errors)
+
+
+class TestRoutingDecisionFormat:
+
+    def test_schema_is_part_of_the_cache_params(self):
+        plain = RoutingDecision(model='gemma3n:e4b', backend='ollama', options={'temperature': 0.3})
+        structured = RoutingDecision(model='gemma3n:e4b', backend='ollama', options={'temperature': 0.3},
+                                     response_format=feature_schema('badge_creation'))
+
+        assert plain.cache_params() == {'temperature': 0.3}
+        assert structured.cache_params() == {'temperature': 0.3, 'format': feature_schema('badge_creation')}
+        assert structured.to_metadata()['structured'] is True
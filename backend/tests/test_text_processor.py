@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do TextProcessor e da limpeza incremental (StreamingTextCleaner)
+"""
+
+import random
+
+import pytest
+
+from utils.text_processor import CleanedText, StreamingTextCleaner, TextProcessor
+
+# Respostas no formato pedido pelos prompts (listas, numeração, títulos)
+SAMPLES = (
+    "Primeiros socorros para queimaduras:\n- Arrefeça a zona com água corrente durante 10 minutos\n"
+    "- Retire anéis e pulseiras\n- Cubra com um pano limpo\n- Procure o centro de saúde mais próximo\n",
+    "Se a pessoa não respira:\n1. Chame ajuda (112 / 118).\n2. Comece compressões no centro do peito.\n"
+    "3. Faça 30 compressões e 2 ventilações\x0c.\n\nImportante: continue até a ajuda chegar…",
+    "Olá! Para plantar arroz na época das chuvas:\n\nPreparação do solo: limpe o terreno e faça os canteiros.\n"
+    "Sementes: escolha variedades locais , como a &quot;arroz de bolanha&quot;.\n\n"
+    "Dica:use fertilizante orgânico — estrume ou composto.\n\n\n\nColheita: quando os grãos estiverem dourados...",
+    "A fotossíntese é o processo pelo qual as plantas produzem o seu alimento.Elas usam a luz do sol , "
+    "a água e o dióxido de carbono.\n\nExemplo para as crianças: a folha é como uma pequena cozinha!!!\n"
+    "• Luz: energia\n• Água: vem das raízes\n• Ar: entra pelas folhas   \n",
+)
+
+# Peças dos textos gerados: cada uma exercita uma regra ou um limite de corte
+ALPHABET = (
+    list("aBz É.!?:;,-*•1 \n\t\r&#;é́…—\x0c\x1b")
+    + ['&amp;', '&#33;', '&excl;', '&quot', '...', '!!', ' .', '\n\n\n', '  \n', '\n1.', '\n2. ',
+       'Título:', 'Dica:', '- item', '\n- Item', '• ', 'palavra', 'Frase.', ' e ']
+)
+
+
+def random_text(rng, samples=SAMPLES):
+    if rng.random() < 0.3:
+        text = rng.choice(samples)
+        start = rng.randrange(len(text) + 1)
+        return text[start:start + rng.randint(0, 400)]
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 80)))
+
+
+def random_chunks(rng, text):
+    if rng.random() < 0.2:
+        return list(text)
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 16))))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+def word_tokens(text):
+    """Pedaços como os tokens do modelo: uma palavra (com o espaço ou a quebra seguinte) por vez"""
+    tokens, start = [], 0
+    for index, char in enumerate(text):
+        if char in ' \n':
+            tokens.append(text[start:index + 1])
+            start = index + 1
+    return tokens + ([text[start:]] if start < len(text) else [])
+
+
+def stream_outputs(chunks):
+    cleaner = StreamingTextCleaner()
+    return [cleaner.feed(chunk) for chunk in chunks] + [cleaner.finish()]
+
+
+class TestCleanResponse:
+
+    def test_rules(self):
+        text = "Olá  mundo!!!Tudo bem ?\n\n\n\nSim &amp; não   \n"
+        assert TextProcessor.clean_response(text) == "Olá mundo! Tudo bem?\n\nSim & não"
+
+    def test_empty(self):
+        assert TextProcessor.clean_response("") == ""
+        assert TextProcessor.clean_response("   \n") == "Resposta vazia ou inválida."
+
+    def test_cleaned_text_is_not_cleaned_again(self):
+        cleaned = TextProcessor.clean_response("Dica:use  água")
+        assert isinstance(cleaned, CleanedText)
+        assert TextProcessor.clean_response(cleaned) is cleaned
+
+    def test_heading_stops_at_line_end(self):
+        text = "Lave a ferida\n- Aplique pressão\nImportante: procure ajuda."
+        assert TextProcessor.clean_response(text) == (
+            "Lave a ferida\n\n- Aplique pressão\n\nImportante:\nprocure ajuda."
+        )
+
+
+class TestStreamingTextCleaner:
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_chunked_equals_whole(self, seed):
+        rng = random.Random(seed)
+        for _ in range(4000):
+            text = random_text(rng)
+            chunks = random_chunks(rng, text)
+            assert ''.join(stream_outputs(chunks)) == TextProcessor.clean_response(text), chunks
+
+    @pytest.mark.parametrize('text', SAMPLES)
+    def test_word_tokens_equal_whole(self, text):
+        assert ''.join(stream_outputs(word_tokens(text))) == TextProcessor.clean_response(text)
+
+    def test_list_lines_flush_as_they_complete(self):
+        outputs = [output for output in stream_outputs(word_tokens(SAMPLES[0])) if output]
+
+        assert len(outputs) == 4
+        assert outputs[1] == "\n\n- Retire anéis e pulseiras"
+
+    def test_numbered_lines_flush_as_they_complete(self):
+        text = "1. Chame ajuda\n2. Deite a pessoa de lado\n3. Fique com ela\n"
+        outputs = stream_outputs(word_tokens(text))
+
+        assert [output for output in outputs[:-1] if output] == ["1. Chame ajuda", "\n2. Deite a pessoa de lado"]
+        assert ''.join(outputs) == TextProcessor.clean_response(text)
+
+    def test_empty_stream(self):
+        assert stream_outputs([]) == [""]
+        assert ''.join(stream_outputs([" ", "\n"])) == "Resposta vazia ou inválida."
@@ -1,106 +1,303 @@
+"""
+Extração de JSON das respostas do modelo
+
+O ``JsonObjectScanner`` percorre o texto uma vez, só nos caracteres que
+mudam o estado (aspas, barra invertida, chaves e colchetes), acompanhando
+se está dentro de uma string e a pilha de aberturas. Cada objeto ``{...}``
+balanceado é um candidato: primeiro vai direto para o ``json`` da
+biblioteca padrão e, se falhar, recebe reparos pontuais na posição do
+erro (vírgula sobrando ou faltando, chaves sem aspas, aspas simples,
+literais do Python, aspas internas sem escape, decimais com espaços) até
+o parse passar. Uma resposta truncada tem as strings e aberturas
+pendentes fechadas. O texto fora do candidato (markdown, explicações) é
+ignorado e os acentos são preservados.
+
+O scanner também recebe pedaços de um stream e entrega o primeiro objeto
+assim que ele fecha (``parse_first_json``), sem ler o resto da resposta.
+"""
+
 import json
 import logging
 import re
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Reparos tentados por candidato antes de desistir
+MAX_REPAIRS = 64
+
+# strict=False: quebras de linha cruas dentro de strings são aceitas
+_DECODER = json.JSONDecoder(strict=False)
+
+_SIGNIFICANT = re.compile(r'[\\"{}\[\]]')
+_CLOSERS = {'{': '}', '[': ']'}
+
+_KNOWN_TYPOS = re.compile(r'\bspeciees\b', re.IGNORECASE)
+_PYTHON_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+_PYTHON_LITERAL = re.compile(r'(True|False|None)\b')
+_BARE_KEY = re.compile(r'([^\s"\':,{}\[\]]+)\s*:')
+_BARE_VALUE = re.compile(r'[^,}\]\n]+')
+# Aspas simples: a string termina na aspa seguida de um delimitador JSON
+_SINGLE_QUOTED = re.compile(r"'((?:[^'\\]|\\.|'(?!\s*[,:}\]]))*)'")
+_SPACED_DECIMAL = re.compile(r'(\d)\s*\.\s*(\d)')
+
+
+class JsonObjectScanner:
+    """Localiza objetos JSON balanceados em texto recebido inteiro ou em pedaços"""
+
+    def __init__(self):
+        self._parts: List[str] = []      # texto do candidato aberto
+        self._stack: List[str] = []      # aberturas pendentes ('{' ou '[')
+        self._in_string = False
+        self._escape = False             # barra invertida no fim do pedaço anterior
+
+    def feed(self, chunk: str) -> Iterator[str]:
+        """Candidatos (``{...}`` completos) que fecham neste pedaço, em ordem"""
+        pos = 0
+        if self._escape and chunk:
+            # O caractere escapado é o primeiro deste pedaço
+            self._escape = False
+            pos = 1
+            if len(chunk) == 1:
+                self._parts.append(chunk)
+                return
+        while pos < len(chunk):
+            if not self._stack:
+                start = chunk.find('{', pos)
+                if start < 0:
+                    return
+                self._parts = []
+                self._stack.append('{')
+                pos = start + 1
+            else:
+                # Continuação do candidato aberto no pedaço anterior
+                start = 0
+
+            skip_to = pos
+            closed_at = None
+            for match in _SIGNIFICANT.finditer(chunk, pos):
+                i = match.start()
+                if i < skip_to:
+                    continue
+                char = match.group()
+                if self._in_string:
+                    if char == '\\':
+                        if i + 1 == len(chunk):
+                            self._escape = True
+                        skip_to = i + 2
+                    elif char == '"':
+                        self._in_string = False
+                elif char == '"':
+                    self._in_string = True
+                elif char in _CLOSERS:
+                    self._stack.append(char)
+                elif char in '}]':
+                    # Fechamento trocado (']' por '}') também fecha o nível
+                    self._stack.pop()
+                    if not self._stack:
+                        closed_at = i + 1
+                        break
+
+            if closed_at is None:
+                self._parts.append(chunk[start:])
+                return
+            candidate = ''.join(self._parts) + chunk[start:closed_at]
+            self._parts = []
+            pos = closed_at
+            yield candidate
+
+    def pending(self) -> Optional[str]:
+        """Candidato aberto (resposta truncada) com as strings e aberturas fechadas"""
+        if not self._stack:
+            return None
+        text = ''.join(self._parts)
+        if self._in_string:
+            text = (text[:-1] if self._escape else text) + '"'
+        return text + ''.join(_CLOSERS[opener] for opener in reversed(self._stack))
+
+
+def _previous(text: str, pos: int) -> int:
+    """Índice do último caractere não branco antes de ``pos`` (-1 se não houver)"""
+    pos -= 1
+    while pos >= 0 and text[pos].isspace():
+        pos -= 1
+    return pos
+
+
+def _quote_single(text: str, pos: int) -> Optional[str]:
+    match = _SINGLE_QUOTED.match(text, pos)
+    if not match:
+        return None
+    content = match.group(1).replace("\\'", "'")
+    return text[:pos] + json.dumps(content, ensure_ascii=False) + text[match.end():]
+
+
+def _drop_dangling_member(text: str, pos: int) -> Optional[str]:
+    """Remover ``"chave":`` sem valor (resposta truncada depois dos dois pontos)"""
+    colon = _previous(text, pos)
+    key_end = _previous(text, colon)
+    if key_end < 0 or text[key_end] != '"':
+        return None
+    key_start = text.rfind('"', 0, key_end)
+    before = _previous(text, key_start)
+    if key_start < 0 or before < 0:
+        return None
+    cut = before if text[before] == ',' else key_start
+    return text[:cut] + text[pos:]
+
+
+def _repair_property_name(text: str, pos: int) -> Optional[str]:
+    char = text[pos:pos + 1]
+    previous = _previous(text, pos)
+    if char in ('}', ']') and previous >= 0 and text[previous] == ',':
+        return text[:previous] + text[previous + 1:]
+    if char == "'":
+        return _quote_single(text, pos)
+    match = _BARE_KEY.match(text, pos)
+    if match:
+        return f'{text[:pos]}"{match.group(1)}"{text[match.end(1):]}'
+    return None
+
+
+def _repair_value(text: str, pos: int) -> Optional[str]:
+    char = text[pos:pos + 1]
+    previous = _previous(text, pos)
+    if char in ('}', ']', ''):
+        if previous >= 0 and text[previous] == ',':
+            return text[:previous] + text[previous + 1:]
+        if previous >= 0 and text[previous] == ':':
+            return _drop_dangling_member(text, pos)
+        return None
+    if char == "'":
+        return _quote_single(text, pos)
+    match = _PYTHON_LITERAL.match(text, pos)
+    if match:
+        return text[:pos] + _PYTHON_LITERALS[match.group(1)] + text[match.end():]
+    match = _BARE_VALUE.match(text, pos)
+    if match and match.group().strip():
+        value = match.group().rstrip()
+        return text[:pos] + json.dumps(value, ensure_ascii=False) + text[pos + len(value):]
+    return None
+
+
+def _repair_delimiter(text: str, pos: int) -> Optional[str]:
+    previous = _previous(text, pos)
+    if previous < 0:
+        return None
+    if text[previous].isdigit():
+        match = _SPACED_DECIMAL.match(text, previous)
+        if match:
+            return f'{text[:previous]}{match.group(1)}.{match.group(2)}{text[match.end():]}'
+    char = text[pos:pos + 1]
+    if text[previous] == '"' and (char not in ('"', '{', '[', '}', ']', '') or previous == pos - 1):
+        # Aspas dentro da string sem escape: a string "fechou" cedo
+        return text[:previous] + '\\"' + text[previous + 1:]
+    return text[:pos] + ',' + text[pos:]
+
+
+def _repair_colon(text: str, pos: int) -> Optional[str]:
+    previous = _previous(text, pos)
+    if previous >= 0 and text[previous] == '"':
+        return text[:pos] + ':' + text[pos:]
+    return None
+
+
+def _repair_escape(text: str, pos: int) -> Optional[str]:
+    return text[:pos] + '\\' + text[pos:]
+
+
+_REPAIRS: Dict[str, Callable[[str, int], Optional[str]]] = {
+    'Expecting property name enclosed in double quotes': _repair_property_name,
+    'Expecting value': _repair_value,
+    "Expecting ',' delimiter": _repair_delimiter,
+    "Expecting ':' delimiter": _repair_colon,
+    'Invalid \\escape': _repair_escape,
+}
+
+
+def _decode(text: str) -> Any:
+    value, _ = _DECODER.raw_decode(text)
+    return value
+
+
+def parse_json_candidate(candidate: str) -> Optional[Any]:
+    """Parse direto e, se falhar, reparos pontuais na posição de cada erro"""
+    text = _KNOWN_TYPOS.sub('species', candidate)
+    for attempt in range(MAX_REPAIRS + 1):
+        try:
+            value = _decode(text)
+            if attempt:
+                logger.debug(f"🔧 JSON parseado após {attempt} reparo(s)")
+            return value
+        except json.JSONDecodeError as e:
+            repair = _REPAIRS.get(e.msg)
+            repaired = repair(text, e.pos) if repair else None
+            if repaired is None or repaired == text:
+                logger.debug(f"JSON irreparável ({e.msg} na posição {e.pos}): {text[:120]!r}")
+                return None
+            text = repaired
+        except RecursionError:
+            logger.debug("JSON aninhado demais para o parser")
+            return None
+    return None
+
+
+def _parse_truncated(scanner: JsonObjectScanner) -> Optional[Dict[Any, Any]]:
+    truncated = scanner.pending()
+    parsed = parse_json_candidate(truncated) if truncated else None
+    if isinstance(parsed, dict):
+        logger.debug("🔧 JSON truncado completado")
+        return parsed
+    return None
+
+
+def parse_first_json(chunks: Iterable[str]) -> Optional[Dict[Any, Any]]:
+    """Primeiro objeto JSON válido de um stream; para de consumir ``chunks`` quando ele fecha
+
+    O primeiro candidato que fecha e passa (com reparos, se preciso) é o
+    resultado, mesmo que um objeto maior venha depois.
+    """
+    scanner = JsonObjectScanner()
+    for chunk in chunks:
+        for candidate in scanner.feed(chunk):
+            parsed = parse_json_candidate(candidate)
+            if isinstance(parsed, dict):
+                return parsed
+    return _parse_truncated(scanner)
+
+
 def safe_parse_llm_json(response: str) -> Optional[Dict[Any, Any]]:
     """
     Tenta extrair e parsear um JSON de uma resposta de modelo de linguagem,
-    aplicando múltiplas camadas de limpeza e correção.
+    aplicando reparos pontuais onde o parse falha.
     Retorna None se falhar.
     """
     if not isinstance(response, str):
         logger.error("Resposta não é string.")
         return None
 
-    # 1. Limpeza inicial: remover caracteres de controle e normalizar quebras
-    cleaned = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', response)
-    cleaned = cleaned.replace('\r\n', '\n').replace('\r', '\n')
+    # 1. Candidatos que já são JSON válido, na ordem do texto
+    scanner = JsonObjectScanner()
+    failed = []
+    for candidate in scanner.feed(response):
+        try:
+            parsed = _decode(_KNOWN_TYPOS.sub('species', candidate))
+        except json.JSONDecodeError:
+            failed.append(candidate)
+            continue
+        except RecursionError:
+            continue
+        if isinstance(parsed, dict):
+            return parsed
 
-    # 2. Remover blocos markdown de código (com ou sem 'json')
-    cleaned = re.sub(r'```(?:json)?\s*', '', cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r'```$', '', cleaned)
+    # 2. Reparos, do maior candidato para o menor: chaves soltas na prosa
+    #    ("use {nome}") não passam na frente do objeto da resposta
+    for candidate in sorted(failed, key=len, reverse=True):
+        parsed = parse_json_candidate(candidate)
+        if isinstance(parsed, dict):
+            return parsed
 
-    # 3. Extrair conteúdo entre { } (possível JSON) - versão simplificada
-    json_match = re.search(r'\{.*\}', cleaned, re.DOTALL)
-    if not json_match:
-        logger.warning("Nenhum bloco JSON encontrado na resposta.")
-        return None
-
-    json_str = json_match.group(0)
-
-    logger.info(f"🔍 JSON bruto extraído: {json_str[:300]}...")
-
-    # 4. Correções comuns
-    fix_mapping = {
-        r'speciees': 'species',
-        r'true': 'true',  # garantir booleanos
-        r'false': 'false',
-        r'null': 'null',
-    }
-    for bad, good in fix_mapping.items():
-        json_str = re.sub(rf'\b{bad}\b', good, json_str, flags=re.IGNORECASE)
-
-    # 5. Corrigir números decimais com espaços
-    json_str = re.sub(r'(\d+)\s*\.\s*(\d+)', r'\1.\2', json_str)
-    json_str = re.sub(r':\s*([0-9]+\s*\.\s*[0-9]+)', r': \1', json_str)
-
-    # 6. Corrigir espaços em torno de vírgulas, dois pontos e chaves
-    json_str = re.sub(r'\s*,\s*', ', ', json_str)
-    json_str = re.sub(r'\s*:\s*', ': ', json_str)
-    json_str = re.sub(r'\{\s*', '{', json_str)
-    json_str = re.sub(r'\s*\}', '}', json_str)
-    json_str = re.sub(r'\[\s*', '[', json_str)
-    json_str = re.sub(r'\s*\]', ']', json_str)
-
-    # 7. Garantir aspas duplas em chaves e strings
-    # Corrigir aspas simples para duplas (cuidado: não dentro de strings!)
-    # Simplificação: assumir que chaves estão sem aspas ou com aspas simples
-    json_str = re.sub(r'([{,])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:', r'\1"\2":', json_str)
-
-    # 8. Corrigir strings com aspas simples para duplas (caso simples)
-    # Aviso: isso pode falhar em strings complexas, mas ajuda em casos simples
-    def replace_single_quotes(match):
-        content = match.group(1)
-        return f'"{content}"'
-
-    json_str = re.sub(r'"\s*:\s*\'([^\']*)\'', lambda m: f'": "{m.group(1)}"', json_str)
-    json_str = re.sub(r':\s*\'([^\']*)\'', lambda m: f': "{m.group(1)}"', json_str)
-
-    logger.info(f"🔧 JSON após correções básicas: {json_str[:300]}...")
-
-    # 9. Tentar parse com json.loads
-    try:
-        return json.loads(json_str)
-    except json.JSONDecodeError as e:
-        logger.warning(f"Primeira tentativa de parse falhou: {e}")
-
-    # 10. Última tentativa: limpeza agressiva (só ASCII, espaços, etc)
-    aggressive = re.sub(r'[^\x20-\x7E]', '', json_str)  # Remove não-ASCII
-    aggressive = re.sub(r'\s+', ' ', aggressive)  # Espaços múltiplos → um espaço
-    aggressive = aggressive.strip()
-
-    # Fechar chaves faltando (tentativa simples)
-    open_braces = aggressive.count('{')
-    close_braces = aggressive.count('}')
-    if open_braces > close_braces:
-        aggressive += '}' * (open_braces - close_braces)
-    elif close_braces > open_braces:
-        aggressive = '{' * (close_braces - open_braces) + aggressive
-
-    # Fechar colchetes, se aplicável
-    if '[' in aggressive and ']' not in aggressive:
-        aggressive += ']'
-
-    logger.info(f"🔧 JSON após limpeza agressiva: {aggressive[:300]}...")
-
-    try:
-        result = json.loads(aggressive)
-        logger.info(f"✅ JSON parseado com sucesso após limpeza agressiva!")
-        return result
-    except json.JSONDecodeError as e:
-        logger.error(f"❌ Falha ao parsear JSON mesmo após limpeza: {e}")
-        logger.debug(f"Texto final tentado: {aggressive}")
-        return None
+    parsed = _parse_truncated(scanner)
+    if parsed is None:
+        logger.warning(f"❌ Nenhum JSON válido encontrado na resposta ({len(response)} caracteres)")
+    return parsed
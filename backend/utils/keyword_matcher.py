@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Casamento de várias palavras-chave em uma única passada
+Hackathon Gemma 3n
+
+As palavras-chave são compiladas uma vez em uma trie (autômato de
+Aho–Corasick) sobre texto sem acentos e em minúsculas. Como toda ocorrência
+válida começa no início de uma palavra, o autômato é ancorado nas palavras
+e os links de falha não são necessários: o texto é dividido em tokens por
+espaço (``str.split``, em C) e só os tokens distintos avançam a trie. A
+transição de cada token (palavras-chave encontradas e o nó seguinte, para
+expressões como "primeiros socorros") é memorizada, então tokens repetidos
+custam uma consulta a dicionário e o texto inteiro nunca precisa ser
+normalizado; a posição dos tokens só é percorrida quando algum deles inicia
+uma expressão.
+
+Regras de fronteira:
+- toda palavra-chave precisa começar no início de uma palavra;
+- palavras-chave curtas (menos de ``MIN_PREFIX_LEN`` caracteres) não
+  casam como prefixo, só a palavra inteira ou o plural ("ar" não casa
+  dentro de "área", mas "dor" casa "dores"); as terminadas em dígito só a
+  palavra inteira; as demais casam também como prefixo ("plant" casa
+  "plantas");
+- expressões casam palavras consecutivas separadas por espaços em branco.
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+MIN_PREFIX_LEN = 4
+
+# O que pode seguir uma palavra-chave curta na mesma palavra (plural)
+SHORT_KEYWORD_ENDINGS = ('', 's', 'es')
+
+# Limite de tokens distintos memorizados por matcher
+TOKEN_CACHE_SIZE = 50000
+
+_COMBINING_MARKS = re.compile(r'[\u0300-\u036f]')
+_WHITESPACE = re.compile(r'\s+')
+_WORD = re.compile(r'\w+')
+
+# Marca de fim de palavra-chave dentro dos nós da trie
+_END = ''
+
+_Transition = Tuple[Tuple[str, ...], Optional[dict]]
+
+
+def fold_text(text: str) -> str:
+    """Minúsculas, sem acentos e com espaços normalizados ("Emergência" -> "emergencia")"""
+    folded = text.lower()
+    if not folded.isascii():
+        folded = _COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', folded))
+    return _WHITESPACE.sub(' ', folded)
+
+
+def _walk_word(node: Dict[str, dict], word: str) -> _Transition:
+    """Avançar a trie por uma palavra inteira
+
+    Retorna as palavras-chave que terminam dentro da palavra e o nó a partir
+    do qual uma expressão continua na palavra seguinte (ou None).
+    """
+    found = []
+    last = len(word) - 1
+    for index, char in enumerate(word):
+        node = node.get(char)
+        if node is None:
+            return tuple(found), None
+        terminal = node.get(_END)
+        if terminal is not None:
+            keyword, endings = terminal
+            if endings is None or (word[index + 1:] if index < last else '') in endings:
+                found.append(keyword)
+    return tuple(found), node.get(' ')
+
+
+def _continue_phrase(node: Dict[str, dict], token: str) -> _Transition:
+    """Seguir uma expressão iniciada no token anterior pela primeira palavra de ``token``"""
+    folded = fold_text(token)
+    match = _WORD.match(folded)
+    if match is None:
+        return (), None
+    keywords, phrase = _walk_word(node, match.group())
+    # Pontuação depois da palavra interrompe a expressão
+    return keywords, phrase if match.end() == len(folded) else None
+
+
+class KeywordMatcher:
+    """Trie compilada de palavras-chave, consultada em uma única passada pelo texto"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._root: Dict[str, dict] = {}
+        self._tokens: Dict[str, _Transition] = {}
+        self.keywords: List[str] = []
+        for keyword in keywords:
+            self.add(keyword)
+
+    def add(self, keyword: str) -> str:
+        """Incluir ``keyword``; retorna a forma normalizada (``fold_text``)"""
+        folded = ' '.join(_WORD.findall(fold_text(keyword)))
+        if not folded:
+            raise ValueError("Palavra-chave vazia")
+
+        node = self._root
+        for char in folded:
+            node = node.setdefault(char, {})
+        if _END not in node:
+            # Guardar o que pode seguir a palavra-chave na palavra (None: qualquer coisa)
+            if not folded[-1].isalpha():
+                endings = ('',)
+            elif len(folded) < MIN_PREFIX_LEN:
+                endings = SHORT_KEYWORD_ENDINGS
+            else:
+                endings = None
+            node[_END] = (folded, endings)
+            self.keywords.append(folded)
+            self._tokens = {}
+        return folded
+
+    def _transition(self, token: str) -> _Transition:
+        transition = self._tokens.get(token)
+        if transition is None:
+            folded = fold_text(token)
+            keywords: List[str] = []
+            phrase = None
+            for word in _WORD.findall(folded):
+                found, phrase = _walk_word(self._root, word)
+                keywords.extend(found)
+            if phrase is not None and not folded[-1].isalnum():
+                phrase = None
+            transition = (tuple(keywords), phrase)
+            if len(self._tokens) >= TOKEN_CACHE_SIZE:
+                self._tokens = {}
+            self._tokens[token] = transition
+        return transition
+
+    def find(self, text: str) -> Set[str]:
+        """Palavras-chave (normalizadas) presentes em ``text``"""
+        found: Set[str] = set()
+        if not self._root or not text:
+            return found
+
+        tokens = text.lower().split()
+        phrase_starts: Dict[str, dict] = {}
+        for token in set(tokens):
+            keywords, phrase = self._transition(token)
+            if keywords:
+                found.update(keywords)
+            if phrase is not None:
+                phrase_starts[token] = phrase
+
+        if phrase_starts:
+            # Expressões dependem da ordem: seguir a partir de cada token inicial
+            last = len(tokens) - 1
+            for position, token in enumerate(tokens):
+                node = phrase_starts.get(token)
+                while node is not None and position < last:
+                    position += 1
+                    keywords, node = _continue_phrase(node, tokens[position])
+                    found.update(keywords)
+        return found
+
+    def __len__(self) -> int:
+        return len(self.keywords)
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro declarativo de parsers de respostas em texto do Gemma
+Hackathon Gemma 3n
+
+As rotas extraíam campos das respostas em texto livre com funções próprias,
+cada uma varrendo a resposta inteira com uma regex por campo
+("Tipo principal:", "Reciclável:", "1.|INSIGHTS", ...). Agora cada endpoint
+declara o que precisa em um ``ResponseSpec``:
+
+- ``FieldSpec``: valor curto logo depois de um rótulo ("Categoria: Plástico");
+- ``SectionSpec``: trecho entre um cabeçalho (no início da linha, depois de
+  numeração ou markdown) e o cabeçalho de uma seção declarada depois dela,
+  ou o fim da resposta, como texto ou lista de itens;
+- ``ClassifierSpec``: rótulo de maior prioridade cujas palavras-chave
+  aparecem no texto (tipo e severidade de um alerta).
+
+Rótulos e cabeçalhos são escritos em minúsculas e compilados em uma única
+alternação sem grupos, percorrida uma vez sobre ``text.lower()``: sem
+grupos nem IGNORECASE o ``re`` pula direto para os caracteres que podem
+iniciar um rótulo, o que uma alternação com grupos nomeados não faz. Só nas
+posições encontradas se descobre qual rótulo casou e se casa o valor,
+ancorado, no texto original. As palavras-chave dos classificadores vão
+para um ``KeywordMatcher``. Parsers compilados ficam em cache por spec.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+from utils.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+# Marcador de item no início da linha: "-", "*", "•" ou "1." / "1)"
+_BULLET = re.compile(r'^\s*(?:[-*•]+|\d+[.)])\s*')
+# O que pode preceder um cabeçalho na linha: espaços, markdown e numeração
+_HEADER_PREFIX = re.compile(r'[\s#*>•\-\d.)]*')
+# Negrito e dois pontos que fecham o cabeçalho ("**Título:**")
+_HEADER_TAIL = re.compile(r'[ \t]*\**[ \t]*:?[ \t]*\**')
+# Letras maiúsculas fora de escapes (\D, \S e \W são classes, não letras)
+_UPPERCASE = re.compile(r'(?<!\\)[^\W\d_]')
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """Valor logo depois de um rótulo; a primeira ocorrência cujo valor casa vence"""
+    name: str
+    label: str
+    # Ancorada no fim do rótulo; o grupo 1 (ou o casamento inteiro) é o valor.
+    # O padrão pula o negrito que fecha o rótulo ("**Tipo principal:** PET")
+    value: str = r'[\s*]*([^\n*]+)'
+    convert: Optional[Callable[[str], Any]] = None
+
+
+@dataclass(frozen=True)
+class SectionSpec:
+    """Trecho entre um dos ``headers`` e o cabeçalho de uma seção declarada depois"""
+    name: str
+    headers: Tuple[str, ...]
+    as_list: bool = False
+
+
+@dataclass(frozen=True)
+class ClassifierSpec:
+    """Rótulo (na ordem de prioridade) com alguma palavra-chave presente no texto"""
+    name: str
+    labels: Tuple[Tuple[str, Tuple[str, ...]], ...]
+    default: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ResponseSpec:
+    """Tudo o que um endpoint extrai de uma resposta"""
+    name: str
+    fields: Tuple[FieldSpec, ...] = ()
+    sections: Tuple[SectionSpec, ...] = ()
+    classifiers: Tuple[ClassifierSpec, ...] = ()
+
+
+def yes_no(value: str) -> bool:
+    return value.strip().lower() in ('sim', 'yes')
+
+
+def percent(value: str) -> float:
+    return int(value) / 100
+
+
+def split_items(text: str) -> List[str]:
+    """Itens de uma seção em lista, um por linha, sem marcadores"""
+    items = []
+    for line in text.splitlines():
+        item = _BULLET.sub('', line).strip(' \t*')
+        if item:
+            items.append(item)
+    return items
+
+
+def _first_chars(pattern: str) -> Optional[frozenset]:
+    """Caracteres com que ``pattern`` pode começar, se dá para saber sem executá-lo
+
+    Cobre os rótulos usados nos specs: literais, escapes de pontuação,
+    alternativas no nível de cima e grupos. Classes e metacaracteres no
+    início retornam None (o rótulo é testado em qualquer posição).
+    """
+    branches, depth, start, index = [], 0, 0, 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\':
+            index += 1
+        elif char == '[':
+            index = pattern.find(']', index + 2)
+            if index < 0:
+                return None
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            branches.append(pattern[start:index])
+            start = index + 1
+        index += 1
+    branches.append(pattern[start:])
+
+    chars = set()
+    for branch in branches:
+        if branch.startswith('(?:') and branch.endswith(')'):
+            inner = _first_chars(branch[3:-1])
+            if inner is None:
+                return None
+            chars |= inner
+        elif len(branch) > 1 and branch[0] == '\\' and not branch[1].isalnum():
+            chars.add(branch[1])
+        elif branch and branch[0] not in '\\[(.^$*+?{|)' and (len(branch) == 1 or branch[1] not in '*?{'):
+            chars.add(branch[0])
+        else:
+            return None
+    return frozenset(chars)
+
+
+def _lowercase_pattern(pattern: str, spec_name: str) -> str:
+    if any(char.isupper() for char in _UPPERCASE.findall(pattern)):
+        raise ValueError(f"Parser '{spec_name}': rótulos e cabeçalhos devem estar em minúsculas ({pattern!r})")
+    return pattern
+
+
+class ResponseParser:
+    """Spec compilado: uma alternação de tokens e, se houver classificadores, um ``KeywordMatcher``"""
+
+    def __init__(self, spec: ResponseSpec):
+        self.spec = spec
+        # (padrão ancorado, tipo, índice) na ordem de declaração
+        self._alternatives: List[Tuple[Pattern, str, int]] = []
+        self._values: List[Pattern] = []
+        for index, field in enumerate(spec.fields):
+            label = _lowercase_pattern(field.label, spec.name)
+            self._alternatives.append((re.compile(label), 'field', index))
+            self._values.append(re.compile(field.value, re.IGNORECASE))
+        self._headers: List[Tuple[Pattern, ...]] = []
+        for index, section in enumerate(spec.sections):
+            headers = tuple(re.compile(_lowercase_pattern(header, spec.name)) for header in section.headers)
+            self._headers.append(headers)
+            self._alternatives.extend((header, 'section', index) for header in headers)
+
+        self._tokens = None
+        self._tokens_ignorecase = None
+        if self._alternatives:
+            # Sem grupos: mantém a busca rápida pelo primeiro caractere
+            combined = '|'.join(f'(?:{pattern.pattern})' for pattern, _, _ in self._alternatives)
+            self._tokens = re.compile(combined)
+            # Para textos cujo ``lower()`` muda de tamanho (posições deixariam de bater)
+            self._tokens_ignorecase = re.compile(combined, re.IGNORECASE)
+
+            # Rótulos candidatos pelo primeiro caractere do token
+            first = [_first_chars(pattern.pattern) for pattern, _, _ in self._alternatives]
+            self._any_start = tuple(alt for alt, chars in zip(self._alternatives, first) if chars is None)
+            self._by_char: Dict[str, Tuple[Tuple[Pattern, str, int], ...]] = {}
+            for char in set().union(*(chars for chars in first if chars)):
+                self._by_char[char] = tuple(
+                    alt for alt, chars in zip(self._alternatives, first) if chars is None or char in chars
+                )
+            self._ignorecase = {
+                pattern: re.compile(pattern.pattern, re.IGNORECASE) for pattern, _, _ in self._alternatives
+            }
+
+        self._matcher = None
+        # palavra-chave normalizada -> [(classificador, prioridade)]
+        self._keyword_index: Dict[str, List[Tuple[int, int]]] = {}
+        if spec.classifiers:
+            self._matcher = KeywordMatcher(())
+            for classifier_index, classifier in enumerate(spec.classifiers):
+                for rank, (_, keywords) in enumerate(classifier.labels):
+                    for keyword in keywords:
+                        folded = self._matcher.add(keyword)
+                        self._keyword_index.setdefault(folded, []).append((classifier_index, rank))
+
+    def parse(self, text: str) -> Dict[str, Any]:
+        """Campos, seções e classificações encontrados (ausentes ficam de fora)"""
+        result: Dict[str, Any] = {}
+        if not text:
+            return result
+        if self._tokens is not None:
+            self._scan(text, result)
+        if self._matcher is not None:
+            self._classify(text, result)
+        return result
+
+    def _scan(self, text: str, result: Dict[str, Any]) -> None:
+        lowered = text.lower()
+        tokens, ignorecase, by_char = self._tokens, None, self._by_char
+        if len(lowered) != len(text):
+            lowered, tokens, ignorecase = text, self._tokens_ignorecase, self._ignorecase
+
+        fields = self.spec.fields
+        pending = set(range(len(fields)))
+        sections = self.spec.sections
+        # seção -> [início do conteúdo, fim]; a última declarada vai até o fim do texto
+        spans: Dict[int, List[int]] = {}
+        open_sections: List[int] = []
+        token = tokens.search(lowered)
+        while token is not None:
+            start = token.start()
+            # Todos os rótulos que começam aqui ("confiança" e "confiança da análise")
+            char = lowered[start] if ignorecase is None else lowered[start].lower()
+            for pattern, kind, index in by_char.get(char, self._any_start):
+                if ignorecase is not None:
+                    pattern = ignorecase[pattern]
+                match = pattern.match(lowered, start)
+                if match is None:
+                    continue
+                if kind == 'section':
+                    line_start = lowered.rfind('\n', 0, start) + 1
+                    if not _HEADER_PREFIX.fullmatch(lowered, line_start, start):
+                        continue
+                    # O cabeçalho (com o markdown que o precede) encerra as seções abertas declaradas antes dele
+                    if open_sections:
+                        still_open = []
+                        for section in open_sections:
+                            if section < index and spans[section][0] <= start:
+                                spans[section][1] = max(line_start, spans[section][0])
+                            else:
+                                still_open.append(section)
+                        open_sections = still_open
+                    if index not in spans:
+                        spans[index] = [self._content_start(text, lowered, match.end(), index, ignorecase), len(text)]
+                        if index != len(sections) - 1:
+                            open_sections.append(index)
+                elif index in pending:
+                    value = self._values[index].match(text, match.end())
+                    if value is None:
+                        continue
+                    raw = (value.group(1) if value.re.groups else value.group()).strip()
+                    field = fields[index]
+                    result[field.name] = field.convert(raw) if field.convert else raw
+                    pending.discard(index)
+            # Nada mais a decidir: campos encontrados e todas as seções delimitadas
+            if not pending and len(spans) == len(sections) and not open_sections:
+                break
+            # Continuar do caractere seguinte: um rótulo pode começar dentro de outro
+            token = tokens.search(lowered, start + 1)
+
+        for index, (content_start, content_end) in sorted(spans.items()):
+            section = sections[index]
+            content = text[content_start:content_end]
+            result[section.name] = split_items(content) if section.as_list else content.strip()
+
+    def _content_start(self, text: str, lowered: str, end: int, index: int,
+                       ignorecase: Optional[Dict[Pattern, Pattern]]) -> int:
+        """Início do conteúdo depois do cabeçalho da seção ``index``
+
+        Outro cabeçalho da mesma seção logo em seguida, na mesma linha, ainda
+        faz parte do título ("4. Exercícios:").
+        """
+        content_start = _HEADER_TAIL.match(text, end).end()
+        title_end = _HEADER_PREFIX.match(lowered, content_start).end()
+        if '\n' in lowered[content_start:title_end]:
+            return content_start
+        for header in self._headers[index]:
+            match = (ignorecase[header] if ignorecase is not None else header).match(lowered, title_end)
+            if match is not None:
+                return _HEADER_TAIL.match(text, match.end()).end()
+        return content_start
+
+    def _classify(self, text: str, result: Dict[str, Any]) -> None:
+        best: Dict[int, int] = {}
+        for keyword in self._matcher.find(text):
+            for classifier_index, rank in self._keyword_index[keyword]:
+                if rank < best.get(classifier_index, len(self.spec.classifiers[classifier_index].labels)):
+                    best[classifier_index] = rank
+        for classifier_index, classifier in enumerate(self.spec.classifiers):
+            rank = best.get(classifier_index)
+            label = classifier.labels[rank][0] if rank is not None else classifier.default
+            if label is not None:
+                result[classifier.name] = label
+
+
+_REGISTRY: Dict[str, ResponseParser] = {}
+
+
+@lru_cache(maxsize=128)
+def compile_parser(spec: ResponseSpec) -> ResponseParser:
+    """Parser compilado de ``spec`` (em cache: specs iguais compartilham o parser)"""
+    return ResponseParser(spec)
+
+
+def register_parser(spec: ResponseSpec) -> ResponseParser:
+    """Registrar o spec de um endpoint; retorna o parser compilado"""
+    parser = compile_parser(spec)
+    previous = _REGISTRY.get(spec.name)
+    if previous is not None and previous.spec != spec:
+        logger.warning(f"⚠️ Parser de resposta '{spec.name}' redefinido")
+    _REGISTRY[spec.name] = parser
+    return parser
+
+
+def get_parser(name: str) -> ResponseParser:
+    return _REGISTRY[name]
+
+
+def parse_response(name: str, text: str) -> Dict[str, Any]:
+    """Extrair da resposta os campos declarados pelo parser ``name``"""
+    return _REGISTRY[name].parse(text)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Server-Sent Events para o Moransa Backend
+Hackathon Gemma 3n
+
+Converte o stream de eventos do GemmaService.generate_response_stream em
+uma resposta text/event-stream do Flask.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from flask import Response, stream_with_context
+
+from services.request_deadline import current_deadline, deadline_scope
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(data: Any, event: Optional[str] = None) -> str:
+    """Formatar um evento SSE (dados serializados em JSON)"""
+    payload = json.dumps(data, ensure_ascii=False)
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {payload}")
+    return "\n".join(lines) + "\n\n"
+
+
+def single_response_events(response: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    """Converter uma resposta já pronta (ex.: fallback) em eventos token/done"""
+    text = response.get('response', '')
+    if text:
+        yield {'type': 'token', 'text': text}
+    final = dict(response)
+    final.setdefault('success', True)
+    final.setdefault('metadata', {})['streamed'] = False
+    yield {'type': 'done', **final}
+
+
+def sse_response(
+    events: Iterable[Dict[str, Any]],
+    on_done: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+) -> Response:
+    """Criar uma resposta SSE a partir dos eventos de geração
+
+    Eventos ``token`` viram ``event: token`` com o texto incremental; o evento
+    ``done`` vira ``event: done`` com a resposta final e os metadados
+    (opcionalmente enriquecido por ``on_done``). Se o cliente desconectar, o
+    prazo da requisição é cancelado para abortar a geração em andamento.
+    """
+    # O gerador roda depois do fim da view: levar junto o prazo da requisição
+    deadline = current_deadline()
+
+    def generate():
+        try:
+            with deadline_scope(deadline):
+                yield from _generate_events()
+        except GeneratorExit:
+            logger.info("🔌 Cliente encerrou o stream SSE")
+            if deadline is not None:
+                deadline.cancel('cliente desconectou')
+            raise
+
+    def _generate_events():
+        try:
+            for item in events:
+                event_type = item.get('type', 'token')
+                if event_type == 'token':
+                    yield format_sse({'text': item.get('text', '')}, event='token')
+                elif event_type == 'done':
+                    final = {key: value for key, value in item.items() if key != 'type'}
+                    if on_done:
+                        final = on_done(final)
+                    yield format_sse(final, event='done')
+        except Exception as e:
+            logger.error(f"❌ Erro durante o stream SSE: {e}")
+            yield format_sse({'success': False, 'error': str(e)}, event='error')
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Evitar buffering em proxies (nginx)
+        }
+    )
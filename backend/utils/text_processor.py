@@ -3,17 +3,49 @@
 """
 Módulo de Tratamento de Texto para Respostas do Gemma 3n
 Limpa, formata e normaliza as saídas do modelo para apresentação adequada
+
+Os padrões são compilados uma vez na importação. A substituição de
+``PROBLEMATIC_CHARS`` e a remoção de caracteres de controle são uma única
+passada (uma classe de caracteres e uma tabela de substituição); cada
+regra de espaço em branco só roda quando o texto contém o que ela procura.
+O texto limpo é devolvido como ``CleanedText`` e fica em cache: os
+``format_*`` e os extratores não limpam de novo uma resposta já limpa.
 """
 
 import re
 import html
 import unicodedata
 import logging
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
 import json
 
 logger = logging.getLogger(__name__)
 
+# Respostas brutas distintas mantidas no cache de limpeza
+CLEAN_CACHE_SIZE = 512
+
+# Caracteres de controle removidos (CLEANUP_PATTERNS[0]); inclui o ESC, então
+# as sequências ANSI perdem o ESC antes de seu padrão ser aplicado
+_CONTROL_CHARS = '\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f'
+
+
+class CleanedText(str):
+    """Texto já passado por ``TextProcessor.clean_response`` (não é limpo de novo)"""
+
+    __slots__ = ()
+
+
+def _special_chars(problematic_chars: Dict[str, str]):
+    """Padrão e tabela de substituição: caracteres problemáticos e de controle (removidos)
+
+    As entradas de ``PROBLEMATIC_CHARS`` que mapeiam um caractere para ele
+    mesmo ficam de fora.
+    """
+    table = {char: replacement for char, replacement in problematic_chars.items() if char != replacement}
+    pattern = re.compile(f"[{_CONTROL_CHARS}{re.escape(''.join(table))}]")
+    return pattern, table
+
 class TextProcessor:
     """Processador de texto para respostas do Gemma 3n"""
     
@@ -57,57 +89,110 @@ class TextProcessor:
         (r'\s+([.!?,:;])', r'\1'),
     ]
     
-    # Padrões de formatação
+    # Padrões de formatação (aplicados em ordem)
     FORMATTING_PATTERNS = [
         # Adiciona espaço após pontuação quando necessário
         (r'([.!?])([A-ZÁÉÍÓÚÀÂÊÔÃÕÇ])', r'\1 \2'),
         # Corrige espaçamento em listas
         (r'^(\s*[-*•]\s*)', r'\n\1', re.MULTILINE),
-        # Adiciona quebra de linha antes de títulos
-        (r'\n?([A-ZÁÉÍÓÚÀÂÊÔÃÕÇ][^.!?]*:)\s*', r'\n\n\1\n'),
+        # Adiciona quebra de linha antes de títulos (um título não passa do fim da linha)
+        (r'\n?([A-ZÁÉÍÓÚÀÂÊÔÃÕÇ][^.!?\n]*:)\s*', r'\n\n\1\n'),
         # Corrige numeração de listas
         (r'\n(\d+)\.\s*', r'\n\1. '),
     ]
 
+    # ----- Formas compiladas das regras acima -----
+
+    _SPECIAL_CHARS, _REPLACEMENTS = _special_chars(PROBLEMATIC_CHARS)
+    _NEWLINE_RUNS = re.compile(r'\n{3,}')
+    _TRAILING_SPACES = re.compile(r'[ \t]+$', re.MULTILINE)
+    _SPACE_RUNS = re.compile(r'[ ]{2,}')
+    # Formas equivalentes e mais baratas de ([.!?]){2,} e \s+([.!?,:;])
+    _REPEATED_PUNCTUATION = re.compile(r'[.!?]+([.!?])')
+    _SPACE_BEFORE_PUNCTUATION = re.compile(r'\s+(?=[.!?,:;])')
+    _SENTENCE_SPACING = re.compile(FORMATTING_PATTERNS[0][0])
+    _LIST_SPACING = re.compile(FORMATTING_PATTERNS[1][0], FORMATTING_PATTERNS[1][2])
+    _HEADING = re.compile(FORMATTING_PATTERNS[2][0])
+    _NUMBERING = re.compile(FORMATTING_PATTERNS[3][0])
+
+    _HAS_STRUCTURE = re.compile(r'^\*\*|^#|^\d+\.', re.MULTILINE)
+    _NUMBERED_LINE = re.compile(r'^\d+\.')
+    _EDUCATION_EMOJIS = (
+        (re.compile(r'\b(aprend|estud|escola|professor)', re.IGNORECASE), r'📚 \1'),
+        (re.compile(r'\b(experiment|test|prática)', re.IGNORECASE), r'🔬 \1'),
+        (re.compile(r'\b(matemática|número|cálculo)', re.IGNORECASE), r'🔢 \1'),
+    )
+    _AGRICULTURE_EMOJIS = (
+        (re.compile(r'\b(plant|cultiv|semel)', re.IGNORECASE), r'🌱 \1'),
+        (re.compile(r'\b(solo|terra|fertilizante)', re.IGNORECASE), r'🌍 \1'),
+        (re.compile(r'\b(colheit|safra)', re.IGNORECASE), r'🌾 \1'),
+    )
+    _LIST_ITEM = re.compile(r'^[-•*]\s*(.+)$', re.MULTILINE)
+    _NUMBERED_ITEM = re.compile(r'^\d+\.\s*(.+)$', re.MULTILINE)
+    _SENTENCE_END = re.compile(r'[.!?]+')
+
     @classmethod
     def clean_response(cls, text: str) -> str:
         """Limpa e normaliza texto de resposta do Gemma 3n"""
         if not text or not isinstance(text, str):
             return ""
+        if isinstance(text, CleanedText):
+            # Já limpo (ex.: format_* sobre a resposta de _parse_ollama_chat_response)
+            return text
         
         try:
-            # 1. Decodificar HTML entities
-            text = html.unescape(text)
-            
-            # 2. Normalizar caracteres Unicode
-            text = unicodedata.normalize('NFC', text)
-            
-            # 3. Substituir caracteres problemáticos
-            for problematic, replacement in cls.PROBLEMATIC_CHARS.items():
-                text = text.replace(problematic, replacement)
-            
-            # 4. Aplicar padrões de limpeza
-            for pattern, replacement, *flags in cls.CLEANUP_PATTERNS:
-                flags = flags[0] if flags else 0
-                text = re.sub(pattern, replacement, text, flags=flags)
-            
-            # 5. Aplicar formatação
-            for pattern, replacement, *flags in cls.FORMATTING_PATTERNS:
-                flags = flags[0] if flags else 0
-                text = re.sub(pattern, replacement, text, flags=flags)
-            
-            # 6. Limpar início e fim
-            text = text.strip()
-            
-            # 7. Garantir que não está vazio
-            if not text:
-                return "Resposta vazia ou inválida."
-            
-            return text
-            
+            return _clean_cached(text)
         except Exception as e:
             logger.error(f"Erro ao limpar texto: {e}")
             return text.strip() if text else "Erro no processamento da resposta."
+
+    @classmethod
+    def _clean(cls, text: str) -> str:
+        """Pipeline de limpeza (use ``clean_response``, que memoriza o resultado)"""
+        text = cls._apply_rules(cls._normalize_chars(text))
+
+        # 6. Limpar início e fim
+        text = text.strip()
+
+        # 7. Garantir que não está vazio
+        return CleanedText(text or "Resposta vazia ou inválida.")
+
+    @classmethod
+    def _normalize_chars(cls, text: str) -> str:
+        """Etapas caractere a caractere: entidades HTML, NFC e caracteres especiais"""
+        # 1. Decodificar HTML entities
+        text = html.unescape(text)
+        
+        # 2. Normalizar caracteres Unicode
+        if not text.isascii():
+            text = unicodedata.normalize('NFC', text)
+        
+        # 3. Substituir caracteres problemáticos e remover caracteres de controle
+        replacements = cls._REPLACEMENTS
+        return cls._SPECIAL_CHARS.sub(lambda match: replacements.get(match.group(), ''), text)
+
+    @classmethod
+    def _apply_rules(cls, text: str) -> str:
+        """Padrões de limpeza e formatação (sem o strip final)"""
+        # 4. Aplicar padrões de limpeza (cada um só se puder casar)
+        if '\n\n\n' in text:
+            text = cls._NEWLINE_RUNS.sub('\n\n', text)
+        if ' \n' in text or '\t\n' in text or text.endswith((' ', '\t')):
+            text = cls._TRAILING_SPACES.sub('', text)
+        if '  ' in text:
+            text = cls._SPACE_RUNS.sub(' ', text)
+        text = cls._REPEATED_PUNCTUATION.sub(r'\1', text)
+        text = cls._SPACE_BEFORE_PUNCTUATION.sub('', text)
+        
+        # 5. Aplicar formatação (só as regras que podem casar)
+        text = cls._SENTENCE_SPACING.sub(r'\1 \2', text)
+        if '-' in text or '*' in text or '•' in text:
+            text = cls._LIST_SPACING.sub(r'\n\1', text)
+        if ':' in text:
+            text = cls._HEADING.sub(r'\n\n\1\n', text)
+        if '\n' in text:
+            text = cls._NUMBERING.sub(r'\n\1. ', text)
+        return text
     
     @classmethod
     def format_medical_response(cls, text: str) -> str:
@@ -115,7 +200,7 @@ class TextProcessor:
         text = cls.clean_response(text)
         
         # Adicionar estrutura para respostas médicas
-        if not re.search(r'^\*\*|^#|^\d+\.', text, re.MULTILINE):
+        if not cls._HAS_STRUCTURE.search(text):
             # Se não tem formatação, adicionar estrutura básica
             lines = text.split('\n')
             formatted_lines = []
@@ -132,7 +217,7 @@ class TextProcessor:
                 elif line.startswith(('-', '•', '*')):
                     formatted_lines.append(f"• {line[1:].strip()}")
                 # Detectar passos numerados
-                elif re.match(r'^\d+\.', line):
+                elif cls._NUMBERED_LINE.match(line):
                     formatted_lines.append(line)
                 else:
                     formatted_lines.append(line)
@@ -147,9 +232,8 @@ class TextProcessor:
         text = cls.clean_response(text)
         
         # Adicionar emojis educativos quando apropriado
-        text = re.sub(r'\b(aprend|estud|escola|professor)', r'📚 \1', text, flags=re.IGNORECASE)
-        text = re.sub(r'\b(experiment|test|prática)', r'🔬 \1', text, flags=re.IGNORECASE)
-        text = re.sub(r'\b(matemática|número|cálculo)', r'🔢 \1', text, flags=re.IGNORECASE)
+        for pattern, replacement in cls._EDUCATION_EMOJIS:
+            text = pattern.sub(replacement, text)
         
         return text
     
@@ -159,9 +243,8 @@ class TextProcessor:
         text = cls.clean_response(text)
         
         # Adicionar emojis agrícolas quando apropriado
-        text = re.sub(r'\b(plant|cultiv|semel)', r'🌱 \1', text, flags=re.IGNORECASE)
-        text = re.sub(r'\b(solo|terra|fertilizante)', r'🌍 \1', text, flags=re.IGNORECASE)
-        text = re.sub(r'\b(colheit|safra)', r'🌾 \1', text, flags=re.IGNORECASE)
+        for pattern, replacement in cls._AGRICULTURE_EMOJIS:
+            text = pattern.sub(replacement, text)
         
         return text
     
@@ -199,7 +282,8 @@ class TextProcessor:
             # Preparar resposta processada
             processed_response = response.copy()
             processed_response['response'] = formatted_text
-            processed_response['original_response'] = response_text
+            # O texto cru do parse (ex.: o JSON de uma saída estruturada) tem precedência
+            processed_response.setdefault('original_response', response_text)
             processed_response['processed'] = True
             processed_response['context'] = context
             
@@ -231,17 +315,17 @@ class TextProcessor:
         text = cls.clean_response(text)
         
         # Procurar por listas existentes
-        list_items = re.findall(r'^[-•*]\s*(.+)$', text, re.MULTILINE)
+        list_items = cls._LIST_ITEM.findall(text)
         if list_items and len(list_items) <= max_points:
             return list_items[:max_points]
         
         # Procurar por itens numerados
-        numbered_items = re.findall(r'^\d+\.\s*(.+)$', text, re.MULTILINE)
+        numbered_items = cls._NUMBERED_ITEM.findall(text)
         if numbered_items and len(numbered_items) <= max_points:
             return numbered_items[:max_points]
         
         # Dividir por sentenças e pegar as principais
-        sentences = re.split(r'[.!?]+', text)
+        sentences = cls._SENTENCE_END.split(text)
         key_sentences = [s.strip() for s in sentences if len(s.strip()) > 20 and len(s.strip()) < 200]
         
         return key_sentences[:max_points]
@@ -255,7 +339,7 @@ class TextProcessor:
             return text
         
         # Pegar as primeiras sentenças até o limite
-        sentences = re.split(r'[.!?]+', text)
+        sentences = cls._SENTENCE_END.split(text)
         summary = ""
         
         for sentence in sentences:
@@ -273,7 +357,132 @@ class TextProcessor:
         
         return summary.strip() + "..."
 
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def _clean_cached(text: str) -> CleanedText:
+    return TextProcessor._clean(text)
+
 # Função de conveniência para uso direto
 def clean_gemma_response(response: Dict[str, Any], context: str = "general") -> Dict[str, Any]:
     """Função principal para limpeza de respostas do Gemma 3n"""
     return TextProcessor.process_gemma_response(response, context)
+
+
+class StreamingTextCleaner:
+    """Versão incremental de ``TextProcessor.clean_response`` para respostas em stream
+
+    ``feed`` recebe os pedaços na ordem em que chegam e devolve o texto limpo
+    que já é definitivo; ``finish`` devolve o restante. A concatenação das
+    saídas é igual a ``clean_response`` aplicada ao texto completo.
+
+    Cada pedaço é processado uma vez, em duas etapas:
+
+    1. Entidades HTML, NFC e caracteres especiais são cortados antes do
+       último espaço ou quebra de linha: nenhuma entidade contém espaço e
+       um caractere ASCII não compõe com o anterior.
+    2. As regras de espaço, pontuação, listas e títulos são aplicadas até o
+       último ponto de corte seguro, o que vier por último entre:
+
+       - fim de frase: letra, pontuação final, espaço e um caractere que
+         não seja pontuação nem marcador de lista (o título para no
+         ``.!?``);
+       - fim de linha: antes da quebra de linha que segue uma letra, um
+         dígito ou uma letra com pontuação final, se a próxima linha não
+         começa com pontuação (os espaços antes dela seriam removidos,
+         juntando as linhas). A quebra fica com a linha seguinte, onde
+         casam as regras de início de linha (listas, numeração, título), e
+         o título não passa do fim da linha. Ficam de fora ``:`` (o título
+         consome os espaços seguintes), marcadores soltos e um número
+         seguido de ponto (a numeração também).
+
+       Nenhuma regra casa através desses pontos, então o que vem antes já
+       tem sua forma final.
+
+    A espera máxima é, portanto, uma frase ou uma linha: itens de lista
+    saem assim que a quebra de linha seguinte chega. O custo por pedaço é
+    proporcional ao tamanho do pedaço (mais o trecho final que ainda pode
+    formar um ponto de corte).
+    """
+
+    # O corte fica logo após a pontuação final ou antes da quebra de linha
+    _SAFE_CUT = re.compile(
+        r'[^\W\d_][.!?]+(?=\s+[^\s.!?,:;\-*•])'
+        r'|(?:[^\W_]|[^\W\d_][.!?]+)(?=\n\s*[^\s.!?,:;])'
+    )
+
+    def __init__(self):
+        self._raw: List[str] = []        # etapa 1: texto bruto sem corte seguro
+        self._pending: List[str] = []    # etapa 2: texto normalizado sem corte seguro
+        self._tail = ''                  # sufixo de _pending que pode iniciar um ponto de corte
+        self._received = False
+        self._started = False            # já emitiu texto não vazio (strip inicial feito)
+
+    def feed(self, chunk: str) -> str:
+        """Adicionar um pedaço da resposta; retorna o texto limpo já definitivo ('' se nenhum)"""
+        if not chunk:
+            return ""
+        self._received = True
+
+        cut = max(chunk.rfind(' '), chunk.rfind('\n'))
+        if cut < 0:
+            self._raw.append(chunk)
+            return ""
+        raw = ''.join(self._raw) + chunk[:cut]
+        self._raw = [chunk[cut:]]
+        if not raw:
+            return ""
+        return self._emit(self._split(TextProcessor._normalize_chars(raw)))
+
+    def finish(self) -> str:
+        """Texto limpo restante (inclui o strip final e a mensagem de resposta vazia)"""
+        raw = ''.join(self._raw)
+        pending = ''.join(self._pending) + (TextProcessor._normalize_chars(raw) if raw else '')
+        self._raw, self._pending, self._tail = [], [], ''
+
+        text = TextProcessor._apply_rules(pending).rstrip() if pending else ''
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return "Resposta vazia ou inválida." if self._received else ""
+            self._started = True
+        return text
+
+    def _split(self, text: str) -> str:
+        """Acumular texto normalizado; retorna o trecho até o último ponto de corte seguro"""
+        window = self._tail + text
+        end = None
+        for match in self._SAFE_CUT.finditer(window):
+            end = match.end()
+        if end is None:
+            self._pending.append(text)
+            self._tail = self._cut_prefix(window)
+            return ""
+
+        pending = ''.join(self._pending) + text
+        cut = len(pending) - len(window) + end
+        rest = pending[cut:]
+        self._pending = [rest]
+        self._tail = self._cut_prefix(rest)
+        return pending[:cut]
+
+    @staticmethod
+    def _cut_prefix(text: str) -> str:
+        """Menor sufixo de ``text`` do qual um ponto de corte ainda pode começar"""
+        i = len(text)
+        while i and text[i - 1].isspace():
+            i -= 1
+        while i and text[i - 1] in '.!?':
+            i -= 1
+        # A letra antes da pontuação (se houver)
+        return text[max(i - 1, 0):]
+
+    def _emit(self, segment: str) -> str:
+        if not segment:
+            return ""
+        text = TextProcessor._apply_rules(segment)
+        if not self._started:
+            # strip inicial de clean_response
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+        return text